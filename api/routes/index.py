@@ -126,9 +126,12 @@ async def get_index_stats():
         
         stats = index.get_index_stats()
         
+        from src.vector.model_registry import get_model_registry_stats
+        
         return {
             "success": True,
             "stats": stats,
+            "models": get_model_registry_stats(),
             "message": "인덱스 통계를 성공적으로 조회했습니다"
         }
         
@@ -7,13 +7,17 @@ import sys
 import time
 from pathlib import Path
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from typing import Dict, Any
 
 # 프로젝트 루트를 sys.path에 추가
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
-from api.schemas import SearchRequest, SearchResponse, SearchResult
+from api.schemas import (
+    SearchRequest, SearchResponse, SearchResult,
+    BatchSearchRequest, BatchSearchResponse, BatchSearchItem
+)
 from api.core.logging import get_logger, log_business_event
 from api.core.config import get_settings
 
@@ -21,6 +25,31 @@ router = APIRouter()
 logger = get_logger(__name__)
 settings = get_settings()
 
+# 배치 검색용 검색 서비스 (모델 로드 1회, 프로세스 내 재사용)
+_batch_search_service = None
+
+
+def get_batch_search_service():
+    """배치 검색 서비스 조회 (지연 생성, 단일 검색과 같은 인덱스 디렉터리 / 임베딩·리랭킹 모델 설정)"""
+    global _batch_search_service
+    if _batch_search_service is None:
+        from src.search.search_service import SearchService
+        from src.vector.embedder import EmbeddingService
+        from src.vector.reranker import CrossEncoderReranker
+        _batch_search_service = SearchService(
+            index_directory=settings.chroma_dir,
+            embedding_service=EmbeddingService(
+                model_name=settings.embed_model,
+                device=settings.embed_device
+            ),
+            reranker=CrossEncoderReranker(
+                model_name=settings.rerank_model
+            ),
+            top_k_first=settings.topk_first,
+            top_k_final=settings.topk_final
+        )
+    return _batch_search_service
+
 
 @router.post("/search", response_model=SearchResponse)
 async def search_documents(request: SearchRequest):
@@ -132,6 +161,83 @@ async def search_documents(request: SearchRequest):
         )
 
 
+@router.post("/search/batch", response_model=BatchSearchResponse)
+async def search_documents_batch(request: BatchSearchRequest):
+    """다중 쿼리 검색 (쿼리 인코딩/스코어링/리랭킹 각 1회 배치)"""
+    start_time = time.time()
+    
+    try:
+        logger.info(f"배치 검색 시작: {len(request.queries)}개 쿼리")
+        
+        # 모델 로드 / 인코딩 / 검색은 스레드 풀에서 실행 (이벤트 루프 블로킹 방지)
+        search_service = await run_in_threadpool(get_batch_search_service)
+        results_list = await run_in_threadpool(
+            search_service.search_many,
+            queries=request.queries,
+            top_k=request.top_k,
+            law_topic=request.law_topic,
+            use_rerank=request.with_rerank
+        )
+        
+        # 검색 결과 변환
+        items = []
+        for query, results in zip(request.queries, results_list):
+            search_results = [
+                SearchResult(
+                    text=result["text"],
+                    score=result.get("final_score", 0.0),
+                    metadata=result["metadata"],
+                    source_url=result["metadata"].get("source_url"),
+                    published_at=result["metadata"].get("published_at")
+                )
+                for result in results
+            ]
+            items.append(BatchSearchItem(
+                query=query,
+                results=search_results,
+                total_results=len(search_results)
+            ))
+        
+        # 실행 시간 계산
+        duration_ms = int((time.time() - start_time) * 1000)
+        
+        # 비즈니스 이벤트 로깅
+        log_business_event(
+            "batch_search_completed",
+            queries_count=len(request.queries),
+            results_count=sum(item.total_results for item in items),
+            with_rerank=request.with_rerank,
+            law_topic=request.law_topic,
+            duration_ms=duration_ms
+        )
+        
+        logger.info(f"배치 검색 완료: {len(items)}개 쿼리")
+        
+        return BatchSearchResponse(
+            success=True,
+            results=items,
+            total_queries=len(items),
+            with_rerank=request.with_rerank,
+            duration_ms=duration_ms
+        )
+        
+    except Exception as e:
+        duration_ms = int((time.time() - start_time) * 1000)
+        logger.error(f"배치 검색 실패: {e}", exc_info=True)
+        
+        log_business_event(
+            "batch_search_failed",
+            queries_count=len(request.queries),
+            error=str(e),
+            duration_ms=duration_ms
+        )
+        
+        raise HTTPException(
+            status_code=500,
+            detail=f"배치 검색 중 오류가 발생했습니다: {str(e)}"
+        )
+
+
 @router.get("/search/suggestions")
 async def get_search_suggestions(q: str = ""):
     """검색 제안 조회"""
@@ -103,6 +103,37 @@ class SearchResponse(BaseModel):
     suggestions: Optional[List[str]] = Field(None, description="검색 제안")
 
 
+class BatchSearchRequest(BaseModel):
+    """다중 쿼리 검색 요청 스키마"""
+    queries: List[str] = Field(..., description="검색 쿼리 목록", min_items=1, max_items=500)
+    top_k: Optional[int] = Field(6, description="쿼리별 반환할 결과 수", ge=1, le=20)
+    with_rerank: Optional[bool] = Field(True, description="리랭킹 사용 여부")
+    law_topic: Optional[str] = Field("채권추심", description="법률 주제 필터")
+    
+    @validator('queries')
+    def validate_queries(cls, v):
+        queries = [q.strip() for q in v]
+        if any(not q or len(q) > 500 for q in queries):
+            raise ValueError('queries의 각 항목은 1~500자여야 합니다')
+        return queries
+
+
+class BatchSearchItem(BaseModel):
+    """쿼리별 검색 결과 스키마"""
+    query: str = Field(..., description="검색 쿼리")
+    results: List[SearchResult] = Field(..., description="검색 결과")
+    total_results: int = Field(..., description="전체 결과 수")
+
+
+class BatchSearchResponse(BaseModel):
+    """다중 쿼리 검색 응답 스키마"""
+    success: bool = Field(..., description="성공 여부")
+    results: List[BatchSearchItem] = Field(..., description="쿼리별 검색 결과")
+    total_queries: int = Field(..., description="쿼리 수")
+    with_rerank: bool = Field(..., description="리랭킹 사용 여부")
+    duration_ms: int = Field(..., description="실행 시간 (밀리초)")
+
+
 class GenerateRequest(BaseModel):
     """생성 요청 스키마"""
     query: str = Field(..., description="생성 쿼리", min_length=1, max_length=500)
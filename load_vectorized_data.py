@@ -8,7 +8,7 @@ import numpy as np
 import os
 import glob
 from typing import List, Dict, Any
-from simple_vector_store import get_store, upsert_docs
+from simple_vector_store import get_store, upsert_embedded
 
 def load_vectorized_data():
     """벡터화된 데이터를 로드하여 벡터 스토어에 저장"""
@@ -71,8 +71,9 @@ def load_vectorized_data():
     # 벡터 스토어에 저장
     print("💾 벡터 스토어에 저장 중...")
     
+    # 스냅샷 저장 + 코퍼스 BM25 동기화 포함
+    upsert_embedded(all_ids, all_documents, all_embeddings, all_metadatas)
     store = get_store()
-    store.upsert(all_ids, all_documents, all_embeddings, all_metadatas)
     
     print("🎉 벡터화된 데이터 로딩 완료!")
     
@@ -4,6 +4,7 @@
 모니터링 및 성능 측정 스크립트
 """
 import os
+import sys
 import json
 import numpy as np
 import time
@@ -15,6 +16,12 @@ import torch
 from collections import defaultdict, deque
 import statistics
 
+# 프로젝트 루트를 Python 경로에 추가
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.vector.search_engine import VectorSearchEngine
+
 # ===== 환경 가드 설정 =====
 os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
 os.environ.setdefault("OMP_NUM_THREADS", "1")
@@ -74,16 +81,13 @@ class PerformanceMonitor:
             }
         }
 
-def cosine_similarity(a, b):
-    """코사인 유사도 계산"""
-    return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
-
 class QualityEvaluator:
     """검색 품질 평가 클래스"""
     
     def __init__(self, embeddings, metadata):
         self.embeddings = embeddings
         self.metadata = metadata
+        self.engine = VectorSearchEngine(embeddings)
         self.model = None
         
     def load_model(self):
@@ -92,26 +96,20 @@ class QualityEvaluator:
         self.model = SentenceTransformer("intfloat/multilingual-e5-base", device=device)
         self.model.max_seq_length = 512
     
-    def evaluate_recall_at_k(self, queries: List[str], k: int = 10) -> Dict[str, float]:
-        """Recall@k 평가"""
+    def search_batch(self, queries: List[str], k: int) -> List[List[tuple]]:
+        """쿼리 일괄 인코딩 + 배치 검색"""
         if not self.model:
             self.load_model()
         
+        prefixed_queries = [f"query: {query}" for query in queries]
+        query_embeddings = self.model.encode(prefixed_queries, normalize_embeddings=True)
+        return self.engine.search_many(query_embeddings, top_k=k)
+    
+    def evaluate_recall_at_k(self, queries: List[str], k: int = 10) -> Dict[str, float]:
+        """Recall@k 평가"""
         recalls = []
         
-        for query in queries:
-            # 쿼리 임베딩 생성
-            prefixed_query = f"query: {query}"
-            query_embedding = self.model.encode([prefixed_query], normalize_embeddings=True)[0]
-            
-            # 검색 실행
-            similarities = []
-            for i, embedding in enumerate(self.embeddings):
-                sim = cosine_similarity(query_embedding, embedding)
-                similarities.append((sim, i))
-            
-            similarities.sort(reverse=True)
-            
+        for query, similarities in zip(queries, self.search_batch(queries, k)):
             # 상위 k개 결과의 카테고리 분석
             top_k_categories = []
             for sim, idx in similarities[:k]:
@@ -140,24 +138,9 @@ class QualityEvaluator:
     
     def evaluate_ndcg_at_k(self, queries: List[str], k: int = 10) -> Dict[str, float]:
         """nDCG@k 평가"""
-        if not self.model:
-            self.load_model()
-        
         ndcgs = []
         
-        for query in queries:
-            # 쿼리 임베딩 생성
-            prefixed_query = f"query: {query}"
-            query_embedding = self.model.encode([prefixed_query], normalize_embeddings=True)[0]
-            
-            # 검색 실행
-            similarities = []
-            for i, embedding in enumerate(self.embeddings):
-                sim = cosine_similarity(query_embedding, embedding)
-                similarities.append((sim, i))
-            
-            similarities.sort(reverse=True)
-            
+        for similarities in self.search_batch(queries, k):
             # DCG 계산
             dcg = 0
             for i, (sim, idx) in enumerate(similarities[:k]):
@@ -220,8 +203,9 @@ def run_performance_test():
     # 아티팩트 로드
     embeddings, metadata = load_artifacts()
     
-    # 모니터 초기화
+    # 모니터 및 검색 엔진 초기화
     monitor = PerformanceMonitor()
+    engine = VectorSearchEngine(embeddings)
     
     # 테스트 쿼리들
     test_queries = [
@@ -253,16 +237,8 @@ def run_performance_test():
             prefixed_query = f"query: {query}"
             query_embedding = model.encode([prefixed_query], normalize_embeddings=True)[0]
             
-            # 검색 실행
-            similarities = []
-            for j, embedding in enumerate(embeddings):
-                sim = cosine_similarity(query_embedding, embedding)
-                similarities.append((sim, j))
-            
-            similarities.sort(reverse=True)
-            
-            # 상위 20개 결과
-            top_results = similarities[:20]
+            # 검색 실행 (상위 20개 결과)
+            top_results = engine.search(query_embedding, top_k=20)
             
             latency_ms = (time.time() - start_time) * 1000
             
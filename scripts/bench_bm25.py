@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+BM25 top-k 벤치마크 CLI 도구
+전수 스코어링과 MaxScore 조기 종료 검색의 지연 / 스코어링한 postings 비율 / 결과 일치를 비교합니다.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# 프로젝트 루트를 Python 경로에 추가
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+try:
+    from src.search.bm25 import InvertedBM25Index, tokenize
+except ImportError as e:
+    print(f"❌ 모듈 import 실패: {e}")
+    print("프로젝트 루트에서 실행해주세요.")
+    sys.exit(1)
+
+def build_synthetic_index(num_docs: int, vocab_size: int, seed: int) -> InvertedBM25Index:
+    """Zipf 분포 합성 코퍼스 인덱스"""
+    rng = np.random.default_rng(seed)
+    vocab = np.array([f"용어{i}" for i in range(vocab_size)])
+    probs = 1.0 / np.arange(1, vocab_size + 1)
+    probs /= probs.sum()
+    lengths = rng.integers(50, 400, size=num_docs)
+    words = vocab[rng.choice(vocab_size, size=int(lengths.sum()), p=probs)]
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    texts = [" ".join(words[offsets[i]:offsets[i + 1]]) for i in range(num_docs)]
+
+    index = InvertedBM25Index()
+    index.add_documents([f"doc-{i}" for i in range(num_docs)], texts)
+    index.compact()
+    return index
+
+def sample_queries(index: InvertedBM25Index, count: int, length: int, seed: int):
+    """인덱스 어휘에서 문서 빈도 비례로 용어를 뽑아 쿼리 생성 (긴 자연어 쿼리 모사)"""
+    rng = np.random.default_rng(seed)
+    terms = sorted(index.vocab, key=index.vocab.get)
+    doc_freqs = np.array([index._postings(term_id)[0].size for term_id in range(len(terms))], dtype=np.float64)
+    probs = doc_freqs / doc_freqs.sum()
+    return [" ".join(terms[t] for t in rng.choice(len(terms), size=length, p=probs)) for _ in range(count)]
+
+def main():
+    ap = argparse.ArgumentParser(description="BM25 MaxScore 벤치마크 도구")
+    ap.add_argument("--dir", default=None, help="저장된 BM25 인덱스 디렉터리 (없으면 합성 코퍼스 사용)")
+    ap.add_argument("--docs", type=int, default=50000, help="합성 코퍼스 문서 수")
+    ap.add_argument("--vocab", type=int, default=50000, help="합성 코퍼스 어휘 수")
+    ap.add_argument("--queries", type=int, default=200, help="쿼리 수")
+    ap.add_argument("--query-length", type=int, default=12, help="쿼리당 용어 수")
+    ap.add_argument("--top-k", type=int, default=10, help="top-k (기본: 10)")
+    ap.add_argument("--seed", type=int, default=0, help="난수 시드")
+    args = ap.parse_args()
+
+    if args.dir:
+        print(f"🗄️ 인덱스 로드 중: {args.dir}")
+        index = InvertedBM25Index.load(args.dir)
+        if index is None or len(index) == 0:
+            print("❌ 인덱스가 비어있습니다.")
+            sys.exit(1)
+    else:
+        print(f"🔧 합성 코퍼스 생성 중... ({args.docs}개 문서, 어휘 {args.vocab}개)")
+        index = build_synthetic_index(args.docs, args.vocab, args.seed)
+
+    queries = sample_queries(index, args.queries, args.query_length, args.seed)
+    print(f"📊 평가 중: 문서 {len(index)}개, 쿼리 {len(queries)}개 × {args.query_length}용어, top-{args.top_k}")
+
+    exact_ms, pruned_ms, scored, total, mismatches = 0.0, 0.0, 0, 0, 0
+    for query in queries:
+        start = time.perf_counter()
+        expected = index.search(query, args.top_k, prune=False)
+        exact_ms += (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        rows, scores, scored_postings = index.search_rows(query, args.top_k)
+        pruned_ms += (time.perf_counter() - start) * 1000
+
+        scored += scored_postings
+        total += sum(index._postings(index.vocab[term])[0].size
+                     for term in set(tokenize(query)) if term in index.vocab)
+        found = scores[scores > 0]
+        # 누적 순서 차이로 인한 float32 오차는 허용
+        mismatches += not (found.shape[0] == len(expected) and
+                           np.allclose(found, [hit["bm25"] for hit in expected], rtol=1e-5))
+
+    print(f"{'mode':>10} {'avg_ms':>9} {'postings':>9}")
+    print(f"{'exhaustive':>10} {exact_ms / len(queries):>9.3f} {1.0:>9.1%}")
+    print(f"{'maxscore':>10} {pruned_ms / len(queries):>9.3f} {scored / max(1, total):>9.1%}")
+    print(f"✅ 속도 향상: {exact_ms / max(pruned_ms, 1e-9):.2f}배, 점수 불일치 쿼리: {mismatches}개")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+SimpleVectorIndex용 IVF-Flat ANN 인덱스 구축 CLI 도구
+저장된 벡터로 인덱스를 학습하고, nprobe별 recall@k / 지연을 전수 검색과 비교합니다.
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# 프로젝트 루트를 Python 경로에 추가
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+try:
+    from src.vector.embedder import EmbeddingService
+    from src.vector.simple_index import SimpleVectorIndex
+    from src.vector.ann_index import evaluate_recall
+except ImportError as e:
+    print(f"❌ 모듈 import 실패: {e}")
+    print("프로젝트 루트에서 실행해주세요.")
+    sys.exit(1)
+
+def main():
+    ap = argparse.ArgumentParser(description="IVF-Flat ANN 인덱스 구축 도구")
+    ap.add_argument("--index-name", default="naver_blog_debt_collection", help="인덱스 이름")
+    ap.add_argument("--dir", default="./src/data/indexes/default/simple", help="인덱스 저장 디렉터리")
+    ap.add_argument("--device", default="cpu", help="임베딩 모델 디바이스 (기본: cpu)")
+    ap.add_argument("--nlist", type=int, default=None, help="리스트 수 (기본: 4·√N)")
+    ap.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32], help="평가할 nprobe 값들")
+    ap.add_argument("--top-k", type=int, default=10, help="recall@k의 k (기본: 10)")
+    ap.add_argument("--queries", type=int, default=200, help="평가용 샘플 쿼리 수 (저장된 벡터에서 추출)")
+    ap.add_argument("--seed", type=int, default=0, help="난수 시드")
+    args = ap.parse_args()
+
+    print(f"🗄️ 인덱스 로드 중: {args.dir}/{args.index_name}")
+    index = SimpleVectorIndex(
+        index_name=args.index_name,
+        persist_directory=args.dir,
+        embedding_service=EmbeddingService(device=args.device)
+    )
+    if not index.documents:
+        print("❌ 인덱스가 비어있습니다.")
+        sys.exit(1)
+
+    print(f"🔧 IVF 인덱스 학습 중... ({len(index.documents)}개 문서)")
+    build_info = index.build_ann_index(nlist=args.nlist, seed=args.seed)
+    print(f"✅ 구축 완료: nlist={build_info['nlist']}, {build_info['build_seconds']}초 → {build_info['ann_file']}")
+
+    # 저장된 벡터 일부를 쿼리로 사용해 recall / 지연 측정
+    matrix = np.asarray(index.embeddings_matrix)
+    rng = np.random.default_rng(args.seed)
+    sample = rng.choice(matrix.shape[0], size=min(args.queries, matrix.shape[0]), replace=False)
+    queries = matrix[np.sort(sample)]
+
+    print(f"📊 평가 중: 쿼리 {len(queries)}개, top-{args.top_k}")
+    report = evaluate_recall(index.ann_index, matrix, queries, top_k=args.top_k, nprobe_values=args.nprobe)
+
+    print(f"{'nprobe':>8} {'recall@' + str(args.top_k):>10} {'avg_ms':>9} {'exact_ms':>9} {'scanned':>8}")
+    for row in report:
+        print(f"{row['nprobe']:>8} {row[f'recall@{args.top_k}']:>10.3f} {row['avg_ms']:>9.3f} "
+              f"{row['exact_avg_ms']:>9.3f} {row['scanned_ratio']:>8.1%}")
+
+    print(f"💡 검색 시 SimpleVectorIndex(nprobe=...)로 recall/지연을 조절하세요 (현재 기본값: {index.nprobe})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+하이브리드 점수 융합 전략 비교 CLI 도구
+골드 쿼리셋으로 rrf / zscore / minmax 전략의 품질(recall@k, MRR, nDCG@k)과 융합 지연을 비교합니다.
+후보 생성(쿼리 인코딩 + 벡터/BM25)은 쿼리당 1회만 수행하고 모든 전략이 같은 후보를 사용합니다.
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# 프로젝트 루트를 Python 경로에 추가
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+try:
+    from src.config.settings import settings
+    from src.search.fusion import FUSION_STRATEGIES
+    from src.search.hybrid_retriever import HybridSearchPipeline, fuse_hits
+    from src.ingest.embed_to_chroma_deploy import load_gold_queries, calculate_ndcg
+except ImportError as e:
+    print(f"❌ 모듈 import 실패: {e}")
+    print("프로젝트 루트에서 실행해주세요.")
+    sys.exit(1)
+
+def evaluate(gold_queries, k: int, num_candidates: int, alpha: float):
+    """전략별 평균 지표 / 지연"""
+    pipeline = HybridSearchPipeline()
+    metrics = {strategy: {"recall": [], "mrr": [], "ndcg": [], "fusion_ms": []} for strategy in FUSION_STRATEGIES}
+    candidate_ms = []
+
+    for item in gold_queries:
+        relevant = set(item.get("relevant_docs", []))
+        _, vector_hits, bm25_hits, timings = pipeline.candidates(item["query"], item.get("where"), num_candidates)
+        candidate_ms.append(timings["encode"] + timings["candidates"])
+
+        for strategy in FUSION_STRATEGIES:
+            start = time.perf_counter()
+            fused = fuse_hits([dict(hit) for hit in vector_hits], [dict(hit) for hit in bm25_hits], alpha, strategy)
+            metrics[strategy]["fusion_ms"].append((time.perf_counter() - start) * 1000)
+
+            retrieved = [hit["id"] for hit in fused[:k]]
+            metrics[strategy]["recall"].append(len(relevant & set(retrieved)) / len(relevant) if relevant else 0.0)
+            metrics[strategy]["mrr"].append(next((1.0 / (i + 1) for i, doc_id in enumerate(retrieved)
+                                                  if doc_id in relevant), 0.0))
+            metrics[strategy]["ndcg"].append(calculate_ndcg(relevant, retrieved, k))
+
+    summary = {strategy: {name: float(np.mean(values)) if values else 0.0 for name, values in result.items()}
+               for strategy, result in metrics.items()}
+    return summary, float(np.mean(candidate_ms)) if candidate_ms else 0.0
+
+def main():
+    ap = argparse.ArgumentParser(description="하이브리드 점수 융합 전략 비교 도구")
+    ap.add_argument("--gold", default=None, help="골드 쿼리 JSON 파일 ([{query, relevant_docs}], 없으면 load_gold_queries())")
+    ap.add_argument("--k", type=int, default=10, help="평가 컷오프 k (기본: 10)")
+    ap.add_argument("--candidates", type=int, default=50, help="검색기별 후보 수 (기본: 50)")
+    ap.add_argument("--alpha", type=float, default=settings.RETRIEVAL_ALPHA, help="BM25 가중치")
+    ap.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    args = ap.parse_args()
+
+    if args.gold:
+        with open(args.gold, "r", encoding="utf-8") as f:
+            gold_queries = json.load(f)
+    else:
+        gold_queries = load_gold_queries()
+    labeled = sum(1 for item in gold_queries if item.get("relevant_docs"))
+    print(f"📊 평가 중: 골드 쿼리 {len(gold_queries)}개 (라벨 {labeled}개), 후보 {args.candidates}개, k={args.k}")
+
+    summary, candidate_ms = evaluate(gold_queries, args.k, args.candidates, args.alpha)
+
+    print(f"⏱️ 후보 생성 평균: {candidate_ms:.2f}ms (인코딩 + 벡터/BM25)")
+    print(f"{'strategy':>9} {'recall@' + str(args.k):>10} {'mrr':>7} {'ndcg@' + str(args.k):>8} {'fusion_ms':>10}")
+    for strategy, result in summary.items():
+        print(f"{strategy:>9} {result['recall']:>10.3f} {result['mrr']:>7.3f} {result['ndcg']:>8.3f} "
+              f"{result['fusion_ms']:>10.3f}")
+
+    best = max(summary, key=lambda strategy: (summary[strategy]["ndcg"], summary[strategy]["mrr"]))
+    print(f"💡 nDCG 기준 최적 전략: {best} (FUSION_STRATEGY 환경변수 또는 요청의 fusion 필드로 선택)")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"k": args.k, "candidate_ms": candidate_ms, "strategies": summary}, f, ensure_ascii=False, indent=2)
+        print(f"💾 결과 저장: {args.output}")
+
+if __name__ == "__main__":
+    main()
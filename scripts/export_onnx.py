@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+ONNX 내보내기 + 일치도 검증 + 지연 벤치마크 CLI 도구
+e5 임베더 / Cross-Encoder를 ONNX(fp32 + 동적 int8)로 내보내고 PyTorch 경로와 결과·지연을 비교합니다.
+서빙: INFERENCE_BACKEND=onnx (ONNX_MODEL_DIR에 내보낸 모델 사용)
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# 프로젝트 루트를 Python 경로에 추가
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+try:
+    from src.vector.model_registry import SENTENCE_TRANSFORMER, CROSS_ENCODER
+    from src.vector.onnx_backend import (
+        ONNX_MODEL_DIR, OnnxSentenceEncoder, OnnxCrossEncoder, export_onnx, onnx_model_dir,
+        cosine_agreement, score_agreement, benchmark
+    )
+except ImportError as e:
+    print(f"❌ 모듈 import 실패: {e}")
+    print("프로젝트 루트에서 실행해주세요.")
+    sys.exit(1)
+
+DEFAULT_MODELS = ["intfloat/multilingual-e5-base", "cross-encoder/ms-marco-MiniLM-L-6-v2"]
+
+
+def model_kind(model_name: str) -> str:
+    return CROSS_ENCODER if model_name.startswith("cross-encoder/") else SENTENCE_TRANSFORMER
+
+
+def load_corpus(path: str, limit: int):
+    docs = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                docs.append(json.loads(line))
+    return docs[:limit]
+
+
+def check_embedder(model_name: str, model_dir: str, docs, args) -> bool:
+    from sentence_transformers import SentenceTransformer
+
+    texts = [f"passage: {d['text']}" for d in docs] + [f"query: {d.get('title', d['text'][:50])}" for d in docs]
+    torch_model = SentenceTransformer(model_name, device="cpu")
+    backends = {"torch": torch_model.encode}
+    for label, quantized in (("onnx-fp32", False), ("onnx-int8", True)):
+        backends[label] = OnnxSentenceEncoder(model_dir, quantized=quantized).encode
+
+    reference = torch_model.encode(texts, normalize_embeddings=True)
+    ok = True
+    for label in ("onnx-fp32", "onnx-int8"):
+        agreement = cosine_agreement(reference, backends[label](texts, normalize_embeddings=True))
+        passed = agreement["mean_cosine"] >= args.min_cosine
+        ok &= passed
+        print(f"   {label}: 평균 코사인 {agreement['mean_cosine']:.5f}, 최소 {agreement['min_cosine']:.5f} "
+              f"{'✅' if passed else '❌'}")
+
+    if args.benchmark:
+        print_benchmark(backends, texts, args)
+    return ok
+
+
+def check_reranker(model_name: str, model_dir: str, docs, args) -> bool:
+    from sentence_transformers import CrossEncoder
+
+    pairs = [(q.get("title", q["text"][:50]), d["text"]) for q in docs for d in docs]
+    torch_model = CrossEncoder(model_name, device="cpu")
+    backends = {"torch": torch_model.predict}
+    for label, quantized in (("onnx-fp32", False), ("onnx-int8", True)):
+        backends[label] = OnnxCrossEncoder(model_dir, quantized=quantized).predict
+
+    reference = torch_model.predict(pairs)
+    ok = True
+    for label in ("onnx-fp32", "onnx-int8"):
+        agreement = score_agreement(reference, backends[label](pairs))
+        passed = agreement["pearson"] >= args.min_pearson
+        ok &= passed
+        print(f"   {label}: 피어슨 {agreement['pearson']:.5f}, 최대 오차 {agreement['max_abs_diff']:.5f}, "
+              f"1위 일치 {agreement['top1_match']} {'✅' if passed else '❌'}")
+
+    if args.benchmark:
+        print_benchmark(backends, pairs, args)
+    return ok
+
+
+def print_benchmark(backends, inputs, args):
+    print(f"   ⏱️ 벤치마크 ({len(inputs)}개 x {args.runs}회)")
+    for batch_size in (1, args.batch_size):
+        for label, fn in backends.items():
+            result = benchmark(lambda batch: fn(batch, batch_size=batch_size), inputs,
+                               batch_size=batch_size, runs=args.runs)
+            print(f"   {label:10s} batch={batch_size:<3d} p50 {result['p50_ms']:8.2f}ms  "
+                  f"p95 {result['p95_ms']:8.2f}ms  {result['items_per_sec']:8.1f}개/초")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="ONNX 내보내기(int8 양자화) + PyTorch 대비 일치도/지연 비교 도구")
+    ap.add_argument("models", nargs="*", default=DEFAULT_MODELS,
+                    help="모델 이름들 (cross-encoder/로 시작하면 리랭커로 처리)")
+    ap.add_argument("--output-dir", default=ONNX_MODEL_DIR, help="내보내기 루트 디렉터리")
+    ap.add_argument("--no-quantize", action="store_true", help="int8 양자화 생략 (fp32만)")
+    ap.add_argument("--skip-export", action="store_true", help="내보내기 생략 (기존 모델로 검증만)")
+    ap.add_argument("--corpus", default=str(project_root / "sample_corpus.jsonl"), help="검증용 코퍼스 (JSONL)")
+    ap.add_argument("--limit", type=int, default=20, help="검증 문서 수")
+    ap.add_argument("--min-cosine", type=float, default=0.98, help="임베딩 평균 코사인 최소값")
+    ap.add_argument("--min-pearson", type=float, default=0.95, help="리랭커 점수 피어슨 상관 최소값")
+    ap.add_argument("--benchmark", action="store_true", help="지연 벤치마크 실행")
+    ap.add_argument("--batch-size", type=int, default=32, help="벤치마크 배치 크기")
+    ap.add_argument("--runs", type=int, default=3, help="벤치마크 반복 횟수")
+    args = ap.parse_args()
+
+    docs = load_corpus(args.corpus, args.limit)
+    failed = False
+    for model_name in args.models:
+        kind = model_kind(model_name)
+        model_dir = onnx_model_dir(model_name, args.output_dir)
+        print(f"📦 {model_name} ({kind}) -> {model_dir}")
+        try:
+            if not args.skip_export:
+                result = export_onnx(model_name, kind, model_dir, quantize=not args.no_quantize)
+                print(f"✅ 내보내기 {result['seconds']}초: fp32 {result['fp32_bytes'] / 1024 / 1024:.1f}MB, "
+                      f"int8 {result['int8_bytes'] / 1024 / 1024:.1f}MB")
+            check = check_reranker if kind == CROSS_ENCODER else check_embedder
+            if not check(model_name, model_dir, docs, args):
+                failed = True
+        except Exception as e:
+            print(f"❌ 실패: {e}")
+            failed = True
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
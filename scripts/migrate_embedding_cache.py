@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+임베딩 캐시 v1 -> v2 마이그레이션 CLI 도구
+pickle로 저장된 embeddings.sqlite 항목을 원시 float32/float16 바이트로 변환하고 v1 테이블을 삭제합니다.
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# 프로젝트 루트를 Python 경로에 추가
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+try:
+    from src.vector.embedding_cache import migrate_embedding_cache, CACHE_DTYPES
+except ImportError as e:
+    print(f"❌ 모듈 import 실패: {e}")
+    print("프로젝트 루트에서 실행해주세요.")
+    sys.exit(1)
+
+def main():
+    ap = argparse.ArgumentParser(description="임베딩 캐시 v1(pickle) -> v2(원시 바이트) 마이그레이션 도구")
+    ap.add_argument("paths", nargs="*", default=["./src/data/cache/embeddings.sqlite"], help="캐시 파일 경로들")
+    ap.add_argument("--dtype", choices=list(CACHE_DTYPES), default="float32", help="저장 dtype (기본: float32)")
+    ap.add_argument("--keep-text", action="store_true", help="text_content 열 유지 (기본: 삭제)")
+    ap.add_argument("--batch-size", type=int, default=1000, help="변환 배치 크기")
+    ap.add_argument("--no-vacuum", action="store_true", help="변환 후 VACUUM 생략")
+    args = ap.parse_args()
+
+    failed = False
+    for path in args.paths:
+        print(f"🗄️ 마이그레이션: {path}")
+        try:
+            result = migrate_embedding_cache(path, dtype=args.dtype, keep_text=args.keep_text,
+                                             batch_size=args.batch_size, vacuum=not args.no_vacuum)
+        except Exception as e:
+            print(f"❌ 실패: {e}")
+            failed = True
+            continue
+
+        if result["already_v2"]:
+            print("✅ 이미 v2 스키마입니다.")
+            continue
+        print(f"✅ 변환 {result['migrated']}개, 건너뜀 {result['skipped']}개, {result['seconds']}초")
+        print(f"   크기: {result['size_before'] / 1024 / 1024:.1f}MB → {result['size_after'] / 1024 / 1024:.1f}MB")
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
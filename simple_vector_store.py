@@ -2,60 +2,256 @@
 # -*- coding: utf-8 -*-
 """
 간단한 메모리 기반 벡터 스토어 (ChromaDB 대체)
+
+    - id -> 행 번호 dict (업서트 O(1))
+    - 사전 할당 float32 행렬 (용량 부족 시 2배 증설, 행 단위 L2 정규화)
+    - where 필터는 메타데이터 비트맵으로 랭킹 전에 적용
+    - 스냅샷({VECTOR_STORE_DIR}/manifest.json + vectors/docs 파일)으로 재시작 시 재임베딩/재해싱 생략
+    - 외부 쓰기는 upsert_docs() / upsert_embedded()로만 (스냅샷 저장 + 코퍼스 BM25 동기화)
+    - 업서트로 문서가 실제로 바뀌었을 때만 인덱스 세대 증가 (검색 결과 캐시 키 무효화)
 """
 import json
+import hashlib
+import threading
+import uuid
 import numpy as np
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from src.search.embedding import E5Embedder
 from src.config.settings import settings
+from src.vector.search_engine import normalize_rows, top_k_indices
+from src.vector.filter_index import BitmapFilterIndex
+from src.search.bm25 import get_corpus_bm25_index
+from src.search.result_cache import bump_index_generation
+
+INITIAL_CAPACITY = 1024
+SNAPSHOT_FORMAT_VERSION = 1
 
 class SimpleVectorStore:
-    def __init__(self):
+    def __init__(self, embedder: Optional[E5Embedder] = None, model_name: str = settings.EMBED_MODEL):
+        self.ids = []  # 행 번호 -> 문서 ID
         self.documents = []
-        self.embeddings = []
         self.metadatas = []
-        self.ids = []
-        self.embedder = E5Embedder(settings.EMBED_MODEL)
+        self.id_to_row = {}  # 문서 ID -> 행 번호
+        self.content_hashes = {}  # 문서 ID -> 텍스트 해시 (스냅샷 재사용 판단)
+        self.model_name = model_name
+        self._matrix = None  # 사전 할당 float32 행렬 (정규화됨)
+        self._size = 0
+        self.filter_index = BitmapFilterIndex()
+        self._filter_dirty = False  # 기존 행 메타데이터 변경 시 비트맵 재구축 필요
+        self._filter_lock = threading.Lock()  # 비트맵 갱신/재구축 직렬화 (벡터/BM25 단계가 동시에 조회)
+        self.bm25_rows = np.zeros(0, dtype=np.int32)  # 행 번호 -> 코퍼스 BM25 행 번호 (없으면 -1)
+        self.bm25_epoch = None  # bm25_rows를 만든 BM25 인덱스 epoch
+        self.embedder = embedder or E5Embedder(model_name)
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self.id_to_row
+    
+    @property
+    def embeddings(self) -> np.ndarray:
+        """저장된 임베딩 행렬 (복사 없음)"""
+        if self._matrix is None:
+            return np.empty((0, 0), dtype=np.float32)
+        return self._matrix[:self._size]
+    
+    def get_embedding(self, doc_id: str) -> np.ndarray:
+        """문서 임베딩 조회"""
+        return self._matrix[self.id_to_row[doc_id]].copy()
+    
+    @staticmethod
+    def content_hash(text: str) -> str:
+        """콘텐츠 해시 생성"""
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+    
+    def stale_rows(self, ids: List[str], documents: List[str]) -> List[int]:
+        """임베딩이 없거나 텍스트가 바뀐 문서의 배치 내 위치"""
+        return [i for i, (doc_id, text) in enumerate(zip(ids, documents))
+                if self.content_hashes.get(doc_id) != self.content_hash(text)]
+    
+    def _ensure_capacity(self, extra_rows: int, dim: int):
+        """용량 부족 시 2배씩 증설 (기존 행만 1회 복사)"""
+        required = self._size + extra_rows
+        if self._matrix is not None and self._matrix.shape[1] != dim:
+            raise ValueError(f"임베딩 차원 불일치: {dim} != {self._matrix.shape[1]}")
+        if self._matrix is None or required > self._matrix.shape[0]:
+            capacity = max(INITIAL_CAPACITY, self._matrix.shape[0] if self._matrix is not None else 0)
+            while capacity < required:
+                capacity *= 2
+            matrix = np.zeros((capacity, dim), dtype=np.float32)
+            if self._matrix is not None:
+                matrix[:self._size] = self._matrix[:self._size]
+            self._matrix = matrix
+    
+    def upsert(self, ids: List[str], documents: List[str], embeddings: List[List[float]], metadatas: List[Dict],
+               content_hashes: Optional[List[Optional[str]]] = None):
+        """문서 업서트 (content_hashes: 이미 아는 텍스트 해시, 스냅샷 로드 시 재해싱 생략)
+        
+        새 문서이거나 텍스트/메타데이터/벡터가 바뀐 문서가 있을 때만 인덱스 세대를 올린다.
+        """
+        if self._upsert_rows(ids, documents, embeddings, metadatas, content_hashes):
+            # 검색 결과 캐시 무효화 (세대 키 변경)
+            bump_index_generation()
+    
+    def _upsert_rows(self, ids: List[str], documents: List[str], embeddings, metadatas: List[Dict],
+                     content_hashes: Optional[List[Optional[str]]] = None) -> bool:
+        """행 기록 -> 바뀐 문서가 있었는지 여부 (세대 증가 없음)"""
+        if not ids:
+            return False
+        vectors = normalize_rows(np.atleast_2d(np.asarray(embeddings, dtype=np.float32)))
+        
+        # 신규 ID만 모아서 한 번에 용량 확보 (배치 내 중복 ID는 마지막 값 기준)
+        new_ids = {doc_id for doc_id in ids if doc_id not in self.id_to_row}
+        self._ensure_capacity(len(new_ids), vectors.shape[1])
+        
+        changed = False
+        with self._filter_lock:
+            for i, doc_id in enumerate(ids):
+                row = self.id_to_row.get(doc_id)
+                if row is not None:
+                    # 기존 문서 업데이트 (바뀐 항목만 반영)
+                    text_changed = self.documents[row] != documents[i]
+                    meta_changed = self.metadatas[row] != metadatas[i]
+                    # 저장된(정규화된) 벡터를 다시 넣으면 재정규화 오차만 생기므로 허용 오차로 비교
+                    vector_changed = not np.allclose(self._matrix[row], vectors[i], rtol=0.0, atol=1e-6)
+                    if not (text_changed or meta_changed or vector_changed):
+                        continue
+                    self.documents[row] = documents[i]
+                    if meta_changed:
+                        self.metadatas[row] = metadatas[i]
+                        self._filter_dirty = True
+                else:
+                    # 새 문서 추가
+                    text_changed = True
+                    row = self._size
+                    self.id_to_row[doc_id] = row
+                    self.ids.append(doc_id)
+                    self.documents.append(documents[i])
+                    self.metadatas.append(metadatas[i])
+                    self.filter_index.add(metadatas[i] or {})
+                    self._size += 1
+                self._matrix[row] = vectors[i]
+                if text_changed:
+                    known_hash = content_hashes[i] if content_hashes else None
+                    self.content_hashes[doc_id] = known_hash or self.content_hash(documents[i])
+                changed = True
+        return changed
+    
+    def where_mask(self, where: Optional[Dict]) -> Optional[np.ndarray]:
+        """where 조건 -> 행 마스크 (조건 없으면 None)
         
-    def upsert(self, ids: List[str], documents: List[str], embeddings: List[List[float]], metadatas: List[Dict]):
-        """문서 업서트"""
-        for i, doc_id in enumerate(ids):
-            if doc_id in self.ids:
-                # 기존 문서 업데이트
-                idx = self.ids.index(doc_id)
-                self.documents[idx] = documents[i]
-                self.embeddings[idx] = embeddings[i]
-                self.metadatas[idx] = metadatas[i]
-            else:
-                # 새 문서 추가
-                self.ids.append(doc_id)
-                self.documents.append(documents[i])
-                self.embeddings.append(embeddings[i])
-                self.metadatas.append(metadatas[i])
-    
-    def query(self, query_embeddings: List[List[float]], n_results: int = 5, where: Dict = None) -> Dict:
-        """유사도 검색"""
-        if not self.documents:
-            return {"documents": [[]], "metadatas": [[]], "ids": [[]], "embeddings": [[]]}
+        비트맵 재구축은 락 안에서 새 인덱스를 만든 뒤 교체하므로,
+        동시에 조회 중인 스레드는 이전 인덱스를 끝까지 읽는다.
+        """
+        if not where:
+            return None
+        if self._filter_dirty:
+            with self._filter_lock:
+                if self._filter_dirty:
+                    filter_index = BitmapFilterIndex(self.filter_index.fields)
+                    filter_index.build([metadata or {} for metadata in self.metadatas])
+                    self.filter_index = filter_index
+                    self._filter_dirty = False
+        return self.filter_index.mask(where)
+    
+    def query(self, query_embeddings: List[List[float]], n_results: int = 5, where: Dict = None,
+              mask: Optional[np.ndarray] = None) -> Dict:
+        """유사도 검색 (쿼리 여러 개는 행렬 곱 1회, mask: 이미 계산한 where_mask() 결과)"""
+        queries = normalize_rows(np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32)))
+        result = {"documents": [], "metadatas": [], "ids": [], "embeddings": [], "distances": []}
+        
+        if mask is None:
+            mask = self.where_mask(where)
+        if self._size == 0 or (mask is not None and not mask.any()):
+            for key in result:
+                result[key] = [[] for _ in range(queries.shape[0])]
+            return result
         
-        query_vec = np.array(query_embeddings[0])
-        doc_vecs = np.array(self.embeddings)
+        # 필터 통과 행만 스코어링
+        rows = None if mask is None else np.flatnonzero(mask)
+        doc_vecs = self.embeddings if rows is None else self.embeddings[rows]
+        similarities = queries @ doc_vecs.T
         
-        # 코사인 유사도 계산
-        similarities = np.dot(doc_vecs, query_vec) / (
-            np.linalg.norm(doc_vecs, axis=1) * np.linalg.norm(query_vec) + 1e-9
-        )
+        for scores in similarities:
+            # 상위 n_results개 선택
+            top = top_k_indices(scores, n_results)
+            top_rows = top if rows is None else rows[top]
+            result["documents"].append([self.documents[i] for i in top_rows])
+            result["metadatas"].append([self.metadatas[i] for i in top_rows])
+            result["ids"].append([self.ids[i] for i in top_rows])
+            result["embeddings"].append(list(self._matrix[top_rows]))
+            result["distances"].append([float(1.0 - scores[i]) for i in top])
+        return result
+    
+    def save(self, directory: str):
+        """스냅샷 저장 (데이터 파일 기록 후 매니페스트를 원자적으로 교체)"""
+        os.makedirs(directory, exist_ok=True)
+        manifest_path = os.path.join(directory, "manifest.json")
+        previous = _read_manifest(manifest_path)
         
-        # 상위 n_results개 선택
-        top_indices = np.argsort(similarities)[::-1][:n_results]
+        token = uuid.uuid4().hex[:12]
+        vectors_file, docs_file = f"vectors-{token}.npy", f"docs-{token}.json"
+        np.save(os.path.join(directory, vectors_file), self.embeddings)
+        with open(os.path.join(directory, docs_file), "w", encoding="utf-8") as f:
+            json.dump({"ids": self.ids, "documents": self.documents, "metadatas": self.metadatas},
+                      f, ensure_ascii=False)
         
-        return {
-            "documents": [[self.documents[i] for i in top_indices]],
-            "metadatas": [[self.metadatas[i] for i in top_indices]],
-            "ids": [[self.ids[i] for i in top_indices]],
-            "embeddings": [[self.embeddings[i] for i in top_indices]]
+        manifest = {
+            "format_version": SNAPSHOT_FORMAT_VERSION,
+            "model": self.model_name,
+            "count": self._size,
+            "vectors": vectors_file,
+            "docs": docs_file,
+            "hashes": {doc_id: self.content_hashes[doc_id] for doc_id in self.ids}
         }
+        tmp_path = f"{manifest_path}.{token}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(tmp_path, manifest_path)
+        
+        # 이전 스냅샷 파일 정리
+        if previous:
+            for key in ("vectors", "docs"):
+                old_path = os.path.join(directory, previous.get(key, ""))
+                if previous.get(key) and os.path.exists(old_path):
+                    os.remove(old_path)
+    
+    def load(self, directory: str) -> bool:
+        """스냅샷 로드 (모델이 다르거나 손상되면 False)"""
+        manifest = _read_manifest(os.path.join(directory, "manifest.json"))
+        if not manifest or manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+            return False
+        if manifest.get("model") != self.model_name:
+            print(f"⚠️ 스냅샷 모델 불일치 ({manifest.get('model')} != {self.model_name}), 재임베딩 필요")
+            return False
+        try:
+            vectors = np.load(os.path.join(directory, manifest["vectors"]))
+            with open(os.path.join(directory, manifest["docs"]), "r", encoding="utf-8") as f:
+                docs = json.load(f)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ 스냅샷 로드 실패: {e}")
+            return False
+        if vectors.shape[0] != len(docs["ids"]):
+            return False
+        
+        # 저장 시점 해시 재사용 (스냅샷 문서와 같은 시점에 기록됨)
+        # 재시작 전과 같은 내용을 복원할 뿐이므로 세대는 올리지 않음 (공유 결과 캐시 유지)
+        hashes = manifest.get("hashes") or {}
+        self._upsert_rows(docs["ids"], docs["documents"], vectors, docs["metadatas"],
+                          [hashes.get(doc_id) for doc_id in docs["ids"]])
+        return True
+
+def _read_manifest(path: str) -> Optional[Dict[str, Any]]:
+    """매니페스트 읽기 (없거나 손상되면 None)"""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
 
 # 전역 스토어 인스턴스
 _store = None
@@ -64,12 +260,60 @@ def get_store():
     global _store
     if _store is None:
         _store = SimpleVectorStore()
-        # 서버 시작 시 자동으로 샘플 데이터 로드
-        _load_sample_data()
+        # 스냅샷 로드 후 바뀐 샘플 데이터만 임베딩
+        if _store.load(settings.VECTOR_STORE_DIR):
+            print(f"✅ 벡터 스토어 스냅샷 로드: {len(_store)}개 문서")
+        changed_ids = _load_sample_data()
+        _sync_bm25(_store, changed_ids)
     return _store
 
-def _load_sample_data():
-    """샘플 데이터 자동 로드"""
+def _embed_changed(store: SimpleVectorStore, ids: List[str], documents: List[str]) -> Tuple[np.ndarray, List[int]]:
+    """텍스트 해시가 바뀐 문서만 임베딩 -> (전체 임베딩, 새로 임베딩한 배치 내 위치)"""
+    stale = store.stale_rows(ids, documents)
+    if len(stale) == len(ids):
+        return store.embedder.encode_passage(documents), stale
+    
+    embeddings = np.empty((len(ids), store.embeddings.shape[1]), dtype=np.float32)
+    for i, doc_id in enumerate(ids):
+        if doc_id in store:
+            embeddings[i] = store.get_embedding(doc_id)
+    if stale:
+        embeddings[stale] = store.embedder.encode_passage([documents[i] for i in stale])
+    return embeddings, stale
+
+def _sync_bm25(store: SimpleVectorStore, changed_ids: List[str]):
+    """BM25 코퍼스 인덱스 증분 갱신 (누락/변경 문서만 토크나이징 후 저장) + 행 번호 매핑 갱신"""
+    index = get_corpus_bm25_index(settings.BM25_INDEX_DIR)
+    changed = set(changed_ids)
+    rows = [row for row, doc_id in enumerate(store.ids) if doc_id in changed or doc_id not in index]
+    if rows:
+        index.add_documents([store.ids[row] for row in rows], [store.documents[row] for row in rows],
+                            [store.content_hashes.get(store.ids[row]) for row in rows])
+        index.save(settings.BM25_INDEX_DIR)
+    bm25_row_map(store, index, rows)
+
+def bm25_row_map(store: SimpleVectorStore, index, rows: List[int] = ()) -> np.ndarray:
+    """스토어 행 -> BM25 행 int32 배열 (where 마스크를 BM25 allowed 마스크로 한 번에 변환)
+    
+    rows(다시 색인한 스토어 행)와 새로 늘어난 행만 조회해 갱신하고,
+    BM25 컴팩션으로 행 번호가 바뀌었으면(epoch 변경) 전체를 다시 만든다.
+    """
+    row_map = store.bm25_rows
+    if store.bm25_epoch != index.epoch:
+        row_map, rows = np.zeros(0, dtype=np.int32), range(len(store))
+    stale = set(rows)
+    if row_map.shape[0] < len(store):
+        stale.update(range(row_map.shape[0], len(store)))
+        row_map = np.concatenate([row_map, np.full(len(store) - row_map.shape[0], -1, dtype=np.int32)])
+    elif stale:
+        row_map = row_map.copy()  # 조회 중인 스레드가 보는 배열은 그대로 둠
+    for row in stale:
+        row_map[row] = index.id_to_row.get(store.ids[row], -1)
+    store.bm25_rows, store.bm25_epoch = row_map, index.epoch
+    return row_map
+
+def _load_sample_data() -> List[str]:
+    """샘플 데이터 자동 로드 -> 새로 임베딩한 문서 ID"""
     try:
         import json
         import os
@@ -83,14 +327,37 @@ def _load_sample_data():
             documents = [doc["text"] for doc in batch]
             metadatas = [{k: v for k, v in doc.items() if k not in ("id", "text")} for doc in batch]
             
-            # 임베딩 생성
-            embeddings = _store.embedder.encode_passage(documents).tolist()
+            # 임베딩 생성 (스냅샷과 해시가 같은 문서는 재사용)
+            embeddings, stale = _embed_changed(_store, ids, documents)
             
-            # 업서트
-            _store.upsert(ids, documents, embeddings, metadatas)
-            print(f"✅ 서버 시작 시 {len(batch)}개 샘플 문서 자동 로드")
+            # 새 문서 / 텍스트·메타데이터가 바뀐 문서만 업서트 (변경 없으면 업서트·저장 생략)
+            stale_set = set(stale)
+            rows = [i for i, doc_id in enumerate(ids)
+                    if i in stale_set or _store.metadatas[_store.id_to_row[doc_id]] != metadatas[i]]
+            if rows:
+                _store.upsert([ids[i] for i in rows], [documents[i] for i in rows],
+                              embeddings[rows], [metadatas[i] for i in rows])
+                _store.save(settings.VECTOR_STORE_DIR)
+            print(f"✅ 서버 시작 시 {len(batch)}개 샘플 문서 자동 로드 (임베딩 {len(stale)}개)")
+            return [ids[i] for i in stale]
     except Exception as e:
         print(f"⚠️ 샘플 데이터 로드 실패: {e}")
+    return []
+
+def upsert_embedded(ids: List[str], documents: List[str], embeddings, metadatas: List[Dict],
+                    changed_ids: Optional[List[str]] = None):
+    """임베딩이 준비된 문서 업서트 + 스냅샷 저장 + 코퍼스 BM25 동기화 (스토어 쓰기 공용 진입점)
+
+    changed_ids: 텍스트가 바뀐 문서 ID (None이면 업서트 전 해시로 판별) — BM25 재토크나이징 대상
+    """
+    if not ids:
+        return
+    store = get_store()
+    if changed_ids is None:
+        changed_ids = [ids[i] for i in store.stale_rows(ids, documents)]
+    store.upsert(ids, documents, embeddings, metadatas)
+    store.save(settings.VECTOR_STORE_DIR)
+    _sync_bm25(store, changed_ids)
 
 def upsert_docs(docs: List[Dict]):
     """문서 업서트 (ChromaDB 호환 인터페이스)"""
@@ -100,42 +367,32 @@ def upsert_docs(docs: List[Dict]):
     documents = [doc["text"] for doc in docs]
     metadatas = [{k: v for k, v in doc.items() if k not in ("id", "text")} for doc in docs]
     
-    # 임베딩 생성
-    embeddings = store.embedder.encode_passage(documents).tolist()
+    # 임베딩 생성 (변경된 문서만)
+    embeddings, stale = _embed_changed(store, ids, documents)
     
-    # 업서트
-    store.upsert(ids, documents, embeddings, metadatas)
+    # 업서트 후 스냅샷/BM25 인덱스 갱신
+    upsert_embedded(ids, documents, embeddings, metadatas, [ids[i] for i in stale])
     
-    print(f"✅ {len(docs)}개 문서 인덱싱 완료")
+    print(f"✅ {len(docs)}개 문서 인덱싱 완료 (임베딩 {len(stale)}개)")
 
-def retrieve(query: str, where: Dict = None, k: int = 8) -> List[Dict]:
-    """검색 (ChromaDB 호환 인터페이스)"""
-    store = get_store()
-    
-    # 쿼리 임베딩
-    query_embedding = store.embedder.encode_query([query])
-    
-    # 검색
-    results = store.query([query_embedding[0].tolist()], n_results=k, where=where)
-    
-    # 결과 변환
+def _to_hits(results: Dict, qi: int) -> List[Dict]:
+    """query() 결과의 qi번째 쿼리 -> 검색 히트 목록"""
     hits = []
-    for i, (doc, meta, doc_id, emb) in enumerate(zip(
-        results["documents"][0],
-        results["metadatas"][0], 
-        results["ids"][0],
-        results["embeddings"][0]
-    )):
-        # 유사도 계산
-        query_vec = query_embedding[0]
-        doc_vec = np.array(emb)
-        sim = float(np.dot(query_vec, doc_vec) / (np.linalg.norm(query_vec) * np.linalg.norm(doc_vec) + 1e-9))
+    for doc, meta, doc_id, emb, dist in zip(
+        results["documents"][qi],
+        results["metadatas"][qi],
+        results["ids"][qi],
+        results["embeddings"][qi],
+        results["distances"][qi]
+    ):
+        # 코사인 유사도 = 1 - 거리 (검색 시 계산된 값 재사용)
+        sim = 1.0 - dist
         
         hits.append({
             "id": doc_id,
             "text": doc,
             "meta": meta,
-            "vec": doc_vec,
+            "vec": emb,
             "sim": sim,
             "bm25": 0.0,  # BM25는 일단 0으로 설정
             "bm25_norm": 0.0,
@@ -143,3 +400,33 @@ def retrieve(query: str, where: Dict = None, k: int = 8) -> List[Dict]:
         })
     
     return hits
+
+def retrieve(query: str, where: Dict = None, k: int = 8) -> List[Dict]:
+    """검색 (ChromaDB 호환 인터페이스)"""
+    store = get_store()
+    
+    # 쿼리 임베딩
+    query_embedding = store.embedder.encode_query([query])
+    
+    return retrieve_by_vector(query_embedding[0], where, k)
+
+def retrieve_by_vector(query_embedding: np.ndarray, where: Dict = None, k: int = 8,
+                       mask: Optional[np.ndarray] = None) -> List[Dict]:
+    """이미 인코딩된 쿼리 벡터로 검색 (하이브리드 파이프라인에서 인코딩 1회 / where 마스크 1회 재사용)"""
+    results = get_store().query(np.asarray(query_embedding)[None, :], n_results=k, where=where, mask=mask)
+    return _to_hits(results, 0)
+
+def retrieve_many(queries: List[str], where: Dict = None, k: int = 8) -> List[List[Dict]]:
+    """다중 쿼리 검색 (인코딩 1회 + 행렬-행렬 곱 1회)"""
+    if not queries:
+        return []
+    store = get_store()
+    
+    # 쿼리 임베딩 (모델 호출 1회)
+    query_embeddings = store.embedder.encode_query(queries)
+    
+    # 검색
+    results = store.query(query_embeddings, n_results=k, where=where)
+    
+    # 결과 변환
+    return [_to_hits(results, qi) for qi in range(len(queries))]
@@ -14,7 +14,7 @@ import os
 import sys
 
 # Prometheus 지표
-from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
 
 # 구조화된 로깅 설정
 from .logging_setup import setup_logging
@@ -26,7 +26,7 @@ from slowapi.middleware import SlowAPIMiddleware
 from slowapi.errors import RateLimitExceeded
 from fastapi.responses import JSONResponse
 from .security import require_api_key, require_api_key_strict, get_cors_origins, get_api_key_hash
-from src.infra.cache import cache_get, cache_set, CACHE_SEARCH, PROMPT_VER
+from src.infra.cache import CACHE_SEARCH, PROMPT_VER
 from src.infra.kv import push_history, list_history, add_fav, list_fav, is_fav, remove_fav
 from src.jobs.scheduler import start_scheduler, get_scheduler_status
 
@@ -37,8 +37,12 @@ sys.path.insert(0, os.path.join(BASE_DIR, 'src'))
 from src.llm.services.generator import generate_blog
 from src.llm.clients.gemini_client import GeminiClient
 from src.config.settings import settings
-from src.search.retriever import retrieve
+from src.search.retriever import retrieve, retrieve_many
+from src.search.fusion import FUSION_STRATEGIES
 from src.search.fact_snippets import compress_to_facts
+from src.search.result_cache import get_result_cache
+from src.search.semantic_cache import get_semantic_cache, encode_cache_query, context_key, result_overlap
+from src.vector.micro_batcher import get_encode_batcher_stats
 
 # 로깅 설정
 logger = logging.getLogger("lsc")
@@ -50,6 +54,30 @@ REQ_LATENCY = Histogram("http_request_seconds", "Request latency by path", ["pat
 SEARCH_COUNT = Counter("search_requests_total", "Total search requests", ["status"])
 GENERATE_COUNT = Counter("generate_requests_total", "Total blog generation requests", ["status"])
 
+# 검색 결과 캐시 지표 (local LRU + shared Redis)
+search_cache = get_result_cache(CACHE_SEARCH)
+SEARCH_CACHE_LOOKUPS = Counter("search_cache_lookups_total", "Search result cache lookups", ["result"])
+SEARCH_CACHE_HIT_RATE = Gauge("search_cache_hit_rate", "Search result cache hit rate (local + shared)")
+SEARCH_CACHE_HIT_RATE.set_function(lambda: search_cache.stats()["hit_rate"])
+SEARCH_CACHE_BYTES = Gauge("search_cache_local_bytes", "Search result cache in-process memory (serialized bytes)")
+SEARCH_CACHE_BYTES.set_function(lambda: search_cache.stats()["local"]["bytes"])
+SEARCH_CACHE_ENTRIES = Gauge("search_cache_local_entries", "Search result cache in-process entries")
+SEARCH_CACHE_ENTRIES.set_function(lambda: search_cache.stats()["local"]["entries"])
+
+# 의미 기반 쿼리 캐시 지표 (근사 중복 쿼리, 샘플 검증 오탐)
+semantic_search_cache = get_semantic_cache("search")
+semantic_generate_cache = get_semantic_cache("generate")
+SEMANTIC_CACHE_LOOKUPS = Counter("semantic_cache_lookups_total", "Semantic cache lookups", ["cache", "result"])
+SEMANTIC_CACHE_FALSE_HITS = Counter("semantic_cache_false_hits_total", "Semantic cache hits rejected by sampled verification", ["cache"])
+
+# 쿼리 인코딩 마이크로 배처 지표 (모든 공용 배처 합계)
+ENCODE_QUEUE_DEPTH = Gauge("encode_batcher_queue_depth", "Query encode requests waiting in micro-batchers")
+ENCODE_QUEUE_DEPTH.set_function(lambda: sum(s["queue_depth"] for s in get_encode_batcher_stats()))
+ENCODE_BATCHES = Gauge("encode_batcher_batches", "encode() calls made by micro-batchers")
+ENCODE_BATCHES.set_function(lambda: sum(s["batches"] for s in get_encode_batcher_stats()))
+ENCODE_ITEMS = Gauge("encode_batcher_items", "Query encode requests served by micro-batchers")
+ENCODE_ITEMS.set_function(lambda: sum(s["items"] for s in get_encode_batcher_stats()))
+
 # 레이트 리밋 설정 (Redis 사용)
 redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/1")
 limiter = Limiter(key_func=get_remote_address, storage_uri=redis_url)
@@ -145,6 +173,12 @@ class SearchRequest(BaseModel):
     where: dict | None = None
     k: int | None = None
     user_id: str | None = None  # 사용자 ID (히스토리/즐겨찾기용)
+    fusion: str | None = None  # 하이브리드 점수 융합 전략 (rrf | zscore | minmax, None이면 설정값)
+
+class BatchSearchRequest(BaseModel):
+    queries: list[str]
+    where: dict | None = None
+    k: int | None = None
 
 # 정적 파일 서빙 (방어적)
 WEB_DIR = os.path.join(BASE_DIR, "web")
@@ -251,30 +285,60 @@ def readiness():
         "detail": detail or "ok"
     }
 
+def _semantic_search(req: SearchRequest, cache_payload: Dict[str, Any], generation: str) -> list:
+    """정확 키 미스 시: 의미 캐시 조회 -> 미스면 검색 (조회에 쓴 쿼리 임베딩 재사용) 후 두 캐시에 저장"""
+    query_vector = encode_cache_query(req.query)
+    context = context_key(**{key: value for key, value in cache_payload.items() if key != "q"}, gen=generation)
+    
+    semantic_hit = semantic_search_cache.lookup(query_vector, context)
+    if semantic_hit is not None and not semantic_search_cache.should_verify():
+        SEMANTIC_CACHE_LOOKUPS.labels(cache="search", result="hit").inc()
+        ops_logger.info("semantic_cache_hit", extra={
+            "query": req.query, "cached_query": semantic_hit.query, "similarity": round(semantic_hit.similarity, 4)
+        })
+        return semantic_hit.value
+    
+    # 실제 검색 수행 (샘플 검증 대상 히트도 새로 검색해 비교)
+    hits = retrieve(req.query, req.where, req.k, fusion=req.fusion, query_vector=query_vector)
+    if semantic_hit is not None:
+        agreed = result_overlap([h["id"] for h in semantic_hit.value], [h["id"] for h in hits]) >= 0.5
+        semantic_search_cache.record_verification(agreed)
+        if not agreed:
+            SEMANTIC_CACHE_FALSE_HITS.labels(cache="search").inc()
+    SEMANTIC_CACHE_LOOKUPS.labels(cache="search", result="hit" if semantic_hit is not None else "miss").inc()
+    
+    # 검색 전 세대로 저장 (벡터는 응답에 쓰지 않으므로 제외)
+    hits = search_cache.set(cache_payload, {"hits": [
+        {key: value for key, value in h.items() if key != "vec"} for h in hits
+    ]}, generation)["hits"]
+    semantic_search_cache.put(req.query, query_vector, hits, context)
+    return hits
+
 @app.post("/api/search")
 @limiter.limit("5/second")  # 검색은 조금 여유
 def api_search(req: SearchRequest, request: Request):
     """검색 API"""
+    if req.fusion is not None and req.fusion not in FUSION_STRATEGIES:
+        raise HTTPException(status_code=400, detail=f"fusion은 {', '.join(FUSION_STRATEGIES)} 중 하나여야 합니다")
     try:
         # 캐시 키 생성
         cache_payload = {
             "q": req.query, 
             "where": req.where, 
             "k": req.k,
+            "fusion": req.fusion,
             "pv": PROMPT_VER
         }
         
-        # 캐시에서 조회
-        cached = cache_get(CACHE_SEARCH, cache_payload)
+        # 캐시에서 조회 (local -> shared, 키에 인덱스 세대 포함)
+        generation = search_cache.generation.current()
+        cached, tier = search_cache.lookup(cache_payload, generation)
+        SEARCH_CACHE_LOOKUPS.labels(result=tier).inc()
         if cached:
             hits = cached["hits"]
-            ops_logger.info("search_cache_hit", extra={"query": req.query})
+            ops_logger.info("search_cache_hit", extra={"query": req.query, "tier": tier, "generation": generation})
         else:
-            # 실제 검색 수행
-            hits = retrieve(req.query, req.where, req.k)
-            
-            # 캐시에 저장 (15분)
-            cache_set(CACHE_SEARCH, cache_payload, {"hits": hits}, ttl=900)
+            hits = _semantic_search(req, cache_payload, generation)
         
         # 사용자 히스토리에 추가
         if req.user_id:
@@ -318,6 +382,74 @@ def api_search(req: SearchRequest, request: Request):
         logger.error(f"Search error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/search/batch")
+@limiter.limit("1/second")  # 배치 검색은 요청당 작업량이 큼
+def api_search_batch(req: BatchSearchRequest, request: Request):
+    """다중 쿼리 검색 API (쿼리 인코딩 1회 + 행렬 곱 1회)"""
+    try:
+        queries = [q.strip() for q in req.queries]
+        if not queries or any(not q for q in queries):
+            raise HTTPException(status_code=400, detail="queries는 비어있을 수 없습니다")
+        if len(queries) > 500:
+            raise HTTPException(status_code=400, detail="queries는 최대 500개입니다")
+        
+        hits_per_query = retrieve_many(queries, req.where, req.k)
+        
+        SEARCH_COUNT.labels(status="success").inc(len(queries))
+        ops_logger.info("search_batch_result", extra={
+            "type": "search_batch",
+            "queries": len(queries),
+            "k": req.k
+        })
+        
+        return {
+            "count": len(queries),
+            "results": [
+                {
+                    "query": query,
+                    "k": len(hits),
+                    "results": [
+                        {
+                            "id": h["id"],
+                            "title": h["meta"].get("title"),
+                            "url": h["meta"].get("url"),
+                            "sim": h["sim"],
+                            "snippet": compress_to_facts(h["text"], 2)
+                        }
+                        for h in hits
+                    ]
+                }
+                for query, hits in zip(queries, hits_per_query)
+            ]
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        SEARCH_COUNT.labels(status="error").inc()
+        logger.error(f"Batch search error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _generate_with_semantic_cache(req: BlogRequest) -> Dict[str, Any]:
+    """블로그 생성 (SEMANTIC_CACHE_GENERATE=true면 주제/키워드가 근사 중복인 최근 성공 초안 재사용)"""
+    if not settings.SEMANTIC_CACHE_GENERATE:
+        return generate_blog(req.model_dump())
+    
+    query_vector = encode_cache_query(f"{req.topic} {req.keywords}")
+    context = context_key(pv=PROMPT_VER, gen=search_cache.generation.current())
+    semantic_hit = semantic_generate_cache.lookup(query_vector, context)
+    SEMANTIC_CACHE_LOOKUPS.labels(cache="generate", result="hit" if semantic_hit else "miss").inc()
+    if semantic_hit is not None:
+        ops_logger.info("semantic_cache_hit", extra={
+            "topic": req.topic, "cached_query": semantic_hit.query, "similarity": round(semantic_hit.similarity, 4)
+        })
+        return {**semantic_hit.value, "topic": req.topic, "cached_from": semantic_hit.query}
+    
+    out = generate_blog(req.model_dump())
+    # QC 통과한 초안만 재사용
+    if out.get("success", bool(out.get("qc", {}).get("passed"))):
+        semantic_generate_cache.put(f"{req.topic} {req.keywords}", query_vector, out, context)
+    return out
+
 @app.post("/api/generate")
 @limiter.limit("1/second", key_func=get_api_key_hash)  # API Key 기반 레이트리밋
 def api_generate(req: BlogRequest, request: Request, _: bool = Depends(require_api_key_strict)):
@@ -325,7 +457,7 @@ def api_generate(req: BlogRequest, request: Request, _: bool = Depends(require_a
     req_id = request.headers.get("X-Request-ID", str(uuid.uuid4())[:8])
     
     try:
-        out = generate_blog(req.model_dump())
+        out = _generate_with_semantic_cache(req)
         success = out.get("success", bool(out.get("qc", {}).get("passed")))
         
         # Prometheus 지표 수집
@@ -30,6 +30,8 @@ class Settings(BaseModel):
     EMBED_MODEL: str = os.getenv("EMBED_MODEL", "intfloat/multilingual-e5-base")
     CHROMA_DIR: str = os.getenv("CHROMA_DIR", "./artifacts/chroma")
     CHROMA_COLLECTION: str = os.getenv("CHROMA_COLLECTION", "law_blog")
+    VECTOR_STORE_DIR: str = os.getenv("VECTOR_STORE_DIR", "./artifacts/simple_store")  # SimpleVectorStore 스냅샷
+    BM25_INDEX_DIR: str = os.getenv("BM25_INDEX_DIR", "./artifacts/bm25")  # 전체 코퍼스 BM25 역색인
     RETRIEVAL_K: int = int(os.getenv("RETRIEVAL_K", "8"))
     CAND_MULTIPLIER: int = int(os.getenv("CAND_MULTIPLIER", "3"))
     USE_BM25: bool = os.getenv("USE_BM25", "false").lower() == "true"
@@ -37,6 +39,19 @@ class Settings(BaseModel):
     # 하이브리드 검색 설정
     RETRIEVAL_ALPHA: float = float(os.getenv("RETRIEVAL_ALPHA", "0.2"))  # BM25 가중치
     MMR_LAMBDA: float = float(os.getenv("MMR_LAMBDA", "0.7"))  # MMR 다양화 가중치
+    FUSION_STRATEGY: str = os.getenv("FUSION_STRATEGY", "minmax")  # rrf | zscore | minmax
+    
+    # 검색 결과 캐시 설정 (프로세스 LRU + Redis 공유 계층)
+    RESULT_CACHE_SIZE: int = int(os.getenv("RESULT_CACHE_SIZE", "512"))  # 프로세스 LRU 최대 항목 수
+    RESULT_CACHE_MAX_MB: float = float(os.getenv("RESULT_CACHE_MAX_MB", "64"))  # 프로세스 LRU 최대 메모리
+    RESULT_CACHE_TTL: int = int(os.getenv("RESULT_CACHE_TTL", "900"))  # 공유 계층 TTL (초)
+    
+    # 의미 기반 쿼리 캐시 (근사 중복 쿼리)
+    SEMANTIC_CACHE_SIZE: int = int(os.getenv("SEMANTIC_CACHE_SIZE", "256"))  # 0=off
+    SEMANTIC_CACHE_THRESHOLD: float = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))  # 코사인 유사도 임계값
+    SEMANTIC_CACHE_TTL: int = int(os.getenv("SEMANTIC_CACHE_TTL", "900"))  # 초
+    SEMANTIC_CACHE_VERIFY_RATE: float = float(os.getenv("SEMANTIC_CACHE_VERIFY_RATE", "0.05"))  # 오탐 측정 샘플 비율
+    SEMANTIC_CACHE_GENERATE: bool = os.getenv("SEMANTIC_CACHE_GENERATE", "false").lower() == "true"  # /api/generate 초안 재사용
 
 # 전역 설정 인스턴스
 settings = Settings()
@@ -9,6 +9,8 @@ from typing import List, Dict, Any
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 
+from src.search.mmr import mmr_rank, mmr_select as mmr_select_vectors
+
 
 class MMRSelector:
     """MMR 기반 문장 선택기"""
@@ -80,48 +82,9 @@ class MMRSelector:
         return sentences
     
     def _mmr_selection(self, tfidf_matrix, relevance_scores, top_k):
-        """MMR 알고리즘으로 문장 선택"""
-        n_sentences = tfidf_matrix.shape[0]
-        selected_indices = []
-        remaining_indices = list(range(n_sentences))
-        
-        # 첫 번째 문장: 가장 관련성 높은 것
-        first_idx = np.argmax(relevance_scores)
-        selected_indices.append(first_idx)
-        remaining_indices.remove(first_idx)
-        
-        # 나머지 문장들: MMR 점수로 선택
-        for _ in range(min(top_k - 1, len(remaining_indices))):
-            best_idx = None
-            best_score = -1
-            
-            for idx in remaining_indices:
-                # 관련성 점수
-                relevance = relevance_scores[idx]
-                
-                # 다양성 점수 (이미 선택된 문장들과의 최대 유사도)
-                if selected_indices:
-                    similarities = cosine_similarity(
-                        tfidf_matrix[idx:idx+1], 
-                        tfidf_matrix[selected_indices]
-                    ).flatten()
-                    diversity = 1 - np.max(similarities)
-                else:
-                    diversity = 1
-                
-                # MMR 점수
-                mmr_score = (self.lambda_param * relevance + 
-                           (1 - self.lambda_param) * diversity)
-                
-                if mmr_score > best_score:
-                    best_score = mmr_score
-                    best_idx = idx
-            
-            if best_idx is not None:
-                selected_indices.append(best_idx)
-                remaining_indices.remove(best_idx)
-        
-        return selected_indices
+        """MMR 알고리즘으로 문장 선택 (문장 간 유사도 행렬 1회 계산, 공용 MMR 사용)"""
+        similarity = cosine_similarity(tfidf_matrix)
+        return mmr_rank(relevance_scores, similarity, top_k, self.lambda_param)
 import numpy as np
 from typing import List, Tuple
 from .config import CONFIG
@@ -142,28 +105,7 @@ def mmr_select(embs: np.ndarray, qvec: np.ndarray, k: int = 40, lam: float = Non
     if lam is None:
         lam = CONFIG["mmr_lambda"]
     
-    S = embs  # (n, d) normalized
-    sims_q = S @ qvec  # 쿼리와의 유사도
-    
-    selected = []
-    taken = set()
-    
-    for _ in range(min(k, len(S))):
-        if not selected:
-            # 첫 번째는 쿼리와 가장 유사한 것
-            i = int(np.argmax(sims_q))
-        else:
-            # 이후는 relevance - diversity로 선택
-            selected_embs = S[selected]
-            max_sim = (S @ selected_embs.T).max(axis=1)  # 이미 선택된 것들과의 최대 유사도
-            score = lam * sims_q - (1 - lam) * max_sim
-            score[list(taken)] = -1e9  # 이미 선택된 것 제외
-            i = int(np.argmax(score))
-        
-        taken.add(i)
-        selected.append(i)
-    
-    return selected
+    return mmr_select_vectors(qvec, embs, lambda_div=lam, topk=k)
 
 def select_by_score(embs: np.ndarray, qvec: np.ndarray, k: int = 40, min_score: float = 0.0) -> List[int]:
     """단순 점수 기반 선택 (MMR 대안)"""
@@ -25,6 +25,13 @@ from rank_bm25 import BM25Okapi
 import numpy as np
 from collections import defaultdict
 import logging
+import sys
+
+# 프로젝트 루트를 Python 경로에 추가 (공용 토크나이저 / 질의 리라이터 / 점수 융합)
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from src.search.tokenizer import ko_bigrams
+from src.search.query_rewriter import rewrite_query
+from src.search.fusion import fuse
 
 # ===== 로깅 설정 =====
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -41,20 +48,6 @@ HNSW_CONFIG = {
     "efSearch": 96
 }
 
-# 법률 용어 동의어 사전
-LEGAL_SYNONYMS = {
-    "압류": ["채권압류", "추심", "압류명령"],
-    "지급명령": ["독촉절차", "지명채권", "지급명령신청"],
-    "강제집행": ["집행명령", "압류집행", "경매"],
-    "대여금": ["대출금", "차용금", "미수금"],
-    "투자금": ["출자금", "투자손실", "손해배상"],
-    "채권추심": ["채권회수", "미수금회수", "채권압류"],
-    "제3채무자": ["제3채무자통지", "채권압류통지"],
-    "소송": ["민사소송", "소송절차", "법원"],
-    "판결": ["승소", "패소", "판결문"],
-    "집행": ["강제집행", "집행절차", "압류집행"]
-}
-
 def load_jsonl(path: Path) -> Iterable[Dict]:
     """JSONL 파일을 한 줄씩 읽어서 Dict로 반환"""
     with path.open("r", encoding="utf-8") as f:
@@ -225,25 +218,6 @@ def to_embed_text(chunk: str, is_query: bool = False) -> str:
     prefix = "query: " if is_query else "passage: "
     return prefix + chunk.strip()
 
-def rewrite_query(query: str) -> str:
-    """질의 리라이터 (법률 용어 확장)"""
-    expanded_terms = []
-    
-    for term, synonyms in LEGAL_SYNONYMS.items():
-        if term in query:
-            expanded_terms.extend(synonyms)
-    
-    if expanded_terms:
-        return query + " " + " ".join(expanded_terms)
-    return query
-
-def ko_bigrams(text: str) -> List[str]:
-    """한국어 bi-gram 토큰화"""
-    # 공백 제거 후 소문자 변환
-    text = re.sub(r'\s+', '', text.lower())
-    # bi-gram 생성
-    return [text[i:i+2] for i in range(len(text)-1)]
-
 def simhash(text: str) -> int:
     """간단한 SimHash 구현"""
     # 텍스트 정규화
@@ -364,7 +338,8 @@ def build_bm25_index_enhanced(chunks: List[Dict]) -> BM25Okapi:
     
     return BM25Okapi(tokenized_docs)
 
-def hybrid_search_enhanced(query: str, collection, bm25_index: BM25Okapi, chunks: List[Dict], top_k: int = 50) -> List:
+def hybrid_search_enhanced(query: str, collection, bm25_index: BM25Okapi, chunks: List[Dict], top_k: int = 50,
+                           fusion: str = "minmax") -> List:
     """향상된 하이브리드 검색 (ID 기반 머지)"""
     start_time = time.time()
     
@@ -396,16 +371,25 @@ def hybrid_search_enhanced(query: str, collection, bm25_index: BM25Okapi, chunks
         # 벡터 거리를 점수로 변환 (거리 → 유사도)
         vector_similarity = 1.0 / (1.0 + vector_score) if vector_score > 0 else 1.0
         
-        combined_score = vector_similarity + 0.3 * bm25_score
         combined_results.append({
             "id": chunk_id,
             "text": document,
             "metadata": metadata,
             "vector_score": vector_similarity,
-            "bm25_score": bm25_score,
-            "combined_score": combined_score
+            "bm25_score": bm25_score
         })
     
+    # 순위 목록 융합 (원시 BM25 합산 대신 전략별 정규화, 벡터 1.0 : BM25 0.3)
+    bm25_ranking = sorted(((r["id"], r["bm25_score"]) for r in combined_results if r["bm25_score"] > 0),
+                          key=lambda item: item[1], reverse=True)
+    fused_scores = dict(fuse(
+        {"vector": [(r["id"], r["vector_score"]) for r in combined_results], "bm25": bm25_ranking},
+        strategy=fusion,
+        weights={"vector": 1.0, "bm25": 0.3}
+    ))
+    for r in combined_results:
+        r["combined_score"] = fused_scores[r["id"]]
+    
     # 결합 점수로 정렬
     combined_results.sort(key=lambda x: x['combined_score'], reverse=True)
     
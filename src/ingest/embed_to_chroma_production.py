@@ -23,6 +23,12 @@ import chromadb
 from chromadb.config import Settings
 from rank_bm25 import BM25Okapi
 import numpy as np
+import sys
+
+# 프로젝트 루트를 Python 경로에 추가 (공용 토크나이저 / 점수 융합)
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from src.search.tokenizer import ko_bigrams
+from src.search.fusion import fuse
 
 # ===== 하드웨어 최적화 =====
 torch.set_float32_matmul_precision("high")
@@ -184,13 +190,6 @@ def to_embed_text(chunk: str, is_query: bool = False) -> str:
     prefix = "query: " if is_query else "passage: "
     return prefix + chunk.strip()
 
-def ko_bigrams(text: str) -> List[str]:
-    """한국어 bi-gram 토큰화"""
-    # 공백 제거 후 소문자 변환
-    text = re.sub(r'\s+', '', text.lower())
-    # bi-gram 생성
-    return [text[i:i+2] for i in range(len(text)-1)]
-
 def simhash(text: str) -> int:
     """간단한 SimHash 구현"""
     # 텍스트 정규화
@@ -305,7 +304,8 @@ def build_bm25_index_enhanced(chunks: List[Dict]) -> BM25Okapi:
     
     return BM25Okapi(tokenized_docs)
 
-def hybrid_search_enhanced(query: str, collection, bm25_index: BM25Okapi, chunks: List[Dict], top_k: int = 10) -> List:
+def hybrid_search_enhanced(query: str, collection, bm25_index: BM25Okapi, chunks: List[Dict], top_k: int = 10,
+                           fusion: str = "minmax") -> List:
     """향상된 하이브리드 검색 (ID 기반 머지)"""
     # 벡터 검색
     vector_results = collection.query(
@@ -330,14 +330,23 @@ def hybrid_search_enhanced(query: str, collection, bm25_index: BM25Okapi, chunks
         # 벡터 거리를 점수로 변환 (거리 → 유사도)
         vector_similarity = 1.0 / (1.0 + vector_score) if vector_score > 0 else 1.0
         
-        combined_score = vector_similarity + 0.3 * bm25_score
         combined_results.append({
             "id": chunk_id,
             "vector_score": vector_similarity,
-            "bm25_score": bm25_score,
-            "combined_score": combined_score
+            "bm25_score": bm25_score
         })
     
+    # 순위 목록 융합 (원시 BM25 합산 대신 전략별 정규화, 벡터 1.0 : BM25 0.3)
+    bm25_ranking = sorted(((r["id"], r["bm25_score"]) for r in combined_results if r["bm25_score"] > 0),
+                          key=lambda item: item[1], reverse=True)
+    fused_scores = dict(fuse(
+        {"vector": [(r["id"], r["vector_score"]) for r in combined_results], "bm25": bm25_ranking},
+        strategy=fusion,
+        weights={"vector": 1.0, "bm25": 0.3}
+    ))
+    for r in combined_results:
+        r["combined_score"] = fused_scores[r["id"]]
+    
     # 결합 점수로 정렬
     combined_results.sort(key=lambda x: x['combined_score'], reverse=True)
     
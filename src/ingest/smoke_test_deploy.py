@@ -19,6 +19,11 @@ from sentence_transformers import SentenceTransformer, CrossEncoder
 from rank_bm25 import BM25Okapi
 import numpy as np
 import logging
+import sys
+
+# 프로젝트 루트를 Python 경로에 추가 (공용 토크나이저)
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from src.search.tokenizer import ko_bigrams
 
 # ===== 로깅 설정 =====
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -33,12 +38,6 @@ def load_jsonl(path: Path) -> List[Dict]:
                 docs.append(json.loads(line))
     return docs
 
-def ko_bigrams(text: str) -> List[str]:
-    """한국어 bi-gram 토큰화"""
-    import re
-    text = re.sub(r'\s+', '', text.lower())
-    return [text[i:i+2] for i in range(len(text)-1)]
-
 def to_embed_text(chunk: str, is_query: bool = False) -> str:
     """e5 모델용 프리픽스 적용"""
     prefix = "query: " if is_query else "passage: "
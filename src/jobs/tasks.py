@@ -181,42 +181,39 @@ def upsert_docs(docs: List[Dict[str, Any]]) -> Dict[str, Any]:
     start_time = time.time()
     
     try:
-        from simple_vector_store import get_store
+        from simple_vector_store import get_store, upsert_embedded
         
         store = get_store()
         
-        # 문서들을 벡터화하고 저장
+        # 문서들을 벡터화 (문서별 실패 집계)
+        ids, texts, embeddings, metas, existing_flags = [], [], [], [], []
         for doc in docs:
             doc_start = time.time()
             try:
                 # 임베딩 생성
-                embedding = store.embedder.encode_docs([doc["text"]])[0]
+                embedding = store.embedder.encode_passage([doc["text"]])[0]
                 embedding_time = (time.time() - doc_start) * 1000  # ms
                 result["embedding_times"].append(embedding_time)
                 
+                ids.append(doc["id"])
+                texts.append(doc["text"])
+                embeddings.append(embedding.tolist())
+                metas.append(doc["meta"])
                 # 기존 문서 존재 여부 확인
-                existing = any(d["id"] == doc["id"] for d in store.documents)
-                
-                # 벡터 스토어에 추가/업데이트
-                store.upsert(
-                    [doc["id"]],
-                    [doc["text"]],
-                    [embedding.tolist()],
-                    [doc["meta"]]
-                )
-                
-                result["success"] += 1
-                if existing:
-                    result["updated"] += 1
-                else:
-                    result["added"] += 1
+                existing_flags.append(doc["id"] in store)
                 
             except Exception as e:
                 result["failed"] += 1
                 result["errors"].append(f"{doc['id']}: {str(e)}")
-                logger.error(f"문서 업서트 실패: {doc['id']} - {e}")
+                logger.error(f"문서 임베딩 실패: {doc['id']} - {e}")
                 continue
         
+        # 벡터 스토어에 일괄 추가/업데이트 (스냅샷 저장 + 코퍼스 BM25 동기화)
+        upsert_embedded(ids, texts, embeddings, metas)
+        result["success"] = len(ids)
+        result["updated"] = sum(existing_flags)
+        result["added"] = len(ids) - result["updated"]
+        
         result["total_time_ms"] = (time.time() - start_time) * 1000
         
         # 품질 지표 계산
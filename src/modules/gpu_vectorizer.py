@@ -6,13 +6,19 @@ sentence-transformers를 사용한 고속 임베딩 생성
 """
 
 import os
+import sys
 import json
 import argparse
+from pathlib import Path
 from typing import List, Dict, Any
 import torch
 
+# 프로젝트 루트를 sys.path에 추가 (공용 모델 레지스트리)
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
 try:
-    from sentence_transformers import SentenceTransformer
+    import sentence_transformers  # noqa: F401
+    from src.vector.model_registry import get_sentence_transformer
     SENTENCE_TRANSFORMERS_AVAILABLE = True
 except ImportError:
     SENTENCE_TRANSFORMERS_AVAILABLE = False
@@ -52,8 +58,8 @@ class GPUEmbeddingFunction:
         
         print(f"💻 사용 디바이스: {self.device}")
         
-        # 모델 로드
-        self.model = SentenceTransformer(model_name, device=self.device)
+        # 모델 로드 (프로세스 공용 레지스트리, 같은 모델/디바이스는 1회만 로드)
+        self.model = get_sentence_transformer(model_name, self.device)
         print(f"✅ 모델 로드 완료")
     
     def __call__(self, input: List[str]) -> List[List[float]]:
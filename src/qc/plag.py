@@ -1,12 +1,11 @@
-import re
+from src.search.tokenizer import get_tokenizer
 
 def ngrams(tokens, n=8):
     return set(tuple(tokens[i:i+n]) for i in range(0, max(0, len(tokens)-n+1)))
 
 def tokenize_ko(text: str):
-    # 간단 토크나이저(공백/문장부호 기준) — mecab 미사용
-    text = re.sub(r"[^\w가-힣\s]", " ", text)
-    return [t for t in re.split(r"\s+", text) if t]
+    # 공용 토크나이저 word 모드(공백/문장부호 기준, 1글자 포함) — mecab 미사용, 청크별 캐시 공유
+    return get_tokenizer("word", min_length=1).tokenize(text)
 
 def plag_8gram(generated: str, contexts: list[str]) -> float:
     gt = tokenize_ko(generated)
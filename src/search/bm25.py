@@ -2,11 +2,34 @@
 # -*- coding: utf-8 -*-
 """
 BM25 검색 구현
+
+    - SimpleBM25: 후보 문서 집합에 대한 즉석 BM25 (하위 호환)
+    - InvertedBM25Index: 전체 코퍼스 역색인 (postings + 문서 길이 + IDF),
+      디스크에 저장되고 수집 시 증분 갱신, term-at-a-time numpy 누적 스코어링,
+      용어별 점수 상한을 이용한 MaxScore 조기 종료 top-k 검색
 """
-import re
-from typing import List, Dict, Any
+import os
+import json
+import uuid
+import math
+from bisect import bisect_left
+from typing import List, Dict, Any, Iterable, Optional
 from collections import Counter
 
+import numpy as np
+
+from src.vector.search_engine import top_k_indices
+from src.search.tokenizer import tokenize
+from src.search.result_cache import bump_index_generation
+
+BM25_FORMAT_VERSION = 2
+BM25_K1 = 1.2
+BM25_B = 0.75
+# save() 시 대기 postings / 톰스톤 비율이 이 값을 넘거나 델타 세그먼트가 너무 많으면 컴팩션 후 전체 기록
+BM25_COMPACT_RATIO = float(os.getenv("BM25_COMPACT_RATIO", "0.2"))
+BM25_MAX_SEGMENTS = int(os.getenv("BM25_MAX_SEGMENTS", "32"))
+
+
 class SimpleBM25:
     """간단한 BM25 구현 (외부 의존성 없이)"""
     
@@ -21,16 +44,8 @@ class SimpleBM25:
         self.idf = self._calculate_idf()
     
     def _tokenize(self, text: str) -> List[str]:
-        """한국어 텍스트 토크나이징 (간단한 구현)"""
-        # HTML 태그 제거
-        text = re.sub(r'<[^>]+>', '', text)
-        # 특수문자 제거하고 공백으로 분리
-        text = re.sub(r'[^\w\s가-힣]', ' ', text)
-        # 연속된 공백을 하나로
-        text = re.sub(r'\s+', ' ', text)
-        # 단어 단위로 분리
-        tokens = [token.strip() for token in text.split() if len(token.strip()) > 1]
-        return tokens
+        """한국어 텍스트 토크나이징 (공용 토크나이저 word 모드)"""
+        return tokenize(text)
     
     def _calculate_idf(self) -> Dict[str, float]:
         """IDF (Inverse Document Frequency) 계산"""
@@ -91,7 +106,527 @@ def create_bm25_index(docs: List[Dict[str, Any]]) -> SimpleBM25:
     return SimpleBM25(docs)
 
 
+class InvertedBM25Index:
+    """전체 코퍼스 BM25 역색인 (Okapi BM25, 증분 갱신 + 디스크 저장)
+
+    postings는 CSR 배열(term_offsets / post_rows / post_tfs)로 고정 저장되고,
+    이후 추가된 문서는 용어별 대기 목록(pending)에 쌓인다.
+    save()는 마지막 저장 이후 추가/삭제분만 델타 세그먼트 파일로 기본 배열 옆에 기록하고,
+    대기/톰스톤 비율이 BM25_COMPACT_RATIO를 넘을 때만 compact() 후 전체를 다시 쓴다.
+    기존 ID 재수집은 이전 행을 톰스톤 처리하고 새 행을 추가한다.
+    """
+    
+    def __init__(self, k1: float = BM25_K1, b: float = BM25_B):
+        self.k1 = k1
+        self.b = b
+        self.doc_ids: List[str] = []  # 행 번호 -> 문서 ID
+        self.id_to_row: Dict[str, int] = {}  # 살아있는 문서 ID -> 행 번호
+        self.vocab: Dict[str, int] = {}  # 용어 -> 용어 번호
+        self._terms: List[str] = []  # 용어 번호 -> 용어
+        self._doc_lengths = np.zeros(0, dtype=np.float32)
+        self._alive = np.zeros(0, dtype=bool)
+        self._size = 0
+        self._total_length = 0.0  # 살아있는 문서 길이 합
+        # 고정 postings (CSR)
+        self._term_offsets = np.zeros(1, dtype=np.int64)
+        self._post_rows = np.zeros(0, dtype=np.int32)
+        self._post_tfs = np.zeros(0, dtype=np.float32)
+        # 고정 postings의 용어별 최대 tf 성분 (IDF 제외 점수 상한, _bound_avg_length 기준)
+        self._term_max_impact = np.zeros(0, dtype=np.float32)
+        self._bound_avg_length = 0.0
+        # 증분 postings: 용어 번호 -> ([행], [tf]) (행 오름차순)
+        self._pending: Dict[int, tuple] = {}
+        self._pending_postings = 0
+        self.epoch = 0  # 컴팩션(행 번호 재부여)마다 증가 — 외부 행 번호 매핑 무효화 판단
+        # 디스크 상태: 기본 배열 토큰 / 델타 세그먼트 파일 / 마지막 저장 이후 변경분
+        self._base_token: Optional[str] = None
+        self._segments: List[str] = []
+        self._saved_size = 0
+        self._saved_terms = 0
+        self._dirty_terms = set()
+        self._removed_rows: List[int] = []
+    
+    def __len__(self) -> int:
+        return len(self.id_to_row)
+    
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self.id_to_row
+    
+    @property
+    def avg_doc_length(self) -> float:
+        return self._total_length / len(self.id_to_row) if self.id_to_row else 0.0
+    
+    def _grow(self, required: int):
+        """문서 길이/톰스톤 배열 2배 증설"""
+        if required <= self._doc_lengths.shape[0]:
+            return
+        capacity = max(1024, self._doc_lengths.shape[0])
+        while capacity < required:
+            capacity *= 2
+        doc_lengths = np.zeros(capacity, dtype=np.float32)
+        doc_lengths[:self._size] = self._doc_lengths[:self._size]
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:self._size] = self._alive[:self._size]
+        self._doc_lengths, self._alive = doc_lengths, alive
+    
+    def remove(self, doc_id: str) -> bool:
+        """문서 톰스톤 처리"""
+        row = self.id_to_row.pop(doc_id, None)
+        if row is None:
+            return False
+        self._alive[row] = False
+        self._total_length -= float(self._doc_lengths[row])
+        self._removed_rows.append(row)
+        return True
+    
+    def add_documents(self, ids: List[str], texts: List[str], text_hashes: Optional[List[str]] = None):
+        """문서 추가 (기존 ID는 교체). text_hashes를 주면 토큰 캐시 키로 재사용"""
+        self._grow(self._size + len(ids))
+        for i, (doc_id, text) in enumerate(zip(ids, texts)):
+            self.remove(doc_id)
+            row = self._size
+            tokens = tokenize(text, text_hash=text_hashes[i] if text_hashes else None)
+            counts = Counter(tokens)
+            for term, tf in counts.items():
+                term_id = self.vocab.get(term)
+                if term_id is None:
+                    term_id = self.vocab[term] = len(self._terms)
+                    self._terms.append(term)
+                rows, tfs = self._pending.setdefault(term_id, ([], []))
+                rows.append(row)
+                tfs.append(tf)
+                self._dirty_terms.add(term_id)
+            self._pending_postings += len(counts)
+            self.doc_ids.append(doc_id)
+            self.id_to_row[doc_id] = row
+            self._doc_lengths[row] = len(tokens)
+            self._alive[row] = True
+            self._total_length += len(tokens)
+            self._size += 1
+    
+    def _postings(self, term_id: int):
+        """용어의 (행, tf) 배열 (고정 + 대기)"""
+        rows, tfs = [], []
+        if term_id + 1 < self._term_offsets.shape[0]:
+            start, end = self._term_offsets[term_id], self._term_offsets[term_id + 1]
+            rows.append(self._post_rows[start:end])
+            tfs.append(self._post_tfs[start:end])
+        pending = self._pending.get(term_id)
+        if pending:
+            rows.append(np.asarray(pending[0], dtype=np.int32))
+            tfs.append(np.asarray(pending[1], dtype=np.float32))
+        if not rows:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+        if len(rows) == 1:
+            return rows[0], tfs[0]
+        return np.concatenate(rows), np.concatenate(tfs)
+    
+    def row_mask(self, doc_ids: Iterable[str]) -> np.ndarray:
+        """문서 ID 목록 -> 검색 허용 행 마스크 (search / search_rows의 allowed, 인덱스에 없는 ID는 무시)"""
+        mask = np.zeros(self._size, dtype=bool)
+        rows = [self.id_to_row[doc_id] for doc_id in doc_ids if doc_id in self.id_to_row]
+        mask[rows] = True
+        return mask
+    
+    def rows_mask(self, rows: np.ndarray) -> np.ndarray:
+        """행 번호 배열 -> 검색 허용 행 마스크 (ID 조회 없이 벡터화, 범위 밖 / 음수 행은 무시)"""
+        rows = np.asarray(rows)
+        mask = np.zeros(self._size, dtype=bool)
+        mask[rows[(rows >= 0) & (rows < self._size)]] = True
+        return mask
+    
+    def idf(self, doc_freq: int) -> float:
+        """Okapi BM25 IDF (음수 방지 +1 변형)"""
+        n = len(self.id_to_row)
+        return math.log(1.0 + (n - doc_freq + 0.5) / (doc_freq + 0.5))
+    
+    def score(self, query: str, allowed: Optional[np.ndarray] = None) -> np.ndarray:
+        """전체 문서 BM25 점수 (term-at-a-time 누적, 삭제 문서 / allowed 밖 문서는 0)"""
+        scores = np.zeros(self._size, dtype=np.float32)
+        if not self.id_to_row:
+            return scores
+        alive = self._alive[:self._size]
+        norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[:self._size] / max(self.avg_doc_length, 1e-9))
+        
+        for term, query_tf in Counter(tokenize(query)).items():
+            term_id = self.vocab.get(term)
+            if term_id is None:
+                continue
+            rows, tfs = self._postings(term_id)
+            live = alive[rows]
+            rows, tfs = rows[live], tfs[live]
+            if rows.size == 0:
+                continue
+            weight = self.idf(rows.size) * query_tf
+            scores[rows] += weight * tfs * (self.k1 + 1) / (tfs + norm[rows])
+        if allowed is not None:
+            scores[~allowed[:self._size]] = 0.0
+        return scores
+    
+    def search(self, query: str, topk: int = 100, prune: bool = True,
+               allowed: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        """BM25 검색 -> [{"id", "bm25"}] (점수 > 0만)
+        
+        prune=True면 MaxScore 조기 종료, False면 전수 스코어링 (결과 동일)
+        allowed(행 마스크, row_mask())를 주면 top-k 선정 전에 허용 행만 남긴다 (IDF는 전체 코퍼스 기준)
+        """
+        if prune:
+            rows, scores, _ = self.search_rows(query, topk, allowed)
+        else:
+            all_scores = self.score(query, allowed)
+            rows = top_k_indices(all_scores, topk)
+            scores = all_scores[rows]
+        return [{"id": self.doc_ids[row], "bm25": float(score)}
+                for row, score in zip(rows, scores) if score > 0]
+    
+    def _tf_component(self, rows: np.ndarray, tfs: np.ndarray, avg_length: float) -> np.ndarray:
+        """BM25 tf 성분 (IDF 제외)"""
+        norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[rows] / avg_length)
+        return tfs * (self.k1 + 1) / (tfs + norm)
+    
+    def _term_upper_bound(self, term_id: int, avg_length: float) -> float:
+        """용어 tf 성분의 상한 (IDF 제외)
+        
+        고정 postings는 컴팩션 시점 평균 길이 A0 기준 최댓값을 쓰며, 현재 평균 길이 A > A0이면
+        A/A0배 하면 여전히 상한이 된다. 대기 postings는 직접 계산한다.
+        """
+        bound = 0.0
+        if term_id < self._term_max_impact.shape[0]:
+            bound = float(self._term_max_impact[term_id]) * max(1.0, avg_length / max(self._bound_avg_length, 1e-9))
+        pending = self._pending.get(term_id)
+        if pending:
+            rows = np.asarray(pending[0], dtype=np.int64)
+            tfs = np.asarray(pending[1], dtype=np.float32)
+            bound = max(bound, float(self._tf_component(rows, tfs, avg_length).max()))
+        return bound
+    
+    def search_rows(self, query: str, topk: int = 100, allowed: Optional[np.ndarray] = None) -> tuple:
+        """MaxScore 동적 가지치기 top-k -> (행 번호, 점수, 스코어링한 postings 수)
+        
+        용어를 점수 상한 내림차순으로 누적하다가 남은 용어 상한의 합이 현재 k번째 점수보다
+        작아지면 새 후보 유입을 중단하고, 이후 용어는 기존 후보 행만 이분 탐색으로 조회한다.
+        후보 점수 + 남은 상한 < k번째 점수인 후보는 즉시 제외한다.
+        allowed 밖 행은 postings에서 미리 제외한다 (IDF / 상한은 필터 전 기준이므로 점수는 그대로).
+        """
+        empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32), 0)
+        if not self.id_to_row or topk <= 0:
+            return empty
+        alive = self._alive[:self._size]
+        has_tombstones = len(self.id_to_row) != self._size
+        avg_length = max(self.avg_doc_length, 1e-9)
+        
+        terms = []
+        for term, query_tf in Counter(tokenize(query)).items():
+            term_id = self.vocab.get(term)
+            if term_id is None:
+                continue
+            rows, tfs = self._postings(term_id)
+            if has_tombstones:
+                live = alive[rows]
+                rows, tfs = rows[live], tfs[live]
+            if rows.size == 0:
+                continue
+            weight = self.idf(rows.size) * query_tf
+            # float32 누적 오차 여유
+            bound = weight * self._term_upper_bound(term_id, avg_length) * (1 + 1e-6)
+            if allowed is not None:
+                keep = allowed[rows]
+                rows, tfs = rows[keep], tfs[keep]
+                if rows.size == 0:
+                    continue
+            terms.append((bound, weight, rows, tfs))
+        if not terms:
+            return empty
+        
+        terms.sort(key=lambda item: item[0], reverse=True)
+        # remaining[i] = i번째 이후 용어 상한 합
+        remaining = np.concatenate([np.cumsum([t[0] for t in terms][::-1])[::-1], [0.0]])
+        
+        scores = np.zeros(self._size, dtype=np.float32)
+        seen = np.zeros(self._size, dtype=bool)
+        touched = []  # 새로 등장한 후보 행 (중복 없음)
+        scored_postings = 0
+        i = 0
+        # 1단계: 필수 용어 — 새 후보를 만들 수 있는 동안 전체 postings 누적
+        while i < len(terms):
+            _, weight, rows, tfs = terms[i]
+            scores[rows] += weight * self._tf_component(rows, tfs, avg_length)
+            touched.append(rows[~seen[rows]])
+            seen[rows] = True
+            scored_postings += rows.size
+            i += 1
+            if i == len(terms):
+                break
+            candidates = np.concatenate(touched)
+            touched = [candidates]
+            if candidates.size >= topk:
+                threshold = np.partition(scores[candidates], candidates.size - topk)[candidates.size - topk]
+                if remaining[i] < threshold:
+                    break
+        
+        candidates = np.concatenate(touched)
+        # 2단계: 비필수 용어 — 남은 후보만 이분 탐색으로 보정
+        while i < len(terms) and candidates.size:
+            threshold = (np.partition(scores[candidates], candidates.size - topk)[candidates.size - topk]
+                         if candidates.size >= topk else 0.0)
+            candidates = candidates[scores[candidates] + remaining[i] >= threshold]
+            _, weight, rows, tfs = terms[i]
+            positions = np.searchsorted(rows, candidates)
+            positions[positions == rows.size] = 0
+            matched = rows[positions] == candidates
+            hit_rows, hit_tfs = candidates[matched], tfs[positions[matched]]
+            scores[hit_rows] += weight * self._tf_component(hit_rows, hit_tfs, avg_length)
+            scored_postings += hit_rows.size
+            i += 1
+        
+        top = candidates[top_k_indices(scores[candidates], topk)]
+        return top, scores[top], scored_postings
+    
+    def compact(self):
+        """대기 postings 병합 + 삭제 문서 제거 (행 번호 재부여, 명시적 유지보수 단계)
+
+        행 번호가 바뀌므로 다음 save()는 델타 대신 전체를 다시 기록한다.
+        """
+        alive_rows = np.flatnonzero(self._alive[:self._size])
+        remap = np.full(self._size, -1, dtype=np.int64)
+        remap[alive_rows] = np.arange(alive_rows.size)
+        
+        offsets = np.zeros(len(self.vocab) + 1, dtype=np.int64)
+        all_rows, all_tfs = [], []
+        for term_id in range(len(self.vocab)):
+            rows, tfs = self._postings(term_id)
+            new_rows = remap[rows]
+            keep = new_rows >= 0
+            all_rows.append(new_rows[keep].astype(np.int32))
+            all_tfs.append(tfs[keep])
+            offsets[term_id + 1] = offsets[term_id] + int(keep.sum())
+        
+        self._term_offsets = offsets
+        self._post_rows = np.concatenate(all_rows) if all_rows else np.zeros(0, dtype=np.int32)
+        self._post_tfs = np.concatenate(all_tfs) if all_tfs else np.zeros(0, dtype=np.float32)
+        self._pending = {}
+        self._pending_postings = 0
+        self.epoch += 1
+        self._base_token = None
+        self._dirty_terms = set()
+        self._removed_rows = []
+        
+        self.doc_ids = [self.doc_ids[row] for row in alive_rows]
+        self.id_to_row = {doc_id: row for row, doc_id in enumerate(self.doc_ids)}
+        doc_lengths = self._doc_lengths[alive_rows]
+        self._size = 0
+        self._doc_lengths = np.zeros(0, dtype=np.float32)
+        self._alive = np.zeros(0, dtype=bool)
+        self._grow(alive_rows.size)
+        self._doc_lengths[:alive_rows.size] = doc_lengths
+        self._alive[:alive_rows.size] = True
+        self._size = int(alive_rows.size)
+        self._total_length = float(doc_lengths.sum())
+        self._build_term_bounds()
+    
+    def _build_term_bounds(self):
+        """고정 postings의 용어별 최대 tf 성분 (reduceat)"""
+        num_terms = self._term_offsets.shape[0] - 1
+        self._term_max_impact = np.zeros(num_terms, dtype=np.float32)
+        self._bound_avg_length = max(self.avg_doc_length, 1e-9)
+        nonempty = np.diff(self._term_offsets) > 0
+        if not nonempty.any():
+            return
+        impacts = self._tf_component(self._post_rows, self._post_tfs, self._bound_avg_length)
+        self._term_max_impact[nonempty] = np.maximum.reduceat(impacts, self._term_offsets[:-1][nonempty])
+    
+    def needs_compaction(self) -> bool:
+        """대기 postings / 톰스톤 비율이나 델타 세그먼트 수가 임계값을 넘었는지"""
+        tombstones = self._size - len(self.id_to_row)
+        return (self._pending_postings > BM25_COMPACT_RATIO * max(self._post_rows.size, 1)
+                or tombstones > BM25_COMPACT_RATIO * max(self._size, 1)
+                or len(self._segments) >= BM25_MAX_SEGMENTS)
+    
+    def save(self, directory: str, compact: bool = False):
+        """디스크 저장 (매니페스트 원자적 교체, 기록한 변경이 있으면 인덱스 세대 증가)
+        
+        같은 디렉터리의 기본 배열이 그대로면 마지막 저장 이후 변경분만 델타 세그먼트로 추가하고,
+        임계값 초과(needs_compaction) / compact=True / 다른 기본 배열이면 컴팩션 후 전체를 기록한다.
+        """
+        os.makedirs(directory, exist_ok=True)
+        manifest_path = os.path.join(directory, "manifest.json")
+        previous = _read_manifest(manifest_path)
+        on_disk = (previous is not None and previous.get("format_version") == BM25_FORMAT_VERSION
+                   and previous["base"]["token"] == self._base_token
+                   and previous["segments"] == self._segments)
+        
+        if on_disk and not compact and not self.needs_compaction():
+            if self._size == self._saved_size and not self._removed_rows:
+                return
+            manifest = dict(previous, segments=self._segments + [self._write_segment(directory)])
+            _write_manifest(manifest_path, manifest)
+        else:
+            self.compact()
+            manifest = {
+                "format_version": BM25_FORMAT_VERSION,
+                "k1": self.k1,
+                "b": self.b,
+                "base": self._write_base(directory),
+                "segments": []
+            }
+            _write_manifest(manifest_path, manifest)
+            # 이전 기본 배열 / 델타 세그먼트 파일 정리
+            if previous and previous.get("format_version") == BM25_FORMAT_VERSION:
+                old_files = list(previous["base"]["files"].values()) + list(previous["segments"])
+            else:
+                old_files = list((previous or {}).get("files", {}).values())
+            for filename in old_files:
+                old_path = os.path.join(directory, filename)
+                if os.path.exists(old_path):
+                    os.remove(old_path)
+        
+        self._base_token = manifest["base"]["token"]
+        self._segments = list(manifest["segments"])
+        self._saved_size = self._size
+        self._saved_terms = len(self._terms)
+        self._dirty_terms = set()
+        self._removed_rows = []
+        # 재구축/증분 갱신 반영 -> 검색 결과 캐시 무효화
+        bump_index_generation()
+    
+    def _write_base(self, directory: str) -> Dict[str, Any]:
+        """컴팩션된 CSR 배열 + 문서 ID / 용어 목록 기록 -> 매니페스트 base 항목"""
+        token = uuid.uuid4().hex[:12]
+        arrays = {
+            "term_offsets": self._term_offsets,
+            "post_rows": self._post_rows,
+            "post_tfs": self._post_tfs,
+            "doc_lengths": self._doc_lengths[:self._size]
+        }
+        files = {}
+        for name, array in arrays.items():
+            files[name] = f"{name}-{token}.npy"
+            np.save(os.path.join(directory, files[name]), array)
+        files["meta"] = f"meta-{token}.json"
+        with open(os.path.join(directory, files["meta"]), "w", encoding="utf-8") as f:
+            json.dump({"doc_ids": self.doc_ids, "terms": self._terms}, f, ensure_ascii=False)
+        return {"token": token, "files": files}
+    
+    def _write_segment(self, directory: str) -> str:
+        """마지막 저장 이후 추가 문서 / 새 용어 / 대기 postings / 삭제 행 -> 델타 세그먼트 파일 이름"""
+        term_ids = np.array(sorted(self._dirty_terms), dtype=np.int32)
+        offsets = np.zeros(term_ids.size + 1, dtype=np.int64)
+        all_rows, all_tfs = [], []
+        for i, term_id in enumerate(term_ids):
+            rows, tfs = self._pending[int(term_id)]
+            start = bisect_left(rows, self._saved_size)
+            all_rows.extend(rows[start:])
+            all_tfs.extend(tfs[start:])
+            offsets[i + 1] = len(all_rows)
+        
+        filename = f"segment-{uuid.uuid4().hex[:12]}.npz"
+        tmp_path = os.path.join(directory, f"{filename}.tmp.npz")
+        np.savez(tmp_path,
+                 doc_ids=np.array(self.doc_ids[self._saved_size:self._size], dtype=str),
+                 doc_lengths=self._doc_lengths[self._saved_size:self._size],
+                 terms=np.array(self._terms[self._saved_terms:], dtype=str),
+                 term_ids=term_ids, offsets=offsets,
+                 rows=np.array(all_rows, dtype=np.int32), tfs=np.array(all_tfs, dtype=np.float32),
+                 removed=np.array(self._removed_rows, dtype=np.int64))
+        os.replace(tmp_path, os.path.join(directory, filename))
+        return filename
+    
+    def _apply_segment(self, data):
+        """델타 세그먼트 적용 (기록 순서대로: 문서 추가 -> postings -> 삭제)"""
+        start = self._size
+        new_ids = data["doc_ids"].tolist()
+        self._grow(start + len(new_ids))
+        self._doc_lengths[start:start + len(new_ids)] = data["doc_lengths"]
+        self._alive[start:start + len(new_ids)] = True
+        for offset, doc_id in enumerate(new_ids):
+            self.doc_ids.append(doc_id)
+            self.id_to_row[doc_id] = start + offset
+        self._size = start + len(new_ids)
+        
+        for term in data["terms"].tolist():
+            self.vocab[term] = len(self._terms)
+            self._terms.append(term)
+        offsets, rows, tfs = data["offsets"], data["rows"].tolist(), data["tfs"].tolist()
+        for i, term_id in enumerate(data["term_ids"].tolist()):
+            pending_rows, pending_tfs = self._pending.setdefault(term_id, ([], []))
+            pending_rows.extend(rows[offsets[i]:offsets[i + 1]])
+            pending_tfs.extend(tfs[offsets[i]:offsets[i + 1]])
+        self._pending_postings += len(rows)
+        
+        for row in data["removed"].tolist():
+            self._alive[row] = False
+            if self.id_to_row.get(self.doc_ids[row]) == row:
+                del self.id_to_row[self.doc_ids[row]]
+    
+    @classmethod
+    def load(cls, directory: str) -> Optional["InvertedBM25Index"]:
+        """디스크 로드 (기본 배열 + 델타 세그먼트, 없거나 손상되면 None)"""
+        manifest = _read_manifest(os.path.join(directory, "manifest.json"))
+        if not manifest or manifest.get("format_version") != BM25_FORMAT_VERSION:
+            return None
+        index = cls(k1=manifest["k1"], b=manifest["b"])
+        try:
+            files = manifest["base"]["files"]
+            arrays = {name: np.load(os.path.join(directory, filename))
+                      for name, filename in files.items() if name != "meta"}
+            with open(os.path.join(directory, files["meta"]), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            
+            index.doc_ids = list(meta["doc_ids"])
+            index.id_to_row = {doc_id: row for row, doc_id in enumerate(index.doc_ids)}
+            index._terms = list(meta["terms"])
+            index.vocab = {term: term_id for term_id, term in enumerate(index._terms)}
+            index._term_offsets = arrays["term_offsets"]
+            index._post_rows = arrays["post_rows"]
+            index._post_tfs = arrays["post_tfs"]
+            index._grow(len(index.doc_ids))
+            index._size = len(index.doc_ids)
+            index._doc_lengths[:index._size] = arrays["doc_lengths"]
+            index._alive[:index._size] = True
+            
+            for filename in manifest["segments"]:
+                with np.load(os.path.join(directory, filename), allow_pickle=False) as data:
+                    index._apply_segment(data)
+        except (OSError, ValueError, KeyError):
+            return None
+        
+        index._total_length = float(index._doc_lengths[:index._size][index._alive[:index._size]].sum())
+        index._base_token = manifest["base"]["token"]
+        index._segments = list(manifest["segments"])
+        index._saved_size = index._size
+        index._saved_terms = len(index._terms)
+        index._build_term_bounds()
+        return index
+
+
+def _read_manifest(path: str) -> Optional[Dict[str, Any]]:
+    """매니페스트 읽기 (없거나 손상되면 None)"""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
 
+def _write_manifest(path: str, manifest: Dict[str, Any]):
+    """매니페스트 원자적 교체"""
+    tmp_path = f"{path}.{uuid.uuid4().hex[:12]}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
 
 
+# 전역 코퍼스 인덱스
+_corpus_index = None
 
+def get_corpus_bm25_index(directory: Optional[str] = None) -> InvertedBM25Index:
+    """전체 코퍼스 BM25 인덱스 (프로세스 내 1회 로드)"""
+    global _corpus_index
+    if _corpus_index is None:
+        if directory is None:
+            from src.config.settings import settings
+            directory = settings.BM25_INDEX_DIR
+        _corpus_index = InvertedBM25Index.load(directory) or InvertedBM25Index()
+    return _corpus_index
@@ -1,21 +1,27 @@
-from sentence_transformers import SentenceTransformer
 import numpy as np
 
-# 싱글턴 모델 캐시
-_model = None
+from src.vector.model_registry import get_sentence_transformer
+from src.vector.micro_batcher import get_query_batcher
 
-def _get_model(name):
-    global _model
-    if _model is None:
-        _model = SentenceTransformer(name)
-    return _model
 
 class E5Embedder:
-    def __init__(self, model_name: str):
-        self.model = _get_model(model_name)
+    def __init__(self, model_name: str, device: str = None):
+        self.model_name = model_name
+        self.device = device
+        self._model = None
+    
+    @property
+    def model(self):
+        """공용 모델 (첫 사용 시 프로세스 레지스트리에서 로드, 모델 이름별로 공유)"""
+        if self._model is None:
+            self._model = get_sentence_transformer(self.model_name, self.device)
+        return self._model
     
     def encode_query(self, texts: list[str]) -> np.ndarray:
-        """쿼리 임베딩 (검색 시 사용)"""
+        """쿼리 임베딩 (검색 시 사용, 소량 요청은 공용 마이크로 배처에서 동시 요청과 함께 인코딩)"""
+        batcher = get_query_batcher(self.model_name, self.device)
+        if len(texts) <= batcher.max_batch:
+            return batcher.encode_many(texts)
         texts = [f"query: {t}" for t in texts]
         X = self.model.encode(texts, batch_size=32, normalize_embeddings=True)
         return X.astype(np.float32)
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+하이브리드 검색 점수 융합
+
+전략:
+    - rrf: Reciprocal Rank Fusion, Σ w / (rrf_k + 순위) — 점수 스케일 무관
+    - zscore: 목록별 (점수 - 평균) / 표준편차 후 가중합
+    - minmax: 목록별 (점수 - 최소) / (최대 - 최소) 후 가중합
+입력은 검색기별 상위 후보 순위 목록 [(문서 ID, 점수), ...] (점수 내림차순)이며, 후보 합집합에 대해서만
+계산하므로 전체 코퍼스 점수 배열을 만들지 않는다.
+zscore / minmax에서 어떤 목록에 없는 문서는 그 목록의 최저 정규화 점수를 받는다.
+목록 점수가 모두 같으면(히트 1개 등) 정규화할 수 없으므로 등장 문서 1.0, 누락 문서 0.0으로 둔다
+(그 목록의 신호가 사라지지 않도록).
+"""
+import heapq
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+
+FUSION_STRATEGIES = ("rrf", "zscore", "minmax")
+RRF_K = 60
+
+Ranking = Sequence[Tuple[str, float]]
+
+
+def _normalize(ranking: Ranking, strategy: str) -> Tuple[Dict[str, float], float]:
+    """zscore / minmax 목록 점수 정규화 -> (문서 ID별 점수, 누락 문서 점수)"""
+    scores = [float(score) for _, score in ranking]
+    low, high = min(scores), max(scores)
+    if high - low <= 1e-9:
+        # 점수가 모두 같음: 등장 여부만 신호로 사용
+        normalized, floor = [1.0] * len(scores), 0.0
+    elif strategy == "zscore":
+        mean = sum(scores) / len(scores)
+        std = math.sqrt(sum((score - mean) ** 2 for score in scores) / len(scores))
+        normalized = [(score - mean) / std for score in scores]
+        floor = min(normalized)
+    else:
+        normalized = [(score - low) / (high - low) for score in scores]
+        floor = 0.0
+    values = {}
+    for (doc_id, _), value in zip(ranking, normalized):
+        # 중복 ID는 첫 번째(최고 순위) 값 유지
+        values.setdefault(doc_id, value)
+    return values, floor
+
+
+def fuse(
+    rankings: Dict[str, Ranking],
+    strategy: str = "rrf",
+    weights: Optional[Dict[str, float]] = None,
+    top_k: Optional[int] = None,
+    rrf_k: int = RRF_K
+) -> List[Tuple[str, float]]:
+    """
+    순위 목록 융합
+
+    Args:
+        rankings: 검색기 이름 -> [(문서 ID, 점수), ...] (점수 내림차순)
+        strategy: rrf | zscore | minmax
+        weights: 검색기 이름 -> 가중치 (기본 1.0)
+        top_k: 반환할 개수 (None이면 전체)
+        rrf_k: RRF 순위 상수
+
+    Returns:
+        [(문서 ID, 융합 점수), ...] (융합 점수 내림차순)
+    """
+    if strategy not in FUSION_STRATEGIES:
+        raise ValueError(f"지원하지 않는 융합 전략: {strategy} (지원: {', '.join(FUSION_STRATEGIES)})")
+    weights = weights or {}
+
+    fused: Dict[str, float] = {}
+    floors = 0.0
+    for name, ranking in rankings.items():
+        if not ranking:
+            continue
+        weight = weights.get(name, 1.0)
+        if strategy == "rrf":
+            values = {}
+            for rank, (doc_id, _) in enumerate(ranking, start=1):
+                values.setdefault(doc_id, 1.0 / (rrf_k + rank))
+            floor = 0.0
+        else:
+            values, floor = _normalize(ranking, strategy)
+        # 누락 문서 기본값(floor)은 모든 문서에 더한 것으로 보고, 등장 문서는 차이만큼 보정
+        floors += weight * floor
+        for doc_id, value in values.items():
+            fused[doc_id] = fused.get(doc_id, 0.0) + weight * (value - floor)
+
+    items = ((doc_id, score + floors) for doc_id, score in fused.items())
+    if top_k is None:
+        return sorted(items, key=lambda item: item[1], reverse=True)
+    return heapq.nlargest(top_k, items, key=lambda item: item[1])
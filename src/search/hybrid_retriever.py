@@ -2,166 +2,239 @@
 # -*- coding: utf-8 -*-
 """
 하이브리드 검색 (BM25 + 벡터) 구현
+
+단계별 파이프라인 (쿼리 인코딩 1회):
+    1. encode: 쿼리 임베딩
+    2. candidates: 벡터 후보 / 코퍼스 BM25 후보를 병렬 생성 (같은 쿼리 벡터 재사용)
+    3. fusion: 순위 목록 융합 (rrf / zscore / minmax, 요청별 선택) — 벡터 1-alpha, BM25 alpha 가중
+    4. mmr: 저장된 후보 벡터로 MMR 다양화 (재인코딩 없음)
+단계별 소요 시간(ms)은 결과와 함께 반환되고 누적 통계로도 조회할 수 있다.
 """
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+
 import numpy as np
-from typing import List, Dict, Any, Optional
-from .bm25 import create_bm25_index
-from .retriever import retrieve, mmr_select
+
+from .bm25 import get_corpus_bm25_index
+from .fusion import fuse
+from .mmr import mmr_select
+
+PIPELINE_STAGES = ("encode", "vector", "bm25", "candidates", "fusion", "mmr", "total")
+
+
+def _corpus_bm25_hits(store, query: str, query_vector: np.ndarray, mask: Optional[np.ndarray],
+                      topk: int) -> List[Dict[str, Any]]:
+    """전체 코퍼스 BM25 상위 문서 (본문/메타데이터/저장 벡터/코사인 유사도 포함)
+
+    mask(스토어 where_mask() 결과)는 벡터 경로와 같은 마스크로 랭킹 전에 적용한다
+    (통과 문서만 BM25 top-k 후보가 됨).
+    """
+    from src.config.settings import settings
+    from simple_vector_store import bm25_row_map
+    index = get_corpus_bm25_index(settings.BM25_INDEX_DIR)
+
+    allowed = None
+    if mask is not None:
+        if not mask.any():
+            return []
+        # 스토어 행 -> BM25 행 매핑으로 허용 마스크를 벡터화 변환 (문서별 ID 조회 없음)
+        row_map = bm25_row_map(store, index)
+        size = min(mask.shape[0], row_map.shape[0])
+        allowed = index.rows_mask(row_map[:size][mask[:size]])
+
+    hits = []
+    for hit in index.search(query, topk=topk, allowed=allowed):
+        row = store.id_to_row.get(hit["id"])
+        if row is None:
+            continue
+        vector = store.embeddings[row]
+        hit.update({
+            "text": store.documents[row],
+            "meta": store.metadatas[row],
+            "vec": vector,
+            "sim": float(np.dot(vector, query_vector))
+        })
+        hits.append(hit)
+        if len(hits) >= topk:
+            break
+    return hits
+
+
+def _timed(func, *args) -> Tuple[Any, float]:
+    """(결과, 소요 ms)"""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+class HybridSearchPipeline:
+    """단계별 하이브리드 검색 파이프라인"""
+
+    def __init__(self, max_workers: int = 2):
+        # 벡터/BM25 후보 생성용 공용 스레드 풀 (numpy 연산은 GIL을 놓음)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hybrid")
+        self._lock = threading.Lock()
+        self._stage_totals = {stage: 0.0 for stage in PIPELINE_STAGES}
+        self._runs = 0
+
+    def candidates(self, query: str, where: Optional[Dict] = None, num_candidates: int = 24,
+                   query_vector: Optional[np.ndarray] = None) -> Tuple:
+        """1~2단계: 쿼리 인코딩 + 벡터/BM25 후보 -> (쿼리 벡터, 벡터 후보, BM25 후보, 단계별 ms)"""
+        from simple_vector_store import get_store, retrieve_by_vector
+
+        timings = {}
+        store = get_store()
+
+        # 1. 쿼리 인코딩 (1회, 호출자가 이미 인코딩했으면 생략)
+        if query_vector is None:
+            query_vector, timings["encode"] = _timed(lambda: store.embedder.encode_query([query])[0])
+        else:
+            query_vector, timings["encode"] = np.asarray(query_vector, dtype=np.float32), 0.0
+
+        # 2. 벡터 / BM25 후보 병렬 생성 (where 마스크는 한 번만 계산해 두 단계가 공유)
+        stage_start = time.perf_counter()
+        mask = store.where_mask(where)
+        vector_future = self.executor.submit(_timed, retrieve_by_vector, query_vector, where, num_candidates, mask)
+        bm25_future = self.executor.submit(_timed, _corpus_bm25_hits, store, query, query_vector, mask, num_candidates)
+        vector_hits, timings["vector"] = vector_future.result()
+        bm25_hits, timings["bm25"] = bm25_future.result()
+        timings["candidates"] = (time.perf_counter() - stage_start) * 1000
+        return query_vector, vector_hits, bm25_hits, timings
+
+    def run(
+        self,
+        query: str,
+        where: Optional[Dict] = None,
+        k: int = 8,
+        alpha: Optional[float] = None,
+        use_mmr: bool = True,
+        fusion: Optional[str] = None,
+        query_vector: Optional[np.ndarray] = None
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, float]]:
+        """하이브리드 검색 실행 -> (결과, 단계별 소요 ms)"""
+        from src.config.settings import settings
+
+        if alpha is None:
+            alpha = settings.RETRIEVAL_ALPHA
+        start = time.perf_counter()
+        query_vector, vector_hits, bm25_hits, timings = self.candidates(query, where, k * 3, query_vector)
+
+        # 3. 점수 융합
+        merged_hits, timings["fusion"] = _timed(
+            fuse_hits, vector_hits, bm25_hits, alpha, fusion or settings.FUSION_STRATEGY)
+
+        # 4. MMR 다양화 (저장된 후보 벡터 재사용)
+        if use_mmr and len(merged_hits) > k:
+            final_hits, timings["mmr"] = _timed(
+                mmr_rerank, query_vector, merged_hits[:k * 2], settings.MMR_LAMBDA, k)
+        else:
+            final_hits, timings["mmr"] = merged_hits[:k], 0.0
+        timings["total"] = (time.perf_counter() - start) * 1000
+
+        with self._lock:
+            self._runs += 1
+            for stage in PIPELINE_STAGES:
+                self._stage_totals[stage] += timings.get(stage, 0.0)
+        return final_hits, timings
+
+    def stats(self) -> Dict[str, Any]:
+        """누적 실행 수 / 단계별 평균 소요 ms"""
+        with self._lock:
+            runs = self._runs
+            return {
+                "runs": runs,
+                "avg_stage_ms": {stage: round(total / runs, 3) if runs else 0.0
+                                 for stage, total in self._stage_totals.items()}
+            }
+
+
+def fuse_hits(vector_hits: List[Dict[str, Any]], bm25_hits: List[Dict[str, Any]],
+              alpha: float, strategy: str = "minmax") -> List[Dict[str, Any]]:
+    """벡터 / BM25 후보 순위 목록 융합 -> 융합 점수(combo) 내림차순 히트"""
+    # BM25 점수 정규화 (응답 호환 필드)
+    if bm25_hits:
+        bm25_scores = [hit["bm25"] for hit in bm25_hits]
+        min_bm25 = min(bm25_scores)
+        bm25_range = max(bm25_scores) - min_bm25 + 1e-9
+        for hit in bm25_hits:
+            hit["bm25_norm"] = (hit["bm25"] - min_bm25) / bm25_range
+
+    vector_dict = {hit["id"]: hit for hit in vector_hits}
+    bm25_dict = {hit["id"]: hit for hit in bm25_hits}
+    fused = fuse(
+        {"vector": [(hit["id"], hit["sim"]) for hit in vector_hits],
+         "bm25": [(hit["id"], hit["bm25"]) for hit in bm25_hits]},
+        strategy=strategy,
+        weights={"vector": 1 - alpha, "bm25": alpha}
+    )
+
+    merged_hits = []
+    for doc_id, score in fused:
+        # 벡터 후보 우선, BM25로만 찾은 문서는 스토어에서 채운 값 사용
+        source = vector_dict.get(doc_id) or bm25_dict[doc_id]
+        bm25_hit = bm25_dict.get(doc_id, {})
+        merged_hits.append({
+            "id": doc_id,
+            "sim": source.get("sim", 0.0),
+            "bm25": bm25_hit.get("bm25", 0.0),
+            "bm25_norm": bm25_hit.get("bm25_norm", 0.0),
+            "combo": score,
+            "text": source.get("text", ""),
+            "meta": source.get("meta", {}),
+            "vec": source.get("vec")
+        })
+    return merged_hits
+
+
+def mmr_rerank(query_vector: np.ndarray, candidates: List[Dict[str, Any]],
+               lambda_div: float, k: int) -> List[Dict[str, Any]]:
+    """후보에 저장된 벡터로 MMR 선택"""
+    candidate_vectors = np.stack([np.asarray(hit["vec"], dtype=np.float32) for hit in candidates])
+    selected_indices = mmr_select(query_vector, candidate_vectors, lambda_div=lambda_div, topk=k)
+    return [candidates[i] for i in selected_indices]
+
+
+# 전역 파이프라인
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+def get_hybrid_pipeline() -> HybridSearchPipeline:
+    """프로세스 공용 하이브리드 파이프라인"""
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is None:
+            _pipeline = HybridSearchPipeline()
+        return _pipeline
+
 
 def hybrid_search(
-    query: str, 
-    where: Optional[Dict] = None, 
+    query: str,
+    where: Optional[Dict] = None,
     k: int = 8,
     alpha: Optional[float] = None,
-    use_mmr: bool = True
+    use_mmr: bool = True,
+    fusion: Optional[str] = None,
+    query_vector: Optional[np.ndarray] = None
 ) -> List[Dict[str, Any]]:
     """
     하이브리드 검색: BM25 + 벡터 검색
-    
+
     Args:
         query: 검색 쿼리
         where: 필터 조건
         k: 반환할 결과 수
         alpha: BM25 가중치 (None이면 settings에서 가져옴)
         use_mmr: MMR 다양화 사용 여부
-    
+        fusion: 점수 융합 전략 rrf | zscore | minmax (None이면 settings에서 가져옴)
+        query_vector: 이미 인코딩된 쿼리 벡터 (None이면 인코딩)
+
     Returns:
         검색 결과 리스트
     """
-    
-    # 설정에서 alpha 가져오기
-    if alpha is None:
-        from src.config.settings import settings
-        alpha = settings.RETRIEVAL_ALPHA
-    
-    # 1. 벡터 검색 (기존)
-    vector_hits = retrieve(query, where, k * 3)  # 더 많은 후보 수집
-    
-    if not vector_hits:
-        return []
-    
-    # 2. BM25 검색을 위한 문서 준비
-    docs_for_bm25 = []
-    for hit in vector_hits:
-        docs_for_bm25.append({
-            "id": hit["id"],
-            "text": hit["text"],
-            "meta": hit["meta"]
-        })
-    
-    # 3. BM25 인덱스 생성 및 검색
-    bm25_index = create_bm25_index(docs_for_bm25)
-    bm25_hits = bm25_index.search(query, topk=k * 3)
-    
-    # 4. BM25 점수 정규화
-    if bm25_hits:
-        bm25_scores = [hit["bm25"] for hit in bm25_hits]
-        min_bm25 = min(bm25_scores)
-        max_bm25 = max(bm25_scores)
-        bm25_range = max_bm25 - min_bm25 + 1e-9
-        
-        for hit in bm25_hits:
-            hit["bm25_norm"] = (hit["bm25"] - min_bm25) / bm25_range
-    else:
-        bm25_hits = []
-    
-    # 5. 벡터와 BM25 결과 병합
-    vector_dict = {hit["id"]: hit for hit in vector_hits}
-    bm25_dict = {hit["id"]: hit for hit in bm25_hits}
-    
-    # 모든 ID 수집
-    all_ids = set(vector_dict.keys()) | set(bm25_dict.keys())
-    
-    # 병합된 결과 생성
-    merged_hits = []
-    for doc_id in all_ids:
-        merged_hit = {
-            "id": doc_id,
-            "sim": 0.0,
-            "bm25": 0.0,
-            "bm25_norm": 0.0,
-            "combo": 0.0,
-            "text": "",
-            "meta": {}
-        }
-        
-        # 벡터 점수
-        if doc_id in vector_dict:
-            vec_hit = vector_dict[doc_id]
-            merged_hit.update({
-                "sim": vec_hit["sim"],
-                "text": vec_hit["text"],
-                "meta": vec_hit["meta"]
-            })
-        
-        # BM25 점수
-        if doc_id in bm25_dict:
-            bm25_hit = bm25_dict[doc_id]
-            merged_hit.update({
-                "bm25": bm25_hit["bm25"],
-                "bm25_norm": bm25_hit.get("bm25_norm", 0.0)
-            })
-        
-        # 조합 점수 계산
-        merged_hit["combo"] = (1 - alpha) * merged_hit["sim"] + alpha * merged_hit["bm25_norm"]
-        merged_hits.append(merged_hit)
-    
-    # 6. 조합 점수로 정렬
-    merged_hits.sort(key=lambda x: x["combo"], reverse=True)
-    
-    # 7. MMR 다양화 적용 (선택사항)
-    if use_mmr and len(merged_hits) > k:
-        # 상위 후보들에 대해 MMR 적용
-        top_candidates = merged_hits[:k * 2]
-        
-        # 실제 벡터 임베딩 추출
-        candidate_vectors = []
-        query_vector = None
-        
-        try:
-            from simple_vector_store import get_store
-            store = get_store()
-            
-            # 쿼리 벡터 생성
-            query_vector = store.embedder.encode_query([query])[0]
-            
-            # 후보 벡터들 추출
-            for hit in top_candidates:
-                # 실제 임베딩을 가져오거나 새로 생성
-                try:
-                    # 벡터 스토어에서 임베딩 조회 시도
-                    if hasattr(store, 'get_embedding'):
-                        embedding = store.get_embedding(hit["id"])
-                    else:
-                        # 임베딩이 없으면 새로 생성
-                        embedding = store.embedder.encode_docs([hit["text"]])[0]
-                    candidate_vectors.append(embedding)
-                except Exception as e:
-                    # 임베딩 추출 실패 시 sim 점수로 대체
-                    candidate_vectors.append([hit["sim"]])
-            
-            if candidate_vectors and query_vector is not None:
-                # 설정에서 MMR lambda 가져오기
-                from src.config.settings import settings
-                lambda_div = settings.MMR_LAMBDA
-                
-                selected_indices = mmr_select(
-                    query_vector, 
-                    candidate_vectors, 
-                    lambda_div=lambda_div, 
-                    topk=k
-                )
-                final_hits = [top_candidates[i] for i in selected_indices]
-            else:
-                final_hits = merged_hits[:k]
-                
-        except Exception as e:
-            # MMR 실패 시 상위 k개 반환
-            final_hits = merged_hits[:k]
-    else:
-        final_hits = merged_hits[:k]
-    
-    return final_hits
+    hits, _ = get_hybrid_pipeline().run(query, where, k, alpha, use_mmr, fusion, query_vector)
+    return hits
 
 def get_hybrid_search_stats() -> Dict[str, Any]:
     """하이브리드 검색 통계"""
@@ -171,5 +244,7 @@ def get_hybrid_search_stats() -> Dict[str, Any]:
         "alpha": settings.RETRIEVAL_ALPHA,
         "mmr_lambda": settings.MMR_LAMBDA,
         "mmr_enabled": True,
-        "description": "BM25 + 벡터 검색 조합"
+        "fusion_strategy": settings.FUSION_STRATEGY,
+        "description": "BM25 + 벡터 검색 조합",
+        "pipeline": get_hybrid_pipeline().stats()
     }
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MMR (Maximal Marginal Relevance) 공용 구현
+
+    score(i) = λ · relevance(i) − (1 − λ) · max_{j ∈ 선택됨} sim(i, j)
+
+후보 간 유사도 행렬을 한 번만 계산하고, 선택된 항목과의 최대 유사도 벡터를 매 라운드
+np.maximum으로 갱신하므로 각 라운드는 numpy argmax 1회다.
+"""
+from typing import List
+
+import numpy as np
+
+from src.vector.search_engine import normalize_rows
+
+
+def mmr_rank(relevance: np.ndarray, similarity: np.ndarray, k: int, lambda_param: float = 0.7) -> List[int]:
+    """
+    관련성 / 후보 간 유사도 행렬로 MMR 선택
+
+    Args:
+        relevance: 후보별 관련성 (n,)
+        similarity: 후보 간 유사도 (n, n)
+        k: 선택할 개수
+        lambda_param: 관련성 가중치 (1이면 관련성 순, 0이면 다양성만)
+
+    Returns:
+        선택 순서대로의 후보 인덱스
+    """
+    relevance = np.asarray(relevance, dtype=np.float32).ravel()
+    n = relevance.shape[0]
+    k = min(k, n)
+    if k <= 0:
+        return []
+
+    weighted_relevance = lambda_param * relevance
+    max_similarity = np.zeros(n, dtype=np.float32)
+    available = np.ones(n, dtype=bool)
+    # 첫 항목은 관련성 최고
+    scores = relevance.copy()
+    selected = []
+    for _ in range(k):
+        scores[~available] = -np.inf
+        i = int(np.argmax(scores))
+        selected.append(i)
+        available[i] = False
+        if len(selected) == 1:
+            max_similarity[:] = similarity[i]
+        else:
+            np.maximum(max_similarity, similarity[i], out=max_similarity)
+        scores = weighted_relevance - (1 - lambda_param) * max_similarity
+    return selected
+
+
+def mmr_select(query_vec, cand_vecs, lambda_div: float = 0.7, topk: int = 8) -> List[int]:
+    """임베딩 기반 MMR (코사인 유사도)"""
+    if len(cand_vecs) == 0:
+        return []
+    candidates = normalize_rows(np.asarray(cand_vecs, dtype=np.float32))
+    query = normalize_rows(np.asarray(query_vec, dtype=np.float32).ravel())
+    return mmr_rank(candidates @ query, candidates @ candidates.T, topk, lambda_div)
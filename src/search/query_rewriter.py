@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+질의 정규화 / 법률 동의어 확장
+
+동의어 사전은 모듈 로드 시 Aho-Corasick 오토마톤으로 1회 컴파일하고, 질의 1회 스캔(O(질의 길이 + 매칭 수))으로
+포함된 모든 용어를 찾는다 ("강제집행"처럼 겹치는 용어 "집행"도 함께 매칭).
+확장 결과는 질의별 LRU로 메모이즈하므로 반복 질의는 사전 조회 없이 반환된다.
+확장 결과는 기존 rewrite_query()와 같다: 사전 순서대로 매칭 용어의 동의어를 질의 뒤에 덧붙임.
+"""
+import os
+import re
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Optional, Sequence
+
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "4096"))
+
+# 법률 용어 동의어 사전
+LEGAL_SYNONYMS = {
+    "압류": ["채권압류", "추심", "압류명령"],
+    "지급명령": ["독촉절차", "지명채권", "지급명령신청"],
+    "강제집행": ["집행명령", "압류집행", "경매"],
+    "대여금": ["대출금", "차용금", "미수금"],
+    "투자금": ["출자금", "투자손실", "손해배상"],
+    "채권추심": ["채권회수", "미수금회수", "채권압류"],
+    "제3채무자": ["제3채무자통지", "채권압류통지"],
+    "소송": ["민사소송", "소송절차", "법원"],
+    "판결": ["승소", "패소", "판결문"],
+    "집행": ["강제집행", "집행절차", "압류집행"]
+}
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+class LRUMemo:
+    """크기 제한 메모 (스레드 안전, 히트 통계)"""
+
+    def __init__(self, max_size: int = QUERY_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[Any, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Any) -> Optional[Any]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Any, value: Any):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._entries), "max_size": self.max_size,
+                    "hits": self.hits, "misses": self.misses}
+
+
+class SynonymAutomaton:
+    """용어 집합 Aho-Corasick 오토마톤 (생성 시 1회 컴파일)"""
+
+    def __init__(self, terms: Sequence[str]):
+        self.terms = list(terms)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+
+        # 1. 트라이
+        for term_id, term in enumerate(self.terms):
+            node = 0
+            for char in term:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                node = next_node
+            self._output[node].append(term_id)
+
+        # 2. 실패 링크 (BFS), 출력은 실패 노드 출력과 합쳐 접미사 매칭까지 포함
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def find(self, text: str) -> List[int]:
+        """텍스트에 포함된 용어 ID (중복 없음, 사전 순서)"""
+        found = set()
+        node = 0
+        for char in text:
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            found.update(self._output[node])
+        return sorted(found)
+
+
+class QueryRewriter:
+    """질의 정규화 + 동의어 확장 (확장 결과 메모이즈)"""
+
+    def __init__(self, synonyms: Optional[Dict[str, List[str]]] = None, cache_size: int = QUERY_CACHE_SIZE):
+        self.synonyms = dict(LEGAL_SYNONYMS if synonyms is None else synonyms)
+        self._expansions = [tuple(values) for values in self.synonyms.values()]
+        self.automaton = SynonymAutomaton(list(self.synonyms))
+        self.memo = LRUMemo(cache_size)
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        """앞뒤 공백 제거 + 연속 공백 축약"""
+        return _WHITESPACE.sub(' ', query or '').strip()
+
+    def expand(self, query: str) -> str:
+        """정규화된 질의 + 매칭 용어 동의어 (사전 순서). 원본 질의를 키로 메모이즈해 히트 시 정규화도 생략"""
+        expanded = self.memo.get(query)
+        if expanded is None:
+            normalized = self.normalize(query)
+            terms = [synonym for term_id in self.automaton.find(normalized) for synonym in self._expansions[term_id]]
+            expanded = f"{normalized} {' '.join(terms)}" if terms else normalized
+            self.memo.put(query, expanded)
+        return expanded
+
+    __call__ = expand
+
+
+_rewriter: Optional[QueryRewriter] = None
+
+def get_query_rewriter() -> QueryRewriter:
+    """프로세스 공용 질의 리라이터 (법률 동의어 사전)"""
+    global _rewriter
+    if _rewriter is None:
+        _rewriter = QueryRewriter()
+    return _rewriter
+
+
+def rewrite_query(query: str) -> str:
+    """질의 리라이터 (법률 용어 확장)"""
+    return get_query_rewriter().expand(query)
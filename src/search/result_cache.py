@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+검색 결과 2계층 캐시 (인덱스 세대 기반 무효화)
+
+    - local: 프로세스 내 LRU (항목 수 / 직렬화 바이트 상한)
+    - shared: Redis 공유 계층 (src.infra.cache, redis 사용 불가 시 local만 사용)
+
+캐시 키에는 인덱스 세대 번호가 포함된다. 세대는 검색 결과를 바꾸는 모든 쓰기(벡터 스토어 업서트,
+SimpleVectorIndex 업서트/삭제/컴팩션/초기화, 코퍼스 BM25 인덱스 저장) 후 증가하고 Redis로 프로세스 간
+공유되므로, 문서가 바뀐 뒤에는 이전 세대 키가 다시 조회되지 않는다 (오래된 결과 히트 불가).
+Redis 세대 값은 INDEX_GENERATION_TTL초 동안 프로세스에 캐시한다 (검색마다 GET 왕복 없음) — 쓰기를 한
+프로세스는 즉시, 다른 프로세스는 최대 TTL 뒤에 새 세대를 본다.
+이전 세대 항목은 local에서는 LRU 축출로, shared에서는 TTL로 사라진다.
+"""
+import os
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+INDEX_GENERATION_KEY = "index:generation"
+INDEX_GENERATION_TTL = float(os.getenv("INDEX_GENERATION_TTL", "1.0"))  # Redis 세대 값 로컬 캐시 (초)
+
+_UNSET = object()
+_redis_client = _UNSET
+
+
+def _shared_client():
+    """Redis 클라이언트 (redis 미설치 / 연결 설정 실패 시 None, 결과는 1회만 판정)"""
+    global _redis_client
+    if _redis_client is _UNSET:
+        try:
+            from src.infra.kv import r
+            _redis_client = r
+        except Exception as e:
+            logger.info(f"Redis 공유 계층 비활성화: {e}")
+            _redis_client = None
+    return _redis_client
+
+
+def _to_json(value: Any) -> Any:
+    """numpy 값 JSON 변환"""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"JSON 직렬화 불가 타입: {type(value).__name__}")
+
+
+class IndexGeneration:
+    """인덱스 세대 번호 (Redis 공유 + ttl초 로컬 캐시, 불가 시 프로세스 로컬)"""
+
+    def __init__(self, ttl: float = INDEX_GENERATION_TTL):
+        self.ttl = ttl
+        self._local = 0
+        self._shared: Optional[int] = None  # 마지막으로 읽은 Redis 세대
+        self._shared_at = 0.0  # 읽은 시각 (monotonic)
+        self._lock = threading.Lock()
+
+    def _remember(self, value: int, read_at: float):
+        """Redis 세대 캐시 갱신 (더 나중에 읽은 값이 이미 있으면 유지)"""
+        with self._lock:
+            if self._shared is None or read_at >= self._shared_at:
+                self._shared, self._shared_at = value, read_at
+
+    def current(self) -> str:
+        """현재 세대 ("r<n>": Redis 공유, "l<n>": 로컬 — 출처가 바뀌어도 키가 겹치지 않음)"""
+        client = _shared_client()
+        if client is not None:
+            now = time.monotonic()
+            with self._lock:
+                if self._shared is not None and now - self._shared_at < self.ttl:
+                    return f"r{self._shared}"
+            try:
+                value = int(client.get(INDEX_GENERATION_KEY) or 0)
+            except Exception:
+                pass
+            else:
+                self._remember(value, now)
+                return f"r{value}"
+        with self._lock:
+            return f"l{self._local}"
+
+    def bump(self) -> str:
+        """세대 증가 (검색 결과를 바꾸는 쓰기 후 호출) -> 새 세대"""
+        with self._lock:
+            self._local += 1
+        client = _shared_client()
+        if client is not None:
+            try:
+                self._remember(int(client.incr(INDEX_GENERATION_KEY)), time.monotonic())
+            except Exception as e:
+                with self._lock:
+                    self._shared = None  # 다음 조회에서 다시 읽거나 로컬 세대로 전환
+                logger.warning(f"공유 인덱스 세대 갱신 실패 (다른 프로세스 캐시는 TTL까지 유지): {e}")
+        return self.current()
+
+
+# 프로세스 공용 인덱스 세대
+index_generation = IndexGeneration()
+
+def current_index_generation() -> str:
+    return index_generation.current()
+
+def bump_index_generation() -> str:
+    return index_generation.bump()
+
+
+class ResultCache:
+    """검색 결과 2계층 캐시 (local LRU + shared Redis)"""
+
+    def __init__(
+        self,
+        namespace: str,
+        max_entries: int = 512,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl: int = 900,
+        generation: Optional[IndexGeneration] = None,
+        shared: bool = True
+    ):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.generation = generation or index_generation
+        self.shared = shared
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    def _keyed(self, payload: Dict[str, Any], generation: Optional[str]) -> Tuple[str, Dict[str, Any]]:
+        """(local 키, 세대 포함 shared 페이로드)"""
+        keyed = dict(payload, gen=generation or self.generation.current())
+        return json.dumps(keyed, sort_keys=True, ensure_ascii=False), keyed
+
+    def _shared_backend(self):
+        if not self.shared or _shared_client() is None:
+            return None
+        try:
+            from src.infra import cache
+            return cache
+        except Exception:
+            return None
+
+    def _put_local(self, key: str, data: Dict[str, Any], size: int):
+        if self.max_entries <= 0 or size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (data, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def lookup(self, payload: Dict[str, Any], generation: Optional[str] = None) -> Tuple[Optional[Dict[str, Any]], str]:
+        """
+        캐시 조회 (local -> shared 순, shared 히트는 local에 채움) -> (데이터, "local" | "shared" | "miss")
+
+        generation을 생략하면 현재 세대를 읽는다. 미스 후 검색 결과를 set()할 때는 검색 전에 읽은 같은 세대를
+        넘겨야 검색 도중 업서트가 일어나도 이전 결과가 새 세대 키로 저장되지 않는다. 반환값은 수정하지 말 것.
+        """
+        key, keyed = self._keyed(payload, generation)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.local_hits += 1
+                return entry[0], "local"
+
+        backend = self._shared_backend()
+        if backend is not None:
+            data = backend.cache_get(self.namespace, keyed)
+            if data is not None:
+                self._put_local(key, data, len(json.dumps(data, ensure_ascii=False).encode("utf-8")))
+                with self._lock:
+                    self.shared_hits += 1
+                return data, "shared"
+
+        with self._lock:
+            self.misses += 1
+        return None, "miss"
+
+    def get(self, payload: Dict[str, Any], generation: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """캐시 조회 (미스면 None)"""
+        return self.lookup(payload, generation)[0]
+
+    def set(self, payload: Dict[str, Any], data: Dict[str, Any], generation: Optional[str] = None) -> Dict[str, Any]:
+        """세대 키로 두 계층에 저장 -> 저장된 JSON 호환 사본 (numpy 값은 리스트/스칼라로 변환)"""
+        key, keyed = self._keyed(payload, generation)
+        encoded = json.dumps(data, ensure_ascii=False, default=_to_json)
+        plain = json.loads(encoded)
+        self._put_local(key, plain, len(encoded.encode("utf-8")))
+
+        backend = self._shared_backend()
+        if backend is not None:
+            backend.cache_set(self.namespace, keyed, plain, ttl=self.ttl)
+        return plain
+
+    def clear(self):
+        """local 계층 비우기 (shared는 세대 증가로 무효화)"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.local_hits = self.shared_hits = self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """계층별 히트 / 적중률 / local 메모리 사용량"""
+        generation = self.generation.current()
+        shared_enabled = self._shared_backend() is not None
+        with self._lock:
+            lookups = self.local_hits + self.shared_hits + self.misses
+            return {
+                "namespace": self.namespace,
+                "generation": generation,
+                "local": {"entries": len(self._entries), "max_entries": self.max_entries,
+                          "bytes": self._bytes, "max_bytes": self.max_bytes, "hits": self.local_hits},
+                "shared": {"enabled": shared_enabled, "hits": self.shared_hits},
+                "misses": self.misses,
+                "hit_rate": round((self.local_hits + self.shared_hits) / lookups, 4) if lookups else 0.0
+            }
+
+
+_caches: Dict[str, ResultCache] = {}
+_caches_lock = threading.Lock()
+
+def get_result_cache(namespace: str = "search") -> ResultCache:
+    """네임스페이스별 공용 결과 캐시 (크기/TTL은 settings)"""
+    from src.config.settings import settings
+    with _caches_lock:
+        if namespace not in _caches:
+            _caches[namespace] = ResultCache(
+                namespace,
+                max_entries=settings.RESULT_CACHE_SIZE,
+                max_bytes=int(settings.RESULT_CACHE_MAX_MB * 1024 * 1024),
+                ttl=settings.RESULT_CACHE_TTL
+            )
+        return _caches[namespace]
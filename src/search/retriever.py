@@ -1,9 +1,13 @@
 from typing import List, Tuple, Optional, Dict, Any
 import numpy as np, math
 from src.search.embedding import E5Embedder
+from src.search.tokenizer import get_tokenizer
+from src.search.mmr import mmr_select  # 공용 벡터화 MMR (하위 호환 re-export)
 # ChromaDB 대신 간단한 벡터 스토어 사용
 try:
     from simple_vector_store import retrieve as simple_retrieve
+    from simple_vector_store import retrieve_many as simple_retrieve_many
+    from simple_vector_store import retrieve_by_vector as simple_retrieve_by_vector
     USE_SIMPLE_STORE = True
 except ImportError:
     from src.search.store import get_collection
@@ -25,40 +29,30 @@ except Exception:
 def cosine(a, b): 
     return float(np.dot(a, b) / (np.linalg.norm(a)*np.linalg.norm(b) + 1e-9))
 
-def mmr_select(query_vec, cand_vecs, lambda_div=0.7, topk=8):
-    selected, remaining = [], list(range(len(cand_vecs)))
-    if not remaining: return []
-    # 1st: 최고 유사도 후보
-    sims = [cosine(query_vec, v) for v in cand_vecs]
-    selected.append(int(np.argmax(sims))); remaining.remove(selected[0])
-    while len(selected) < min(topk, len(cand_vecs)):
-        best_i, best_score = None, -1e9
-        for i in remaining:
-            rel = cosine(query_vec, cand_vecs[i])
-            div = max(cosine(cand_vecs[i], cand_vecs[j]) for j in selected) if selected else 0
-            score = lambda_div*rel - (1-lambda_div)*div
-            if score > best_score: best_i, best_score = i, score
-        selected.append(best_i); remaining.remove(best_i)
-    return selected
-
-def retrieve(query: str, where: dict|None=None, k: int|None=None, use_hybrid: bool = True) -> List[dict]:
+def retrieve(query: str, where: dict|None=None, k: int|None=None, use_hybrid: bool = True,
+             fusion: str|None=None, query_vector: np.ndarray|None=None) -> List[dict]:
+    """검색 (query_vector를 주면 쿼리 인코딩 생략 — 의미 캐시 조회에 쓴 임베딩 재사용)"""
     k = k or settings.RETRIEVAL_K
     
-    # 하이브리드 검색 사용 (BM25 + 벡터)
-    if use_hybrid and HYBRID_ENABLED:
+    # 하이브리드 검색 사용 (BM25 + 벡터, 간단한 벡터 스토어 기반 파이프라인)
+    if use_hybrid and HYBRID_ENABLED and USE_SIMPLE_STORE:
         try:
-            return hybrid_search(query, where, k)
+            return hybrid_search(query, where, k, fusion=fusion, query_vector=query_vector)
         except Exception as e:
             print(f"⚠️ 하이브리드 검색 실패, 벡터 검색으로 폴백: {e}")
     
     # 간단한 벡터 스토어 사용
     if USE_SIMPLE_STORE:
+        if query_vector is not None:
+            return simple_retrieve_by_vector(query_vector, where, k)
         return simple_retrieve(query, where, k)
     
     # ChromaDB 사용 (기존 코드)
     col = get_collection()
-    em = E5Embedder(settings.EMBED_MODEL)
-    qv = em.encode_query([query])[0]
+    if query_vector is not None:
+        qv = np.asarray(query_vector, dtype=np.float32)
+    else:
+        qv = E5Embedder(settings.EMBED_MODEL).encode_query([query])[0]
 
     # 1) 벡터 후보(최종 k의 ≥3배)
     cand = max(k*settings.CAND_MULTIPLIER, k)
@@ -78,12 +72,8 @@ def retrieve(query: str, where: dict|None=None, k: int|None=None, use_hybrid: bo
 
     # (선택) BM25 하이브리드
     if settings.USE_BM25 and BM25Okapi:
-        # 한국어 토크나이저 개선 (간단한 형태소 분할 시뮬레이션)
-        def korean_tokenize(text):
-            # 공백 + 문장부호 기준으로 토큰화 (향후 kiwi/kss로 교체 가능)
-            import re
-            tokens = re.findall(r'\b\w+\b', text)
-            return [t for t in tokens if len(t) > 1]  # 1글자 토큰 제거
+        # 공용 한국어 토크나이저 (word 모드, 1글자 토큰 제거, 청크별 캐시)
+        korean_tokenize = get_tokenizer("word")
         
         corpus = [korean_tokenize(u["text"]) for u in uniq]
         bm = BM25Okapi(corpus)
@@ -116,3 +106,11 @@ def retrieve(query: str, where: dict|None=None, k: int|None=None, use_hybrid: bo
     for u in picked:
         u["sim"] = cosine(qv, u["vec"])
     return picked
+
+def retrieve_many(queries: List[str], where: dict|None=None, k: int|None=None) -> List[List[dict]]:
+    """다중 쿼리 벡터 검색 (간단한 벡터 스토어: 인코딩 1회 + 행렬 곱 1회)"""
+    k = k or settings.RETRIEVAL_K
+    if USE_SIMPLE_STORE:
+        return simple_retrieve_many(queries, where, k)
+    # ChromaDB 경로는 쿼리별 파이프라인 유지
+    return [retrieve(q, where, k, use_hybrid=False) for q in queries]
@@ -2,12 +2,20 @@
 # -*- coding: utf-8 -*-
 """
 검색 서비스 모듈
+
+질의 처리 순서:
+    1. 정규화 + 법률 동의어 확장 (Aho-Corasick 사전, 확장 결과 메모이즈)
+    2. 확장 질의 임베딩 (서비스별 LRU 메모 -> 임베딩 캐시 -> 모델 순, 반복 질의는 인코더 생략)
+    3. 벡터 검색 (+ 원 질의로 Cross-Encoder 리랭킹)
 """
 import os
 import logging
 from typing import List, Dict, Optional, Any
+import numpy as np
 from ..vector.simple_index import SimpleVectorIndex
+from ..vector.embedder import EmbeddingService
 from ..vector.reranker import TwoStageRetriever, CrossEncoderReranker
+from .query_rewriter import LRUMemo, get_query_rewriter
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
@@ -21,27 +29,55 @@ class SearchService:
                  index_name: str = "naver_blog_debt_collection",
                  index_directory: str = "./src/data/indexes/default/simple",
                  top_k_first: int = 20,
-                 top_k_final: int = 6):
+                 top_k_final: int = 6,
+                 rewrite_queries: bool = True,
+                 embedding_service: Optional[EmbeddingService] = None,
+                 reranker: Optional[CrossEncoderReranker] = None):
         self.index_name = index_name
         self.index_directory = index_directory
         self.top_k_first = top_k_first
         self.top_k_final = top_k_final
         
+        # 질의 정규화/확장 + 확장 질의 임베딩 메모 (임베딩 모델은 서비스별이므로 메모도 서비스별)
+        self.rewrite_queries = rewrite_queries
+        self.query_rewriter = get_query_rewriter()
+        self.query_embeddings = LRUMemo()
+        
         # 벡터 인덱스 초기화
         self.vector_index = SimpleVectorIndex(
             index_name=index_name,
-            persist_directory=index_directory
+            persist_directory=index_directory,
+            embedding_service=embedding_service
         )
         
         # 2단계 검색기 초기화
         self.retriever = TwoStageRetriever(
             vector_index=self.vector_index,
+            reranker=reranker,
             top_k_first=top_k_first,
             top_k_final=top_k_final
         )
         
         logger.info(f"SearchService 초기화 완료: {index_name}")
     
+    def expand_query(self, query: str) -> str:
+        """정규화 + 동의어 확장 (rewrite_queries=False면 정규화만)"""
+        if self.rewrite_queries:
+            return self.query_rewriter.expand(query)
+        return self.query_rewriter.normalize(query)
+    
+    def embed_queries(self, queries: List[str]) -> np.ndarray:
+        """확장 질의 임베딩 행렬 (메모 미스만 배치 인코딩)"""
+        expanded = [self.expand_query(query) for query in queries]
+        vectors = [self.query_embeddings.get(text) for text in expanded]
+        missing = sorted({text for text, vector in zip(expanded, vectors) if vector is None})
+        if missing:
+            computed = dict(zip(missing, self.vector_index.embedding_service.get_embeddings_batch(missing)))
+            for text, vector in computed.items():
+                self.query_embeddings.put(text, np.asarray(vector, dtype=np.float32))
+            vectors = [computed[text] if vector is None else vector for text, vector in zip(expanded, vectors)]
+        return np.vstack(vectors)
+    
     def search(self, query: str, 
                top_k: Optional[int] = None,
                law_topic: Optional[str] = None,
@@ -53,12 +89,16 @@ class SearchService:
             if law_topic:
                 where_filter = {"law_topic": law_topic}
             
+            # 확장 질의 임베딩 (반복 질의는 인코더 생략)
+            query_embedding = self.embed_queries([query])[0]
+            
             # 검색 실행
             if use_rerank:
                 # 2단계 검색 (벡터 + 리랭킹)
                 results = self.retriever.search_with_rerank(
                     query=query,
-                    where_filter=where_filter
+                    where_filter=where_filter,
+                    query_embedding=query_embedding
                 )
                 
                 # top_k가 지정된 경우 추가 제한
@@ -66,8 +106,8 @@ class SearchService:
                     results = results[:top_k]
             else:
                 # 1단계 검색만 (벡터 검색)
-                results = self.vector_index.search(
-                    query=query,
+                results = self.vector_index.search_by_vector(
+                    query_embedding,
                     top_k=top_k or self.top_k_final,
                     where_filter=where_filter
                 )
@@ -85,6 +125,49 @@ class SearchService:
             logger.error(f"검색 오류: {e}")
             return []
     
+    def search_many(self, queries: List[str],
+                    top_k: Optional[int] = None,
+                    law_topic: Optional[str] = None,
+                    use_rerank: bool = True) -> List[List[Dict[str, Any]]]:
+        """다중 쿼리 검색 (쿼리 인코딩 1회, 행렬-행렬 곱 1회, 리랭킹 1회 배치)
+        
+        인코더/인덱스 오류는 빈 결과로 삼키지 않고 호출자(API 라우트)로 전달한다.
+        """
+        try:
+            where_filter = {"law_topic": law_topic} if law_topic else None
+            if not queries:
+                return []
+            query_embeddings = self.embed_queries(queries)
+            
+            if use_rerank:
+                results_list = self.retriever.search_many_with_rerank(
+                    queries=queries,
+                    where_filter=where_filter,
+                    query_embeddings=query_embeddings
+                )
+                if top_k is not None:
+                    results_list = [results[:top_k] for results in results_list]
+            else:
+                results_list = self.vector_index.search_many_by_vector(
+                    query_embeddings,
+                    top_k=top_k or self.top_k_final,
+                    where_filter=where_filter
+                )
+                
+                # 결과 포맷 통일
+                for results in results_list:
+                    for i, result in enumerate(results):
+                        result["search_rank"] = i + 1
+                        result["vector_score"] = result.get("similarity", 0.0)
+                        result["final_score"] = result.get("similarity", 0.0)
+            
+            logger.info(f"다중 검색 완료: {len(queries)}개 쿼리")
+            return results_list
+            
+        except Exception as e:
+            logger.error(f"다중 검색 오류: {e}")
+            raise
+    
     def search_by_law_topic(self, query: str, law_topic: str = "채권추심") -> List[Dict[str, Any]]:
         """법률 주제별 검색"""
         return self.search(query, law_topic=law_topic)
@@ -119,6 +202,11 @@ class SearchService:
                 "top_k_final": self.top_k_final,
                 "index_name": self.index_name
             }
+            stats["query_rewrite"] = {
+                "expanded_query": self.expand_query(query),
+                "expansion_cache": self.query_rewriter.memo.stats(),
+                "embedding_cache": self.query_embeddings.stats()
+            }
             
             return stats
             
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+의미 기반 쿼리 캐시 (근사 중복 쿼리)
+
+"지급명령 신청 방법" / "지급명령 신청 절차"처럼 표현만 다른 쿼리는 정확 키 캐시(result_cache)에서 모두 미스가 난다.
+최근 쿼리 임베딩을 작은 사전 할당 행렬에 두고, 새 쿼리와의 코사인 유사도가 임계값 이상이면 그 쿼리의 결과
+(검색 결과 또는 생성 초안)를 돌려준다.
+
+    - 컨텍스트 키(where / k / 프롬프트 버전 / 인덱스 세대 등)가 같은 항목끼리만 매칭
+    - TTL 만료 + LRU 축출 (용량 초과 시 마지막 사용이 가장 오래된 슬롯 재사용)
+    - 조회 1회 = (용량 × 차원) 행렬-벡터 곱 1회
+    - 오탐(false hit) 측정: verify_rate 비율로 히트를 실제 결과와 비교해 record_verification()으로 기록
+"""
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from src.vector.search_engine import normalize_rows
+
+
+@dataclass
+class SemanticHit:
+    """의미 캐시 히트"""
+    value: Any
+    query: str  # 캐시된 원래 쿼리
+    similarity: float
+
+
+def context_key(**params) -> str:
+    """매칭 범위를 정하는 컨텍스트 키 (정렬된 JSON)"""
+    return json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def result_overlap(cached_ids: Sequence[str], fresh_ids: Sequence[str]) -> float:
+    """두 결과 ID 목록의 겹침 비율 (|교집합| / 실제 결과 수)"""
+    if not fresh_ids:
+        return 1.0 if not cached_ids else 0.0
+    return len(set(cached_ids) & set(fresh_ids)) / len(set(fresh_ids))
+
+
+class SemanticCache:
+    """쿼리 임베딩 근사 매칭 캐시 (스레드 안전)"""
+
+    def __init__(self, name: str, capacity: int = 256, threshold: float = 0.95, ttl: float = 900,
+                 verify_rate: float = 0.0):
+        self.name = name
+        self.capacity = capacity
+        self.threshold = threshold
+        self.ttl = ttl
+        self.verify_rate = verify_rate
+        self._vectors: Optional[np.ndarray] = None  # (capacity, dim), 첫 저장 시 할당
+        self._valid = np.zeros(capacity, dtype=bool)
+        self._expires = np.zeros(capacity, dtype=np.float64)
+        self._last_used = np.zeros(capacity, dtype=np.float64)
+        self._context_hashes = np.zeros(capacity, dtype=np.int64)
+        self._contexts: List[Optional[str]] = [None] * capacity
+        self._queries: List[Optional[str]] = [None] * capacity
+        self._values: List[Any] = [None] * capacity
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.verified = 0
+        self.false_hits = 0
+
+    def _live_mask(self, context: str, now: float) -> np.ndarray:
+        return self._valid & (self._expires > now) & (self._context_hashes == hash(context))
+
+    def lookup(self, query_vector: np.ndarray, context: str = "") -> Optional[SemanticHit]:
+        """컨텍스트가 같은 유효 항목 중 코사인 유사도 최고 항목이 임계값 이상이면 히트"""
+        if self.capacity <= 0:
+            return None
+        query = normalize_rows(np.asarray(query_vector, dtype=np.float32).ravel())
+        now = time.time()
+        with self._lock:
+            if self._vectors is None or self._vectors.shape[1] != query.shape[0]:
+                self.misses += 1
+                return None
+            mask = self._live_mask(context, now)
+            if not mask.any():
+                self.misses += 1
+                return None
+            similarities = self._vectors @ query
+            similarities[~mask] = -np.inf
+            slot = int(np.argmax(similarities))
+            similarity = float(similarities[slot])
+            if similarity < self.threshold or self._contexts[slot] != context:
+                self.misses += 1
+                return None
+            self._last_used[slot] = now
+            self.hits += 1
+            return SemanticHit(self._values[slot], self._queries[slot], similarity)
+
+    def put(self, query: str, query_vector: np.ndarray, value: Any, context: str = ""):
+        """저장 (같은 쿼리/컨텍스트는 덮어쓰기, 빈 슬롯 -> 만료 슬롯 -> LRU 슬롯 순으로 재사용)"""
+        if self.capacity <= 0:
+            return
+        vector = normalize_rows(np.asarray(query_vector, dtype=np.float32).ravel())
+        now = time.time()
+        with self._lock:
+            if self._vectors is None or self._vectors.shape[1] != vector.shape[0]:
+                # 최초 저장 또는 임베딩 차원 변경 (모델 교체) 시 전체 초기화
+                self._vectors = np.zeros((self.capacity, vector.shape[0]), dtype=np.float32)
+                self._valid[:] = False
+
+            live = self._valid & (self._expires > now)
+            same = [i for i in np.flatnonzero(live)
+                    if self._queries[i] == query and self._contexts[i] == context]
+            if same:
+                slot = same[0]
+            elif not live.all():
+                slot = int(np.argmin(live))  # 첫 빈/만료 슬롯
+            else:
+                slot = int(np.argmin(self._last_used))
+
+            self._vectors[slot] = vector
+            self._valid[slot] = True
+            self._expires[slot] = now + self.ttl
+            self._last_used[slot] = now
+            self._context_hashes[slot] = hash(context)
+            self._contexts[slot] = context
+            self._queries[slot] = query
+            self._values[slot] = value
+
+    def should_verify(self) -> bool:
+        """이번 히트를 실제 결과와 비교할지 (verify_rate 샘플링)"""
+        return self.verify_rate > 0 and random.random() < self.verify_rate
+
+    def record_verification(self, agreed: bool):
+        """샘플 검증 결과 기록 (agreed=False면 오탐)"""
+        with self._lock:
+            self.verified += 1
+            if not agreed:
+                self.false_hits += 1
+
+    def clear(self):
+        with self._lock:
+            self._valid[:] = False
+            self._values = [None] * self.capacity
+            self.hits = self.misses = self.verified = self.false_hits = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """히트 / 오탐 지표"""
+        now = time.time()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "entries": int((self._valid & (self._expires > now)).sum()),
+                "capacity": self.capacity,
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "verified": self.verified,
+                "false_hits": self.false_hits,
+                "false_hit_rate": round(self.false_hits / self.verified, 4) if self.verified else 0.0
+            }
+
+
+_caches: Dict[str, SemanticCache] = {}
+_caches_lock = threading.Lock()
+
+def get_semantic_cache(name: str = "search") -> SemanticCache:
+    """이름별 공용 의미 캐시 (용량/임계값/TTL/검증 비율은 settings)"""
+    from src.config.settings import settings
+    with _caches_lock:
+        if name not in _caches:
+            _caches[name] = SemanticCache(
+                name,
+                capacity=settings.SEMANTIC_CACHE_SIZE,
+                threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+                ttl=settings.SEMANTIC_CACHE_TTL,
+                verify_rate=settings.SEMANTIC_CACHE_VERIFY_RATE
+            )
+        return _caches[name]
+
+
+def encode_cache_query(text: str) -> np.ndarray:
+    """캐시 조회용 쿼리 임베딩 (검색과 같은 E5 쿼리 인코딩 — 미스 시 retrieve(query_vector=)로 재사용)"""
+    from src.config.settings import settings
+    from src.search.embedding import E5Embedder
+    return E5Embedder(settings.EMBED_MODEL).encode_query([text])[0]
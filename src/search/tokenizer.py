@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+한국어 공용 토크나이저
+
+모드:
+    - word: HTML 태그/특수문자 제거 후 공백 분리 (min_length 미만 토큰 제외) — BM25, 벡터 검색 하이브리드, 표절 검사
+    - bigram: 공백 제거 + 소문자화 후 문자 bi-gram — ingest 스크립트 BM25
+    - mixed: 어절별 bi-gram + 어절 원형 — 웹 API BM25
+
+정규식은 모듈 로드 시 1회 컴파일하고, 토큰 스트림은 (모드, 콘텐츠 해시) 키로 프로세스 공용 LRU 캐시에
+저장해 인덱싱 / BM25 / 표절 검사가 같은 청크의 토큰화를 재사용한다.
+word 모드는 1글자 토큰까지 포함한 스트림을 캐시하고 min_length 필터만 호출 시 적용한다.
+"""
+import os
+import re
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "20000"))
+TOKENIZER_MODES = ("word", "bigram", "mixed")
+
+_HTML_TAG = re.compile(r'<[^>]+>')
+_NON_WORD = re.compile(r'[^\w\s가-힣]')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def content_hash(text: str) -> str:
+    """콘텐츠 해시 (SimpleVectorStore.content_hash와 동일)"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class TokenCache:
+    """토큰 스트림 LRU 캐시 (스레드 안전)"""
+
+    def __init__(self, max_size: int = TOKEN_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[tuple, Tuple[str, ...]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple) -> Optional[Tuple[str, ...]]:
+        with self._lock:
+            tokens = self._entries.get(key)
+            if tokens is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return tokens
+
+    def put(self, key: tuple, tokens: Tuple[str, ...]):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = tokens
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._entries), "max_size": self.max_size,
+                    "hits": self.hits, "misses": self.misses}
+
+
+# 프로세스 공용 캐시
+token_cache = TokenCache()
+
+
+def _word_tokens(text: str) -> Tuple[str, ...]:
+    text = _HTML_TAG.sub('', text)
+    text = _NON_WORD.sub(' ', text)
+    return tuple(text.split())
+
+
+def _bigram_tokens(text: str) -> Tuple[str, ...]:
+    text = _WHITESPACE.sub('', text.lower())
+    return tuple(text[i:i + 2] for i in range(len(text) - 1))
+
+
+def _mixed_tokens(text: str) -> Tuple[str, ...]:
+    tokens = []
+    for word in text.split():
+        if len(word) >= 2:
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+        tokens.append(word)
+    return tuple(tokens)
+
+
+_MODE_FUNCTIONS = {
+    "word": _word_tokens,
+    "bigram": _bigram_tokens,
+    "mixed": _mixed_tokens
+}
+
+
+class KoreanTokenizer:
+    """한국어 토크나이저 (모드별, 캐시 공유)"""
+
+    def __init__(self, mode: str = "word", min_length: int = 2, cache: Optional[TokenCache] = None):
+        if mode not in _MODE_FUNCTIONS:
+            raise ValueError(f"지원하지 않는 토크나이저 모드: {mode} (지원: {', '.join(TOKENIZER_MODES)})")
+        self.mode = mode
+        self.min_length = min_length if mode == "word" else 1
+        self.cache = cache if cache is not None else token_cache
+        self._tokenize = _MODE_FUNCTIONS[mode]
+
+    def tokenize(self, text: str, text_hash: Optional[str] = None) -> Tuple[str, ...]:
+        """토큰 스트림 (불변 튜플, 캐시 공유). text_hash를 주면 해시 계산을 생략"""
+        text = text or ""
+        key = (self.mode, text_hash or content_hash(text))
+        tokens = self.cache.get(key)
+        if tokens is None:
+            tokens = self._tokenize(text)
+            self.cache.put(key, tokens)
+        if self.min_length > 1:
+            tokens = tuple(token for token in tokens if len(token) >= self.min_length)
+        return tokens
+
+    __call__ = tokenize
+
+
+_tokenizers: Dict[tuple, KoreanTokenizer] = {}
+
+def get_tokenizer(mode: str = "word", min_length: int = 2) -> KoreanTokenizer:
+    """모드별 공용 토크나이저 인스턴스"""
+    key = (mode, min_length)
+    if key not in _tokenizers:
+        _tokenizers[key] = KoreanTokenizer(mode, min_length)
+    return _tokenizers[key]
+
+
+def tokenize(text: str, mode: str = "word", text_hash: Optional[str] = None) -> Tuple[str, ...]:
+    """한국어 텍스트 토크나이징 (기본: word 모드, 2글자 이상)"""
+    return get_tokenizer(mode).tokenize(text, text_hash)
+
+
+def ko_bigrams(text: str) -> List[str]:
+    """한국어 bi-gram 토큰화"""
+    return list(get_tokenizer("bigram").tokenize(text))
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+IVF-Flat 근사 최근접 이웃 인덱스 (numpy 구현)
+
+구조:
+    - 구면 k-means로 학습한 nlist개 중심 벡터 (coarse quantizer)
+    - 행 -> 리스트 할당 배열 (새 행은 재학습 없이 가장 가까운 중심에 할당)
+검색 시 쿼리와 가까운 nprobe개 리스트의 행만 후보로 반환한다 (nprobe↑ = recall↑, 지연↑).
+"""
+import os
+import time
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+
+try:
+    from .search_engine import normalize_rows, top_k_indices
+except ImportError:
+    from search_engine import normalize_rows, top_k_indices
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ASSIGN_BATCH_SIZE = 8192
+
+
+def default_nlist(num_rows: int) -> int:
+    """기본 리스트 수 (≈ 4·√N)"""
+    return int(max(1, min(num_rows, round(4 * np.sqrt(max(num_rows, 1))))))
+
+
+class IVFFlatIndex:
+    """IVF-Flat 인덱스"""
+
+    def __init__(self, centroids: np.ndarray, assignments: Optional[np.ndarray] = None):
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        self.assignments = (np.asarray(assignments, dtype=np.int32)
+                            if assignments is not None else np.empty(0, dtype=np.int32))
+        self._order = None
+        self._offsets = None
+
+    @property
+    def nlist(self) -> int:
+        return self.centroids.shape[0]
+
+    @property
+    def num_rows(self) -> int:
+        return self.assignments.shape[0]
+
+    @classmethod
+    def train(cls, matrix: np.ndarray, nlist: Optional[int] = None, n_iter: int = 10,
+              sample_size: int = 65536, seed: int = 0, train_rows: Optional[np.ndarray] = None) -> "IVFFlatIndex":
+        """구면 k-means 학습 후 전체 행 할당 (train_rows: 학습 표본을 뽑을 행, 기본 전체 — 삭제 행 제외용)"""
+        rows = np.arange(matrix.shape[0]) if train_rows is None else np.asarray(train_rows, dtype=np.int64)
+        if rows.size == 0:
+            raise ValueError("빈 행렬로는 IVF 인덱스를 학습할 수 없습니다")
+        nlist = min(nlist or default_nlist(rows.size), rows.size)
+        rng = np.random.default_rng(seed)
+
+        sample_rows = np.sort(rng.choice(rows, size=min(rows.size, max(sample_size, nlist)), replace=False))
+        sample = normalize_rows(matrix[sample_rows])
+        centroids = sample[rng.choice(sample.shape[0], size=nlist, replace=False)].copy()
+
+        for _ in range(n_iter):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            counts = np.bincount(labels, minlength=nlist)
+            empty = counts == 0
+            if empty.any():
+                # 빈 클러스터는 임의 샘플로 재초기화
+                sums[empty] = sample[rng.choice(sample.shape[0], size=int(empty.sum()))]
+            centroids = normalize_rows(sums)
+
+        index = cls(centroids)
+        index.add(matrix)
+        return index
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        """가장 가까운 중심 번호"""
+        labels = np.empty(vectors.shape[0], dtype=np.int32)
+        for start in range(0, vectors.shape[0], ASSIGN_BATCH_SIZE):
+            batch = np.asarray(vectors[start:start + ASSIGN_BATCH_SIZE], dtype=np.float32)
+            labels[start:start + batch.shape[0]] = np.argmax(batch @ self.centroids.T, axis=1)
+        return labels
+
+    def add(self, vectors: np.ndarray):
+        """새 행 할당 (행 번호는 기존 행 뒤에 이어짐)"""
+        if vectors.shape[0] == 0:
+            return
+        self.assignments = np.concatenate([self.assignments, self._assign(vectors)])
+        self._order = None
+
+    def select_rows(self, rows: np.ndarray):
+        """행 재배치 (컴팩션 후 살아있는 행만 유지)"""
+        self.assignments = self.assignments[rows]
+        self._order = None
+
+    def _build_lists(self):
+        """리스트별 행 번호 (CSR) 재구축"""
+        self._order = np.argsort(self.assignments, kind="stable")
+        counts = np.bincount(self.assignments, minlength=self.nlist)
+        self._offsets = np.concatenate([[0], np.cumsum(counts)])
+
+    def candidates(self, query_embedding: np.ndarray, nprobe: int = 8) -> np.ndarray:
+        """nprobe개 리스트의 후보 행 번호 (정렬됨)"""
+        if self._order is None:
+            self._build_lists()
+        probe = top_k_indices(self.centroids @ query_embedding, min(nprobe, self.nlist))
+        rows = [self._order[self._offsets[l]:self._offsets[l + 1]] for l in probe]
+        return np.sort(np.concatenate(rows)) if rows else np.empty(0, dtype=np.int64)
+
+    def save(self, path: str):
+        """npz 저장 (pickle 없음)"""
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, centroids=self.centroids, assignments=self.assignments)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "IVFFlatIndex":
+        """npz 로드"""
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data["centroids"], data["assignments"])
+
+
+def evaluate_recall(index: IVFFlatIndex, matrix: np.ndarray, queries: np.ndarray,
+                    top_k: int = 10, nprobe_values: List[int] = (1, 2, 4, 8, 16, 32)) -> List[Dict[str, float]]:
+    """nprobe별 recall@k / 평균 지연 (전수 검색 대비)"""
+    queries = normalize_rows(queries)
+    exact_ms, truth = 0.0, []
+    for query in queries:
+        start = time.perf_counter()
+        truth.append(set(top_k_indices(matrix @ query, top_k).tolist()))
+        exact_ms += (time.perf_counter() - start) * 1000
+
+    report = []
+    for nprobe in nprobe_values:
+        hits, elapsed_ms, scanned = 0, 0.0, 0
+        for query, expected in zip(queries, truth):
+            start = time.perf_counter()
+            rows = index.candidates(query, nprobe)
+            found = rows[top_k_indices(matrix[rows] @ query, top_k)]
+            elapsed_ms += (time.perf_counter() - start) * 1000
+            hits += len(expected & set(found.tolist()))
+            scanned += rows.shape[0]
+        report.append({
+            "nprobe": nprobe,
+            f"recall@{top_k}": hits / max(1, len(queries) * top_k),
+            "avg_ms": elapsed_ms / max(1, len(queries)),
+            "exact_avg_ms": exact_ms / max(1, len(queries)),
+            "scanned_ratio": scanned / max(1, len(queries) * matrix.shape[0])
+        })
+    return report
@@ -4,146 +4,24 @@
 임베딩 캐시 및 벡터화 모듈
 """
 import os
-import sqlite3
-import hashlib
-import pickle
 import numpy as np
-from typing import List, Dict, Optional, Tuple
-from sentence_transformers import SentenceTransformer
+from typing import List, Dict, Optional
 import logging
 
+try:
+    from .embedding_cache import EmbeddingCache
+    from .model_registry import model_registry, SENTENCE_TRANSFORMER
+    from .micro_batcher import MicroBatcher, get_encode_batcher
+except ImportError:
+    from embedding_cache import EmbeddingCache
+    from model_registry import model_registry, SENTENCE_TRANSFORMER
+    from micro_batcher import MicroBatcher, get_encode_batcher
+
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-class EmbeddingCache:
-    """임베딩 캐시 관리 클래스"""
-    
-    def __init__(self, cache_db_path: str):
-        self.cache_db_path = cache_db_path
-        self.conn = self._get_connection()
-        self._init_schema()
-    
-    def _get_connection(self) -> sqlite3.Connection:
-        """데이터베이스 연결 생성"""
-        # 디렉터리 생성
-        os.makedirs(os.path.dirname(self.cache_db_path), exist_ok=True)
-        
-        conn = sqlite3.connect(self.cache_db_path)
-        conn.execute("PRAGMA journal_mode=WAL;")
-        conn.execute("PRAGMA synchronous=NORMAL;")
-        return conn
-    
-    def _init_schema(self):
-        """캐시 스키마 초기화"""
-        self.conn.executescript("""
-        CREATE TABLE IF NOT EXISTS embedding_cache (
-            text_hash TEXT PRIMARY KEY,
-            text_content TEXT NOT NULL,
-            embedding BLOB NOT NULL,
-            model_name TEXT NOT NULL,
-            created_at INTEGER NOT NULL,
-            access_count INTEGER DEFAULT 0,
-            last_accessed INTEGER NOT NULL
-        );
-        
-        CREATE INDEX IF NOT EXISTS idx_model_name ON embedding_cache(model_name);
-        CREATE INDEX IF NOT EXISTS idx_created_at ON embedding_cache(created_at);
-        CREATE INDEX IF NOT EXISTS idx_access_count ON embedding_cache(access_count);
-        """)
-        self.conn.commit()
-    
-    def get_text_hash(self, text: str) -> str:
-        """텍스트 해시 생성"""
-        return hashlib.sha256(text.encode('utf-8')).hexdigest()
-    
-    def get_cached_embedding(self, text: str, model_name: str) -> Optional[np.ndarray]:
-        """캐시된 임베딩 조회"""
-        text_hash = self.get_text_hash(text)
-        
-        cursor = self.conn.execute("""
-            SELECT embedding, access_count FROM embedding_cache 
-            WHERE text_hash = ? AND model_name = ?
-        """, (text_hash, model_name))
-        
-        row = cursor.fetchone()
-        if row:
-            embedding_blob, access_count = row
-            embedding = pickle.loads(embedding_blob)
-            
-            # 접근 횟수 업데이트
-            import time
-            self.conn.execute("""
-                UPDATE embedding_cache 
-                SET access_count = ?, last_accessed = ?
-                WHERE text_hash = ? AND model_name = ?
-            """, (access_count + 1, int(time.time()), text_hash, model_name))
-            self.conn.commit()
-            
-            logger.debug(f"캐시 히트: {text_hash[:8]}... (접근 횟수: {access_count + 1})")
-            return embedding
-        
-        logger.debug(f"캐시 미스: {text_hash[:8]}...")
-        return None
-    
-    def cache_embedding(self, text: str, embedding: np.ndarray, model_name: str):
-        """임베딩 캐시 저장"""
-        text_hash = self.get_text_hash(text)
-        embedding_blob = pickle.dumps(embedding)
-        
-        import time
-        now = int(time.time())
-        
-        self.conn.execute("""
-            INSERT OR REPLACE INTO embedding_cache 
-            (text_hash, text_content, embedding, model_name, created_at, last_accessed)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (text_hash, text, embedding_blob, model_name, now, now))
-        self.conn.commit()
-        
-        logger.debug(f"임베딩 캐시 저장: {text_hash[:8]}...")
-    
-    def get_cache_stats(self) -> Dict[str, int]:
-        """캐시 통계 조회"""
-        cursor = self.conn.execute("""
-            SELECT 
-                COUNT(*) as total_entries,
-                COUNT(DISTINCT model_name) as unique_models,
-                SUM(access_count) as total_accesses,
-                AVG(access_count) as avg_accesses
-            FROM embedding_cache
-        """)
-        
-        row = cursor.fetchone()
-        return {
-            'total_entries': row[0] or 0,
-            'unique_models': row[1] or 0,
-            'total_accesses': row[2] or 0,
-            'avg_accesses': int(row[3] or 0)
-        }
-    
-    def cleanup_old_entries(self, days_old: int = 30):
-        """오래된 캐시 항목 정리"""
-        import time
-        cutoff_time = int(time.time()) - (days_old * 24 * 60 * 60)
-        
-        cursor = self.conn.execute("""
-            DELETE FROM embedding_cache 
-            WHERE created_at < ? AND access_count < 2
-        """, (cutoff_time,))
-        
-        deleted_count = cursor.rowcount
-        self.conn.commit()
-        
-        logger.info(f"오래된 캐시 항목 {deleted_count}개 정리 완료")
-        return deleted_count
-    
-    def close(self):
-        """연결 종료"""
-        self.conn.close()
-
-
 class EmbeddingService:
     """임베딩 서비스 클래스"""
     
@@ -152,28 +30,27 @@ class EmbeddingService:
         self.model_name = model_name
         self.device = device
         self.cache = EmbeddingCache(cache_db_path)
-        self.model = None
-        self._load_model()
+        self._model = None
+    
+    @property
+    def model(self):
+        """임베딩 모델 (첫 사용 시 공용 레지스트리에서 로드)"""
+        if self._model is None:
+            self._load_model()
+        return self._model
+    
+    @property
+    def encode_batcher(self) -> MicroBatcher:
+        """공용 마이크로 배처 (같은 모델/실제 디바이스의 모든 서비스가 공유)"""
+        return get_encode_batcher(self.model_name, self.device)
     
     def _load_model(self):
-        """모델 로드"""
-        try:
-            logger.info(f"임베딩 모델 로딩: {self.model_name} (device: {self.device})")
-            self.model = SentenceTransformer(self.model_name, device=self.device)
-            logger.info("임베딩 모델 로딩 완료")
-        except Exception as e:
-            logger.error(f"모델 로딩 실패: {e}")
-            # CPU로 폴백
-            if self.device == "cuda":
-                logger.info("CPU로 폴백 시도...")
-                self.device = "cpu"
-                self.model = SentenceTransformer(self.model_name, device=self.device)
-                logger.info("CPU 모델 로딩 완료")
-            else:
-                raise e
+        """모델 로드 (프로세스당 1회, CUDA 실패 시 CPU 폴백은 레지스트리가 처리)"""
+        loaded = model_registry.get(SENTENCE_TRANSFORMER, self.model_name, self.device)
+        self._model, self.device = loaded.model, loaded.device
     
     def get_or_compute_embedding(self, text: str) -> np.ndarray:
-        """임베딩 조회 또는 계산"""
+        """임베딩 조회 또는 계산 (캐시 히트는 읽기 전용 배열 — 수정하려면 복사할 것)"""
         if not text or not text.strip():
             # 빈 텍스트에 대한 기본 임베딩 반환
             return np.zeros(768, dtype=np.float32)
@@ -185,7 +62,7 @@ class EmbeddingService:
         
         # 임베딩 계산
         logger.debug(f"임베딩 계산: {text[:50]}...")
-        embedding = self.model.encode(text, convert_to_numpy=True)
+        embedding = self.encode_batcher.encode(text)
         
         # 캐시에 저장
         self.cache.cache_embedding(text, embedding, self.model_name)
@@ -197,43 +74,40 @@ class EmbeddingService:
         if not texts:
             return []
         
-        embeddings = []
-        cache_hits = 0
-        texts_to_compute = []
-        indices_to_compute = []
+        # 캐시 일괄 조회 (빈 텍스트 제외)
+        valid_indices = [i for i, text in enumerate(texts) if text and text.strip()]
+        cached = self.cache.get_many([texts[i] for i in valid_indices], self.model_name)
         
-        # 캐시 확인
-        for i, text in enumerate(texts):
-            if not text or not text.strip():
-                embeddings.append(np.zeros(768, dtype=np.float32))
-                continue
-                
-            cached_embedding = self.cache.get_cached_embedding(text, self.model_name)
+        embeddings: List[Optional[np.ndarray]] = [np.zeros(768, dtype=np.float32) for _ in texts]
+        missing: Dict[str, List[int]] = {}  # 미스 텍스트 -> 위치 (중복 텍스트는 1회만 계산)
+        for i, cached_embedding in zip(valid_indices, cached):
             if cached_embedding is not None:
-                embeddings.append(cached_embedding)
-                cache_hits += 1
+                embeddings[i] = cached_embedding
             else:
-                embeddings.append(None)  # 플레이스홀더
-                texts_to_compute.append(text)
-                indices_to_compute.append(i)
+                missing.setdefault(texts[i], []).append(i)
+        cache_hits = len(valid_indices) - sum(len(indices) for indices in missing.values())
         
         # 캐시되지 않은 텍스트들 배치 계산
-        if texts_to_compute:
+        if missing:
+            texts_to_compute = list(missing)
             logger.info(f"배치 임베딩 계산: {len(texts_to_compute)}개 (캐시 히트: {cache_hits}개)")
             
-            computed_embeddings = self.model.encode(
-                texts_to_compute, 
-                batch_size=batch_size,
-                convert_to_numpy=True
-            )
+            if len(texts_to_compute) <= self.encode_batcher.max_batch:
+                # 소량(쿼리)은 동시 요청과 함께 배치 인코딩
+                computed_embeddings = self.encode_batcher.encode_many(texts_to_compute)
+            else:
+                computed_embeddings = self.model.encode(
+                    texts_to_compute, 
+                    batch_size=batch_size,
+                    convert_to_numpy=True
+                )
+            
+            for text, embedding in zip(texts_to_compute, computed_embeddings):
+                for original_index in missing[text]:
+                    embeddings[original_index] = embedding
             
-            # 결과 배치 저장
-            for i, embedding in enumerate(computed_embeddings):
-                original_index = indices_to_compute[i]
-                text = texts_to_compute[i]
-                
-                embeddings[original_index] = embedding
-                self.cache.cache_embedding(text, embedding, self.model_name)
+            # 결과 일괄 저장 (트랜잭션 1개)
+            self.cache.put_many(list(zip(texts_to_compute, computed_embeddings)), self.model_name)
         
         logger.info(f"배치 임베딩 완료: 총 {len(texts)}개, 캐시 히트 {cache_hits}개")
         return embeddings
@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+임베딩 캐시 (SQLite, 스키마 v2)
+
+v2 스키마:
+    - embedding: 리틀 엔디언 float32(또는 float16) 원시 바이트 — np.frombuffer로 복사 없이 디코딩 (pickle 없음)
+    - embedding_models: 모델별 헤더 (차원, dtype) — 행마다 형식 정보를 두지 않고 길이만 검증
+    - text_content: 선택 (기본 저장 안 함, 원문은 코퍼스에 있음)
+    - 키: (text_hash, model_name) — 같은 텍스트도 모델별로 따로 캐시
+
+v1(pickle, text_content 필수) 파일을 열면 기존 테이블을 embedding_cache_v1로 보존하고 빈 v2 테이블을 만든다.
+보존된 v1 항목은 migrate_embedding_cache() (scripts/migrate_embedding_cache.py)로 한 번에 변환한다.
+"""
+import os
+import sqlite3
+import hashlib
+import pickle
+import threading
+import time
+import logging
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 2
+LEGACY_TABLE = "embedding_cache_v1"
+
+# 저장 형식 (리틀 엔디언 고정 — 플랫폼 간 파일 이동 가능)
+CACHE_DTYPES = {"float32": np.dtype("<f4"), "float16": np.dtype("<f2")}
+CACHE_DTYPE = os.getenv("EMBEDDING_CACHE_DTYPE", "float32")
+CACHE_STORE_TEXT = os.getenv("EMBEDDING_CACHE_STORE_TEXT", "false").lower() == "true"
+
+SCHEMA_V2 = """
+CREATE TABLE IF NOT EXISTS embedding_models (
+    model_name TEXT PRIMARY KEY,
+    dimension INTEGER NOT NULL,
+    dtype TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS embedding_cache (
+    text_hash TEXT NOT NULL,
+    model_name TEXT NOT NULL,
+    embedding BLOB NOT NULL,
+    text_content TEXT,
+    created_at INTEGER NOT NULL,
+    access_count INTEGER DEFAULT 0,
+    last_accessed INTEGER NOT NULL,
+    PRIMARY KEY (text_hash, model_name)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_cache_created_at ON embedding_cache(created_at);
+"""
+
+
+def _table_exists(conn: sqlite3.Connection, name: str) -> bool:
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (name,)).fetchone() is not None
+
+
+def _prepare_schema(conn: sqlite3.Connection):
+    """v2 스키마 보장 (v1 테이블은 embedding_cache_v1로 이름만 바꿔 보존)"""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version < SCHEMA_VERSION and _table_exists(conn, "embedding_cache"):
+        if _table_exists(conn, LEGACY_TABLE):
+            raise RuntimeError(f"v1 캐시 테이블이 이미 보존되어 있음 ({LEGACY_TABLE}) — 먼저 마이그레이션하세요")
+        conn.execute(f"ALTER TABLE embedding_cache RENAME TO {LEGACY_TABLE}")
+        logger.warning(f"v1(pickle) 임베딩 캐시를 {LEGACY_TABLE}로 보존 — "
+                       f"scripts/migrate_embedding_cache.py로 변환하세요")
+    conn.executescript(SCHEMA_V2)
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    conn.commit()
+
+
+def encode_embedding(embedding: np.ndarray, dtype: np.dtype) -> bytes:
+    """임베딩 -> 원시 바이트"""
+    return np.ascontiguousarray(embedding, dtype=dtype).tobytes()
+
+
+def decode_embedding(blob: bytes, dimension: int, dtype: np.dtype) -> Optional[np.ndarray]:
+    """원시 바이트 -> float32 임베딩 (float32는 복사 없는 읽기 전용 뷰, 길이가 헤더와 다르면 None)"""
+    if len(blob) != dimension * dtype.itemsize:
+        return None
+    embedding = np.frombuffer(blob, dtype=dtype)
+    return embedding if dtype == CACHE_DTYPES["float32"] else embedding.astype(np.float32)
+
+
+class EmbeddingCache:
+    """
+    임베딩 캐시 관리 클래스
+
+    조회/저장은 배치 단위(get_many / put_many)로 처리한다: 조회는 `WHERE text_hash IN (...)` 쿼리 1회,
+    저장은 트랜잭션 1개 안의 executemany 1회. 조회 시 access_count / last_accessed 갱신은 메모리에 모아 두었다가
+    백그라운드 스레드가 flush_interval초마다(또는 flush_threshold건이 쌓이면) 트랜잭션 1개로 반영한다.
+    """
+
+    # SQLite 바인드 변수 상한(구버전 999) 이하로 IN 목록 분할
+    MAX_IN_PARAMS = 900
+
+    def __init__(self, cache_db_path: str, flush_interval: float = 5.0, flush_threshold: int = 1000,
+                 dtype: str = CACHE_DTYPE, store_text: bool = CACHE_STORE_TEXT):
+        if dtype not in CACHE_DTYPES:
+            raise ValueError(f"지원하지 않는 캐시 dtype: {dtype} (지원: {', '.join(CACHE_DTYPES)})")
+        self.cache_db_path = cache_db_path
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self.dtype = dtype
+        self.store_text = store_text
+        self._lock = threading.RLock()
+        self._models: Dict[str, Tuple[int, np.dtype]] = {}  # 모델 -> (차원, dtype) 헤더
+        self._pending_access: Dict[Tuple[str, str], Tuple[int, int]] = {}  # (해시, 모델) -> (횟수, 마지막 접근)
+        self._flush_event = threading.Event()
+        self._closed = False
+        self._flusher: Optional[threading.Thread] = None
+        self.conn = self._get_connection()
+        self._init_schema()
+
+    def _get_connection(self) -> sqlite3.Connection:
+        """데이터베이스 연결 생성 (백그라운드 flush 스레드와 공유, self._lock으로 직렬화)"""
+        # 디렉터리 생성
+        os.makedirs(os.path.dirname(self.cache_db_path), exist_ok=True)
+
+        conn = sqlite3.connect(self.cache_db_path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL;")
+        conn.execute("PRAGMA synchronous=NORMAL;")
+        return conn
+
+    def _init_schema(self):
+        """캐시 스키마 초기화 (v2) + 모델 헤더 로드"""
+        _prepare_schema(self.conn)
+        for model_name, dimension, dtype in self.conn.execute(
+                "SELECT model_name, dimension, dtype FROM embedding_models"):
+            self._models[model_name] = (dimension, CACHE_DTYPES[dtype])
+
+    def _model_format(self, model_name: str, dimension: int) -> Tuple[int, np.dtype]:
+        """모델 헤더 (없으면 현재 설정으로 등록, 호출자가 self._lock 보유)"""
+        header = self._models.get(model_name)
+        if header is None:
+            with self.conn:
+                self.conn.execute("INSERT OR IGNORE INTO embedding_models (model_name, dimension, dtype) VALUES (?, ?, ?)",
+                                  (model_name, dimension, self.dtype))
+            row = self.conn.execute("SELECT dimension, dtype FROM embedding_models WHERE model_name = ?",
+                                    (model_name,)).fetchone()
+            header = self._models[model_name] = (row[0], CACHE_DTYPES[row[1]])
+        if header[0] != dimension:
+            raise ValueError(f"임베딩 차원 불일치: {model_name}은 {header[0]}차원으로 캐시됨 (입력 {dimension}차원)")
+        return header
+
+    def get_text_hash(self, text: str) -> str:
+        """텍스트 해시 생성"""
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def get_many(self, texts: Sequence[str], model_name: str) -> List[Optional[np.ndarray]]:
+        """캐시된 임베딩 일괄 조회 (입력 순서, 미스는 None)"""
+        hashes = [self.get_text_hash(text) for text in texts]
+        unique_hashes = list(dict.fromkeys(hashes))
+        found: Dict[str, np.ndarray] = {}
+
+        with self._lock:
+            header = self._models.get(model_name)
+            if header is None:
+                # 헤더가 없으면 이 모델로 저장된 항목도 없음
+                return [None] * len(texts)
+            dimension, dtype = header
+
+            for start in range(0, len(unique_hashes), self.MAX_IN_PARAMS):
+                chunk = unique_hashes[start:start + self.MAX_IN_PARAMS]
+                placeholders = ",".join("?" * len(chunk))
+                cursor = self.conn.execute(f"""
+                    SELECT text_hash, embedding FROM embedding_cache
+                    WHERE model_name = ? AND text_hash IN ({placeholders})
+                """, (model_name, *chunk))
+                for text_hash, embedding_blob in cursor:
+                    embedding = decode_embedding(embedding_blob, dimension, dtype)
+                    if embedding is None:
+                        logger.warning(f"손상된 캐시 항목 무시: {text_hash[:8]}... ({len(embedding_blob)} bytes)")
+                        continue
+                    found[text_hash] = embedding
+
+            # 접근 횟수는 지연 반영 (조회 경로에서 쓰기 트랜잭션 없음)
+            if found:
+                now = int(time.time())
+                for text_hash in hashes:
+                    if text_hash in found:
+                        count, _ = self._pending_access.get((text_hash, model_name), (0, now))
+                        self._pending_access[(text_hash, model_name)] = (count + 1, now)
+                pending = len(self._pending_access)
+
+        if found:
+            self._schedule_flush(pending)
+        logger.debug(f"캐시 일괄 조회: {len(texts)}개 중 히트 {sum(h in found for h in hashes)}개")
+        return [found.get(text_hash) for text_hash in hashes]
+
+    def put_many(self, items: Sequence[Tuple[str, np.ndarray]], model_name: str):
+        """(텍스트, 임베딩) 일괄 저장 (트랜잭션 1개, executemany 1회)"""
+        if not items:
+            return
+        now = int(time.time())
+
+        with self._lock:
+            dimension, dtype = self._model_format(model_name, int(np.shape(items[0][1])[-1]))
+            rows = []
+            for text, embedding in items:
+                if np.shape(embedding)[-1] != dimension:
+                    raise ValueError(f"임베딩 차원 불일치: {model_name}은 {dimension}차원 (입력 {np.shape(embedding)[-1]}차원)")
+                rows.append((self.get_text_hash(text), model_name, encode_embedding(embedding, dtype),
+                             text if self.store_text else None, now, now))
+
+            with self.conn:
+                self.conn.executemany("""
+                    INSERT OR REPLACE INTO embedding_cache
+                    (text_hash, model_name, embedding, text_content, created_at, last_accessed)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, rows)
+
+        logger.debug(f"임베딩 캐시 일괄 저장: {len(rows)}개")
+
+    def get_cached_embedding(self, text: str, model_name: str) -> Optional[np.ndarray]:
+        """캐시된 임베딩 조회"""
+        return self.get_many([text], model_name)[0]
+
+    def cache_embedding(self, text: str, embedding: np.ndarray, model_name: str):
+        """임베딩 캐시 저장"""
+        self.put_many([(text, embedding)], model_name)
+
+    def _schedule_flush(self, pending: int):
+        """백그라운드 flush 스레드 시작 (최초 1회), 임계치 초과 시 즉시 flush 요청"""
+        with self._lock:
+            if self._closed:
+                return
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, name="embedding-cache-flush", daemon=True)
+                self._flusher.start()
+        if pending >= self.flush_threshold:
+            self._flush_event.set()
+
+    def _flush_loop(self):
+        while not self._closed:
+            self._flush_event.wait(self.flush_interval)
+            self._flush_event.clear()
+            try:
+                self.flush_access_counts()
+            except sqlite3.Error as e:
+                logger.warning(f"접근 횟수 반영 실패 (다음 주기에 재시도): {e}")
+
+    def flush_access_counts(self) -> int:
+        """지연된 접근 횟수 갱신을 트랜잭션 1개로 반영 -> 반영 항목 수"""
+        with self._lock:
+            if not self._pending_access or self._closed:
+                return 0
+            pending, self._pending_access = self._pending_access, {}
+            try:
+                with self.conn:
+                    self.conn.executemany("""
+                        UPDATE embedding_cache
+                        SET access_count = access_count + ?, last_accessed = MAX(last_accessed, ?)
+                        WHERE text_hash = ? AND model_name = ?
+                    """, [(count, last, text_hash, model_name)
+                          for (text_hash, model_name), (count, last) in pending.items()])
+            except sqlite3.Error:
+                # 실패분은 다음 flush에 다시 합산
+                for key, (count, last) in pending.items():
+                    prev_count, prev_last = self._pending_access.get(key, (0, last))
+                    self._pending_access[key] = (count + prev_count, max(last, prev_last))
+                raise
+        return len(pending)
+
+    def get_cache_stats(self) -> Dict[str, int]:
+        """캐시 통계 조회"""
+        self.flush_access_counts()
+        with self._lock:
+            cursor = self.conn.execute("""
+                SELECT
+                    COUNT(*) as total_entries,
+                    COUNT(DISTINCT model_name) as unique_models,
+                    SUM(access_count) as total_accesses,
+                    AVG(access_count) as avg_accesses,
+                    SUM(LENGTH(embedding)) as embedding_bytes
+                FROM embedding_cache
+            """)
+            row = cursor.fetchone()
+
+        return {
+            'total_entries': row[0] or 0,
+            'unique_models': row[1] or 0,
+            'total_accesses': row[2] or 0,
+            'avg_accesses': int(row[3] or 0),
+            'embedding_bytes': row[4] or 0,
+            'schema_version': SCHEMA_VERSION
+        }
+
+    def cleanup_old_entries(self, days_old: int = 30):
+        """오래된 캐시 항목 정리"""
+        self.flush_access_counts()
+        cutoff_time = int(time.time()) - (days_old * 24 * 60 * 60)
+
+        with self._lock, self.conn:
+            cursor = self.conn.execute("""
+                DELETE FROM embedding_cache
+                WHERE created_at < ? AND access_count < 2
+            """, (cutoff_time,))
+            deleted_count = cursor.rowcount
+
+        logger.info(f"오래된 캐시 항목 {deleted_count}개 정리 완료")
+        return deleted_count
+
+    def close(self):
+        """연결 종료 (남은 접근 횟수 반영 후)"""
+        try:
+            self.flush_access_counts()
+        except sqlite3.Error as e:
+            logger.warning(f"접근 횟수 반영 실패: {e}")
+        with self._lock:
+            self._closed = True
+            self._flush_event.set()
+            self.conn.close()
+
+
+def migrate_embedding_cache(cache_db_path: str, dtype: str = "float32", keep_text: bool = False,
+                            batch_size: int = 1000, vacuum: bool = True) -> Dict[str, Any]:
+    """
+    v1(pickle) 임베딩 캐시 파일을 v2로 한 번에 변환
+
+    v1 항목(embedding_cache 또는 보존된 embedding_cache_v1)을 batch_size씩 읽어 원시 바이트로 다시 쓰고,
+    전체를 트랜잭션 1개로 커밋한 뒤 v1 테이블을 삭제한다 (실패 시 롤백되어 v1 그대로 유지).
+    pickle을 푸는 유일한 경로이므로 신뢰하는 로컬 캐시 파일에만 실행할 것.
+    """
+    if dtype not in CACHE_DTYPES:
+        raise ValueError(f"지원하지 않는 캐시 dtype: {dtype} (지원: {', '.join(CACHE_DTYPES)})")
+    if not os.path.exists(cache_db_path):
+        raise FileNotFoundError(cache_db_path)
+    start = time.time()
+    size_before = os.path.getsize(cache_db_path)
+
+    conn = sqlite3.connect(cache_db_path)
+    try:
+        _prepare_schema(conn)
+        if not _table_exists(conn, LEGACY_TABLE):
+            return {"migrated": 0, "skipped": 0, "already_v2": True}
+
+        models: Dict[str, Tuple[int, np.dtype]] = {
+            name: (dim, CACHE_DTYPES[dt]) for name, dim, dt in
+            conn.execute("SELECT model_name, dimension, dtype FROM embedding_models")}
+        migrated = skipped = 0
+
+        with conn:
+            cursor = conn.execute(f"""
+                SELECT text_hash, text_content, embedding, model_name, created_at, access_count, last_accessed
+                FROM {LEGACY_TABLE}
+            """)
+            while True:
+                batch = cursor.fetchmany(batch_size)
+                if not batch:
+                    break
+                rows = []
+                for text_hash, text, blob, model_name, created_at, access_count, last_accessed in batch:
+                    try:
+                        embedding = np.asarray(pickle.loads(blob)).ravel()
+                    except Exception as e:
+                        logger.warning(f"디코딩 실패 항목 건너뜀: {text_hash[:8]}... ({e})")
+                        skipped += 1
+                        continue
+                    if model_name not in models:
+                        models[model_name] = (embedding.shape[0], CACHE_DTYPES[dtype])
+                        conn.execute("INSERT INTO embedding_models (model_name, dimension, dtype) VALUES (?, ?, ?)",
+                                     (model_name, embedding.shape[0], dtype))
+                    dimension, model_dtype = models[model_name]
+                    if embedding.shape[0] != dimension:
+                        logger.warning(f"차원 불일치 항목 건너뜀: {text_hash[:8]}... ({embedding.shape[0]} != {dimension})")
+                        skipped += 1
+                        continue
+                    rows.append((text_hash, model_name, encode_embedding(embedding, model_dtype),
+                                 text if keep_text else None, created_at, access_count or 0, last_accessed))
+                conn.executemany("""
+                    INSERT OR REPLACE INTO embedding_cache
+                    (text_hash, model_name, embedding, text_content, created_at, access_count, last_accessed)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, rows)
+                migrated += len(rows)
+            cursor.close()
+            conn.execute(f"DROP TABLE {LEGACY_TABLE}")
+
+        if vacuum:
+            conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+    return {
+        "migrated": migrated,
+        "skipped": skipped,
+        "already_v2": False,
+        "size_before": size_before,
+        "size_after": os.path.getsize(cache_db_path),
+        "seconds": round(time.time() - start, 2)
+    }
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+메타데이터 필터 인덱스 (필드별 역비트맵, ChromaDB where 문법 호환)
+"""
+import bisect
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 기본 인덱싱 필드
+DEFAULT_FILTER_FIELDS = ("law_topic", "category", "cat", "logno", "published_at", "date", "chunk_type")
+
+RANGE_OPERATORS = ("$gt", "$gte", "$lt", "$lte")
+
+
+def _compare(value: Any, op: str, operand: Any) -> bool:
+    """단일 연산자 비교"""
+    try:
+        if op == "$eq":
+            return value == operand
+        if op == "$ne":
+            return value != operand
+        if op == "$in":
+            return value in operand
+        if op == "$nin":
+            return value not in operand
+        if op == "$gt":
+            return value > operand
+        if op == "$gte":
+            return value >= operand
+        if op == "$lt":
+            return value < operand
+        if op == "$lte":
+            return value <= operand
+    except TypeError:
+        return False
+    raise ValueError(f"지원하지 않는 필터 연산자: {op}")
+
+
+def matches_where(metadata: Dict[str, Any], where: Optional[Dict[str, Any]]) -> bool:
+    """where 조건 매칭 (equality, $in, $gte/$lte 등)"""
+    if not where:
+        return True
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches_where(metadata, sub) for sub in condition):
+                return False
+            continue
+        if key == "$or":
+            if not any(matches_where(metadata, sub) for sub in condition):
+                return False
+            continue
+        if key not in metadata:
+            return False
+        value = metadata[key]
+        if isinstance(condition, dict):
+            if not all(_compare(value, op, operand) for op, operand in condition.items()):
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+class BitmapFilterIndex:
+    """필드 값 -> 행 번호 역색인, 조회 시 불리언 마스크로 결합"""
+
+    def __init__(self, fields: Iterable[str] = DEFAULT_FILTER_FIELDS):
+        self.fields = tuple(fields)
+        self.num_rows = 0
+        self._postings: Dict[str, Dict[Any, List[int]]] = {field: {} for field in self.fields}
+        self._sorted_values: Dict[str, Optional[List[Any]]] = {field: None for field in self.fields}
+        self._metadatas: List[Dict[str, Any]] = []
+
+    def build(self, metadatas: List[Dict[str, Any]]):
+        """전체 재구축"""
+        self.num_rows = 0
+        self._postings = {field: {} for field in self.fields}
+        self._sorted_values = {field: None for field in self.fields}
+        self._metadatas = []
+        for metadata in metadatas:
+            self.add(metadata)
+
+    def add(self, metadata: Dict[str, Any]) -> int:
+        """행 추가 (행 번호 반환)"""
+        row = self.num_rows
+        for field in self.fields:
+            if field in metadata:
+                value = metadata[field]
+                postings = self._postings[field]
+                if value not in postings:
+                    postings[value] = []
+                    self._sorted_values[field] = None
+                postings[value].append(row)
+        self._metadatas.append(metadata)
+        self.num_rows += 1
+        return row
+
+    def _value_mask(self, field: str, values: Iterable[Any]) -> np.ndarray:
+        """값 목록에 해당하는 행 마스크"""
+        mask = np.zeros(self.num_rows, dtype=bool)
+        postings = self._postings[field]
+        for value in values:
+            rows = postings.get(value)
+            if rows:
+                mask[rows] = True
+        return mask
+
+    def _range_values(self, field: str, condition: Dict[str, Any]) -> List[Any]:
+        """범위 조건을 만족하는 값 목록 (정렬된 distinct 값 위 bisect)"""
+        values = self._sorted_values[field]
+        if values is None:
+            try:
+                values = sorted(self._postings[field])
+            except TypeError:
+                values = sorted(self._postings[field], key=str)
+            self._sorted_values[field] = values
+        lo, hi = 0, len(values)
+        try:
+            if "$gte" in condition:
+                lo = max(lo, bisect.bisect_left(values, condition["$gte"]))
+            if "$gt" in condition:
+                lo = max(lo, bisect.bisect_right(values, condition["$gt"]))
+            if "$lte" in condition:
+                hi = min(hi, bisect.bisect_right(values, condition["$lte"]))
+            if "$lt" in condition:
+                hi = min(hi, bisect.bisect_left(values, condition["$lt"]))
+        except TypeError:
+            return [v for v in values if all(_compare(v, op, condition[op])
+                                             for op in RANGE_OPERATORS if op in condition)]
+        return values[lo:hi]
+
+    def _field_mask(self, field: str, condition: Any) -> np.ndarray:
+        """단일 필드 조건 마스크"""
+        if not isinstance(condition, dict):
+            return self._value_mask(field, [condition])
+
+        mask = np.ones(self.num_rows, dtype=bool)
+        if any(op in condition for op in RANGE_OPERATORS):
+            mask &= self._value_mask(field, self._range_values(field, condition))
+        for op, operand in condition.items():
+            if op in RANGE_OPERATORS:
+                continue
+            if op == "$eq":
+                mask &= self._value_mask(field, [operand])
+            elif op == "$in":
+                mask &= self._value_mask(field, operand)
+            elif op == "$ne":
+                mask &= ~self._value_mask(field, [operand])
+            elif op == "$nin":
+                mask &= ~self._value_mask(field, operand)
+            else:
+                raise ValueError(f"지원하지 않는 필터 연산자: {op}")
+        if "$ne" in condition or "$nin" in condition:
+            # 필드가 없는 행은 제외 (ChromaDB 동작과 동일)
+            mask &= self._value_mask(field, self._postings[field].keys())
+        return mask
+
+    def _scan_mask(self, key: str, condition: Any) -> np.ndarray:
+        """인덱싱되지 않은 필드는 메타데이터 스캔"""
+        return np.fromiter(
+            (matches_where(metadata, {key: condition}) for metadata in self._metadatas),
+            dtype=bool, count=self.num_rows
+        )
+
+    def mask(self, where: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """where 조건 -> 후보 행 마스크 (조건 없으면 None)"""
+        if not where:
+            return None
+        mask = np.ones(self.num_rows, dtype=bool)
+        for key, condition in where.items():
+            if key == "$and":
+                for sub in condition:
+                    sub_mask = self.mask(sub)
+                    if sub_mask is not None:
+                        mask &= sub_mask
+            elif key == "$or":
+                any_mask = np.zeros(self.num_rows, dtype=bool)
+                for sub in condition:
+                    sub_mask = self.mask(sub)
+                    any_mask |= np.ones(self.num_rows, dtype=bool) if sub_mask is None else sub_mask
+                mask &= any_mask
+            elif key in self._postings:
+                mask &= self._field_mask(key, condition)
+            else:
+                mask &= self._scan_mask(key, condition)
+        return mask
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+동적 마이크로 배칭 인코더
+
+동시 요청마다 model.encode([쿼리 1개])를 따로 호출하면 CPU에서는 배치 행렬 곱의 처리량을 대부분 버린다.
+요청을 큐에 모아 첫 요청 후 최대 max_wait_ms 동안(또는 max_batch개가 찰 때까지) 기다렸다가
+encode()를 배치당 1회 호출하고, 요청별 Future에 결과를 돌려준다.
+
+    - 전용 워커 스레드 1개 (첫 요청 시 시작), 호출자는 encode() / encode_many()로 대기하거나
+      encode_async()로 이벤트 루프를 막지 않고 대기
+    - max_wait_ms=0 (기본): 대기 없이 직전 배치 인코딩 중 쌓인 요청만 묶음 (저부하 시 지연 추가 없음)
+      max_wait_ms>0: 배치가 더 커지는 대신 단건 요청에도 최대 그만큼 지연이 추가됨
+    - 같은 배치 안의 동일 텍스트는 1회만 인코딩
+    - 큐 깊이 / 배치 크기 / 대기·인코딩 시간 통계 (stats())
+
+(모델, 실제 로드 디바이스, 프리픽스, 정규화)별 공용 배처는 get_encode_batcher()로 얻는다 — 모든 검색 진입점이 공유.
+"""
+import os
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    from .model_registry import model_registry, SENTENCE_TRANSFORMER
+except ImportError:
+    from model_registry import model_registry, SENTENCE_TRANSFORMER
+
+logger = logging.getLogger(__name__)
+
+ENCODE_BATCH_MAX = int(os.getenv("ENCODE_BATCH_MAX", "32"))
+ENCODE_BATCH_WAIT_MS = float(os.getenv("ENCODE_BATCH_WAIT_MS", "0"))
+
+EncodeFn = Callable[[List[str]], np.ndarray]
+
+
+@dataclass
+class _Request:
+    text: str
+    future: Future
+    enqueued: float
+
+
+class MicroBatcher:
+    """요청을 모아 배치당 encode() 1회 호출 (스레드 안전)"""
+
+    def __init__(self, encode_fn: EncodeFn, max_batch: int = ENCODE_BATCH_MAX,
+                 max_wait_ms: float = ENCODE_BATCH_WAIT_MS, name: str = "encoder"):
+        self.encode_fn = encode_fn
+        self.max_batch = max(1, max_batch)
+        self.max_wait_ms = max(0.0, max_wait_ms)
+        self.name = name
+        self._queue: Deque[_Request] = deque()
+        self._cond = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+        self._closed = False
+        self.batches = 0
+        self.items = 0
+        self.max_queue_depth = 0
+        self._wait_total = 0.0
+        self._encode_total = 0.0
+
+    def submit_many(self, texts: Sequence[str]) -> List[Future]:
+        """요청 등록 (한 번에 넣은 텍스트는 같은 배치에 실릴 수 있도록 함께 큐에 추가)"""
+        futures = [Future() for _ in texts]
+        now = time.perf_counter()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError(f"마이크로 배처가 종료됨: {self.name}")
+            self._queue.extend(_Request(text, future, now) for text, future in zip(texts, futures))
+            self.max_queue_depth = max(self.max_queue_depth, len(self._queue))
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name=f"microbatch-{self.name}", daemon=True)
+                self._worker.start()
+            self._cond.notify()
+        return futures
+
+    def submit(self, text: str) -> Future:
+        return self.submit_many([text])[0]
+
+    def encode(self, text: str, timeout: Optional[float] = None) -> np.ndarray:
+        """단일 텍스트 인코딩 (배치 처리 완료까지 대기)"""
+        return self.submit(text).result(timeout)
+
+    def encode_many(self, texts: Sequence[str], timeout: Optional[float] = None) -> np.ndarray:
+        """여러 텍스트 인코딩 (다른 요청과 함께 배치될 수 있음) -> (N, 차원)"""
+        if not texts:
+            return np.asarray(self.encode_fn([]), dtype=np.float32)
+        return np.stack([future.result(timeout) for future in self.submit_many(texts)])
+
+    async def encode_async(self, text: str) -> np.ndarray:
+        """이벤트 루프를 막지 않는 단일 텍스트 인코딩"""
+        return await asyncio.wrap_future(self.submit(text))
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue:
+                    return  # 종료 + 큐 비움
+
+                # 첫 요청 기준 max_wait_ms 또는 max_batch개까지 수집
+                deadline = self._queue[0].enqueued + self.max_wait_ms / 1000
+                while len(self._queue) < self.max_batch and not self._closed:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = [self._queue.popleft() for _ in range(min(self.max_batch, len(self._queue)))]
+            self._process(batch)
+
+    def _process(self, batch: List[_Request]):
+        start = time.perf_counter()
+        batch = [request for request in batch if request.future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        texts = list(dict.fromkeys(request.text for request in batch))
+        try:
+            vectors = np.asarray(self.encode_fn(texts), dtype=np.float32)
+        except Exception as e:
+            logger.warning(f"배치 인코딩 실패 ({self.name}, {len(texts)}개): {e}")
+            for request in batch:
+                request.future.set_exception(e)
+        else:
+            rows = {text: i for i, text in enumerate(texts)}
+            for request in batch:
+                request.future.set_result(vectors[rows[request.text]])
+        encode_seconds = time.perf_counter() - start
+
+        with self._cond:
+            self.batches += 1
+            self.items += len(batch)
+            self._wait_total += sum(start - request.enqueued for request in batch)
+            self._encode_total += encode_seconds
+
+    def close(self, timeout: Optional[float] = None):
+        """새 요청 거부, 남은 요청 처리 후 워커 종료"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._worker is not None:
+            self._worker.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """큐 깊이 / 배치 크기 / 평균 대기·인코딩 시간"""
+        with self._cond:
+            return {
+                "name": self.name,
+                "queue_depth": len(self._queue),
+                "max_queue_depth": self.max_queue_depth,
+                "max_batch": self.max_batch,
+                "max_wait_ms": self.max_wait_ms,
+                "batches": self.batches,
+                "items": self.items,
+                "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+                "avg_wait_ms": round(self._wait_total / self.items * 1000, 3) if self.items else 0.0,
+                "avg_encode_ms": round(self._encode_total / self.batches * 1000, 3) if self.batches else 0.0
+            }
+
+
+_batchers: Dict[Tuple[str, str, str, bool], MicroBatcher] = {}
+_batchers_lock = threading.Lock()
+
+def get_encode_batcher(model_name: str, device: Optional[str] = None, prefix: str = "",
+                       normalize: bool = False) -> MicroBatcher:
+    """(모델, 디바이스, 프리픽스, 정규화)별 공용 배처 (모델은 model_registry에서 공유)
+
+    키는 레지스트리가 실제로 로드한 디바이스 기준이다 — "cuda" 요청이 CPU로 폴백되면
+    "cpu" 요청과 같은 배처(워커 스레드 1개)를 공유한다. 모델이 아직 없으면 여기서 로드한다.
+    """
+    device = model_registry.get(SENTENCE_TRANSFORMER, model_name, device).device
+    key = (model_name, device, prefix, normalize)
+    with _batchers_lock:
+        batcher = _batchers.get(key)
+        if batcher is None:
+            def encode(texts: List[str]) -> np.ndarray:
+                model = model_registry.get(SENTENCE_TRANSFORMER, model_name, device).model
+                return model.encode([f"{prefix}{text}" for text in texts], batch_size=max(len(texts), 1),
+                                    normalize_embeddings=normalize, convert_to_numpy=True)
+            batcher = _batchers[key] = MicroBatcher(encode, name=f"{model_name}:{prefix.strip() or 'raw'}")
+        return batcher
+
+
+def get_query_batcher(model_name: str, device: Optional[str] = None) -> MicroBatcher:
+    """e5 쿼리 인코딩 배처 ("query: " 프리픽스 + 정규화)"""
+    return get_encode_batcher(model_name, device, prefix="query: ", normalize=True)
+
+
+def get_encode_batcher_stats() -> List[Dict[str, Any]]:
+    with _batchers_lock:
+        batchers = list(_batchers.values())
+    return [batcher.stats() for batcher in batchers]
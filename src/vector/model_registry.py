@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+프로세스 공용 모델 레지스트리
+
+(종류, 모델 이름, 디바이스)마다 모델을 프로세스당 1회만 로드해 EmbeddingService / E5Embedder /
+CrossEncoderReranker / GPUEmbeddingFunction / 웹 서버가 같은 인스턴스를 공유한다.
+    - 지연 로드: 서비스 객체 생성 시가 아니라 모델을 처음 사용할 때 로드
+    - 키별 잠금: 같은 모델 동시 요청은 1회만 로드하고, 다른 모델 로드끼리는 서로 막지 않음
+    - CUDA 로드 실패 시 CPU로 폴백하고 요청 키에도 CPU 모델을 연결 (이후 재시도 없음)
+    - 모델별 로드 시간 / 파라미터 메모리 / 프로세스 RSS 증가량 통계 (stats())
+    - INFERENCE_BACKEND=onnx: 내보낸 ONNX(int8) 모델을 CPU 세션으로 로드 (onnx_backend, 없으면 PyTorch 폴백)
+"""
+import os
+import time
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+SENTENCE_TRANSFORMER = "sentence_transformer"
+CROSS_ENCODER = "cross_encoder"
+
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "torch")  # torch | onnx
+
+Loader = Callable[[str, Optional[str]], Any]
+
+
+def _load_onnx(kind: str, model_name: str):
+    """INFERENCE_BACKEND=onnx면 내보낸 ONNX 모델 (사용할 수 없으면 None)"""
+    if INFERENCE_BACKEND != "onnx":
+        return None
+    try:
+        from .onnx_backend import load_onnx_model
+    except ImportError:
+        from onnx_backend import load_onnx_model
+    return load_onnx_model(kind, model_name)
+
+
+def _load_sentence_transformer(model_name: str, device: Optional[str]):
+    model = _load_onnx(SENTENCE_TRANSFORMER, model_name)
+    if model is not None:
+        return model
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name, device=device)
+
+
+def _load_cross_encoder(model_name: str, device: Optional[str]):
+    model = _load_onnx(CROSS_ENCODER, model_name)
+    if model is not None:
+        return model
+    from sentence_transformers import CrossEncoder
+    return CrossEncoder(model_name, device=device)
+
+
+DEFAULT_LOADERS: Dict[str, Loader] = {
+    SENTENCE_TRANSFORMER: _load_sentence_transformer,
+    CROSS_ENCODER: _load_cross_encoder,
+}
+
+
+def _rss_bytes() -> int:
+    if psutil is None:
+        return 0
+    try:
+        return psutil.Process().memory_info().rss
+    except Exception:
+        return 0
+
+
+def model_memory_bytes(model: Any) -> int:
+    """파라미터 메모리 (ONNX 모델은 모델 파일 크기, torch 모듈이 아니면 0; CrossEncoder는 내부 .model 기준)"""
+    model_bytes = getattr(model, "model_bytes", None)
+    if isinstance(model_bytes, int):
+        return model_bytes
+    for module in (model, getattr(model, "model", None)):
+        parameters = getattr(module, "parameters", None)
+        if not callable(parameters):
+            continue
+        try:
+            return int(sum(p.numel() * p.element_size() for p in parameters()))
+        except Exception:
+            continue
+    return 0
+
+
+@dataclass
+class LoadedModel:
+    """레지스트리에 로드된 모델"""
+    kind: str
+    model_name: str
+    device: str  # 실제 로드 디바이스 (폴백 반영)
+    model: Any
+    load_seconds: float
+    memory_bytes: int
+    rss_delta_bytes: int
+    backend: str = "torch"  # torch | onnx
+    loaded_at: float = field(default_factory=time.time)
+
+
+class ModelRegistry:
+    """(종류, 모델, 디바이스)별 1회 로드 + 공유"""
+
+    def __init__(self, loaders: Optional[Dict[str, Loader]] = None):
+        self.loaders = dict(DEFAULT_LOADERS if loaders is None else loaders)
+        self._entries: Dict[Tuple[str, str, str], LoadedModel] = {}
+        self._key_locks: Dict[Tuple[str, str, str], threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(kind: str, model_name: str, device: Optional[str]) -> Tuple[str, str, str]:
+        return kind, model_name, device or "auto"
+
+    def get(self, kind: str, model_name: str, device: Optional[str] = None) -> LoadedModel:
+        """로드된 모델 조회 (없으면 이 키에 대해서만 잠그고 1회 로드)"""
+        key = self._key(kind, model_name, device)
+        entry = self._entries.get(key)
+        if entry is not None:
+            return entry
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._load(kind, model_name, device)
+                with self._lock:
+                    self._entries[key] = entry
+                    self._entries.setdefault(self._key(kind, model_name, entry.device), entry)
+        return entry
+
+    def _load(self, kind: str, model_name: str, device: Optional[str]) -> LoadedModel:
+        if kind not in self.loaders:
+            raise ValueError(f"알 수 없는 모델 종류: {kind}")
+
+        logger.info(f"모델 로딩: {model_name} ({kind}, device: {device or 'auto'})")
+        rss_before = _rss_bytes()
+        start = time.perf_counter()
+        try:
+            model = self.loaders[kind](model_name, device)
+        except Exception as e:
+            if device and device.startswith("cuda"):
+                logger.warning(f"모델 로딩 실패 ({device}), CPU로 폴백: {e}")
+                return self.get(kind, model_name, "cpu")
+            raise
+
+        backend = getattr(model, "backend", "torch")
+        if backend != "torch":
+            device = model.device  # ONNX 세션은 요청 디바이스와 무관하게 CPU
+        entry = LoadedModel(
+            kind=kind,
+            model_name=model_name,
+            device=device or str(getattr(model, "device", "auto")),
+            model=model,
+            load_seconds=time.perf_counter() - start,
+            memory_bytes=model_memory_bytes(model),
+            rss_delta_bytes=max(_rss_bytes() - rss_before, 0),
+            backend=backend
+        )
+        logger.info(f"모델 로딩 완료: {model_name} ({entry.backend}/{entry.device}, {entry.load_seconds:.2f}초, "
+                    f"{entry.memory_bytes / 1024 / 1024:.1f}MB)")
+        return entry
+
+    def loaded(self) -> List[LoadedModel]:
+        """로드된 모델 목록 (폴백 별칭 중복 제거)"""
+        with self._lock:
+            return list({id(entry): entry for entry in self._entries.values()}.values())
+
+    def stats(self) -> Dict[str, Any]:
+        """모델별 로드 시간 / 메모리"""
+        models = [{
+            "kind": entry.kind,
+            "model_name": entry.model_name,
+            "device": entry.device,
+            "backend": entry.backend,
+            "load_seconds": round(entry.load_seconds, 3),
+            "memory_mb": round(entry.memory_bytes / 1024 / 1024, 1),
+            "rss_delta_mb": round(entry.rss_delta_bytes / 1024 / 1024, 1),
+            "loaded_at": entry.loaded_at
+        } for entry in self.loaded()]
+        return {
+            "loaded": len(models),
+            "total_memory_mb": round(sum(m["memory_mb"] for m in models), 1),
+            "total_load_seconds": round(sum(m["load_seconds"] for m in models), 3),
+            "models": models
+        }
+
+    def clear(self):
+        """등록 해제 (다른 곳에서 참조 중인 모델은 그대로 유지됨)"""
+        with self._lock:
+            self._entries.clear()
+            self._key_locks.clear()
+
+
+# 프로세스 공용 레지스트리
+model_registry = ModelRegistry()
+
+def get_sentence_transformer(model_name: str, device: Optional[str] = None):
+    """공용 SentenceTransformer (device=None이면 라이브러리 자동 선택)"""
+    return model_registry.get(SENTENCE_TRANSFORMER, model_name, device).model
+
+def get_cross_encoder(model_name: str, device: Optional[str] = None):
+    """공용 CrossEncoder"""
+    return model_registry.get(CROSS_ENCODER, model_name, device).model
+
+def get_model_registry_stats() -> Dict[str, Any]:
+    return model_registry.stats()
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ONNX Runtime CPU 추론 백엔드 (동적 int8 양자화)
+
+서빙 서버는 CPU 전용이라 PyTorch 경로 대신 ONNX Runtime 세션으로 e5 임베딩 / Cross-Encoder 리랭킹을 실행한다.
+    - export_onnx(): Hugging Face 모델 -> ONNX(fp32) 내보내기 + quantize_dynamic()으로 int8 가중치 모델 생성
+    - OnnxSentenceEncoder: SentenceTransformer.encode()와 같은 인터페이스 (마스크 평균 풀링, 선택 정규화)
+    - OnnxCrossEncoder: CrossEncoder.predict()와 같은 인터페이스 (레이블 1개면 시그모이드 점수)
+    - cosine_agreement() / score_agreement() / benchmark(): PyTorch 경로 대비 일치도·지연 측정
+
+INFERENCE_BACKEND=onnx면 model_registry가 ONNX_MODEL_DIR/<모델 이름>에 내보낸 모델을 로드한다
+(없거나 onnxruntime / transformers가 설치되지 않았으면 PyTorch로 폴백).
+내보내기·벤치마크는 scripts/export_onnx.py로 실행한다.
+"""
+import os
+import json
+import time
+import logging
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
+
+try:
+    from transformers import AutoTokenizer
+except ImportError:
+    AutoTokenizer = None
+
+try:
+    from .model_registry import SENTENCE_TRANSFORMER, CROSS_ENCODER
+except ImportError:
+    from model_registry import SENTENCE_TRANSFORMER, CROSS_ENCODER
+
+logger = logging.getLogger(__name__)
+
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "./src/data/models/onnx")
+ONNX_QUANTIZED = os.getenv("ONNX_QUANTIZED", "true").lower() == "true"
+ONNX_THREADS = int(os.getenv("ONNX_THREADS", "0"))  # 0이면 onnxruntime 기본값 (물리 코어 수)
+
+FP32_FILE = "model.onnx"
+INT8_FILE = "model.int8.onnx"
+CONFIG_FILE = "onnx_config.json"
+
+
+def onnx_available() -> bool:
+    """ONNX 추론에 필요한 패키지(onnxruntime, transformers) 설치 여부"""
+    return ort is not None and AutoTokenizer is not None
+
+
+def onnx_model_dir(model_name: str, root: str = ONNX_MODEL_DIR) -> str:
+    """모델별 내보내기 디렉터리 (intfloat/multilingual-e5-base -> intfloat__multilingual-e5-base)"""
+    return os.path.join(root, model_name.replace("/", "__"))
+
+
+def mean_pool(hidden: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+    """패딩을 제외한 토큰 평균 (sentence-transformers 평균 풀링과 동일) -> (N, 차원)"""
+    mask = attention_mask[..., None].astype(np.float32)
+    summed = (hidden * mask).sum(axis=1)
+    return summed / np.maximum(mask.sum(axis=1), 1e-9)
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def export_onnx(model_name: str, kind: str = SENTENCE_TRANSFORMER, output_dir: Optional[str] = None,
+                quantize: bool = True, max_length: int = 512, opset: int = 14) -> Dict[str, Any]:
+    """
+    Hugging Face 모델을 ONNX로 내보내고 (선택) 동적 int8 양자화
+
+    배치/시퀀스 축은 동적 축으로 내보내 한 모델 파일로 모든 입력 길이를 처리한다.
+    양자화는 가중치만 int8로 저장하고 활성값 스케일은 실행 시 계산한다 (보정 데이터 불필요).
+    """
+    import torch
+    from transformers import AutoModel, AutoModelForSequenceClassification, AutoTokenizer as Tokenizer
+
+    if kind not in (SENTENCE_TRANSFORMER, CROSS_ENCODER):
+        raise ValueError(f"ONNX 내보내기를 지원하지 않는 모델 종류: {kind}")
+    output_dir = output_dir or onnx_model_dir(model_name)
+    os.makedirs(output_dir, exist_ok=True)
+    start = time.time()
+
+    tokenizer = Tokenizer.from_pretrained(model_name)
+    if kind == SENTENCE_TRANSFORMER:
+        model = AutoModel.from_pretrained(model_name)
+        output_name = "last_hidden_state"
+        sample = tokenizer(["query: 지급명령 신청 방법"], return_tensors="pt")
+    else:
+        model = AutoModelForSequenceClassification.from_pretrained(model_name)
+        output_name = "logits"
+        sample = tokenizer(["지급명령 신청 방법"], ["지급명령은 법원의 결정입니다."], return_tensors="pt")
+    model.eval()
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+
+    class _Wrapper(torch.nn.Module):
+        """모델 출력 객체 대신 필요한 텐서 1개만 반환 (ONNX 그래프 출력 고정)"""
+
+        def __init__(self, inner):
+            super().__init__()
+            self.inner = inner
+
+        def forward(self, input_ids, attention_mask, token_type_ids=None):
+            inputs = {"input_ids": input_ids, "attention_mask": attention_mask}
+            if token_type_ids is not None:
+                inputs["token_type_ids"] = token_type_ids
+            return getattr(self.inner(**inputs), output_name)
+
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes[output_name] = {0: "batch", 1: "sequence"} if kind == SENTENCE_TRANSFORMER else {0: "batch"}
+
+    fp32_path = os.path.join(output_dir, FP32_FILE)
+    with torch.no_grad():
+        torch.onnx.export(_Wrapper(model), tuple(sample[name] for name in input_names), fp32_path,
+                          input_names=input_names, output_names=[output_name],
+                          dynamic_axes=dynamic_axes, opset_version=opset, do_constant_folding=True)
+    tokenizer.save_pretrained(output_dir)
+
+    int8_path = None
+    if quantize:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        int8_path = os.path.join(output_dir, INT8_FILE)
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+
+    config = {
+        "model_name": model_name,
+        "kind": kind,
+        "output_name": output_name,
+        "input_names": input_names,
+        "max_length": max_length,
+        "dimension": int(model.config.hidden_size),
+        "num_labels": int(getattr(model.config, "num_labels", 1)),
+        "quantized": quantize,
+        "opset": opset,
+        "exported_at": time.time()
+    }
+    with open(os.path.join(output_dir, CONFIG_FILE), "w", encoding="utf-8") as f:
+        json.dump(config, f, ensure_ascii=False, indent=2)
+
+    result = {
+        "output_dir": output_dir,
+        "fp32_bytes": os.path.getsize(fp32_path),
+        "int8_bytes": os.path.getsize(int8_path) if int8_path else 0,
+        "seconds": round(time.time() - start, 2)
+    }
+    logger.info(f"ONNX 내보내기 완료: {model_name} -> {output_dir} "
+                f"(fp32 {result['fp32_bytes'] / 1024 / 1024:.1f}MB, int8 {result['int8_bytes'] / 1024 / 1024:.1f}MB)")
+    return result
+
+
+class _OnnxModel:
+    """ONNX Runtime CPU 세션 + 토크나이저 (내보내기 디렉터리 1개)"""
+
+    backend = "onnx"
+    device = "cpu"
+
+    def __init__(self, model_dir: str, quantized: bool = ONNX_QUANTIZED, threads: int = ONNX_THREADS):
+        if not onnx_available():
+            raise ImportError("ONNX 백엔드에는 onnxruntime과 transformers가 필요합니다")
+        with open(os.path.join(model_dir, CONFIG_FILE), encoding="utf-8") as f:
+            self.config = json.load(f)
+
+        model_path = os.path.join(model_dir, INT8_FILE)
+        if not (quantized and os.path.exists(model_path)):
+            model_path = os.path.join(model_dir, FP32_FILE)
+        self.model_path = model_path
+        self.quantized = model_path.endswith(INT8_FILE)
+        self.model_bytes = os.path.getsize(model_path)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads > 0:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        self.output_name = self.config["output_name"]
+        self.max_seq_length = self.config["max_length"]
+
+    def _run(self, features: Dict[str, np.ndarray]) -> np.ndarray:
+        feed = {name: np.asarray(features[name], dtype=np.int64) for name in self.input_names}
+        return self.session.run([self.output_name], feed)[0]
+
+
+class OnnxSentenceEncoder(_OnnxModel):
+    """SentenceTransformer.encode() 호환 ONNX 임베더"""
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.config["dimension"]
+
+    def encode(self, sentences: Union[str, Sequence[str]], batch_size: int = 32,
+               normalize_embeddings: bool = False, convert_to_numpy: bool = True,
+               show_progress_bar: Optional[bool] = None, **kwargs) -> np.ndarray:
+        """텍스트 -> 임베딩 (단일 문자열이면 1차원, 목록이면 (N, 차원))"""
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        embeddings = np.zeros((len(texts), self.get_sentence_embedding_dimension()), dtype=np.float32)
+
+        # 길이순으로 묶어 배치 내 패딩 최소화, 결과는 입력 순서로 복원
+        order = np.argsort([-len(text) for text in texts], kind="stable")
+        for start in range(0, len(texts), max(batch_size, 1)):
+            rows = order[start:start + batch_size]
+            features = self.tokenizer([texts[i] for i in rows], padding=True, truncation=True,
+                                      max_length=self.max_seq_length, return_tensors="np")
+            embeddings[rows] = mean_pool(self._run(features), features["attention_mask"])
+
+        if normalize_embeddings:
+            embeddings = _normalize_rows(embeddings)
+        return embeddings[0] if single else embeddings
+
+
+class OnnxCrossEncoder(_OnnxModel):
+    """CrossEncoder.predict() 호환 ONNX 리랭커"""
+
+    def predict(self, sentences: Union[Tuple[str, str], Sequence[Tuple[str, str]]], batch_size: int = 32,
+                apply_softmax: bool = False, convert_to_numpy: bool = True,
+                show_progress_bar: Optional[bool] = None, **kwargs) -> np.ndarray:
+        """(쿼리, 문서) 쌍 -> 점수 (레이블 1개면 시그모이드 (N,), 아니면 로짓 (N, 레이블))"""
+        single = isinstance(sentences[0], str) if len(sentences) else False
+        pairs = [sentences] if single else list(sentences)
+        num_labels = self.config["num_labels"]
+        logits = np.zeros((len(pairs), num_labels), dtype=np.float32)
+
+        order = np.argsort([-(len(q) + len(d)) for q, d in pairs], kind="stable")
+        for start in range(0, len(pairs), max(batch_size, 1)):
+            rows = order[start:start + batch_size]
+            features = self.tokenizer([pairs[i][0] for i in rows], [pairs[i][1] for i in rows],
+                                      padding=True, truncation="longest_first",
+                                      max_length=self.max_seq_length, return_tensors="np")
+            logits[rows] = self._run(features)
+
+        if num_labels == 1:
+            scores = 1.0 / (1.0 + np.exp(-logits[:, 0]))
+        elif apply_softmax:
+            shifted = np.exp(logits - logits.max(axis=1, keepdims=True))
+            scores = shifted / shifted.sum(axis=1, keepdims=True)
+        else:
+            scores = logits
+        return scores[0] if single else scores
+
+
+ONNX_MODEL_CLASSES = {
+    SENTENCE_TRANSFORMER: OnnxSentenceEncoder,
+    CROSS_ENCODER: OnnxCrossEncoder,
+}
+
+
+def load_onnx_model(kind: str, model_name: str, root: str = ONNX_MODEL_DIR) -> Optional[_OnnxModel]:
+    """내보낸 ONNX 모델 로드 (패키지 미설치 / 내보내기 없음이면 경고 후 None -> 호출자가 PyTorch로 폴백)"""
+    if kind not in ONNX_MODEL_CLASSES:
+        return None
+    if not onnx_available():
+        logger.warning("onnxruntime / transformers 미설치 — PyTorch 백엔드 사용")
+        return None
+    model_dir = onnx_model_dir(model_name, root)
+    if not os.path.exists(os.path.join(model_dir, CONFIG_FILE)):
+        logger.warning(f"내보낸 ONNX 모델 없음: {model_dir} — scripts/export_onnx.py로 생성하세요 (PyTorch 백엔드 사용)")
+        return None
+    return ONNX_MODEL_CLASSES[kind](model_dir)
+
+
+def cosine_agreement(reference: np.ndarray, candidate: np.ndarray) -> Dict[str, float]:
+    """행별 코사인 유사도 (기준 임베딩 vs 후보 임베딩) 평균 / 최소"""
+    reference = _normalize_rows(np.atleast_2d(np.asarray(reference, dtype=np.float32)))
+    candidate = _normalize_rows(np.atleast_2d(np.asarray(candidate, dtype=np.float32)))
+    cosines = (reference * candidate).sum(axis=1)
+    return {"mean_cosine": float(cosines.mean()), "min_cosine": float(cosines.min())}
+
+
+def score_agreement(reference: Sequence[float], candidate: Sequence[float]) -> Dict[str, float]:
+    """리랭커 점수 일치도 (피어슨 상관, 최대 절대 오차, 1위 일치 여부)"""
+    reference = np.asarray(reference, dtype=np.float64).ravel()
+    candidate = np.asarray(candidate, dtype=np.float64).ravel()
+    if reference.std() > 0 and candidate.std() > 0:
+        pearson = float(np.corrcoef(reference, candidate)[0, 1])
+    else:
+        pearson = 1.0 if np.allclose(reference, candidate) else 0.0
+    return {
+        "pearson": pearson,
+        "max_abs_diff": float(np.abs(reference - candidate).max()) if reference.size else 0.0,
+        "top1_match": bool(reference.size and reference.argmax() == candidate.argmax())
+    }
+
+
+def benchmark(fn: Callable[[List[Any]], Any], inputs: List[Any], batch_size: int = 1,
+              runs: int = 3, warmup: int = 1) -> Dict[str, float]:
+    """fn(배치) 지연 측정 (batch_size개씩 inputs 전체를 runs회 반복) -> p50 / p95 ms, 초당 처리 건수"""
+    batches = [inputs[i:i + batch_size] for i in range(0, len(inputs), max(batch_size, 1))]
+    for batch in batches[:warmup]:
+        fn(batch)
+
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(runs):
+        for batch in batches:
+            t0 = time.perf_counter()
+            fn(batch)
+            latencies.append((time.perf_counter() - t0) * 1000)
+    elapsed = time.perf_counter() - start
+    return {
+        "batch_size": batch_size,
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+        "items_per_sec": round(len(inputs) * runs / elapsed, 1) if elapsed > 0 else 0.0
+    }
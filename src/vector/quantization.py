@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+압축 임베딩 저장소 (int8 스칼라 양자화 / Product Quantization)
+
+    - 상주 메모리에는 압축 코드만 유지 (int8: 4배, PQ(m=dim/4): 16배 절감)
+    - 쿼리 시 비대칭 거리 계산(ADC): 쿼리는 float32 그대로, 문서만 코드로 근사
+    - 근사 상위 후보만 원본 float32(mmap) 행으로 정확 재스코어링
+코드는 {index}.{method}.npz 로 캐시되며, 원본 .npy 가 더 새로우면 다시 학습한다.
+"""
+import os
+import logging
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+try:
+    from .search_engine import VectorSearchEngine, normalize_rows, top_k_indices
+except ImportError:
+    from search_engine import VectorSearchEngine, normalize_rows, top_k_indices
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+COMPRESSION_METHODS = ("none", "int8", "pq")
+SCORE_BLOCK_ROWS = 65536  # ADC 블록 크기 (임시 float32 버퍼 상한)
+
+
+def _sample_rows(matrix: np.ndarray, sample_size: int, seed: int) -> np.ndarray:
+    """학습용 정규화 샘플"""
+    rng = np.random.default_rng(seed)
+    rows = np.sort(rng.choice(matrix.shape[0], size=min(matrix.shape[0], sample_size), replace=False))
+    return normalize_rows(matrix[rows])
+
+
+class ScalarQuantizer:
+    """차원별 대칭 int8 양자화"""
+
+    method = "int8"
+
+    def __init__(self, scale: np.ndarray):
+        self.scale = np.asarray(scale, dtype=np.float32)
+
+    @property
+    def dimension(self) -> int:
+        return self.scale.shape[0]
+
+    @classmethod
+    def train(cls, matrix: np.ndarray, sample_size: int = 65536, seed: int = 0) -> "ScalarQuantizer":
+        """차원별 최대 절댓값으로 스케일 결정"""
+        sample = _sample_rows(matrix, sample_size, seed)
+        scale = np.abs(sample).max(axis=0) / 127.0
+        scale[scale == 0] = 1.0
+        return cls(scale)
+
+    def encode(self, matrix: np.ndarray) -> np.ndarray:
+        """float32 -> int8 코드 (블록 단위, 행 정규화 포함)"""
+        codes = np.empty(matrix.shape, dtype=np.int8)
+        for start in range(0, matrix.shape[0], SCORE_BLOCK_ROWS):
+            block = normalize_rows(matrix[start:start + SCORE_BLOCK_ROWS])
+            codes[start:start + block.shape[0]] = np.clip(np.rint(block / self.scale), -127, 127)
+        return codes
+
+    def score_codes(self, codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """ADC: (q * scale) · code"""
+        scaled_query = query * self.scale
+        scores = np.empty(codes.shape[0], dtype=np.float32)
+        for start in range(0, codes.shape[0], SCORE_BLOCK_ROWS):
+            block = codes[start:start + SCORE_BLOCK_ROWS]
+            scores[start:start + block.shape[0]] = block.astype(np.float32) @ scaled_query
+        return scores
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        return {"scale": self.scale}
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "ScalarQuantizer":
+        return cls(arrays["scale"])
+
+
+class ProductQuantizer:
+    """Product Quantization (부분공간별 256개 코드북, uint8 코드)"""
+
+    method = "pq"
+
+    def __init__(self, codebooks: np.ndarray):
+        self.codebooks = np.asarray(codebooks, dtype=np.float32)  # (m, ksub, dsub)
+
+    @property
+    def m(self) -> int:
+        return self.codebooks.shape[0]
+
+    @property
+    def dsub(self) -> int:
+        return self.codebooks.shape[2]
+
+    @property
+    def dimension(self) -> int:
+        return self.m * self.dsub
+
+    @classmethod
+    def train(cls, matrix: np.ndarray, m: Optional[int] = None, ksub: int = 256, n_iter: int = 10,
+              sample_size: int = 65536, seed: int = 0) -> "ProductQuantizer":
+        """부분공간별 k-means 학습"""
+        dim = matrix.shape[1]
+        m = m or max(1, dim // 4)
+        if dim % m != 0:
+            raise ValueError(f"차원 {dim}은 부분공간 수 {m}로 나누어떨어져야 합니다")
+        rng = np.random.default_rng(seed)
+        sample = _sample_rows(matrix, sample_size, seed)
+        ksub = min(ksub, sample.shape[0], 256)
+        dsub = dim // m
+
+        codebooks = np.empty((m, ksub, dsub), dtype=np.float32)
+        for j in range(m):
+            sub = sample[:, j * dsub:(j + 1) * dsub]
+            centroids = sub[rng.choice(sub.shape[0], size=ksub, replace=False)].copy()
+            for _ in range(n_iter):
+                labels = cls._nearest(sub, centroids)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, labels, sub)
+                counts = np.bincount(labels, minlength=ksub)
+                empty = counts == 0
+                centroids = sums / np.maximum(counts, 1)[:, None]
+                if empty.any():
+                    # 빈 클러스터는 임의 샘플로 재초기화
+                    centroids[empty] = sub[rng.choice(sub.shape[0], size=int(empty.sum()))]
+            codebooks[j] = centroids
+        return cls(codebooks)
+
+    @staticmethod
+    def _nearest(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        """유클리드 최근접 중심 (||c||² - 2x·c 최소)"""
+        return np.argmin((centroids * centroids).sum(axis=1) - 2.0 * (vectors @ centroids.T), axis=1)
+
+    def encode(self, matrix: np.ndarray) -> np.ndarray:
+        """float32 -> uint8 코드 (N, m)"""
+        codes = np.empty((matrix.shape[0], self.m), dtype=np.uint8)
+        for start in range(0, matrix.shape[0], SCORE_BLOCK_ROWS):
+            block = normalize_rows(matrix[start:start + SCORE_BLOCK_ROWS])
+            for j in range(self.m):
+                sub = block[:, j * self.dsub:(j + 1) * self.dsub]
+                codes[start:start + block.shape[0], j] = self._nearest(sub, self.codebooks[j])
+        return codes
+
+    def score_codes(self, codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """ADC: 부분공간별 (쿼리 · 코드북) 테이블 조회 후 합산"""
+        table = np.einsum("mkd,md->mk", self.codebooks, query.reshape(self.m, self.dsub))
+        subspaces = np.arange(self.m)
+        scores = np.empty(codes.shape[0], dtype=np.float32)
+        for start in range(0, codes.shape[0], SCORE_BLOCK_ROWS):
+            block = codes[start:start + SCORE_BLOCK_ROWS]
+            scores[start:start + block.shape[0]] = table[subspaces, block].sum(axis=1)
+        return scores
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        return {"codebooks": self.codebooks}
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "ProductQuantizer":
+        return cls(arrays["codebooks"])
+
+
+QUANTIZERS = {"int8": ScalarQuantizer, "pq": ProductQuantizer}
+
+
+class CompressedSearchEngine:
+    """압축 코드로 근사 스코어링 후 float32 원본으로 상위 후보 재스코어링 (VectorSearchEngine 호환)"""
+
+    def __init__(self, quantizer: Union[ScalarQuantizer, ProductQuantizer], codes: np.ndarray,
+                 vectors: Optional[np.ndarray] = None, rerank_k: int = 100, titles=None):
+        self.quantizer = quantizer
+        self.codes = codes
+        self.vectors = vectors  # 재스코어링용 원본 (mmap 권장, 후보 행만 읽힘)
+        self.rerank_k = rerank_k
+        self.titles = titles  # (선택) TitleVectors: 근사/정확 점수 모두 제목 유사도 late fusion
+        logger.info(f"CompressedSearchEngine 초기화 완료: {quantizer.method}, "
+                    f"{self.codes.shape}, {self.memory_bytes() / 1024 / 1024:.1f}MB")
+
+    def __len__(self) -> int:
+        return self.codes.shape[0]
+
+    @property
+    def dimension(self) -> int:
+        return self.quantizer.dimension
+
+    def memory_bytes(self) -> int:
+        """상주 메모리 (코드 + 코드북)"""
+        return self.codes.nbytes + sum(a.nbytes for a in self.quantizer.to_arrays().values())
+
+    def score(self, query_vec: np.ndarray) -> np.ndarray:
+        """근사 코사인 유사도 (ADC)"""
+        query = normalize_rows(np.asarray(query_vec, dtype=np.float32).reshape(-1))
+        scores = self.quantizer.score_codes(self.codes, query)
+        return scores if self.titles is None else self.titles.fuse(scores, query)
+
+    def _rescore(self, query: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        """후보 행 정확 재스코어링 (float32)"""
+        order = np.argsort(rows)
+        exact = np.empty(rows.shape[0], dtype=np.float32)
+        exact[order] = normalize_rows(self.vectors[rows[order]]) @ query
+        return exact if self.titles is None else self.titles.fuse(exact, query, rows)
+
+    def _ranked(self, query_vec: np.ndarray, limit: int, mask: Optional[np.ndarray],
+                min_similarity: Optional[float], approx: Optional[np.ndarray] = None) -> List[Tuple[float, int]]:
+        """근사 상위 max(limit, rerank_k)개 -> 정확 점수 기준 상위 limit개 (approx: 미리 계산한 score(), 제자리 수정됨)"""
+        query = normalize_rows(np.asarray(query_vec, dtype=np.float32).reshape(-1))
+        scores = self.score(query) if approx is None else approx
+        if mask is not None:
+            scores[~mask] = -np.inf
+        candidates = top_k_indices(scores, max(limit, self.rerank_k))
+        candidates = candidates[np.isfinite(scores[candidates])]
+        if self.vectors is not None and candidates.size:
+            scores = self._rescore(query, candidates)
+        else:
+            scores = scores[candidates]
+        if min_similarity is not None:
+            keep = scores >= min_similarity
+            candidates, scores = candidates[keep], scores[keep]
+        top = top_k_indices(scores, limit)
+        return [(float(scores[i]), int(candidates[i])) for i in top]
+
+    def search(self, query_vec: np.ndarray, top_k: int = 20,
+               mask: Optional[np.ndarray] = None,
+               min_similarity: Optional[float] = None) -> List[Tuple[float, int]]:
+        """단일 쿼리 검색 -> [(score, idx), ...]"""
+        return self._ranked(query_vec, top_k, mask, min_similarity)
+
+    def search_page(self, query_vec: np.ndarray, top_k: int = 20, offset: int = 0,
+                    mask: Optional[np.ndarray] = None,
+                    min_similarity: Optional[float] = None) -> Tuple[List[Tuple[float, int]], int]:
+        """페이징 검색 -> (페이지 결과, 필터 통과 전체 개수). 전체 개수는 근사 점수 기준"""
+        eligible = np.ones(len(self), dtype=bool) if mask is None else mask.copy()
+        approx = None
+        if min_similarity is not None:
+            # ADC 전체 스캔은 한 번만: 개수 집계 후 같은 점수 배열로 순위 계산
+            approx = self.score(query_vec)
+            eligible &= approx >= min_similarity
+        hits = self._ranked(query_vec, offset + top_k, mask, min_similarity, approx)
+        return hits[offset:offset + top_k], int(eligible.sum())
+
+    def search_many(self, query_matrix: np.ndarray, top_k: int = 20,
+                    mask: Optional[np.ndarray] = None,
+                    min_similarity: Optional[float] = None) -> List[List[Tuple[float, int]]]:
+        """배치 검색 -> 쿼리별 [(score, idx), ...]"""
+        return [self._ranked(query, top_k, mask, min_similarity) for query in np.atleast_2d(query_matrix)]
+
+
+def compressed_path(index_path: Union[str, os.PathLike], method: str) -> str:
+    """압축 코드 캐시 경로 (simple_vector_index.npy -> simple_vector_index.int8.npz)"""
+    base, _ = os.path.splitext(str(index_path))
+    return f"{base}.{method}.npz"
+
+
+def save_compressed(path: str, quantizer: Union[ScalarQuantizer, ProductQuantizer], codes: np.ndarray):
+    """코드/코드북 npz 저장 (pickle 없음)"""
+    tmp_path = f"{path}.tmp.npz"
+    np.savez(tmp_path, method=np.array(quantizer.method), codes=codes, **quantizer.to_arrays())
+    os.replace(tmp_path, path)
+
+
+def load_compressed(path: str) -> Tuple[Union[ScalarQuantizer, ProductQuantizer], np.ndarray]:
+    """npz 로드 -> (quantizer, codes)"""
+    with np.load(path, allow_pickle=False) as data:
+        arrays = {key: data[key] for key in data.files}
+    quantizer = QUANTIZERS[str(arrays.pop("method"))].from_arrays(arrays)
+    return quantizer, arrays["codes"]
+
+
+def load_search_engine(index_path: Union[str, os.PathLike], compression: str = "none",
+                       vectors: Optional[np.ndarray] = None, rerank_k: int = 100, titles=None, **train_kwargs):
+    """검색 엔진 생성: compression='none'이면 VectorSearchEngine, 아니면 CompressedSearchEngine (titles: 제목 late fusion)"""
+    if compression not in COMPRESSION_METHODS:
+        raise ValueError(f"지원하지 않는 압축 방식: {compression} (가능: {COMPRESSION_METHODS})")
+    if vectors is None:
+        vectors = np.load(index_path, mmap_mode='r')
+    if compression == "none":
+        return VectorSearchEngine(vectors, titles)
+
+    path = compressed_path(index_path, compression)
+    if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(index_path):
+        quantizer, codes = load_compressed(path)
+        if codes.shape[0] == vectors.shape[0]:
+            return CompressedSearchEngine(quantizer, codes, vectors, rerank_k, titles)
+        logger.warning(f"압축 코드 행 수 불일치, 재학습: {path}")
+
+    logger.info(f"압축 코드 학습 중: {compression} ({vectors.shape})")
+    quantizer = QUANTIZERS[compression].train(vectors, **train_kwargs)
+    codes = quantizer.encode(vectors)
+    save_compressed(path, quantizer, codes)
+    return CompressedSearchEngine(quantizer, codes, vectors, rerank_k, titles)
@@ -7,7 +7,11 @@ import os
 import logging
 from typing import List, Dict, Tuple, Optional
 import numpy as np
-from sentence_transformers import CrossEncoder
+
+try:
+    from .model_registry import model_registry, CROSS_ENCODER
+except ImportError:
+    from model_registry import model_registry, CROSS_ENCODER
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
@@ -22,25 +26,19 @@ class CrossEncoderReranker:
                  device: str = "cuda"):
         self.model_name = model_name
         self.device = device
-        self.model = None
-        self._load_model()
+        self._model = None
+    
+    @property
+    def model(self):
+        """Cross-Encoder 모델 (첫 사용 시 공용 레지스트리에서 로드)"""
+        if self._model is None:
+            self._load_model()
+        return self._model
     
     def _load_model(self):
-        """모델 로드"""
-        try:
-            logger.info(f"Cross-Encoder 모델 로딩: {self.model_name} (device: {self.device})")
-            self.model = CrossEncoder(self.model_name, device=self.device)
-            logger.info("Cross-Encoder 모델 로딩 완료")
-        except Exception as e:
-            logger.error(f"모델 로딩 실패: {e}")
-            # CPU로 폴백
-            if self.device == "cuda":
-                logger.info("CPU로 폴백 시도...")
-                self.device = "cpu"
-                self.model = CrossEncoder(self.model_name, device=self.device)
-                logger.info("CPU 모델 로딩 완료")
-            else:
-                raise e
+        """모델 로드 (프로세스당 1회, CUDA 실패 시 CPU 폴백은 레지스트리가 처리)"""
+        loaded = model_registry.get(CROSS_ENCODER, self.model_name, self.device)
+        self._model, self.device = loaded.model, loaded.device
     
     def rerank(self, query: str, documents: List[str], 
                top_k: Optional[int] = None) -> List[Tuple[str, float]]:
@@ -122,6 +120,46 @@ class CrossEncoderReranker:
         except Exception as e:
             logger.error(f"메타데이터 리랭킹 오류: {e}")
             return documents
+    
+    def rerank_many_with_metadata(self, queries: List[str],
+                                  documents_lists: List[List[Dict[str, any]]],
+                                  top_k: Optional[int] = None) -> List[List[Dict[str, any]]]:
+        """다중 쿼리 리랭킹 (모든 쿼리-문서 쌍을 한 번의 predict로 계산)"""
+        pairs = []
+        for query, documents in zip(queries, documents_lists):
+            for doc in documents:
+                pairs.append((query, doc.get("text", "") if isinstance(doc, dict) else str(doc)))
+        
+        if not pairs:
+            return [[] for _ in queries]
+        
+        try:
+            scores = np.asarray(self.model.predict(pairs), dtype=np.float32)
+        except Exception as e:
+            logger.error(f"다중 리랭킹 오류: {e}")
+            # 오류 시 원본 순서로 반환
+            return [list(documents[:top_k] if top_k is not None else documents) for documents in documents_lists]
+        
+        results = []
+        offset = 0
+        for documents in documents_lists:
+            doc_scores = scores[offset:offset + len(documents)]
+            offset += len(documents)
+            
+            order = np.argsort(-doc_scores, kind="stable")
+            if top_k is not None:
+                order = order[:top_k]
+            
+            reranked = []
+            for i in order:
+                doc = documents[i]
+                result_doc = doc.copy() if isinstance(doc, dict) else {"text": str(doc)}
+                result_doc["rerank_score"] = float(doc_scores[i])
+                reranked.append(result_doc)
+            results.append(reranked)
+        
+        logger.info(f"다중 리랭킹 완료: {len(queries)}개 쿼리, {len(pairs)}개 쌍")
+        return results
 
 
 class TwoStageRetriever:
@@ -138,16 +176,21 @@ class TwoStageRetriever:
         self.top_k_final = top_k_final
     
     def search_with_rerank(self, query: str, 
-                          where_filter: Optional[Dict[str, any]] = None) -> List[Dict[str, any]]:
-        """2단계 검색 실행"""
+                          where_filter: Optional[Dict[str, any]] = None,
+                          query_embedding: Optional[np.ndarray] = None) -> List[Dict[str, any]]:
+        """2단계 검색 실행 (query_embedding을 주면 1단계 쿼리 인코딩 생략)"""
+        vector_results = []
         try:
             # 1단계: 벡터 검색으로 상위 문서들 검색
             logger.info(f"1단계 벡터 검색: top_k={self.top_k_first}")
-            vector_results = self.vector_index.search(
-                query=query,
-                top_k=self.top_k_first,
-                where_filter=where_filter
-            )
+            if query_embedding is not None:
+                vector_results = self.vector_index.search_by_vector(query_embedding, self.top_k_first, where_filter)
+            else:
+                vector_results = self.vector_index.search(
+                    query=query,
+                    top_k=self.top_k_first,
+                    where_filter=where_filter
+                )
             
             if not vector_results:
                 logger.warning("벡터 검색 결과가 없음")
@@ -178,6 +221,45 @@ class TwoStageRetriever:
             # 오류 시 1단계 결과만 반환
             return vector_results[:self.top_k_final] if vector_results else []
     
+    def search_many_with_rerank(self, queries: List[str],
+                                where_filter: Optional[Dict[str, any]] = None,
+                                query_embeddings: Optional[np.ndarray] = None) -> List[List[Dict[str, any]]]:
+        """다중 쿼리 2단계 검색 (인코딩/스코어링/리랭킹 각 1회 배치, query_embeddings를 주면 인코딩 생략)"""
+        vector_results = []
+        try:
+            # 1단계: 모든 쿼리를 한 번에 벡터 검색
+            if query_embeddings is not None:
+                vector_results = self.vector_index.search_many_by_vector(
+                    query_embeddings, self.top_k_first, where_filter)
+            else:
+                vector_results = self.vector_index.search_many(
+                    queries,
+                    top_k=self.top_k_first,
+                    where_filter=where_filter
+                )
+            
+            # 2단계: 모든 쿼리-후보 쌍을 한 번에 리랭킹
+            reranked_results = self.reranker.rerank_many_with_metadata(
+                queries,
+                vector_results,
+                top_k=self.top_k_final
+            )
+            
+            for results in reranked_results:
+                for i, result in enumerate(results):
+                    result["search_rank"] = i + 1
+                    result["vector_score"] = result.get("similarity", 0.0)
+                    result["final_score"] = result.get("rerank_score", 0.0)
+            
+            return reranked_results
+            
+        except Exception as e:
+            logger.error(f"다중 2단계 검색 오류: {e}")
+            # 오류 시 1단계 결과만 반환
+            if vector_results:
+                return [results[:self.top_k_final] for results in vector_results]
+            return [[] for _ in queries]
+    
     def get_search_stats(self, query: str, 
                         where_filter: Optional[Dict[str, any]] = None) -> Dict[str, any]:
         """검색 통계 조회"""
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+벡터화된 Top-k 검색 엔진 (웹 서버/모니터링 공용)
+"""
+import logging
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """행 단위 L2 정규화 (float32)"""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """argpartition 기반 상위 k개 인덱스 (점수 내림차순)"""
+    n = scores.shape[0]
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < n:
+        part = np.argpartition(-scores, k - 1)[:k]
+    else:
+        part = np.arange(n)
+    return part[np.argsort(-scores[part], kind="stable")]
+
+
+class VectorSearchEngine:
+    """정규화된 float32 행렬 하나로 모든 행을 한 번에 스코어링하는 검색 엔진"""
+
+    def __init__(self, embeddings: np.ndarray, titles=None):
+        self.matrix = self._prepare_matrix(embeddings)
+        self.titles = titles  # (선택) TitleVectors: 제목 유사도 late fusion
+        logger.info(f"VectorSearchEngine 초기화 완료: {self.matrix.shape}")
+
+    @staticmethod
+    def _prepare_matrix(embeddings: np.ndarray) -> np.ndarray:
+        """이미 정규화된 float32 행렬(memmap 포함)은 복사 없이 그대로 사용"""
+        if embeddings.ndim != 2:
+            raise ValueError(f"2차원 임베딩 행렬이 필요합니다: {embeddings.shape}")
+        if embeddings.dtype == np.float32 and embeddings.shape[0] > 0:
+            norms = np.linalg.norm(embeddings, axis=1)
+            if np.allclose(norms, 1.0, atol=1e-3):
+                return embeddings
+        return np.ascontiguousarray(normalize_rows(embeddings))
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    @property
+    def dimension(self) -> int:
+        return self.matrix.shape[1]
+
+    def score(self, query_vec: np.ndarray) -> np.ndarray:
+        """단일 쿼리 코사인 유사도 (행렬-벡터 곱 1회)"""
+        query = normalize_rows(np.asarray(query_vec, dtype=np.float32).reshape(1, -1))[0]
+        scores = self.matrix @ query
+        return scores if self.titles is None else self.titles.fuse(scores, query)
+
+    def score_many(self, query_matrix: np.ndarray) -> np.ndarray:
+        """다중 쿼리 코사인 유사도 (Q x N, 행렬-행렬 곱 1회)"""
+        queries = normalize_rows(np.atleast_2d(query_matrix))
+        scores = queries @ self.matrix.T
+        return scores if self.titles is None else self.titles.fuse_many(scores, queries)
+
+    def select(self, scores: np.ndarray, top_k: int,
+               mask: Optional[np.ndarray] = None,
+               min_similarity: Optional[float] = None) -> List[Tuple[float, int]]:
+        """점수 벡터에서 (score, idx) 상위 k개 선택"""
+        if mask is not None or min_similarity is not None:
+            scores = scores.copy()
+            if mask is not None:
+                scores[~mask] = -np.inf
+            if min_similarity is not None:
+                scores[scores < min_similarity] = -np.inf
+        top = top_k_indices(scores, top_k)
+        return [(float(scores[i]), int(i)) for i in top if np.isfinite(scores[i])]
+
+    def search(self, query_vec: np.ndarray, top_k: int = 20,
+               mask: Optional[np.ndarray] = None,
+               min_similarity: Optional[float] = None) -> List[Tuple[float, int]]:
+        """단일 쿼리 검색 -> [(score, idx), ...]"""
+        return self.select(self.score(query_vec), top_k, mask, min_similarity)
+
+    def search_page(self, query_vec: np.ndarray, top_k: int = 20, offset: int = 0,
+                    mask: Optional[np.ndarray] = None,
+                    min_similarity: Optional[float] = None) -> Tuple[List[Tuple[float, int]], int]:
+        """페이징 검색 -> (페이지 결과, 필터 통과 전체 개수)"""
+        scores = self.score(query_vec)
+        eligible = np.ones(scores.shape[0], dtype=bool) if mask is None else mask.copy()
+        if min_similarity is not None:
+            eligible &= scores >= min_similarity
+        total = int(eligible.sum())
+        hits = self.select(scores, offset + top_k, mask=eligible)
+        return hits[offset:offset + top_k], total
+
+    def search_many(self, query_matrix: np.ndarray, top_k: int = 20,
+                    mask: Optional[np.ndarray] = None,
+                    min_similarity: Optional[float] = None) -> List[List[Tuple[float, int]]]:
+        """배치 검색 -> 쿼리별 [(score, idx), ...]"""
+        scores = self.score_many(query_matrix)
+        return [self.select(row, top_k, mask, min_similarity) for row in scores]
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+컬럼형 세그먼트 저장소 (pickle 없음, 메모리 매핑)
+
+세그먼트 하나는 다음 파일로 구성된다:
+    {name}.npy          # float32 벡터 행렬 (mmap_mode='r'로 열림)
+    {name}.texts.bin    # UTF-8 텍스트를 이어붙인 blob (mmap)
+    {name}.offsets.npy  # 텍스트 오프셋 int64[N+1] (mmap)
+    {name}.meta.json    # ID + 사전 인코딩된 메타데이터 컬럼 테이블
+벡터/텍스트는 헤더만 읽고 열리므로, 여러 워커가 OS 페이지 캐시를 공유한다.
+"""
+import os
+import json
+import logging
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def _value_key(value: Any) -> str:
+    """사전 인코딩용 해시 가능 키"""
+    return json.dumps(value, sort_keys=True, ensure_ascii=False)
+
+
+def encode_metadata_table(ids: List[str], metadatas: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """행 단위 메타데이터 -> 사전 인코딩 컬럼 테이블 (누락 값은 코드 -1)"""
+    fields = []
+    for metadata in metadatas:
+        for field in metadata:
+            if field not in fields:
+                fields.append(field)
+
+    columns = {}
+    for field in fields:
+        values, lookup, codes = [], {}, []
+        for metadata in metadatas:
+            if field not in metadata:
+                codes.append(-1)
+                continue
+            key = _value_key(metadata[field])
+            if key not in lookup:
+                lookup[key] = len(values)
+                values.append(metadata[field])
+            codes.append(lookup[key])
+        columns[field] = {"values": values, "codes": codes}
+
+    return {"ids": list(ids), "columns": columns}
+
+
+def decode_metadata_table(table: Dict[str, Any]) -> Tuple[List[str], List[Dict[str, Any]]]:
+    """컬럼 테이블 -> (ids, 행 단위 메타데이터)"""
+    ids = table["ids"]
+    metadatas = [{} for _ in ids]
+    for field, column in table["columns"].items():
+        values = column["values"]
+        for row, code in enumerate(column["codes"]):
+            if code >= 0:
+                metadatas[row][field] = values[code]
+    return ids, metadatas
+
+
+def segment_paths(segment_dir: str, name: str) -> Dict[str, str]:
+    """세그먼트 파일 경로"""
+    base = os.path.join(segment_dir, name)
+    return {
+        "vectors": f"{base}.npy",
+        "texts": f"{base}.texts.bin",
+        "offsets": f"{base}.offsets.npy",
+        "meta": f"{base}.meta.json"
+    }
+
+
+def write_segment(segment_dir: str, name: str, vectors: np.ndarray, ids: List[str],
+                  texts: List[str], metadatas: List[Dict[str, Any]]):
+    """세그먼트 파일 기록"""
+    paths = segment_paths(segment_dir, name)
+
+    np.save(paths["vectors"], np.ascontiguousarray(vectors, dtype=np.float32))
+
+    encoded = [text.encode("utf-8") for text in texts]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(blob) for blob in encoded])
+    with open(paths["texts"], "wb") as f:
+        f.write(b"".join(encoded))
+    np.save(paths["offsets"], offsets)
+
+    with open(paths["meta"], "w", encoding="utf-8") as f:
+        json.dump(encode_metadata_table(ids, metadatas), f, ensure_ascii=False)
+
+
+def remove_segment(segment_dir: str, name: str):
+    """세그먼트 파일 삭제 (v1 jsonl 포함)"""
+    paths = list(segment_paths(segment_dir, name).values()) + [os.path.join(segment_dir, f"{name}.jsonl")]
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+class MappedSegment:
+    """메모리 매핑된 읽기 전용 세그먼트"""
+
+    def __init__(self, segment_dir: str, name: str):
+        paths = segment_paths(segment_dir, name)
+        self.name = name
+        self.vectors = np.load(paths["vectors"], mmap_mode="r")
+        self.offsets = np.load(paths["offsets"], mmap_mode="r")
+        self._blob = (np.memmap(paths["texts"], dtype=np.uint8, mode="r")
+                      if os.path.getsize(paths["texts"]) > 0 else None)
+        with open(paths["meta"], "r", encoding="utf-8") as f:
+            self.ids, self.metadatas = decode_metadata_table(json.load(f))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def text(self, i: int) -> str:
+        """i번째 행 텍스트 (필요할 때만 디코딩)"""
+        start, end = int(self.offsets[i]), int(self.offsets[i + 1])
+        if self._blob is None or start == end:
+            return ""
+        return self._blob[start:end].tobytes().decode("utf-8")
+
+
+def read_jsonl_segment(segment_dir: str, name: str) -> Tuple[np.ndarray, List[str], List[str], List[Dict[str, Any]]]:
+    """v1(npy + jsonl) 세그먼트 읽기 (마이그레이션용)"""
+    vectors = np.load(os.path.join(segment_dir, f"{name}.npy"))
+    ids, texts, metadatas = [], [], []
+    with open(os.path.join(segment_dir, f"{name}.jsonl"), "r", encoding="utf-8") as f:
+        for line in f:
+            row = json.loads(line)
+            ids.append(row["id"])
+            texts.append(row["text"])
+            metadatas.append(row["metadata"])
+    return vectors, ids, texts, metadatas
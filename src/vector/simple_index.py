@@ -2,8 +2,23 @@
 # -*- coding: utf-8 -*-
 """
 간단한 벡터 인덱스 (ChromaDB 대안)
+
+저장 형식 (append-only 컬럼형 세그먼트, segment_store 참고):
+    {persist_directory}/{index_name}/manifest.json   # 포맷 버전, 차원, 세그먼트 목록
+    {persist_directory}/{index_name}/seg_000000.*    # 세그먼트 (벡터 .npy, 텍스트 blob, 메타 테이블)
+    {persist_directory}/{index_name}/tombstones_*.txt  # 삭제된 행 번호 (append-only, 매니페스트가 가리키는 파일)
+    {persist_directory}/{index_name}/ivf.npz         # (선택) IVF-Flat ANN 인덱스, build_ann_index()로 생성
+    {persist_directory}/{index_name}/titles.npz      # 문서 제목 어휘 + 벡터 (title_vectors 참고)
+업서트는 새 세그먼트만 추가하고, 삭제는 톰스톤만 기록하므로 기존 행을 다시 쓰지 않는다.
+컴팩션/초기화는 새 이름의 파일을 먼저 쓰고 매니페스트를 원자적으로 교체한 뒤 이전 파일을 삭제한다
+(중간에 중단되어도 매니페스트는 항상 온전한 파일 집합을 가리킴).
+디스크의 세그먼트는 mmap으로 열고, 이번 프로세스에서 추가된 행만 증설형 버퍼에 둔다.
+메타데이터 "title"이 있는 행은 질의 시 본문 유사도와 제목 유사도를 late fusion한다 (title_weight, 0이면 끔).
 """
 import os
+import json
+import time
+import bisect
 import hashlib
 import pickle
 import numpy as np
@@ -11,13 +26,42 @@ import logging
 from typing import List, Dict, Optional, Tuple, Any
 try:
     from .embedder import EmbeddingService
+    from .search_engine import normalize_rows, top_k_indices
+    from .filter_index import BitmapFilterIndex, matches_where
+    from .segment_store import MappedSegment, write_segment, remove_segment, read_jsonl_segment
+    from .ann_index import IVFFlatIndex
+    from .title_vectors import TitleVectors, TITLE_WEIGHT
 except ImportError:
     from embedder import EmbeddingService
+    from search_engine import normalize_rows, top_k_indices
+    from filter_index import BitmapFilterIndex, matches_where
+    from segment_store import MappedSegment, write_segment, remove_segment, read_jsonl_segment
+    from ann_index import IVFFlatIndex
+    from title_vectors import TitleVectors, TITLE_WEIGHT
+
+try:
+    from src.search.result_cache import bump_index_generation
+except ImportError:
+    # src 패키지 밖에서 단독 실행 (공유 결과 캐시 없음)
+    def bump_index_generation() -> str:
+        return ""
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+SEGMENT_FORMAT_VERSION = 2
+INITIAL_CAPACITY = 1024
+LEGACY_TOMBSTONE_FILE = "tombstones.txt"
+
+
+def _file_number(name: str) -> int:
+    """seg_000003 -> 3 (형식이 다르면 -1)"""
+    try:
+        return int(name.rsplit("_", 1)[-1])
+    except ValueError:
+        return -1
+
 
 class SimpleVectorIndex:
     """간단한 벡터 인덱스 클래스"""
@@ -25,84 +69,398 @@ class SimpleVectorIndex:
     def __init__(self, 
                  index_name: str = "naver_blog_debt_collection",
                  persist_directory: str = "./src/data/indexes/default/simple",
-                 embedding_service: Optional[EmbeddingService] = None):
+                 embedding_service: Optional[EmbeddingService] = None,
+                 nprobe: int = 8,
+                 title_weight: float = TITLE_WEIGHT):
         self.index_name = index_name
         self.persist_directory = persist_directory
         self.embedding_service = embedding_service or EmbeddingService()
         
-        # 인덱스 파일 경로
+        # 세그먼트 디렉터리 및 파일 경로
+        self.segment_dir = os.path.join(persist_directory, index_name)
+        self.manifest_file = os.path.join(self.segment_dir, "manifest.json")
+        self.tombstone_file = os.path.join(self.segment_dir, LEGACY_TOMBSTONE_FILE)
+        self.ann_file = os.path.join(self.segment_dir, "ivf.npz")
+        self.title_file = os.path.join(self.segment_dir, "titles.npz")
+        
+        # 구버전(pickle) 인덱스 파일 경로 (마이그레이션용)
         self.index_file = os.path.join(persist_directory, f"{index_name}.pkl")
         self.metadata_file = os.path.join(persist_directory, f"{index_name}_metadata.pkl")
         
         # 인덱스 데이터
-        self.documents = {}  # {doc_id: {"text": str, "embedding": np.ndarray, "metadata": dict}}
-        self.embeddings_matrix = None  # 모든 임베딩을 담은 행렬
-        self.doc_ids = []  # 문서 ID 순서
+        self.documents = {}  # {doc_id: {"metadata": dict, "row": int}}
+        self.doc_ids = []  # 행 번호 -> 문서 ID (삭제된 행 포함)
+        self.segments = []  # 세그먼트 이름 목록 (추가 순서)
+        self._next_file_id = 0  # 새 세그먼트/톰스톤 파일 번호 (재작성 후에도 이전 이름을 재사용하지 않음)
+        self.dimension = 0
+        self.normalized = True  # 저장된 임베딩의 정규화 여부
+        self.filter_index = BitmapFilterIndex()  # 메타데이터 필터 비트맵 (행 번호 기준)
+        
+        # (선택) ANN 인덱스: nprobe가 클수록 recall↑ 지연↑
+        self.ann_index = None
+        self.nprobe = nprobe
+        
+        # 문서 제목 벡터 (행 -> 제목 매핑, 본문 점수와 late fusion)
+        self.titles = TitleVectors(title_weight)
+        
+        # 디스크 세그먼트 (mmap, 읽기 전용)
+        self._mapped = []  # List[MappedSegment]
+        self._mapped_starts = []  # 각 세그먼트의 시작 행
+        self._mapped_rows = 0
+        
+        # 이번 프로세스에서 추가된 행: 증설 가능한 사전 할당 버퍼
+        self._matrix = None
+        self._tail_texts = []
+        
+        # 전체 행 톰스톤 마스크
+        self._alive = np.zeros(0, dtype=bool)
+        self._size = 0
         
         # 디렉터리 생성 및 인덱스 로드
-        os.makedirs(persist_directory, exist_ok=True)
+        os.makedirs(self.segment_dir, exist_ok=True)
         self._load_index()
         
         logger.info(f"SimpleVectorIndex 초기화 완료: {index_name}")
     
+    @property
+    def embeddings_matrix(self) -> Optional[np.ndarray]:
+        """전체 행렬 (삭제된 행 포함, alive_mask로 구분). 세그먼트가 여러 개면 복사본"""
+        parts = [vectors for _, vectors in self._vector_parts()]
+        if not parts:
+            return None
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+    
+    @property
+    def alive_mask(self) -> np.ndarray:
+        """살아있는 행 마스크"""
+        return self._alive[:self._size]
+    
     def get_content_hash(self, content: str) -> str:
         """콘텐츠 해시 생성"""
         return hashlib.sha256(content.encode('utf-8')).hexdigest()
     
+    def get_text(self, row: int) -> str:
+        """행 텍스트 조회 (mmap 세그먼트는 필요할 때만 디코딩)"""
+        if row >= self._mapped_rows:
+            return self._tail_texts[row - self._mapped_rows]
+        seg_idx = bisect.bisect_right(self._mapped_starts, row) - 1
+        return self._mapped[seg_idx].text(row - self._mapped_starts[seg_idx])
+    
+    def get_document(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        """문서 조회 -> {"text", "metadata"}"""
+        doc = self.documents.get(doc_id)
+        if doc is None:
+            return None
+        return {"text": self.get_text(doc["row"]), "metadata": doc["metadata"]}
+    
+    def _vector_parts(self) -> List[Tuple[int, np.ndarray]]:
+        """(시작 행, 벡터 행렬) 목록: mmap 세그먼트들 + 메모리 버퍼"""
+        parts = [(start, segment.vectors) for start, segment in zip(self._mapped_starts, self._mapped)
+                 if len(segment)]
+        tail_rows = self._size - self._mapped_rows
+        if tail_rows > 0:
+            parts.append((self._mapped_rows, self._matrix[:tail_rows]))
+        return parts
+    
+    def _score(self, query_embedding: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """전체(또는 정렬된 후보 행) 유사도 계산"""
+        scores = []
+        for start, vectors in self._vector_parts():
+            if rows is None:
+                scores.append(vectors @ query_embedding)
+            else:
+                lo, hi = np.searchsorted(rows, [start, start + vectors.shape[0]])
+                if hi > lo:
+                    scores.append(vectors[rows[lo:hi] - start] @ query_embedding)
+        return np.concatenate(scores) if scores else np.empty(0, dtype=np.float32)
+    
+    def _gather(self, rows: np.ndarray) -> np.ndarray:
+        """정렬된 행 번호의 벡터 복사본"""
+        gathered = []
+        for start, vectors in self._vector_parts():
+            lo, hi = np.searchsorted(rows, [start, start + vectors.shape[0]])
+            if hi > lo:
+                gathered.append(np.asarray(vectors[rows[lo:hi] - start]))
+        return np.concatenate(gathered) if gathered else np.empty((0, self.dimension), dtype=np.float32)
+    
+    def _reset(self):
+        """메모리 상태 초기화 (mmap 참조 해제)"""
+        self.documents = {}
+        self.doc_ids = []
+        self.segments = []
+        self.dimension = 0
+        self.normalized = True
+        self.filter_index.build([])
+        self._mapped = []
+        self._mapped_starts = []
+        self._mapped_rows = 0
+        self._matrix = None
+        self._tail_texts = []
+        self._alive = np.zeros(0, dtype=bool)
+        self._size = 0
+        self.titles.reset_rows()
+    
+    def _grow_alive(self, required: int):
+        """톰스톤 마스크 용량 2배 증설"""
+        if required <= self._alive.shape[0]:
+            return
+        capacity = max(INITIAL_CAPACITY, self._alive.shape[0])
+        while capacity < required:
+            capacity *= 2
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:self._size] = self._alive[:self._size]
+        self._alive = alive
+    
+    def _ensure_capacity(self, extra_rows: int, dim: int):
+        """버퍼 용량 부족 시 2배씩 증설 (기존 버퍼 행만 1회 복사)"""
+        tail_rows = self._size - self._mapped_rows
+        required = tail_rows + extra_rows
+        if self._matrix is None or required > self._matrix.shape[0]:
+            capacity = max(INITIAL_CAPACITY, self._matrix.shape[0] if self._matrix is not None else 0)
+            while capacity < required:
+                capacity *= 2
+            matrix = np.zeros((capacity, dim), dtype=np.float32)
+            if self._matrix is not None:
+                matrix[:tail_rows] = self._matrix[:tail_rows]
+            self._matrix = matrix
+            logger.debug(f"임베딩 버퍼 용량 증설: {capacity}")
+        self._grow_alive(self._size + extra_rows)
+    
+    def _register_rows(self, start: int, doc_ids: List[str], metadatas: List[Dict[str, Any]]):
+        """행 메타데이터/필터 비트맵 등록"""
+        for offset, doc_id in enumerate(doc_ids):
+            self.doc_ids.append(doc_id)
+            self.documents[doc_id] = {"metadata": metadatas[offset], "row": start + offset}
+            self.filter_index.add(metadatas[offset])
+    
+    def _append_rows(self, doc_ids: List[str], texts: List[str],
+                     embeddings: np.ndarray, metadatas: List[Dict[str, Any]]) -> Tuple[int, int]:
+        """메모리 버퍼 끝에 행 추가 -> (시작 행, 끝 행)"""
+        start = self._size
+        self._ensure_capacity(len(doc_ids), embeddings.shape[1])
+        end = start + len(doc_ids)
+        
+        tail_start = start - self._mapped_rows
+        self._matrix[tail_start:tail_start + len(doc_ids)] = embeddings
+        self._tail_texts.extend(texts)
+        self._alive[start:end] = True
+        self._size = end
+        self.dimension = embeddings.shape[1]
+        self._register_rows(start, doc_ids, metadatas)
+        
+        if self.ann_index is not None:
+            self.ann_index.add(embeddings)
+        
+        return start, end
+    
+    def _map_segment(self, segment: MappedSegment):
+        """디스크 세그먼트를 mmap 상태로 등록 (버퍼가 비어 있을 때만)"""
+        start = self._size
+        self._mapped.append(segment)
+        self._mapped_starts.append(start)
+        self._mapped_rows += len(segment)
+        self._grow_alive(start + len(segment))
+        self._alive[start:start + len(segment)] = True
+        self._size += len(segment)
+        if len(segment):
+            self.dimension = segment.vectors.shape[1]
+        self._register_rows(start, segment.ids, segment.metadatas)
+    
+    def _encode_titles(self, titles: List[str]) -> np.ndarray:
+        return np.vstack(self.embedding_service.get_embeddings_batch(titles))
+    
+    def _row_title(self, row: int) -> Optional[str]:
+        """살아있는 행의 메타데이터 제목 (없거나 삭제된 행은 None)"""
+        doc = self.documents.get(self.doc_ids[row])
+        if doc is None or doc["row"] != row:
+            return None
+        return doc["metadata"].get("title") or None
+    
+    def _sync_titles(self, save: bool = False, prune: bool = False):
+        """행 -> 제목 매핑을 전체 행까지 확장 (새 제목만 인코딩), 어휘가 바뀌면 저장"""
+        start = self.titles.row_titles.shape[0]
+        added = self.titles.extend([self._row_title(row) for row in range(start, self._size)], self._encode_titles)
+        if prune:
+            self.titles.prune()
+        if (added or save) and len(self.titles):
+            self.titles.save(self.title_file)
+    
     def _load_index(self):
         """인덱스 로드"""
         try:
-            if os.path.exists(self.index_file) and os.path.exists(self.metadata_file):
-                with open(self.index_file, 'rb') as f:
-                    self.documents = pickle.load(f)
-                with open(self.metadata_file, 'rb') as f:
-                    metadata = pickle.load(f)
-                    self.embeddings_matrix = metadata.get('embeddings_matrix')
-                    self.doc_ids = metadata.get('doc_ids', [])
-                
-                logger.info(f"인덱스 로드 완료: {len(self.documents)}개 문서")
+            if os.path.exists(self.manifest_file):
+                self._load_segments()
+                self._load_ann_index()
+                self.titles.load_vocabulary(self.title_file)
+                self._sync_titles()
+                logger.info(f"인덱스 로드 완료: {len(self.documents)}개 문서 ({len(self.segments)}개 세그먼트)")
+            elif os.path.exists(self.index_file) and os.path.exists(self.metadata_file):
+                self._migrate_legacy_index()
+                self._sync_titles()
             else:
                 logger.info("새 인덱스 생성")
         except Exception as e:
             logger.error(f"인덱스 로드 오류: {e}")
-            self.documents = {}
-            self.embeddings_matrix = None
-            self.doc_ids = []
+            self._reset()
     
-    def _save_index(self):
-        """인덱스 저장"""
-        try:
-            with open(self.index_file, 'wb') as f:
-                pickle.dump(self.documents, f)
-            
-            metadata = {
-                'embeddings_matrix': self.embeddings_matrix,
-                'doc_ids': self.doc_ids
-            }
-            with open(self.metadata_file, 'wb') as f:
-                pickle.dump(metadata, f)
-            
-            logger.info(f"인덱스 저장 완료: {len(self.documents)}개 문서")
-        except Exception as e:
-            logger.error(f"인덱스 저장 오류: {e}")
+    def _load_segments(self):
+        """매니페스트 순서대로 세그먼트를 mmap으로 열고 톰스톤 적용 (헤더만 읽음)"""
+        with open(self.manifest_file, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        
+        self._reset()
+        format_version = manifest.get("format_version", 1)
+        self.tombstone_file = os.path.join(self.segment_dir, manifest.get("tombstones", LEGACY_TOMBSTONE_FILE))
+        self._next_file_id = manifest.get(
+            "next_file_id", max([_file_number(name) for name in manifest.get("segments", [])], default=-1) + 1)
+        
+        for segment in manifest.get("segments", []):
+            if format_version >= 2:
+                self._map_segment(MappedSegment(self.segment_dir, segment))
+            else:
+                vectors, doc_ids, texts, metadatas = read_jsonl_segment(self.segment_dir, segment)
+                if doc_ids:
+                    self._append_rows(doc_ids, texts, vectors, metadatas)
+            self.segments.append(segment)
+        
+        if os.path.exists(self.tombstone_file):
+            with open(self.tombstone_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        self._kill_row(int(line))
+        
+        self.normalized = manifest.get("normalized", True)
+        if not self.normalized:
+            self._migrate_to_normalized()
+        elif format_version < SEGMENT_FORMAT_VERSION:
+            logger.info(f"세그먼트 포맷 v{format_version} -> v{SEGMENT_FORMAT_VERSION} 변환")
+            self.compact()
     
-    def _update_embeddings_matrix(self):
-        """임베딩 행렬 업데이트"""
-        if not self.documents:
-            self.embeddings_matrix = None
-            self.doc_ids = []
-            return
+    def _migrate_legacy_index(self):
+        """구버전 pickle 인덱스를 세그먼트 형식으로 1회 변환"""
+        with open(self.index_file, 'rb') as f:
+            documents = pickle.load(f)
+        with open(self.metadata_file, 'rb') as f:
+            normalized = pickle.load(f).get('normalized', False)
         
-        # 문서 ID 순서 정렬
-        self.doc_ids = sorted(self.documents.keys())
+        logger.info(f"구버전 인덱스 마이그레이션: {len(documents)}개 문서")
+        self._reset()
+        if documents:
+            doc_ids = sorted(documents.keys())
+            embeddings = np.vstack([documents[doc_id]["embedding"] for doc_id in doc_ids])
+            if not normalized:
+                embeddings = normalize_rows(embeddings)
+            start, end = self._append_rows(
+                doc_ids,
+                [documents[doc_id]["text"] for doc_id in doc_ids],
+                embeddings.astype(np.float32, copy=False),
+                [documents[doc_id]["metadata"] for doc_id in doc_ids]
+            )
+            self._write_segment(start, end)
+        self._write_manifest()
+    
+    def _migrate_to_normalized(self):
+        """비정규화 세그먼트 인덱스 마이그레이션 (전체 재작성 1회)"""
+        logger.info(f"비정규화 인덱스 마이그레이션: {len(self.documents)}개 문서")
+        rows = np.flatnonzero(self.alive_mask)
+        self._rewrite(rows, normalize_rows(self._gather(rows)))
+    
+    def _kill_row(self, row: int):
+        """행 삭제 표시 (메모리)"""
+        if row < self._size and self._alive[row]:
+            self._alive[row] = False
+            doc_id = self.doc_ids[row]
+            if doc_id in self.documents and self.documents[doc_id]["row"] == row:
+                del self.documents[doc_id]
+    
+    def _write_segment(self, start: int, end: int):
+        """[start, end) 행(메모리 버퍼)을 새 세그먼트 파일로 기록"""
+        segment = f"seg_{self._next_file_id:06d}"
+        self._next_file_id += 1
+        tail_start, tail_end = start - self._mapped_rows, end - self._mapped_rows
+        write_segment(
+            self.segment_dir, segment,
+            self._matrix[tail_start:tail_end],
+            self.doc_ids[start:end],
+            self._tail_texts[tail_start:tail_end],
+            [self.documents[doc_id]["metadata"] for doc_id in self.doc_ids[start:end]]
+        )
+        self.segments.append(segment)
+    
+    def _write_manifest(self):
+        """매니페스트 원자적 갱신"""
+        manifest = {
+            "format_version": SEGMENT_FORMAT_VERSION,
+            "index_name": self.index_name,
+            "dimension": int(self.dimension),
+            "normalized": self.normalized,
+            "segments": self.segments,
+            "tombstones": os.path.basename(self.tombstone_file),
+            "next_file_id": self._next_file_id,
+            "total_rows": self._size
+        }
+        tmp_file = f"{self.manifest_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, self.manifest_file)
+    
+    def _start_generation(self) -> Tuple[List[str], str]:
+        """새 파일 세대 시작: 메모리 상태 초기화 + 새 톰스톤 파일 지정 -> (이전 세그먼트, 이전 톰스톤 파일)"""
+        previous = (list(self.segments), self.tombstone_file)
+        self._reset()
+        self.tombstone_file = os.path.join(self.segment_dir, f"tombstones_{self._next_file_id:06d}.txt")
+        self._next_file_id += 1
+        if os.path.exists(self.tombstone_file):
+            os.remove(self.tombstone_file)  # 이전에 중단된 재작성이 남긴 파일
+        # 이전 행 번호 기준 ANN 파일은 매니페스트 교체 전에 제거 (중단 시 정확 검색으로 폴백)
+        if os.path.exists(self.ann_file):
+            os.remove(self.ann_file)
+        return previous
+    
+    def _remove_previous_generation(self, segments: List[str], tombstone_file: str):
+        """매니페스트 교체 후 더 이상 참조되지 않는 이전 세그먼트/톰스톤 파일 삭제"""
+        for segment in segments:
+            if segment not in self.segments:
+                remove_segment(self.segment_dir, segment)
+        if tombstone_file != self.tombstone_file and os.path.exists(tombstone_file):
+            os.remove(tombstone_file)
+    
+    def _rewrite(self, rows: np.ndarray, embeddings: np.ndarray):
+        """지정 행만 새 세그먼트 1개로 재작성 (새 파일 기록 -> 매니페스트 교체 -> 이전 파일 삭제)"""
+        doc_ids = [self.doc_ids[row] for row in rows]
+        texts = [self.get_text(row) for row in rows]
+        metadatas = [self.documents[doc_id]["metadata"] for doc_id in doc_ids]
         
-        # 임베딩 행렬 생성
-        embeddings = []
-        for doc_id in self.doc_ids:
-            embeddings.append(self.documents[doc_id]['embedding'])
+        # ANN 할당은 살아남은 행 기준으로 재배치 (재학습 없음)
+        ann_index, self.ann_index = self.ann_index, None
+        if ann_index is not None:
+            ann_index.select_rows(rows)
         
-        self.embeddings_matrix = np.vstack(embeddings)
-        logger.debug(f"임베딩 행렬 업데이트: {self.embeddings_matrix.shape}")
+        # 이전 세그먼트는 매니페스트 교체 전까지 디스크에 그대로 둠 (mmap 참조만 해제)
+        previous_segments, previous_tombstones = self._start_generation()
+        if doc_ids:
+            start, end = self._append_rows(doc_ids, texts, embeddings, metadatas)
+            self._write_segment(start, end)
+        self._write_manifest()
+        self._remove_previous_generation(previous_segments, previous_tombstones)
+        self._sync_titles(save=True, prune=True)
+        bump_index_generation()
+        
+        if ann_index is not None and doc_ids:
+            self.ann_index = ann_index
+            self.ann_index.save(self.ann_file)
+    
+    def compact(self) -> bool:
+        """살아있는 행만 단일 세그먼트로 재작성 (톰스톤 정리)"""
+        try:
+            rows = np.flatnonzero(self.alive_mask)
+            self._rewrite(rows, self._gather(rows))
+            logger.info(f"인덱스 컴팩션 완료: {len(rows)}개 문서")
+            return True
+        except Exception as e:
+            logger.error(f"인덱스 컴팩션 오류: {e}")
+            return False
     
     def upsert_chunks(self, chunks: List[Dict[str, Any]]) -> Dict[str, int]:
         """청크들을 벡터 인덱스에 업서트"""
@@ -115,13 +473,14 @@ class SimpleVectorIndex:
         
         # 처리할 청크들 필터링
         chunks_to_process = []
+        batch_hashes = set()
         
         for chunk in chunks:
             try:
                 content_hash = self.get_content_hash(chunk["text"])
                 
-                # 기존 문서 확인
-                if content_hash in self.documents:
+                # 기존 문서 확인 (같은 배치 내 중복 포함)
+                if content_hash in self.documents or content_hash in batch_hashes:
                     logger.debug(f"문서 이미 존재: {content_hash[:8]}...")
                     skipped_count += 1
                     continue
@@ -130,6 +489,7 @@ class SimpleVectorIndex:
                     **chunk,
                     "content_hash": content_hash
                 })
+                batch_hashes.add(content_hash)
                 
             except Exception as e:
                 logger.error(f"청크 처리 오류: {e}")
@@ -138,27 +498,29 @@ class SimpleVectorIndex:
         if not chunks_to_process:
             return {"added": 0, "skipped": skipped_count, "failed": failed_count}
         
-        # 임베딩 계산
+        # 임베딩 계산 (업서트 시점에 L2 정규화)
         texts = [chunk["text"] for chunk in chunks_to_process]
-        embeddings = self.embedding_service.get_embeddings_batch(texts)
+        embeddings = normalize_rows(np.vstack(self.embedding_service.get_embeddings_batch(texts)))
         
-        # 문서 추가
+        # 메타데이터 준비
+        doc_ids, metadatas, keep = [], [], []
         for i, chunk in enumerate(chunks_to_process):
             try:
-                doc_id = chunk["content_hash"]
-                self.documents[doc_id] = {
-                    "text": chunk["text"],
-                    "embedding": embeddings[i],
-                    "metadata": self._prepare_metadata(chunk)
-                }
-                added_count += 1
+                metadatas.append(self._prepare_metadata(chunk))
+                doc_ids.append(chunk["content_hash"])
+                keep.append(i)
             except Exception as e:
                 logger.error(f"문서 추가 오류: {e}")
                 failed_count += 1
         
-        # 임베딩 행렬 업데이트 및 저장
-        self._update_embeddings_matrix()
-        self._save_index()
+        # 행 추가 + 새 세그먼트만 기록 (기존 세그먼트는 건드리지 않음)
+        if doc_ids:
+            start, end = self._append_rows(doc_ids, [texts[i] for i in keep], embeddings[keep], metadatas)
+            self._write_segment(start, end)
+            self._write_manifest()
+            self._sync_titles()
+            added_count = len(doc_ids)
+            bump_index_generation()
         
         logger.info(f"[INDEX] 업서트 완료: added={added_count}, skipped={skipped_count}, failed={failed_count}")
         return {
@@ -174,6 +536,7 @@ class SimpleVectorIndex:
             "law_topic": chunk.get("metadata", {}).get("law_topic", "채권추심"),
             "source_url": chunk.get("metadata", {}).get("source_url", ""),
             "logno": chunk.get("metadata", {}).get("logno", ""),
+            "category": chunk.get("metadata", {}).get("category", ""),
             "published_at": chunk.get("metadata", {}).get("published_at", ""),
             "chunk_id": chunk.get("metadata", {}).get("chunk_id", ""),
             "chunk_type": chunk.get("metadata", {}).get("chunk_type", "semantic"),
@@ -181,6 +544,11 @@ class SimpleVectorIndex:
             "char_count": chunk.get("metadata", {}).get("char_count", "0")
         }
         
+        # 문서 제목 (청크 최상위 또는 메타데이터) -> 제목 벡터
+        title = chunk.get("metadata", {}).get("title") or chunk.get("title")
+        if title:
+            metadata["title"] = title
+        
         # 키워드가 있으면 추가
         if "keywords" in chunk.get("metadata", {}):
             metadata["keywords"] = chunk["metadata"]["keywords"]
@@ -191,38 +559,13 @@ class SimpleVectorIndex:
                where_filter: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """벡터 검색"""
         try:
-            if not self.documents or self.embeddings_matrix is None:
+            if not self.documents:
                 logger.warning("인덱스가 비어있음")
                 return []
             
             # 쿼리 임베딩 계산
             query_embedding = self.embedding_service.get_or_compute_embedding(query)
-            
-            # 코사인 유사도 계산
-            similarities = np.dot(self.embeddings_matrix, query_embedding) / (
-                np.linalg.norm(self.embeddings_matrix, axis=1) * np.linalg.norm(query_embedding)
-            )
-            
-            # 상위 k개 선택
-            top_indices = np.argsort(similarities)[::-1][:top_k]
-            
-            # 결과 포맷팅
-            results = []
-            for idx in top_indices:
-                doc_id = self.doc_ids[idx]
-                doc = self.documents[doc_id]
-                
-                # 필터 적용
-                if where_filter:
-                    if not self._matches_filter(doc["metadata"], where_filter):
-                        continue
-                
-                results.append({
-                    "id": doc_id,
-                    "text": doc["text"],
-                    "metadata": doc["metadata"],
-                    "similarity": float(similarities[idx])
-                })
+            results = self.search_by_vector(query_embedding, top_k, where_filter)
             
             logger.info(f"벡터 검색 완료: {len(results)}개 결과")
             return results
@@ -231,12 +574,159 @@ class SimpleVectorIndex:
             logger.error(f"벡터 검색 오류: {e}")
             return []
     
+    def _filter_rows(self, where_filter: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """필터/톰스톤 통과 행 (None = 전체)"""
+        filter_mask = self.filter_index.mask(where_filter) if where_filter else None
+        if filter_mask is None and len(self.documents) == self._size:
+            return None
+        candidate_mask = self.alive_mask if filter_mask is None else (self.alive_mask & filter_mask)
+        return np.flatnonzero(candidate_mask)
+    
+    def _candidate_rows(self, query_embedding: np.ndarray, top_k: int,
+                        where_filter: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """스코어링 대상 행 (None = 전체). 필터/톰스톤/ANN 후보를 랭킹 전에 적용"""
+        filter_rows = self._filter_rows(where_filter)
+        
+        if self.ann_index is not None:
+            ann_rows = self.ann_index.candidates(query_embedding, self.nprobe)
+            if filter_rows is not None:
+                ann_rows = ann_rows[np.isin(ann_rows, filter_rows, assume_unique=True)]
+            # 후보가 top_k보다 적으면 (선택적인 필터 등) 정확 검색으로 폴백
+            if ann_rows.size >= top_k:
+                return ann_rows
+        
+        return filter_rows
+    
+    def _format_results(self, similarities: np.ndarray, top_indices: np.ndarray,
+                        candidate_rows: Optional[np.ndarray]) -> List[Dict[str, Any]]:
+        """상위 인덱스 -> 결과 딕셔너리"""
+        results = []
+        for idx in top_indices:
+            row = idx if candidate_rows is None else candidate_rows[idx]
+            doc_id = self.doc_ids[row]
+            doc = self.documents[doc_id]
+            
+            results.append({
+                "id": doc_id,
+                "text": self.get_text(row),
+                "metadata": doc["metadata"],
+                "similarity": float(similarities[idx])
+            })
+        return results
+    
+    def search_by_vector(self, query_embedding: np.ndarray, top_k: int = 20,
+                         where_filter: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """임베딩 벡터로 검색 (인코딩 제외)"""
+        if not self.documents:
+            return []
+        
+        query_embedding = normalize_rows(np.asarray(query_embedding, dtype=np.float32))
+        candidate_rows = self._candidate_rows(query_embedding, top_k, where_filter)
+        if candidate_rows is not None and candidate_rows.size == 0:
+            return []
+        
+        # 코사인 유사도 계산 (행렬이 정규화되어 있으므로 내적 1회) + 제목 유사도 late fusion
+        similarities = self.titles.fuse(self._score(query_embedding, candidate_rows), query_embedding, candidate_rows)
+        
+        # 상위 k개 선택
+        return self._format_results(similarities, top_k_indices(similarities, top_k), candidate_rows)
+    
+    def _score_many(self, query_matrix: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """다중 쿼리 유사도 (Q x 후보 행, 세그먼트별 행렬-행렬 곱)"""
+        scores = []
+        for start, vectors in self._vector_parts():
+            if rows is None:
+                scores.append(query_matrix @ vectors.T)
+            else:
+                lo, hi = np.searchsorted(rows, [start, start + vectors.shape[0]])
+                if hi > lo:
+                    scores.append(query_matrix @ vectors[rows[lo:hi] - start].T)
+        if not scores:
+            return np.empty((query_matrix.shape[0], 0), dtype=np.float32)
+        return np.concatenate(scores, axis=1)
+    
+    def search_many(self, queries: List[str], top_k: int = 20,
+                    where_filter: Optional[Dict[str, Any]] = None) -> List[List[Dict[str, Any]]]:
+        """다중 쿼리 검색 (인코딩 1회 + 행렬-행렬 곱 1회)"""
+        try:
+            if not queries:
+                return []
+            if not self.documents:
+                logger.warning("인덱스가 비어있음")
+                return [[] for _ in queries]
+            
+            # 캐시 미스 쿼리만 한 번의 모델 호출로 임베딩
+            query_matrix = np.vstack(self.embedding_service.get_embeddings_batch(queries))
+            results = self.search_many_by_vector(query_matrix, top_k, where_filter)
+            
+            logger.info(f"다중 벡터 검색 완료: {len(queries)}개 쿼리")
+            return results
+            
+        except Exception as e:
+            logger.error(f"다중 벡터 검색 오류: {e}")
+            return [[] for _ in queries]
+    
+    def search_many_by_vector(self, query_matrix: np.ndarray, top_k: int = 20,
+                              where_filter: Optional[Dict[str, Any]] = None) -> List[List[Dict[str, Any]]]:
+        """임베딩 행렬로 다중 검색"""
+        query_matrix = normalize_rows(np.atleast_2d(np.asarray(query_matrix, dtype=np.float32)))
+        if not self.documents:
+            return [[] for _ in range(query_matrix.shape[0])]
+        if self.ann_index is not None:
+            # ANN 후보는 쿼리마다 다르므로 쿼리별 검색
+            return [self.search_by_vector(query, top_k, where_filter) for query in query_matrix]
+        
+        candidate_rows = self._filter_rows(where_filter)
+        if candidate_rows is not None and candidate_rows.size == 0:
+            return [[] for _ in range(query_matrix.shape[0])]
+        
+        similarities = self.titles.fuse_many(self._score_many(query_matrix, candidate_rows), query_matrix, candidate_rows)
+        return [self._format_results(scores, top_k_indices(scores, top_k), candidate_rows)
+                for scores in similarities]
+    
+    def build_ann_index(self, nlist: Optional[int] = None, seed: int = 0) -> Dict[str, Any]:
+        """IVF-Flat ANN 인덱스 학습 및 저장 (센트로이드는 살아있는 행으로만 학습, 할당은 전체 행 번호 기준)"""
+        alive_rows = np.flatnonzero(self.alive_mask)
+        if alive_rows.size == 0:
+            raise ValueError("빈 인덱스에는 ANN 인덱스를 만들 수 없습니다")
+        
+        start_time = time.time()
+        self.ann_index = IVFFlatIndex.train(self.embeddings_matrix, nlist=nlist, seed=seed, train_rows=alive_rows)
+        self.ann_index.save(self.ann_file)
+        
+        build_info = {
+            "nlist": self.ann_index.nlist,
+            "rows": self.ann_index.num_rows,
+            "build_seconds": round(time.time() - start_time, 3),
+            "ann_file": self.ann_file
+        }
+        logger.info(f"ANN 인덱스 구축 완료: {build_info}")
+        return build_info
+    
+    def drop_ann_index(self):
+        """ANN 인덱스 제거 (정확 검색으로 복귀)"""
+        self.ann_index = None
+        if os.path.exists(self.ann_file):
+            os.remove(self.ann_file)
+    
+    def _load_ann_index(self):
+        """ANN 인덱스 로드 후 이후 추가된 행 할당"""
+        if not os.path.exists(self.ann_file) or self._size == 0:
+            return
+        try:
+            self.ann_index = IVFFlatIndex.load(self.ann_file)
+            if self.ann_index.num_rows > self._size:
+                logger.warning("ANN 인덱스가 세그먼트보다 큼, 무시")
+                self.ann_index = None
+            elif self.ann_index.num_rows < self._size:
+                self.ann_index.add(self._gather(np.arange(self.ann_index.num_rows, self._size)))
+        except Exception as e:
+            logger.error(f"ANN 인덱스 로드 오류: {e}")
+            self.ann_index = None
+    
     def _matches_filter(self, metadata: Dict[str, str], where_filter: Dict[str, Any]) -> bool:
         """메타데이터 필터 매칭"""
-        for key, value in where_filter.items():
-            if key not in metadata or metadata[key] != value:
-                return False
-        return True
+        return matches_where(metadata, where_filter)
     
     def get_index_stats(self) -> Dict[str, Any]:
         """인덱스 통계 조회"""
@@ -244,7 +734,9 @@ class SimpleVectorIndex:
             stats = {
                 "total_documents": len(self.documents),
                 "index_name": self.index_name,
-                "persist_directory": self.persist_directory
+                "persist_directory": self.persist_directory,
+                "title_vectors": len(self.titles),
+                "title_weight": self.titles.weight
             }
             
             if self.documents:
@@ -271,20 +763,22 @@ class SimpleVectorIndex:
             return {"error": str(e)}
     
     def delete_documents(self, content_hashes: List[str]) -> int:
-        """문서 삭제"""
+        """문서 삭제 (톰스톤 기록, 기존 세그먼트는 그대로 유지)"""
         try:
-            deleted_count = 0
+            deleted_rows = []
             for content_hash in content_hashes:
                 if content_hash in self.documents:
-                    del self.documents[content_hash]
-                    deleted_count += 1
+                    row = self.documents[content_hash]["row"]
+                    self._kill_row(row)
+                    deleted_rows.append(row)
             
-            if deleted_count > 0:
-                self._update_embeddings_matrix()
-                self._save_index()
+            if deleted_rows:
+                with open(self.tombstone_file, 'a', encoding='utf-8') as f:
+                    f.write("".join(f"{row}\n" for row in deleted_rows))
+                bump_index_generation()
             
-            logger.info(f"문서 삭제 완료: {deleted_count}개")
-            return deleted_count
+            logger.info(f"문서 삭제 완료: {len(deleted_rows)}개")
+            return len(deleted_rows)
         except Exception as e:
             logger.error(f"문서 삭제 오류: {e}")
             return 0
@@ -292,10 +786,14 @@ class SimpleVectorIndex:
     def clear_index(self) -> bool:
         """인덱스 전체 삭제"""
         try:
-            self.documents = {}
-            self.embeddings_matrix = None
-            self.doc_ids = []
-            self._save_index()
+            self.ann_index = None
+            previous_segments, previous_tombstones = self._start_generation()
+            self._write_manifest()
+            self._remove_previous_generation(previous_segments, previous_tombstones)
+            self.titles = TitleVectors(self.titles.weight)
+            if os.path.exists(self.title_file):
+                os.remove(self.title_file)
+            bump_index_generation()
             
             logger.info(f"인덱스 초기화 완료: {self.index_name}")
             return True
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+문서 제목 벡터 (멀티 벡터 검색의 late fusion)
+
+청크 벡터와 별도로 문서 제목마다 벡터 1개를 두고, 질의 시 본문(청크) 유사도와 제목 유사도를 합친다.
+
+    score(row) = (1 - w) · sim(q, chunk[row]) + w · sim(q, title[row_titles[row]])   (제목 없는 행은 본문 점수 그대로)
+
+제목 행렬은 문서 수만큼이므로(청크 수 ≪) 질의당 작은 행렬-벡터 곱 1회만 추가된다.
+행 -> 제목 매핑은 메타데이터 "title"에서 다시 만들 수 있으므로 저장 파일에는 제목 어휘(문자열 + 벡터)만 둔다.
+"""
+import os
+import logging
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+try:
+    from .search_engine import normalize_rows
+except ImportError:
+    from search_engine import normalize_rows
+
+logger = logging.getLogger(__name__)
+
+TITLE_WEIGHT = float(os.getenv("TITLE_WEIGHT", "0.3"))
+
+Encoder = Callable[[List[str]], np.ndarray]
+
+
+class TitleVectors:
+    """제목 어휘 벡터 + 행 -> 제목 매핑"""
+
+    def __init__(self, weight: float = TITLE_WEIGHT, dimension: int = 0):
+        self.weight = weight
+        self.titles: List[str] = []
+        self.title_ids: Dict[str, int] = {}
+        self.matrix = np.zeros((0, dimension), dtype=np.float32)  # (제목 수, 차원), 정규화됨
+        self.row_titles = np.zeros(0, dtype=np.int32)  # 행 -> 제목 번호 (-1 = 제목 없음)
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    @property
+    def active(self) -> bool:
+        return self.weight > 0 and len(self.titles) > 0 and bool((self.row_titles >= 0).any())
+
+    def _add_titles(self, titles: Sequence[str], encode: Encoder):
+        """새 제목만 배치 인코딩해 어휘에 추가"""
+        new_titles = list(dict.fromkeys(t for t in titles if t not in self.title_ids))
+        if not new_titles:
+            return
+        vectors = normalize_rows(np.asarray(encode(new_titles), dtype=np.float32))
+        if self.matrix.shape[0] == 0:
+            self.matrix = vectors
+        else:
+            self.matrix = np.concatenate([self.matrix, vectors])
+        for title in new_titles:
+            self.title_ids[title] = len(self.titles)
+            self.titles.append(title)
+
+    def extend(self, row_titles: Sequence[Optional[str]], encode: Encoder) -> int:
+        """행 추가 (행마다 제목 또는 None) -> 새로 인코딩한 제목 수"""
+        before = len(self.titles)
+        self._add_titles([t for t in row_titles if t], encode)
+        mapping = np.fromiter((self.title_ids[t] if t else -1 for t in row_titles),
+                              dtype=np.int32, count=len(row_titles))
+        self.row_titles = np.concatenate([self.row_titles, mapping])
+        return len(self.titles) - before
+
+    def reset_rows(self):
+        """행 매핑만 비우기 (제목 어휘/벡터는 재사용)"""
+        self.row_titles = np.zeros(0, dtype=np.int32)
+
+    def prune(self):
+        """어떤 행도 쓰지 않는 제목 제거"""
+        used = np.unique(self.row_titles[self.row_titles >= 0])
+        if used.size == len(self.titles):
+            return
+        remap = np.full(len(self.titles) + 1, -1, dtype=np.int32)
+        remap[used] = np.arange(used.size, dtype=np.int32)
+        self.matrix = self.matrix[used]
+        self.titles = [self.titles[i] for i in used]
+        self.title_ids = {title: i for i, title in enumerate(self.titles)}
+        self.row_titles = remap[self.row_titles]
+
+    def fuse(self, body_scores: np.ndarray, query: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """본문 점수(전체 또는 rows 행) + 제목 점수 late fusion (제목 행렬-벡터 곱 1회)"""
+        if not self.active:
+            return body_scores
+        mapping = self.row_titles if rows is None else self.row_titles[rows]
+        has_title = mapping >= 0
+        title_scores = self.matrix @ np.asarray(query, dtype=np.float32).reshape(-1)
+        fused = np.array(body_scores, dtype=np.float32, copy=True)
+        fused[has_title] = ((1 - self.weight) * fused[has_title]
+                            + self.weight * title_scores[mapping[has_title]])
+        return fused
+
+    def fuse_many(self, body_scores: np.ndarray, queries: np.ndarray,
+                  rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """다중 쿼리 (Q x N) 버전 (제목 행렬-행렬 곱 1회)"""
+        if not self.active:
+            return body_scores
+        mapping = self.row_titles if rows is None else self.row_titles[rows]
+        has_title = np.flatnonzero(mapping >= 0)
+        title_scores = np.atleast_2d(np.asarray(queries, dtype=np.float32)) @ self.matrix.T
+        fused = np.array(body_scores, dtype=np.float32, copy=True)
+        fused[:, has_title] = ((1 - self.weight) * fused[:, has_title]
+                               + self.weight * title_scores[:, mapping[has_title]])
+        return fused
+
+    def save(self, path: str):
+        """제목 어휘 저장 (npz, pickle 없음, 원자적 교체)"""
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, titles=np.array(self.titles, dtype=np.str_), vectors=self.matrix)
+        os.replace(tmp_path, path)
+
+    def load_vocabulary(self, path: str) -> bool:
+        """저장된 제목 어휘 로드 (행 매핑은 호출자가 extend로 구성)"""
+        if not os.path.exists(path):
+            return False
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                titles, vectors = data["titles"].tolist(), data["vectors"].astype(np.float32)
+        except Exception as e:
+            logger.warning(f"제목 벡터 로드 실패, 재인코딩: {e}")
+            return False
+        self.titles = titles
+        self.title_ids = {title: i for i, title in enumerate(titles)}
+        self.matrix = vectors
+        self.row_titles = np.zeros(0, dtype=np.int32)
+        return True
+
+
+def titles_path(index_path: str) -> str:
+    """제목 벡터 캐시 경로 (simple_vector_index.npy -> simple_vector_index.titles.npz)"""
+    base, _ = os.path.splitext(str(index_path))
+    return f"{base}.titles.npz"
+
+
+def load_or_build_titles(path: str, row_titles: Sequence[Optional[str]], encode: Encoder,
+                         weight: float = TITLE_WEIGHT) -> TitleVectors:
+    """캐시된 제목 어휘를 재사용해 행 매핑 구성, 새 제목이 있으면 인코딩 후 캐시 갱신"""
+    titles = TitleVectors(weight)
+    titles.load_vocabulary(path)
+    if titles.extend(row_titles, encode):
+        titles.prune()
+        try:
+            titles.save(path)
+        except OSError as e:
+            logger.warning(f"제목 벡터 캐시 저장 실패: {e}")
+    logger.info(f"제목 벡터: {len(titles)}개 (가중치 {weight})")
+    return titles
@@ -16,6 +16,14 @@ sys.path.insert(0, str(project_root))
 
 from src.vector.reranker import CrossEncoderReranker, TwoStageRetriever
 from src.search.search_service import SearchService
+from src.search.bm25 import InvertedBM25Index, tokenize
+from src.search.tokenizer import KoreanTokenizer, TokenCache, get_tokenizer, ko_bigrams
+from src.search.hybrid_retriever import fuse_hits, mmr_rerank
+from src.search.fusion import fuse
+from src.search.mmr import mmr_rank, mmr_select
+from src.search.result_cache import IndexGeneration, ResultCache, current_index_generation
+from src.search.semantic_cache import SemanticCache, context_key, result_overlap
+from src.search.query_rewriter import QueryRewriter, SynonymAutomaton
 
 
 class TestCrossEncoderReranker(unittest.TestCase):
@@ -71,6 +79,24 @@ class TestCrossEncoderReranker(unittest.TestCase):
         scores = [result["rerank_score"] for result in results]
         self.assertEqual(scores, sorted(scores, reverse=True))
     
+    def test_rerank_many_matches_single(self):
+        """다중 쿼리 리랭킹이 쿼리별 리랭킹과 동일한지 테스트"""
+        queries = ["채권추심 절차", "지급명령 서류"]
+        documents_lists = [
+            [{"text": "채권추심은 내용증명 발송부터 시작됩니다."}, {"text": "오늘 날씨가 좋습니다."}],
+            [{"text": "지급명령 신청 시 필요한 서류들을 준비해야 합니다."}, {"text": "강제집행 절차에 대해 설명합니다."}, {"text": "서류"}]
+        ]
+        
+        batch_results = self.reranker.rerank_many_with_metadata(queries, documents_lists, top_k=2)
+        
+        self.assertEqual(len(batch_results), 2)
+        for query, documents, results in zip(queries, documents_lists, batch_results):
+            expected = self.reranker.rerank_with_metadata(query, documents, top_k=2)
+            self.assertEqual([r["text"] for r in results], [r["text"] for r in expected])
+            self.assertEqual([r["rerank_score"] for r in results], [r["rerank_score"] for r in expected])
+        
+        self.assertEqual(self.reranker.rerank_many_with_metadata(["쿼리"], [[]]), [[]])
+    
     def test_rerank_empty_documents(self):
         """빈 문서 리스트 테스트"""
         query = "테스트 쿼리"
@@ -279,6 +305,42 @@ class TestSearchService(unittest.TestCase):
             self.assertIn("vector_score", result)
             self.assertIn("final_score", result)
     
+    def test_search_many(self):
+        """다중 쿼리 검색이 단일 검색과 동일한지 테스트"""
+        queries = ["채권추심 절차", "지급명령 서류", "강제집행"]
+        
+        for use_rerank in (True, False):
+            batch_results = self.service.search_many(queries, use_rerank=use_rerank)
+            self.assertEqual(len(batch_results), len(queries))
+            for query, results in zip(queries, batch_results):
+                expected = self.service.search(query, use_rerank=use_rerank)
+                self.assertEqual([r["text"] for r in results], [r["text"] for r in expected])
+                self.assertTrue(all("final_score" in r for r in results))
+    
+    def test_search_many_propagates_errors(self):
+        """인코더 오류는 빈 결과가 아니라 예외로 전달 (API 라우트가 500 응답)"""
+        from unittest.mock import patch
+        
+        service = self.service.vector_index.embedding_service
+        with patch.object(service, "get_embeddings_batch", side_effect=RuntimeError("encoder down")):
+            with self.assertRaises(RuntimeError):
+                self.service.search_many(["부동산 경매 배당"], use_rerank=False)
+    
+    def test_repeated_query_skips_encoder(self):
+        """확장 질의 임베딩은 메모되어 반복 질의는 임베딩 서비스를 호출하지 않음"""
+        from unittest.mock import patch
+        
+        service = self.service.vector_index.embedding_service
+        with patch.object(service, "get_embeddings_batch", wraps=service.get_embeddings_batch) as batch:
+            first = self.service.search("지급명령  서류", use_rerank=False)
+            second = self.service.search("지급명령 서류", use_rerank=False)
+            self.service.search_many(["지급명령 서류", "강제집행"], use_rerank=False)
+        
+        self.assertEqual([r["text"] for r in first], [r["text"] for r in second])
+        self.assertEqual([call.args[0] for call in batch.call_args_list],
+                         [["지급명령 서류 독촉절차 지명채권 지급명령신청"],
+                          ["강제집행 집행명령 압류집행 경매 강제집행 집행절차 압류집행"]])
+    
     def test_search_by_law_topic(self):
         """법률 주제별 검색 테스트"""
         query = "절차"
@@ -328,6 +390,553 @@ class TestSearchService(unittest.TestCase):
         self.assertEqual(info["index_name"], "test_search_service")
 
 
+class TestKoreanTokenizer(unittest.TestCase):
+    """공용 한국어 토크나이저 테스트"""
+    
+    def test_modes(self):
+        """word / bigram / mixed 모드 토큰 스트림"""
+        text = "<b>채권추심</b> 절차, 및 지급명령!"
+        self.assertEqual(tokenize(text), ("채권추심", "절차", "지급명령"))
+        self.assertEqual(get_tokenizer("word", min_length=1)(text), ("채권추심", "절차", "및", "지급명령"))
+        self.assertEqual(ko_bigrams("채권 추심"), ["채권", "권추", "추심"])
+        self.assertEqual(get_tokenizer("mixed")("채권추심 및"), ("채권", "권추", "추심", "채권추심", "및"))
+        with self.assertRaises(ValueError):
+            KoreanTokenizer(mode="morpheme")
+    
+    def test_cache_shared_by_content_hash(self):
+        """같은 콘텐츠는 캐시된 토큰 스트림 재사용 (min_length 필터만 다름)"""
+        cache = TokenCache(max_size=2)
+        words = KoreanTokenizer("word", min_length=2, cache=cache)
+        all_words = KoreanTokenizer("word", min_length=1, cache=cache)
+        
+        self.assertEqual(words("소멸 시효 및 연장"), ("소멸", "시효", "연장"))
+        self.assertEqual(all_words("소멸 시효 및 연장"), ("소멸", "시효", "및", "연장"))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        
+        # LRU 용량 초과 시 가장 오래된 항목 제거
+        words("가압류 신청")
+        words("강제 집행")
+        self.assertEqual(cache.stats()["size"], 2)
+        words("소멸 시효 및 연장")
+        self.assertEqual(cache.misses, 4)
+
+
+class TestFusion(unittest.TestCase):
+    """순위 목록 융합 테스트"""
+    
+    def setUp(self):
+        self.rankings = {
+            "vector": [("a", 0.9), ("b", 0.5), ("c", 0.1)],
+            "bm25": [("c", 12.0), ("d", 3.0)]
+        }
+    
+    def test_rrf(self):
+        """RRF: 순위만 사용 (점수 스케일 무관)"""
+        fused = dict(fuse(self.rankings, "rrf", rrf_k=60))
+        self.assertAlmostEqual(fused["c"], 1 / 63 + 1 / 61, places=9)
+        self.assertAlmostEqual(fused["d"], 1 / 62, places=9)
+        
+        scaled = dict(fuse({"vector": self.rankings["vector"],
+                            "bm25": [(doc_id, score * 100) for doc_id, score in self.rankings["bm25"]]}, "rrf"))
+        self.assertEqual(fused, scaled)
+    
+    def test_minmax_and_zscore(self):
+        """min-max / z-score: 목록에 없는 문서는 목록 최저값"""
+        fused = dict(fuse(self.rankings, "minmax", weights={"vector": 0.8, "bm25": 0.2}))
+        self.assertAlmostEqual(fused["a"], 0.8, places=6)
+        self.assertAlmostEqual(fused["c"], 0.2, places=6)
+        self.assertAlmostEqual(fused["d"], 0.0, places=6)
+        
+        fused = fuse(self.rankings, "zscore")
+        self.assertEqual(fused[-1][0], "d")
+        import statistics
+        vector_z = (0.1 - 0.5) / statistics.pstdev([0.9, 0.5, 0.1])
+        bm25_z = (12.0 - 7.5) / statistics.pstdev([12.0, 3.0])
+        self.assertAlmostEqual(dict(fused)["c"], vector_z + bm25_z, places=6)
+    
+    def test_single_hit_list_keeps_signal(self):
+        """히트 1개 / 동점 목록도 등장 문서에 가산 (누락 문서 0)"""
+        rankings = {"vector": [("a", 0.9), ("b", 0.8), ("c", 0.5)], "bm25": [("c", 12.0)]}
+        fused = dict(fuse(rankings, "minmax", weights={"vector": 0.8, "bm25": 0.2}))
+        self.assertAlmostEqual(fused["c"], 0.2, places=6)
+        self.assertAlmostEqual(fused["a"], 0.8, places=6)
+        
+        vector_only = dict(fuse({"vector": rankings["vector"]}, "zscore"))
+        fused = dict(fuse(rankings, "zscore"))
+        self.assertAlmostEqual(fused["c"], vector_only["c"] + 1.0, places=6)
+        self.assertAlmostEqual(fused["a"], vector_only["a"], places=6)
+        
+        tied = dict(fuse({"vector": [("a", 0.9), ("b", 0.1)], "bm25": [("a", 5.0), ("b", 5.0)]}, "minmax"))
+        self.assertAlmostEqual(tied["a"] - tied["b"], 1.0, places=6)
+    
+    def test_top_k_and_invalid_strategy(self):
+        """top_k 절단 / 미지원 전략"""
+        self.assertEqual([doc_id for doc_id, _ in fuse(self.rankings, "rrf", top_k=2)], ["c", "a"])
+        with self.assertRaises(ValueError):
+            fuse(self.rankings, "borda")
+
+
+class TestMMR(unittest.TestCase):
+    """공용 벡터화 MMR 테스트"""
+    
+    def _reference(self, query, candidates, lambda_div, topk):
+        """중첩 루프 MMR (기존 구현)"""
+        import numpy as np
+        cos = lambda a, b: float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
+        selected = [int(np.argmax([cos(query, v) for v in candidates]))]
+        remaining = [i for i in range(len(candidates)) if i not in selected]
+        while len(selected) < min(topk, len(candidates)):
+            scores = [lambda_div * cos(query, candidates[i]) -
+                      (1 - lambda_div) * max(cos(candidates[i], candidates[j]) for j in selected)
+                      for i in remaining]
+            best = remaining[int(np.argmax(scores))]
+            selected.append(best)
+            remaining.remove(best)
+        return selected
+    
+    def test_matches_reference(self):
+        """중첩 루프 구현과 같은 선택 순서"""
+        import numpy as np
+        rng = np.random.default_rng(0)
+        for _ in range(50):
+            n = int(rng.integers(1, 30))
+            candidates = rng.normal(size=(n, 8))
+            query = rng.normal(size=8)
+            lambda_div, topk = float(rng.random()), int(rng.integers(1, 10))
+            self.assertEqual(mmr_select(query, candidates, lambda_div, topk),
+                             self._reference(query, candidates, lambda_div, topk))
+    
+    def test_mmr_rank_with_similarity_matrix(self):
+        """유사도 행렬 입력: 중복 후보는 뒤로 밀림"""
+        similarity = [[1.0, 0.99, 0.1], [0.99, 1.0, 0.1], [0.1, 0.1, 1.0]]
+        import numpy as np
+        self.assertEqual(mmr_rank([0.9, 0.85, 0.5], np.array(similarity), 3, 0.5), [0, 2, 1])
+        self.assertEqual(mmr_rank([], np.zeros((0, 0)), 3), [])
+
+
+class TestHybridFusion(unittest.TestCase):
+    """하이브리드 파이프라인 융합 / MMR 단계 테스트"""
+    
+    def test_fuse_hits_merges_bm25_only_candidates(self):
+        """BM25로만 찾은 문서도 저장된 sim/벡터와 함께 병합"""
+        vector_hits = [
+            {"id": "a", "sim": 0.9, "text": "A", "meta": {}, "vec": [1.0, 0.0]},
+            {"id": "b", "sim": 0.5, "text": "B", "meta": {}, "vec": [0.0, 1.0]}
+        ]
+        bm25_hits = [
+            {"id": "b", "bm25": 4.0, "sim": 0.5, "text": "B", "meta": {}, "vec": [0.0, 1.0]},
+            {"id": "c", "bm25": 2.0, "sim": 0.3, "text": "C", "meta": {"cat": "x"}, "vec": [0.6, 0.8]}
+        ]
+        merged = fuse_hits(vector_hits, bm25_hits, alpha=0.4, strategy="minmax")
+        
+        self.assertEqual([hit["id"] for hit in merged], ["a", "b", "c"])
+        by_id = {hit["id"]: hit for hit in merged}
+        self.assertAlmostEqual(by_id["a"]["combo"], 0.6, places=6)
+        self.assertAlmostEqual(by_id["b"]["combo"], 0.4, places=6)
+        self.assertAlmostEqual(by_id["b"]["bm25_norm"], 1.0, places=6)
+        self.assertEqual(by_id["c"]["meta"], {"cat": "x"})
+        self.assertEqual(by_id["c"]["vec"], [0.6, 0.8])
+        
+        # RRF: 두 목록 모두 상위인 b가 1위
+        merged = fuse_hits(vector_hits, bm25_hits, alpha=0.5, strategy="rrf")
+        self.assertEqual(merged[0]["id"], "b")
+    
+    def test_mmr_rerank_uses_stored_vectors(self):
+        """MMR은 후보에 저장된 벡터만 사용 (중복 벡터는 뒤로 밀림)"""
+        candidates = [
+            {"id": "a", "vec": [1.0, 0.0]},
+            {"id": "a-dup", "vec": [1.0, 0.0]},
+            {"id": "b", "vec": [0.7, 0.7]}
+        ]
+        selected = mmr_rerank([1.0, 0.0], candidates, lambda_div=0.4, k=2)
+        self.assertEqual([hit["id"] for hit in selected], ["a", "b"])
+    
+    def test_filtered_candidates_after_metadata_update(self):
+        """기존 행 메타데이터 수정 직후 필터 검색: 벡터/BM25 단계가 같은 마스크를 동시에 사용"""
+        import numpy as np
+        from unittest import mock
+        from concurrent.futures import ThreadPoolExecutor
+        import simple_vector_store
+        from simple_vector_store import SimpleVectorStore
+        from src.search import hybrid_retriever
+        
+        rng = np.random.default_rng(0)
+        ids = [f"doc-{i}" for i in range(200)]
+        texts = [f"채권추심 절차 안내 {i}" for i in range(200)]
+        store = SimpleVectorStore(embedder=object())
+        store.upsert(ids, texts, rng.normal(size=(200, 8)).tolist(), [{"cat": "채권추심"} for _ in ids])
+        index = InvertedBM25Index()
+        index.add_documents(ids, texts)
+        
+        # 기존 행 업데이트 -> 비트맵 재구축 필요 상태
+        store.upsert(["doc-7"], [texts[7]], [store.get_embedding("doc-7").tolist()], [{"cat": "강제집행"}])
+        pipeline = hybrid_retriever.HybridSearchPipeline(max_workers=4)
+        query_vector = store.get_embedding("doc-7")
+        with mock.patch.object(simple_vector_store, "get_store", return_value=store), \
+                mock.patch.object(hybrid_retriever, "get_corpus_bm25_index", return_value=index), \
+                ThreadPoolExecutor(max_workers=8) as pool:
+            futures = [pool.submit(pipeline.candidates, "채권추심 절차", {"cat": "강제집행"}, 10, query_vector)
+                       for _ in range(8)]
+            results = [future.result() for future in futures]
+        pipeline.executor.shutdown()
+        
+        for _, vector_hits, bm25_hits, _ in results:
+            self.assertEqual([hit["id"] for hit in vector_hits], ["doc-7"])
+            self.assertEqual([hit["id"] for hit in bm25_hits], ["doc-7"])
+        self.assertEqual(store.filter_index.num_rows, 200)
+    
+    def test_bm25_row_map_follows_reindex_and_compaction(self):
+        """스토어 행 -> BM25 행 매핑: 재색인 행만 갱신, 컴팩션 후 전체 재구축"""
+        import numpy as np
+        from simple_vector_store import SimpleVectorStore, bm25_row_map
+        
+        ids = [f"doc-{i}" for i in range(6)]
+        store = SimpleVectorStore(embedder=object())
+        store.upsert(ids, [f"문서 {i}" for i in range(6)], np.eye(6, dtype=np.float32).tolist(), [{}] * 6)
+        index = InvertedBM25Index()
+        index.add_documents(ids[:5], [f"문서 {i}" for i in range(5)])
+        
+        def expected():
+            return [index.id_to_row.get(doc_id, -1) for doc_id in store.ids]
+        
+        self.assertEqual(bm25_row_map(store, index).tolist(), expected())
+        self.assertEqual(store.bm25_rows[5], -1)
+        index.add_documents(["doc-2"], ["수정된 문서"])
+        self.assertEqual(bm25_row_map(store, index, [2]).tolist(), expected())
+        index.compact()
+        self.assertEqual(bm25_row_map(store, index).tolist(), expected())
+        
+        mask = np.array([True, False, True, False, True, True])
+        allowed = index.rows_mask(store.bm25_rows[mask])
+        self.assertEqual(sorted(index.doc_ids[row] for row in np.flatnonzero(allowed)), ["doc-0", "doc-2", "doc-4"])
+
+
+class TestResultCache(unittest.TestCase):
+    """인덱스 세대 기반 2계층 결과 캐시 테스트 (shared 계층 없이 local만)"""
+    
+    def setUp(self):
+        self.generation = IndexGeneration()
+        self.cache = ResultCache("test", max_entries=2, generation=self.generation, shared=False)
+    
+    def test_local_hit_and_generation_invalidation(self):
+        """세대가 바뀌면 이전 결과는 조회되지 않음"""
+        payload = {"q": "채권추심", "k": 3}
+        self.assertIsNone(self.cache.get(payload))
+        self.cache.set(payload, {"hits": [{"id": "a"}]})
+        self.assertEqual(self.cache.lookup(payload), ({"hits": [{"id": "a"}]}, "local"))
+        
+        self.generation.bump()
+        self.assertEqual(self.cache.lookup(payload), (None, "miss"))
+        stats = self.cache.stats()
+        self.assertEqual((stats["local"]["hits"], stats["misses"]), (1, 2))
+        self.assertAlmostEqual(stats["hit_rate"], 1 / 3, places=4)
+    
+    def test_set_with_pre_search_generation(self):
+        """검색 도중 세대가 바뀌면 검색 전 세대로 저장되어 새 세대에서 보이지 않음"""
+        payload = {"q": "지급명령"}
+        generation = self.generation.current()
+        self.generation.bump()
+        self.cache.set(payload, {"hits": []}, generation)
+        self.assertIsNone(self.cache.get(payload))
+        self.assertIsNotNone(self.cache.get(payload, generation))
+    
+    def test_shared_generation_cached_locally(self):
+        """Redis 세대는 ttl 동안 로컬 캐시 (조회마다 GET 없음), 자기 bump는 즉시 반영"""
+        from unittest import mock
+        from src.search import result_cache
+        
+        class FakeRedis:
+            def __init__(self):
+                self.value, self.gets = 0, 0
+            
+            def get(self, key):
+                self.gets += 1
+                return str(self.value)
+            
+            def incr(self, key):
+                self.value += 1
+                return self.value
+        
+        client = FakeRedis()
+        with mock.patch.object(result_cache, "_redis_client", client):
+            generation = IndexGeneration(ttl=60)
+            self.assertEqual([generation.current() for _ in range(10)], ["r0"] * 10)
+            self.assertEqual(client.gets, 1)
+            
+            client.value = 4  # 다른 프로세스의 bump는 ttl 뒤에 보임
+            self.assertEqual(generation.current(), "r0")
+            self.assertEqual(generation.bump(), "r5")
+            self.assertEqual(client.gets, 1)
+            
+            generation.ttl = 0
+            client.value = 7
+            self.assertEqual(generation.current(), "r7")
+            self.assertEqual(client.gets, 2)
+    
+    def test_lru_and_byte_bound(self):
+        """항목 수 / 바이트 상한 초과 시 오래된 항목부터 축출, numpy 값은 JSON 호환으로 저장"""
+        import numpy as np
+        self.cache.set({"q": "a"}, {"hits": [{"sim": np.float32(0.5)}]})
+        self.cache.set({"q": "b"}, {"hits": [{"vec": np.array([1.0, 2.0])}]})
+        self.cache.get({"q": "a"})
+        self.cache.set({"q": "c"}, {"hits": []})
+        self.assertIsNone(self.cache.get({"q": "b"}))
+        self.assertEqual(self.cache.get({"q": "a"}), {"hits": [{"sim": 0.5}]})
+        
+        small = ResultCache("test", max_bytes=40, generation=self.generation, shared=False)
+        small.set({"q": "a"}, {"hits": ["x" * 10]})
+        small.set({"q": "b"}, {"hits": ["y" * 10]})
+        self.assertIsNone(small.get({"q": "a"}))
+        self.assertLessEqual(small.stats()["local"]["bytes"], 40)
+
+
+class TestSemanticCache(unittest.TestCase):
+    """의미 기반 쿼리 캐시 테스트"""
+    
+    def setUp(self):
+        import numpy as np
+        self.np = np
+        self.cache = SemanticCache("test", capacity=2, threshold=0.9, ttl=60)
+        self.context = context_key(k=5, where=None)
+    
+    def test_near_duplicate_hit_within_context(self):
+        """임계값 이상 유사 쿼리는 히트, 컨텍스트가 다르거나 임계값 미만이면 미스"""
+        np = self.np
+        self.cache.put("지급명령 신청 방법", np.array([1.0, 0.0, 0.0]), ["a", "b"], self.context)
+        
+        hit = self.cache.lookup(np.array([0.95, 0.1, 0.0]), self.context)
+        self.assertIsNotNone(hit)
+        self.assertEqual((hit.value, hit.query), (["a", "b"], "지급명령 신청 방법"))
+        self.assertIsNone(self.cache.lookup(np.array([0.95, 0.1, 0.0]), context_key(k=10, where=None)))
+        self.assertIsNone(self.cache.lookup(np.array([0.5, 0.5, 0.0]), self.context))
+        self.assertEqual((self.cache.stats()["hits"], self.cache.stats()["misses"]), (1, 2))
+    
+    def test_ttl_and_lru_eviction(self):
+        """만료 항목은 조회되지 않고, 용량 초과 시 마지막 사용이 오래된 항목부터 축출"""
+        np = self.np
+        expired = SemanticCache("test", capacity=2, threshold=0.9, ttl=-1)
+        expired.put("q", np.array([1.0, 0.0]), "v")
+        self.assertIsNone(expired.lookup(np.array([1.0, 0.0])))
+        
+        self.cache.put("a", np.array([1.0, 0.0, 0.0]), "A", self.context)
+        self.cache.put("b", np.array([0.0, 1.0, 0.0]), "B", self.context)
+        self.cache.lookup(np.array([1.0, 0.0, 0.0]), self.context)  # a 사용
+        self.cache.put("c", np.array([0.0, 0.0, 1.0]), "C", self.context)
+        self.assertIsNone(self.cache.lookup(np.array([0.0, 1.0, 0.0]), self.context))
+        self.assertEqual(self.cache.lookup(np.array([1.0, 0.0, 0.0]), self.context).value, "A")
+        self.assertEqual(self.cache.stats()["entries"], 2)
+    
+    def test_false_hit_metrics(self):
+        """샘플 검증 결과로 오탐 비율 집계"""
+        self.assertEqual(result_overlap(["a", "b"], ["b", "c"]), 0.5)
+        self.cache.record_verification(True)
+        self.cache.record_verification(False)
+        stats = self.cache.stats()
+        self.assertEqual((stats["verified"], stats["false_hits"], stats["false_hit_rate"]), (2, 1, 0.5))
+
+
+class TestQueryRewriter(unittest.TestCase):
+    """질의 정규화 / 동의어 확장 테스트"""
+    
+    def test_automaton_finds_overlapping_terms(self):
+        """겹치거나 접미사인 용어까지 모두 찾음"""
+        automaton = SynonymAutomaton(["집행", "강제집행", "he", "she", "hers"])
+        self.assertEqual(automaton.find("강제집행 신청"), [0, 1])
+        self.assertEqual(automaton.find("ushers"), [2, 3, 4])
+        self.assertEqual(automaton.find("무관한 질의"), [])
+    
+    def test_expand_matches_dictionary_order(self):
+        """사전 순서대로 동의어를 덧붙이고 공백은 정규화"""
+        rewriter = QueryRewriter({"압류": ["채권압류"], "강제집행": ["경매"], "집행": ["집행절차"]})
+        self.assertEqual(rewriter.expand("  강제집행   후 압류 "), "강제집행 후 압류 채권압류 경매 집행절차")
+        self.assertEqual(rewriter.expand("상담"), "상담")
+        
+        rewriter.expand("  강제집행   후 압류 ")
+        self.assertEqual(rewriter.memo.stats()["hits"], 1)
+
+
+class TestInvertedBM25Index(unittest.TestCase):
+    """전체 코퍼스 BM25 역색인 테스트"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.ids = ["d1", "d2", "d3", "d4"]
+        self.texts = [
+            "채권추심 절차는 내용증명 발송부터 시작됩니다",
+            "지급명령 신청 서류 준비",
+            "채권추심 채권추심 지급명령 강제집행",
+            "부동산 경매 절차 안내"
+        ]
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def _brute_force(self, query, ids, texts, k1=1.2, b=0.75):
+        """정의대로 계산한 BM25 점수"""
+        import math
+        docs = [tokenize(text) for text in texts]
+        avg_len = sum(len(doc) for doc in docs) / len(docs)
+        scores = {}
+        for doc_id, doc in zip(ids, docs):
+            score = 0.0
+            for term in set(tokenize(query)):
+                df = sum(1 for other in docs if term in other)
+                if df == 0:
+                    continue
+                tf = doc.count(term)
+                idf = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+                score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(doc) / avg_len))
+            scores[doc_id] = score
+        return scores
+    
+    def test_scores_match_definition(self):
+        """증분 추가 상태와 컴팩션 후 점수가 정의와 일치"""
+        index = InvertedBM25Index()
+        index.add_documents(self.ids[:2], self.texts[:2])
+        index.add_documents(self.ids[2:], self.texts[2:])
+        expected = self._brute_force("채권추심 지급명령", self.ids, self.texts)
+        
+        for _ in range(2):
+            results = index.search("채권추심 지급명령", topk=10)
+            self.assertEqual([r["id"] for r in results][0], "d3")
+            for result in results:
+                self.assertAlmostEqual(result["bm25"], expected[result["id"]], places=4)
+            index.compact()
+    
+    def test_replace_and_remove(self):
+        """재수집은 이전 내용을 대체하고 삭제 문서는 검색되지 않음"""
+        index = InvertedBM25Index()
+        index.add_documents(self.ids, self.texts)
+        index.add_documents(["d2"], ["부동산 경매 신청"])
+        self.assertTrue(index.remove("d4"))
+        self.assertEqual(len(index), 3)
+        
+        self.assertNotIn("d2", [r["id"] for r in index.search("지급명령 서류")][:1])
+        self.assertEqual([r["id"] for r in index.search("경매")], ["d2"])
+        
+        texts = dict(zip(self.ids, self.texts))
+        texts["d2"] = "부동산 경매 신청"
+        live_ids = ["d1", "d2", "d3"]
+        expected = self._brute_force("경매 채권추심", live_ids, [texts[i] for i in live_ids])
+        for result in index.search("경매 채권추심"):
+            self.assertAlmostEqual(result["bm25"], expected[result["id"]], places=4)
+    
+    def test_maxscore_matches_exhaustive(self):
+        """MaxScore 조기 종료 결과가 전수 스코어링과 일치 (대기 postings / 톰스톤 포함)"""
+        import random
+        rng = random.Random(0)
+        vocab = [f"용어{i}" for i in range(200)]
+        weights = [1.0 / (i + 1) for i in range(200)]
+        texts = [" ".join(rng.choices(vocab, weights, k=rng.randint(5, 60))) for _ in range(600)]
+        
+        index = InvertedBM25Index()
+        index.add_documents([f"d{i}" for i in range(400)], texts[:400])
+        index.compact()
+        index.add_documents([f"d{i}" for i in range(300, 600)], texts[300:])
+        for i in range(0, 600, 7):
+            index.remove(f"d{i}")
+        
+        for _ in range(50):
+            query = " ".join(rng.choices(vocab, k=rng.randint(1, 10)))
+            for topk in (1, 5, 20):
+                exact = index.search(query, topk, prune=False)
+                pruned = index.search(query, topk)
+                self.assertEqual(len(exact), len(pruned))
+                for a, b in zip(exact, pruned):
+                    self.assertAlmostEqual(a["bm25"], b["bm25"], places=4)
+        
+        # 스코어링한 postings 수는 전체보다 적어야 함
+        _, _, scored = index.search_rows(" ".join(vocab[:10]), 5)
+        total = sum(index._postings(index.vocab[term])[0].size for term in vocab[:10])
+        self.assertLess(scored, total)
+    
+    def test_allowed_mask_filters_before_top_k(self):
+        """allowed 행 마스크는 top-k 선정 전에 적용 (하위 순위 허용 문서도 반환, 점수 불변)"""
+        import random
+        rng = random.Random(1)
+        vocab = [f"용어{i}" for i in range(50)]
+        index = InvertedBM25Index()
+        index.add_documents([f"d{i}" for i in range(300)],
+                            [" ".join(rng.choices(vocab, k=rng.randint(5, 30))) for _ in range(300)])
+        index.remove("d3")
+        
+        query = " ".join(vocab[:5])
+        full = {hit["id"]: hit["bm25"] for hit in index.search(query, topk=300, prune=False)}
+        allowed_ids = [f"d{i}" for i in range(0, 300, 10)] + ["d3", "없는문서"]
+        allowed = index.row_mask(allowed_ids)
+        self.assertEqual(int(allowed.sum()), 30)
+        
+        expected = [doc_id for doc_id in full if doc_id in set(allowed_ids)][:5]
+        for prune in (True, False):
+            hits = index.search(query, topk=5, prune=prune, allowed=allowed)
+            self.assertEqual([hit["id"] for hit in hits], expected)
+            for hit in hits:
+                self.assertAlmostEqual(hit["bm25"], full[hit["id"]], places=4)
+    
+    def test_save_and_load(self):
+        """저장 후 로드한 인덱스가 같은 결과를 반환"""
+        index = InvertedBM25Index()
+        index.add_documents(self.ids, self.texts)
+        index.remove("d1")
+        index.save(self.temp_dir)
+        index.add_documents(["d5"], ["강제집행 신청 절차"])
+        index.save(self.temp_dir)
+        
+        loaded = InvertedBM25Index.load(self.temp_dir)
+        self.assertIsNotNone(loaded)
+        self.assertEqual(len(loaded), len(index))
+        self.assertNotIn("d1", loaded)
+        self.assertEqual(index.search("절차 채권추심"), loaded.search("절차 채권추심"))
+        
+        # 이전 세대 파일은 정리됨
+        npy_files = [name for name in os.listdir(self.temp_dir) if name.endswith(".npy")]
+        self.assertEqual(len(npy_files), 4)
+        
+        # 변경을 기록한 저장마다 결과 캐시 세대 증가 (변경 없으면 기록/증가 없음)
+        generation = current_index_generation()
+        loaded.save(self.temp_dir)
+        self.assertEqual(current_index_generation(), generation)
+        loaded.add_documents(["d6"], ["부동산 경매 절차"])
+        loaded.save(self.temp_dir)
+        self.assertNotEqual(current_index_generation(), generation)
+    
+    def test_save_writes_delta_segments(self):
+        """소량 변경은 기본 배열을 그대로 두고 델타 세그먼트만 기록, 임계값 초과 시 컴팩션"""
+        import random
+        rng = random.Random(2)
+        vocab = [f"용어{i}" for i in range(100)]
+        texts = [" ".join(rng.choices(vocab, k=rng.randint(5, 30))) for _ in range(260)]
+        index = InvertedBM25Index()
+        index.add_documents([f"d{i}" for i in range(200)], texts[:200])
+        index.save(self.temp_dir)
+        base_files = sorted(os.listdir(self.temp_dir))
+        
+        index.add_documents(["d200", "d3"], [texts[200], "새용어 강제집행 절차"])
+        index.remove("d7")
+        index.save(self.temp_dir)
+        index.add_documents(["d201"], [texts[201]])
+        index.save(self.temp_dir)
+        files = sorted(os.listdir(self.temp_dir))
+        self.assertEqual(len([name for name in files if name.startswith("segment-")]), 2)
+        self.assertTrue(set(base_files) - {"manifest.json"} <= set(files))
+        
+        loaded = InvertedBM25Index.load(self.temp_dir)
+        self.assertEqual(len(loaded), len(index))
+        self.assertNotIn("d7", loaded)
+        for query in ("새용어 강제집행", " ".join(vocab[:6]), "용어3 용어50"):
+            self.assertEqual(loaded.search(query, topk=10), index.search(query, topk=10))
+        
+        # 대기 postings 비율 초과 -> 컴팩션 후 전체 기록 (세그먼트 / 이전 기본 배열 정리)
+        loaded.add_documents([f"d{i}" for i in range(202, 260)], texts[202:])
+        self.assertTrue(loaded.needs_compaction())
+        loaded.save(self.temp_dir)
+        files = os.listdir(self.temp_dir)
+        self.assertFalse([name for name in files if name.startswith("segment-")])
+        self.assertEqual(len([name for name in files if name.endswith(".npy")]), 4)
+        reloaded = InvertedBM25Index.load(self.temp_dir)
+        self.assertEqual(reloaded.search(" ".join(vocab[:6]), topk=10), loaded.search(" ".join(vocab[:6]), topk=10))
+
+
 class TestIntegration(unittest.TestCase):
     """통합 테스트"""
     
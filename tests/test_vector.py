@@ -15,7 +15,19 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from src.vector.embedder import EmbeddingCache, EmbeddingService
+from src.vector.model_registry import ModelRegistry
+from src.vector.micro_batcher import MicroBatcher
+from src.vector import onnx_backend
 from src.vector.simple_index import SimpleVectorIndex
+from src.vector.search_engine import VectorSearchEngine, top_k_indices
+from src.vector.title_vectors import TitleVectors
+from src.vector.filter_index import BitmapFilterIndex, matches_where
+from src.vector.ann_index import IVFFlatIndex, evaluate_recall
+from simple_vector_store import SimpleVectorStore
+from src.search.result_cache import current_index_generation
+from src.vector.quantization import (
+    ScalarQuantizer, ProductQuantizer, CompressedSearchEngine, load_search_engine, compressed_path
+)
 
 
 class TestEmbeddingCache(unittest.TestCase):
@@ -97,6 +109,98 @@ class TestEmbeddingCache(unittest.TestCase):
         self.assertEqual(stats['unique_models'], 1)
         self.assertGreaterEqual(stats['total_accesses'], 0)
 
+    def test_bulk_operations_and_deferred_access_counts(self):
+        """일괄 저장/조회 + 접근 횟수 지연 반영 테스트"""
+        import numpy as np
+
+        model_name = "test_model"
+        self.cache.flush_interval, self.cache.flush_threshold = 3600, 10 ** 6  # 백그라운드 flush 배제
+        items = [(f"텍스트{i}", np.random.rand(16).astype(np.float32)) for i in range(1000)]
+        self.cache.put_many(items, model_name)
+
+        # IN 목록 분할 + 입력 순서 / 중복 / 미스 유지
+        texts = [text for text, _ in items] + ["텍스트0", "없는 텍스트"]
+        results = self.cache.get_many(texts, model_name)
+        self.assertEqual(len(results), len(texts))
+        for (_, embedding), cached in zip(items, results):
+            self.assertTrue(np.array_equal(embedding, cached))
+        self.assertTrue(np.array_equal(items[0][1], results[-2]))
+        self.assertIsNone(results[-1])
+        self.assertIsNone(self.cache.get_many(["텍스트0"], "other_model")[0])
+
+        # 조회 경로에서는 DB에 쓰지 않고, flush 시 트랜잭션 1개로 반영
+        count = self.cache.conn.execute(
+            "SELECT access_count FROM embedding_cache WHERE text_hash = ?",
+            (self.cache.get_text_hash("텍스트0"),)).fetchone()[0]
+        self.assertEqual(count, 0)
+        self.assertEqual(self.cache.flush_access_counts(), 1000)
+        count = self.cache.conn.execute(
+            "SELECT access_count FROM embedding_cache WHERE text_hash = ?",
+            (self.cache.get_text_hash("텍스트0"),)).fetchone()[0]
+        self.assertEqual(count, 2)
+        self.assertEqual(self.cache.get_cache_stats()['total_accesses'], 1001)
+
+    def test_raw_blob_format_and_float16(self):
+        """원시 바이트 저장 (pickle 없음, 텍스트 미저장) + float16 캐시 테스트"""
+        import numpy as np
+
+        embedding = np.random.rand(32).astype(np.float32)
+        self.cache.cache_embedding("텍스트", embedding, "test_model")
+        blob, text = self.cache.conn.execute("SELECT embedding, text_content FROM embedding_cache").fetchone()
+        self.assertEqual(len(blob), 32 * 4)
+        self.assertIsNone(text)
+
+        # 모델 헤더와 차원이 다르면 저장 거부
+        with self.assertRaises(ValueError):
+            self.cache.cache_embedding("다른 텍스트", np.zeros(16, dtype=np.float32), "test_model")
+
+        half_cache = EmbeddingCache(os.path.join(self.temp_dir, "half.sqlite"), dtype="float16", store_text=True)
+        try:
+            half_cache.cache_embedding("텍스트", embedding, "test_model")
+            cached = half_cache.get_cached_embedding("텍스트", "test_model")
+            self.assertEqual(cached.dtype, np.float32)
+            self.assertTrue(np.allclose(cached, embedding, atol=1e-3))
+            self.assertEqual(half_cache.get_cache_stats()['embedding_bytes'], 32 * 2)
+        finally:
+            half_cache.close()
+
+    def test_v1_migration(self):
+        """v1(pickle) 캐시 파일 보존 + 마이그레이션 테스트"""
+        import pickle
+        import sqlite3
+        import numpy as np
+        from src.vector.embedding_cache import migrate_embedding_cache
+
+        legacy_path = os.path.join(self.temp_dir, "legacy.sqlite")
+        conn = sqlite3.connect(legacy_path)
+        conn.execute("""CREATE TABLE embedding_cache (
+            text_hash TEXT PRIMARY KEY, text_content TEXT NOT NULL, embedding BLOB NOT NULL,
+            model_name TEXT NOT NULL, created_at INTEGER NOT NULL, access_count INTEGER DEFAULT 0,
+            last_accessed INTEGER NOT NULL)""")
+        embeddings = {f"텍스트{i}": np.random.rand(8).astype(np.float32) for i in range(5)}
+        conn.executemany("INSERT INTO embedding_cache VALUES (?, ?, ?, ?, 0, 3, 0)",
+                         [(self.cache.get_text_hash(text), text, pickle.dumps(embedding), "test_model")
+                          for text, embedding in embeddings.items()])
+        conn.commit()
+        conn.close()
+
+        # 열기만 하면 v1은 보존되고 v2는 빈 상태
+        cache = EmbeddingCache(legacy_path)
+        self.assertIsNone(cache.get_cached_embedding("텍스트0", "test_model"))
+        cache.close()
+
+        result = migrate_embedding_cache(legacy_path)
+        self.assertEqual(result["migrated"], 5)
+        self.assertTrue(migrate_embedding_cache(legacy_path)["already_v2"])
+
+        cache = EmbeddingCache(legacy_path)
+        try:
+            for text, embedding in embeddings.items():
+                self.assertTrue(np.array_equal(cache.get_cached_embedding(text, "test_model"), embedding))
+            self.assertEqual(cache.get_cache_stats()['total_accesses'], 5 * 3 + 5)
+        finally:
+            cache.close()
+
 
 class TestEmbeddingService(unittest.TestCase):
     """EmbeddingService 테스트"""
@@ -185,6 +289,218 @@ class TestEmbeddingService(unittest.TestCase):
         self.assertTrue(np.allclose(embedding2, 0))
 
 
+class TestModelRegistry(unittest.TestCase):
+    """ModelRegistry 테스트"""
+
+    def setUp(self):
+        self.loads = []
+
+        def load(model_name, device):
+            if device == "cuda":
+                raise RuntimeError("CUDA unavailable")
+            self.loads.append((model_name, device))
+            return object()
+
+        self.registry = ModelRegistry(loaders={"fake": load})
+
+    def test_concurrent_get_loads_once(self):
+        """동시 요청에도 (모델, 디바이스)별 1회만 로드"""
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            models = list(executor.map(lambda _: self.registry.get("fake", "m", "cpu").model, range(32)))
+        self.assertEqual(self.loads, [("m", "cpu")])
+        self.assertTrue(all(model is models[0] for model in models))
+
+        self.registry.get("fake", "other", "cpu")
+        stats = self.registry.stats()
+        self.assertEqual(stats["loaded"], 2)
+        self.assertIn("load_seconds", stats["models"][0])
+
+    def test_cuda_fallback_shares_cpu_model(self):
+        """CUDA 실패 시 CPU 모델을 요청 키에 연결 (재시도 없음)"""
+        cpu_model = self.registry.get("fake", "m", "cpu").model
+        fallback = self.registry.get("fake", "m", "cuda")
+        self.assertIs(fallback.model, cpu_model)
+        self.assertEqual(fallback.device, "cpu")
+        self.registry.get("fake", "m", "cuda")
+        self.assertEqual(self.loads, [("m", "cpu")])
+        self.assertEqual(self.registry.stats()["loaded"], 1)
+
+    def test_services_load_lazily_and_share(self):
+        """서비스 생성만으로는 로드하지 않고, 같은 모델은 서비스 간 공유"""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            first = EmbeddingService(device="cpu", cache_db_path=os.path.join(temp_dir, "a.sqlite"))
+            second = EmbeddingService(device="cpu", cache_db_path=os.path.join(temp_dir, "b.sqlite"))
+            self.assertIsNone(first._model)
+            self.assertIs(first.model, second.model)
+            first.close()
+            second.close()
+        finally:
+            shutil.rmtree(temp_dir)
+
+
+class TestMicroBatcher(unittest.TestCase):
+    """MicroBatcher 테스트"""
+
+    def setUp(self):
+        import numpy as np
+
+        self.calls = []
+
+        def encode(texts):
+            self.calls.append(list(texts))
+            if "실패" in texts:
+                raise RuntimeError("encode failed")
+            return np.array([[len(text), i] for i, text in enumerate(texts)], dtype=np.float32)
+
+        self.batcher = MicroBatcher(encode, max_batch=8, max_wait_ms=50)
+
+    def tearDown(self):
+        self.batcher.close()
+
+    def test_concurrent_requests_share_batches(self):
+        """동시 요청이 배치로 묶이고 요청별 결과가 돌아옴"""
+        from concurrent.futures import ThreadPoolExecutor
+
+        texts = [f"질의{i}" * (i + 1) for i in range(16)] + ["질의0"]
+        with ThreadPoolExecutor(max_workers=17) as executor:
+            results = list(executor.map(self.batcher.encode, texts))
+
+        for text, vector in zip(texts, results):
+            self.assertEqual(vector[0], len(text))
+        self.assertLess(len(self.calls), len(texts))
+        self.assertTrue(all(len(call) <= 8 for call in self.calls))
+        self.assertLessEqual(sum(len(call) for call in self.calls), 17)
+        stats = self.batcher.stats()
+        self.assertEqual(stats["items"], 17)
+        self.assertEqual(stats["queue_depth"], 0)
+        self.assertGreater(stats["avg_batch_size"], 1)
+
+    def test_encode_many_and_errors(self):
+        """encode_many 순서 유지 + 인코딩 예외는 배치의 모든 요청에 전달"""
+        vectors = self.batcher.encode_many(["가", "나다", "가"])
+        self.assertEqual(vectors[:, 0].tolist(), [1, 2, 1])
+        self.assertEqual(self.calls, [["가", "나다"]])
+
+        with self.assertRaises(RuntimeError):
+            self.batcher.encode_many(["정상", "실패"])
+
+    def test_encode_async(self):
+        """이벤트 루프에서 대기"""
+        import asyncio
+
+        async def run():
+            return await asyncio.gather(*(self.batcher.encode_async(text) for text in ["가", "나다", "라마바"]))
+
+        results = asyncio.run(run())
+        self.assertEqual([vector[0] for vector in results], [1, 2, 3])
+        self.assertEqual(len(self.calls), 1)
+    
+    def test_shared_batcher_keyed_on_resolved_device(self):
+        """CUDA -> CPU 폴백 시 "cuda" / "cpu" 요청이 같은 배처를 공유"""
+        import numpy as np
+        from unittest import mock
+        from src.vector import micro_batcher
+        from src.vector.model_registry import SENTENCE_TRANSFORMER
+        
+        class FakeModel:
+            def encode(self, texts, **kwargs):
+                return np.ones((len(texts), 2), dtype=np.float32)
+        
+        def load(model_name, device):
+            if device == "cuda":
+                raise RuntimeError("CUDA unavailable")
+            return FakeModel()
+        
+        registry = ModelRegistry(loaders={SENTENCE_TRANSFORMER: load})
+        with mock.patch.object(micro_batcher, "model_registry", registry):
+            batcher = micro_batcher.get_encode_batcher("resolved-device-model", "cuda")
+            try:
+                self.assertIs(micro_batcher.get_encode_batcher("resolved-device-model", "cpu"), batcher)
+                self.assertEqual(batcher.encode("가").tolist(), [1.0, 1.0])
+            finally:
+                batcher.close()
+                with micro_batcher._batchers_lock:
+                    for key in [k for k, v in micro_batcher._batchers.items() if v is batcher]:
+                        del micro_batcher._batchers[key]
+
+
+def _torch_available() -> bool:
+    import importlib.util
+    return importlib.util.find_spec("torch") is not None
+
+
+class TestOnnxBackend(unittest.TestCase):
+    """ONNX 백엔드 테스트 (일치도 테스트는 onnxruntime / transformers / torch 설치 시에만)"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_mean_pool_and_agreement_helpers(self):
+        """평균 풀링은 패딩 토큰 제외, 일치도 지표 계산"""
+        import numpy as np
+
+        hidden = np.array([[[1.0, 1.0], [3.0, 3.0], [100.0, 100.0]]], dtype=np.float32)
+        pooled = onnx_backend.mean_pool(hidden, np.array([[1, 1, 0]]))
+        np.testing.assert_allclose(pooled, [[2.0, 2.0]])
+
+        vectors = np.random.RandomState(0).randn(5, 8).astype(np.float32)
+        self.assertAlmostEqual(onnx_backend.cosine_agreement(vectors, vectors * 3)["min_cosine"], 1.0, places=5)
+        agreement = onnx_backend.score_agreement([0.1, 0.9, 0.5], [0.12, 0.85, 0.5])
+        self.assertGreater(agreement["pearson"], 0.99)
+        self.assertTrue(agreement["top1_match"])
+
+        result = onnx_backend.benchmark(lambda batch: sum(len(text) for text in batch), ["가"] * 10, batch_size=4)
+        self.assertLessEqual(result["p50_ms"], result["p95_ms"])
+
+    def test_load_without_export_falls_back(self):
+        """내보낸 모델이 없으면 None (레지스트리가 PyTorch로 폴백)"""
+        self.assertIsNone(onnx_backend.load_onnx_model("sentence_transformer", "intfloat/multilingual-e5-base",
+                                                       root=self.temp_dir))
+        self.assertEqual(onnx_backend.onnx_model_dir("a/b", self.temp_dir), os.path.join(self.temp_dir, "a__b"))
+
+    @unittest.skipUnless(onnx_backend.onnx_available() and _torch_available(), "onnxruntime/transformers/torch 미설치")
+    def test_embedder_parity_with_torch(self):
+        """e5 ONNX(int8) 임베딩이 PyTorch 임베딩과 코사인 일치"""
+        from sentence_transformers import SentenceTransformer
+
+        model_name = "intfloat/multilingual-e5-base"
+        model_dir = os.path.join(self.temp_dir, "e5")
+        onnx_backend.export_onnx(model_name, "sentence_transformer", model_dir)
+        texts = ["query: 지급명령 신청 방법", "passage: 채권자는 법원에 지급명령을 신청할 수 있습니다.", "query: 소멸시효"]
+
+        reference = SentenceTransformer(model_name, device="cpu").encode(texts, normalize_embeddings=True)
+        for quantized, threshold in ((False, 0.999), (True, 0.98)):
+            encoder = onnx_backend.OnnxSentenceEncoder(model_dir, quantized=quantized)
+            embeddings = encoder.encode(texts, normalize_embeddings=True)
+            self.assertEqual(embeddings.shape, reference.shape)
+            self.assertGreaterEqual(onnx_backend.cosine_agreement(reference, embeddings)["mean_cosine"], threshold)
+        self.assertEqual(encoder.encode(texts[0]).shape, (reference.shape[1],))
+
+    @unittest.skipUnless(onnx_backend.onnx_available() and _torch_available(), "onnxruntime/transformers/torch 미설치")
+    def test_reranker_parity_with_torch(self):
+        """Cross-Encoder ONNX(int8) 점수가 PyTorch 점수와 일치"""
+        from sentence_transformers import CrossEncoder
+
+        model_name = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+        model_dir = os.path.join(self.temp_dir, "ce")
+        onnx_backend.export_onnx(model_name, "cross_encoder", model_dir)
+        pairs = [("payment order", "A payment order is a court decision ordering payment."),
+                 ("payment order", "The weather is sunny today."),
+                 ("statute of limitations", "Claims expire after the limitation period.")]
+
+        reference = CrossEncoder(model_name, device="cpu").predict(pairs)
+        scores = onnx_backend.OnnxCrossEncoder(model_dir, quantized=True).predict(pairs)
+        agreement = onnx_backend.score_agreement(reference, scores)
+        self.assertGreaterEqual(agreement["pearson"], 0.95)
+        self.assertTrue(agreement["top1_match"])
+
+
 class TestSimpleVectorIndex(unittest.TestCase):
     """SimpleVectorIndex 테스트"""
     
@@ -338,6 +654,686 @@ class TestSimpleVectorIndex(unittest.TestCase):
         self.assertIn("total_documents", stats)
         self.assertIn("index_name", stats)
         self.assertGreaterEqual(stats["total_documents"], 0)
+    
+    def test_embeddings_normalized_on_upsert(self):
+        """업서트 시 임베딩 정규화 테스트"""
+        import numpy as np
+        
+        self.manager.upsert_chunks([
+            {"text": "정규화 테스트 텍스트", "metadata": {"law_topic": "채권추심"}}
+        ])
+        
+        norms = np.linalg.norm(self.manager.embeddings_matrix, axis=1)
+        self.assertTrue(np.allclose(norms, 1.0, atol=1e-5))
+        self.assertTrue(self.manager.normalized)
+    
+    def test_legacy_index_migration(self):
+        """구버전(비정규화) 인덱스 로드 시 마이그레이션 테스트"""
+        import pickle
+        import numpy as np
+        
+        legacy_dir = os.path.join(self.temp_dir, "legacy_index")
+        os.makedirs(legacy_dir)
+        documents = {
+            "a": {"text": "문서 A", "embedding": np.array([3.0, 4.0], dtype=np.float32), "metadata": {}},
+            "b": {"text": "문서 B", "embedding": np.array([0.0, 2.0], dtype=np.float32), "metadata": {}}
+        }
+        with open(os.path.join(legacy_dir, "legacy.pkl"), "wb") as f:
+            pickle.dump(documents, f)
+        with open(os.path.join(legacy_dir, "legacy_metadata.pkl"), "wb") as f:
+            pickle.dump({"embeddings_matrix": np.vstack([d["embedding"] for d in documents.values()]),
+                         "doc_ids": ["a", "b"]}, f)
+        
+        index = SimpleVectorIndex(
+            index_name="legacy",
+            persist_directory=legacy_dir,
+            embedding_service=self.manager.embedding_service
+        )
+        
+        self.assertTrue(index.normalized)
+        self.assertTrue(np.allclose(np.linalg.norm(index.embeddings_matrix, axis=1), 1.0))
+        self.assertEqual(len(index.documents), 2)
+        self.assertTrue(os.path.exists(index.manifest_file))
+    
+    def test_append_only_segments(self):
+        """업서트 시 기존 세그먼트를 다시 쓰지 않는지 테스트"""
+        self.manager.upsert_chunks([{"text": "세그먼트 문서 1", "metadata": {}}])
+        first_segment = os.path.join(self.manager.segment_dir, f"{self.manager.segments[0]}.npy")
+        with open(first_segment, "rb") as f:
+            first_bytes = f.read()
+        
+        self.manager.upsert_chunks([
+            {"text": "세그먼트 문서 2", "metadata": {}},
+            {"text": "세그먼트 문서 3", "metadata": {}}
+        ])
+        
+        self.assertEqual(len(self.manager.segments), 2)
+        with open(first_segment, "rb") as f:
+            self.assertEqual(f.read(), first_bytes)
+    
+    def test_delete_tombstone_and_reload(self):
+        """삭제(톰스톤) 후 재로드 시 상태 유지 테스트"""
+        chunks = [{"text": f"삭제 테스트 문서 {i}", "metadata": {"law_topic": "채권추심"}} for i in range(5)]
+        self.manager.upsert_chunks(chunks)
+        victim = self.manager.get_content_hash(chunks[0]["text"])
+        
+        self.assertEqual(self.manager.delete_documents([victim]), 1)
+        results = self.manager.search("삭제 테스트 문서 0", top_k=10)
+        self.assertNotIn(victim, [r["id"] for r in results])
+        self.assertEqual(len(results), 4)
+        
+        reloaded = SimpleVectorIndex(
+            index_name="test_collection",
+            persist_directory=self.index_dir,
+            embedding_service=self.manager.embedding_service
+        )
+        self.assertEqual(len(reloaded.documents), 4)
+        self.assertNotIn(victim, reloaded.documents)
+        
+        # 재추가 및 컴팩션
+        self.assertEqual(reloaded.upsert_chunks([chunks[0]])["added"], 1)
+        self.assertTrue(reloaded.compact())
+        self.assertEqual(len(reloaded.segments), 1)
+        self.assertEqual(len(reloaded.search("삭제 테스트", top_k=10)), 5)
+    
+    def test_writes_bump_index_generation(self):
+        """업서트/삭제/컴팩션/초기화마다 결과 캐시 세대 증가"""
+        chunks = [{"text": f"세대 테스트 문서 {i}", "metadata": {}} for i in range(3)]
+        writes = [
+            lambda: self.manager.upsert_chunks(chunks),
+            lambda: self.manager.delete_documents([self.manager.get_content_hash(chunks[0]["text"])]),
+            self.manager.compact,
+            self.manager.clear_index
+        ]
+        for write in writes:
+            generation = current_index_generation()
+            write()
+            self.assertNotEqual(current_index_generation(), generation)
+        
+        # 변경이 없는 쓰기는 세대 유지
+        generation = current_index_generation()
+        self.assertEqual(self.manager.delete_documents(["없는 문서"]), 0)
+        self.assertEqual(current_index_generation(), generation)
+    
+    def test_compact_interrupted_keeps_previous_index(self):
+        """컴팩션이 매니페스트 교체 전에 중단되어도 이전 세그먼트로 재로드, 완료 후 이전 파일 정리"""
+        from unittest import mock
+        
+        chunks = [{"text": f"컴팩션 중단 문서 {i}", "metadata": {}} for i in range(4)]
+        self.manager.upsert_chunks(chunks[:2])
+        self.manager.upsert_chunks(chunks[2:])
+        self.manager.delete_documents([self.manager.get_content_hash(chunks[0]["text"])])
+        
+        with mock.patch.object(SimpleVectorIndex, "_write_manifest", side_effect=OSError("disk full")):
+            self.assertFalse(self.manager.compact())
+        
+        reloaded = SimpleVectorIndex(
+            index_name="test_collection",
+            persist_directory=self.index_dir,
+            embedding_service=self.manager.embedding_service
+        )
+        self.assertEqual(len(reloaded.documents), 3)
+        self.assertEqual(len(reloaded.search("컴팩션 중단 문서", top_k=10)), 3)
+        
+        old_segments = list(reloaded.segments)
+        self.assertTrue(reloaded.compact())
+        self.assertEqual(len(reloaded.segments), 1)
+        self.assertNotIn(reloaded.segments[0], old_segments)
+        files = os.listdir(reloaded.segment_dir)
+        self.assertFalse(any(f.startswith(tuple(f"{s}." for s in old_segments)) for f in files))
+        self.assertNotIn("tombstones.txt", files)
+        
+        reloaded.delete_documents([reloaded.get_content_hash(chunks[1]["text"])])
+        again = SimpleVectorIndex(
+            index_name="test_collection",
+            persist_directory=self.index_dir,
+            embedding_service=self.manager.embedding_service
+        )
+        self.assertEqual(len(again.documents), 2)
+        self.assertTrue(again.clear_index())
+        self.assertEqual(sorted(os.listdir(again.segment_dir)), ["manifest.json"])
+    
+    def test_title_vectors_late_fusion(self):
+        """제목 벡터 late fusion, 재로드 시 어휘 재사용, 컴팩션 시 미사용 제목 정리"""
+        import numpy as np
+        
+        chunks = [
+            {"text": "지급명령 신청서 작성 요령", "metadata": {"title": "지급명령 가이드"}},
+            {"text": "송달 이후 이의신청 기간", "metadata": {"title": "지급명령 가이드"}},
+            {"text": "압류 대상 재산 조회", "title": "강제집행 실무"},
+            {"text": "제목 없는 청크", "metadata": {}}
+        ]
+        self.manager.upsert_chunks(chunks)
+        self.assertEqual(self.manager.titles.titles, ["지급명령 가이드", "강제집행 실무"])
+        self.assertEqual(self.manager.titles.row_titles.tolist(), [0, 0, 1, -1])
+        
+        # 결과 점수 = (1 - w) · 본문 + w · 제목 (제목 없는 행은 본문만)
+        query = np.asarray(self.manager.embedding_service.get_or_compute_embedding("지급명령"), dtype=np.float32)
+        query = query / np.linalg.norm(query)
+        weight = self.manager.titles.weight
+        body = self.manager.embeddings_matrix @ query
+        title = self.manager.titles.matrix @ query
+        expected = [(1 - weight) * body[0] + weight * title[0], (1 - weight) * body[1] + weight * title[0],
+                    (1 - weight) * body[2] + weight * title[1], body[3]]
+        results = {r["id"]: r["similarity"] for r in self.manager.search_by_vector(query, top_k=4)}
+        for row, doc_id in enumerate(self.manager.doc_ids):
+            self.assertAlmostEqual(results[doc_id], float(expected[row]), places=5)
+        
+        reloaded = SimpleVectorIndex(
+            index_name="test_collection",
+            persist_directory=self.index_dir,
+            embedding_service=self.manager.embedding_service
+        )
+        self.assertEqual(reloaded.titles.row_titles.tolist(), [0, 0, 1, -1])
+        self.assertTrue(np.allclose(reloaded.titles.matrix, self.manager.titles.matrix))
+        
+        reloaded.delete_documents([reloaded.get_content_hash(chunks[2]["text"])])
+        self.assertTrue(reloaded.compact())
+        self.assertEqual(reloaded.titles.titles, ["지급명령 가이드"])
+        self.assertEqual(reloaded.titles.row_titles.tolist(), [0, 0, -1])
+    
+    def test_reload_uses_memory_mapped_segments(self):
+        """재로드 시 벡터/텍스트가 mmap 세그먼트에서 제공되는지 테스트"""
+        import numpy as np
+        
+        chunks = [
+            {"text": "메모리 매핑 테스트 문서", "metadata": {"law_topic": "채권추심", "keywords": ["압류", "추심"]}},
+            {"text": "", "metadata": {"law_topic": "지급명령"}}
+        ]
+        self.manager.upsert_chunks(chunks)
+        self.manager.upsert_chunks([{"text": "두 번째 세그먼트 문서", "metadata": {}}])
+        
+        reloaded = SimpleVectorIndex(
+            index_name="test_collection",
+            persist_directory=self.index_dir,
+            embedding_service=self.manager.embedding_service
+        )
+        
+        self.assertTrue(all(isinstance(segment.vectors, np.memmap) for segment in reloaded._mapped))
+        self.assertFalse(any(name.endswith(".pkl") for name in os.listdir(self.index_dir)))
+        
+        doc_id = self.manager.get_content_hash(chunks[0]["text"])
+        document = reloaded.get_document(doc_id)
+        self.assertEqual(document["text"], chunks[0]["text"])
+        self.assertEqual(document["metadata"]["keywords"], ["압류", "추심"])
+        
+        results = reloaded.search("두 번째 세그먼트 문서", top_k=3)
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[0]["text"], "두 번째 세그먼트 문서")
+        
+        # 재로드 후 추가 업서트도 기존 세그먼트와 함께 검색되는지 확인
+        reloaded.upsert_chunks([{"text": "세 번째 세그먼트 문서", "metadata": {}}])
+        self.assertEqual(len(reloaded.search("세그먼트", top_k=10)), 4)
+    
+    def test_filtered_search_returns_top_k(self):
+        """필터 적용 후에도 top_k개를 채우는지 테스트"""
+        chunks = []
+        for i in range(30):
+            chunks.append({
+                "text": f"필터 검색 테스트 문서 {i}",
+                "metadata": {
+                    "law_topic": "지급명령" if i % 10 == 0 else "채권추심",
+                    "published_at": f"2024-01-{i + 1:02d}"
+                }
+            })
+        self.manager.upsert_chunks(chunks)
+        
+        results = self.manager.search("필터 검색", top_k=3, where_filter={"law_topic": "지급명령"})
+        self.assertEqual(len(results), 3)
+        self.assertTrue(all(r["metadata"]["law_topic"] == "지급명령" for r in results))
+        
+        results = self.manager.search("필터 검색", top_k=50, where_filter={
+            "law_topic": {"$in": ["채권추심"]},
+            "published_at": {"$gte": "2024-01-05", "$lte": "2024-01-09"}
+        })
+        self.assertEqual(len(results), 5)
+        
+        results = self.manager.search("필터 검색", top_k=5, where_filter={"law_topic": "없는주제"})
+        self.assertEqual(results, [])
+    
+    def test_search_many_matches_single(self):
+        """다중 쿼리 검색이 단일 검색과 동일한지 테스트"""
+        chunks = [{"text": f"다중 검색 문서 {i}", "metadata": {"law_topic": "지급명령" if i % 3 == 0 else "채권추심"}}
+                  for i in range(20)]
+        self.manager.upsert_chunks(chunks)
+        self.manager.delete_documents([self.manager.get_content_hash(chunks[1]["text"])])
+        queries = ["다중 검색 문서 4", "다중 검색 문서 9", "없는 문서"]
+        
+        for where_filter in (None, {"law_topic": "지급명령"}):
+            batch_results = self.manager.search_many(queries, top_k=5, where_filter=where_filter)
+            self.assertEqual(len(batch_results), 3)
+            for query, results in zip(queries, batch_results):
+                expected = self.manager.search(query, top_k=5, where_filter=where_filter)
+                self.assertEqual([r["id"] for r in results], [r["id"] for r in expected])
+                for result, single in zip(results, expected):
+                    self.assertAlmostEqual(result["similarity"], single["similarity"], places=5)
+    
+    def test_ann_index_search_and_reload(self):
+        """ANN 인덱스 구축/검색/재로드 테스트"""
+        chunks = [{"text": f"ANN 테스트 문서 {i}", "metadata": {"law_topic": "지급명령" if i < 3 else "채권추심"}}
+                  for i in range(40)]
+        self.manager.upsert_chunks(chunks)
+        
+        build_info = self.manager.build_ann_index(nlist=4)
+        self.assertEqual(build_info["rows"], 40)
+        self.assertTrue(os.path.exists(self.manager.ann_file))
+        
+        # nprobe = nlist 이면 전수 검색과 동일
+        self.manager.nprobe = 4
+        results = self.manager.search("ANN 테스트 문서 7", top_k=5)
+        self.assertEqual(results[0]["text"], "ANN 테스트 문서 7")
+        
+        # 선택적인 필터는 후보가 부족하면 정확 검색으로 폴백
+        self.manager.nprobe = 1
+        results = self.manager.search("ANN 테스트 문서", top_k=3, where_filter={"law_topic": "지급명령"})
+        self.assertEqual(len(results), 3)
+        
+        # 추가 업서트는 재학습 없이 할당되고, 재로드 시 ANN 인덱스도 복원
+        self.manager.upsert_chunks([{"text": "ANN 추가 문서", "metadata": {}}])
+        self.assertEqual(self.manager.ann_index.num_rows, 41)
+        
+        reloaded = SimpleVectorIndex(
+            index_name="test_collection",
+            persist_directory=self.index_dir,
+            embedding_service=self.manager.embedding_service,
+            nprobe=4
+        )
+        self.assertIsNotNone(reloaded.ann_index)
+        self.assertEqual(reloaded.ann_index.num_rows, 41)
+        self.assertEqual(reloaded.search("ANN 추가 문서", top_k=1)[0]["text"], "ANN 추가 문서")
+
+
+class TestVectorSearchEngine(unittest.TestCase):
+    """VectorSearchEngine 테스트"""
+    
+    def setUp(self):
+        """테스트 설정"""
+        import numpy as np
+        rng = np.random.default_rng(42)
+        self.embeddings = rng.normal(size=(200, 32)).astype(np.float32)
+        self.engine = VectorSearchEngine(self.embeddings)
+    
+    def _brute_force(self, query, k):
+        """기존 루프 방식 기준 결과"""
+        import numpy as np
+        sims = []
+        for i, embedding in enumerate(self.embeddings):
+            sim = np.dot(query, embedding) / (np.linalg.norm(query) * np.linalg.norm(embedding))
+            sims.append((sim, i))
+        sims.sort(reverse=True)
+        return [idx for _, idx in sims[:k]]
+    
+    def test_search_matches_brute_force(self):
+        """단일 쿼리 결과가 전수 비교와 동일한지 테스트"""
+        query = self.embeddings[7] + 0.1
+        results = self.engine.search(query, top_k=10)
+        
+        self.assertEqual([idx for _, idx in results], self._brute_force(query, 10))
+        scores = [score for score, _ in results]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+    
+    def test_search_many_matches_single(self):
+        """배치 검색이 단일 검색과 동일한지 테스트"""
+        queries = self.embeddings[:5] * 2.0
+        batch_results = self.engine.search_many(queries, top_k=5)
+        
+        self.assertEqual(len(batch_results), 5)
+        for query, results in zip(queries, batch_results):
+            self.assertEqual([idx for _, idx in results],
+                             [idx for _, idx in self.engine.search(query, top_k=5)])
+    
+    def test_search_page_with_mask(self):
+        """마스크/최소 유사도/페이징 테스트"""
+        import numpy as np
+        mask = np.zeros(len(self.engine), dtype=bool)
+        mask[::2] = True
+        
+        page, total = self.engine.search_page(self.embeddings[0], top_k=5, offset=5,
+                                              mask=mask, min_similarity=0.0)
+        
+        self.assertTrue(all(idx % 2 == 0 for _, idx in page))
+        self.assertTrue(all(score >= 0.0 for score, _ in page))
+        self.assertLessEqual(len(page), 5)
+        self.assertEqual(total, int((mask & (self.engine.score(self.embeddings[0]) >= 0.0)).sum()))
+    
+    def test_title_fusion(self):
+        """제목 벡터를 붙이면 점수가 본문/제목 가중합이 되고 배치 검색과도 일치"""
+        import numpy as np
+        titles = TitleVectors(weight=0.4)
+        titles.extend([f"제목 {i % 20}" if i % 7 else None for i in range(len(self.embeddings))],
+                      lambda texts: self.embeddings[[int(text.split()[1]) for text in texts]] + 0.5)
+        engine = VectorSearchEngine(self.embeddings, titles)
+        
+        query = self.embeddings[3]
+        plain = self.engine.score(query)
+        title_scores = titles.matrix @ (query / np.linalg.norm(query))
+        fused = engine.score(query)
+        for row in (0, 1, 3, 7):
+            mapping = titles.row_titles[row]
+            expected = plain[row] if mapping < 0 else 0.6 * plain[row] + 0.4 * title_scores[mapping]
+            self.assertAlmostEqual(float(fused[row]), float(expected), places=5)
+        
+        for query, results in zip(self.embeddings[:3], engine.search_many(self.embeddings[:3], top_k=5)):
+            self.assertEqual([idx for _, idx in results], [idx for _, idx in engine.search(query, top_k=5)])
+    
+    def test_top_k_indices_edge_cases(self):
+        """top_k 경계값 테스트"""
+        import numpy as np
+        scores = np.array([0.1, 0.9, 0.5], dtype=np.float32)
+        
+        self.assertEqual(top_k_indices(scores, 10).tolist(), [1, 2, 0])
+        self.assertEqual(top_k_indices(scores, 0).tolist(), [])
+
+
+class TestBitmapFilterIndex(unittest.TestCase):
+    """BitmapFilterIndex 테스트"""
+    
+    def setUp(self):
+        """테스트 설정"""
+        self.metadatas = [
+            {"law_topic": "채권추심", "published_at": "2024-01-10", "logno": "1"},
+            {"law_topic": "지급명령", "published_at": "2024-02-10", "logno": "2"},
+            {"law_topic": "채권추심", "published_at": "2024-03-10", "logno": "3", "author": "A"},
+            {"law_topic": "강제집행", "published_at": "2023-12-31", "logno": "4"}
+        ]
+        self.index = BitmapFilterIndex()
+        self.index.build(self.metadatas)
+    
+    def _assert_same_as_scan(self, where):
+        """비트맵 결과가 메타데이터 스캔과 동일한지 확인"""
+        expected = [matches_where(m, where) for m in self.metadatas]
+        self.assertEqual(self.index.mask(where).tolist(), expected)
+    
+    def test_equality_and_in(self):
+        """equality / $in 테스트"""
+        self.assertEqual(self.index.mask({"law_topic": "채권추심"}).tolist(), [True, False, True, False])
+        self._assert_same_as_scan({"law_topic": {"$in": ["지급명령", "강제집행"]}})
+        self._assert_same_as_scan({"logno": {"$ne": "1"}})
+    
+    def test_range(self):
+        """$gte/$lte 범위 테스트"""
+        self._assert_same_as_scan({"published_at": {"$gte": "2024-01-01", "$lte": "2024-02-28"}})
+        self._assert_same_as_scan({"published_at": {"$gt": "2024-01-10"}})
+        self._assert_same_as_scan({"law_topic": "채권추심", "published_at": {"$gte": "2024-02-01"}})
+    
+    def test_unindexed_field_and_compound(self):
+        """인덱싱되지 않은 필드 / $and / $or 테스트"""
+        self._assert_same_as_scan({"author": "A"})
+        self._assert_same_as_scan({"$or": [{"logno": "1"}, {"law_topic": "강제집행"}]})
+        self._assert_same_as_scan({"$and": [{"law_topic": "채권추심"}, {"logno": {"$in": ["3"]}}]})
+    
+    def test_no_filter(self):
+        """필터 없음 테스트"""
+        self.assertIsNone(self.index.mask(None))
+
+
+class TestIVFFlatIndex(unittest.TestCase):
+    """IVFFlatIndex 테스트"""
+    
+    def setUp(self):
+        """테스트 설정"""
+        import numpy as np
+        rng = np.random.default_rng(0)
+        matrix = rng.normal(size=(500, 16)).astype(np.float32)
+        self.matrix = matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+        self.index = IVFFlatIndex.train(self.matrix, nlist=16, seed=0)
+    
+    def test_recall_increases_with_nprobe(self):
+        """nprobe가 nlist와 같으면 recall 1.0"""
+        report = evaluate_recall(self.index, self.matrix, self.matrix[:20], top_k=10, nprobe_values=[1, 16])
+        
+        self.assertEqual(report[-1]["recall@10"], 1.0)
+        self.assertEqual(report[-1]["scanned_ratio"], 1.0)
+        self.assertLessEqual(report[0]["recall@10"], report[-1]["recall@10"])
+        self.assertLess(report[0]["scanned_ratio"], 1.0)
+    
+    def test_save_load_and_add(self):
+        """저장/로드 및 행 추가 테스트"""
+        import numpy as np
+        temp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(temp_dir, "ivf.npz")
+            self.index.save(path)
+            loaded = IVFFlatIndex.load(path)
+        finally:
+            shutil.rmtree(temp_dir)
+        
+        np.testing.assert_array_equal(loaded.assignments, self.index.assignments)
+        query = self.matrix[3]
+        np.testing.assert_array_equal(loaded.candidates(query, 2), self.index.candidates(query, 2))
+        
+        loaded.add(self.matrix[:10])
+        self.assertEqual(loaded.num_rows, 510)
+        self.assertIn(503, loaded.candidates(query, 1).tolist())
+    
+    def test_train_rows_excludes_deleted_rows(self):
+        """train_rows만으로 센트로이드 학습, 할당은 전체 행"""
+        import numpy as np
+        live = np.arange(100, 500)
+        index = IVFFlatIndex.train(self.matrix, nlist=8, seed=0, train_rows=live)
+        expected = IVFFlatIndex.train(self.matrix[live], nlist=8, seed=0)
+        
+        np.testing.assert_allclose(index.centroids, expected.centroids, atol=1e-6)
+        self.assertEqual(index.num_rows, 500)
+
+
+class TestQuantization(unittest.TestCase):
+    """int8 / PQ 압축 검색 테스트"""
+    
+    def setUp(self):
+        """테스트 설정"""
+        import numpy as np
+        rng = np.random.default_rng(1)
+        matrix = rng.normal(size=(400, 32)).astype(np.float32)
+        self.matrix = matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+        self.queries = self.matrix[:10] + 0.05 * rng.normal(size=(10, 32)).astype(np.float32)
+        self.exact = VectorSearchEngine(self.matrix)
+    
+    def _recall(self, engine, k=10):
+        hits = 0
+        for query in self.queries:
+            expected = {idx for _, idx in self.exact.search(query, top_k=k)}
+            hits += len(expected & {idx for _, idx in engine.search(query, top_k=k)})
+        return hits / (len(self.queries) * k)
+    
+    def test_int8_rescored_matches_exact(self):
+        """int8 ADC + float32 재스코어링 결과 및 점수가 전수 검색과 동일한지 테스트"""
+        quantizer = ScalarQuantizer.train(self.matrix)
+        engine = CompressedSearchEngine(quantizer, quantizer.encode(self.matrix), self.matrix, rerank_k=50)
+        
+        self.assertEqual(engine.memory_bytes(), engine.codes.nbytes + quantizer.scale.nbytes)
+        self.assertLess(engine.codes.nbytes, self.matrix.nbytes // 3)
+        self.assertEqual(self._recall(engine), 1.0)
+        
+        score, idx = engine.search(self.queries[0], top_k=1)[0]
+        exact_score, exact_idx = self.exact.search(self.queries[0], top_k=1)[0]
+        self.assertEqual(idx, exact_idx)
+        self.assertAlmostEqual(score, exact_score, places=5)
+    
+    def test_pq_recall_with_rerank(self):
+        """PQ ADC 근사 후 재스코어링 recall 테스트"""
+        quantizer = ProductQuantizer.train(self.matrix, m=8, ksub=64)
+        codes = quantizer.encode(self.matrix)
+        
+        self.assertEqual(codes.shape, (400, 8))
+        self.assertEqual(self.matrix.nbytes // codes.nbytes, 16)
+        engine = CompressedSearchEngine(quantizer, codes, self.matrix, rerank_k=80)
+        self.assertGreaterEqual(self._recall(engine), 0.9)
+    
+    def test_mask_and_page(self):
+        """마스크/페이징이 VectorSearchEngine과 동일하게 동작하는지 테스트"""
+        import numpy as np
+        quantizer = ScalarQuantizer.train(self.matrix)
+        engine = CompressedSearchEngine(quantizer, quantizer.encode(self.matrix), self.matrix, rerank_k=100)
+        mask = np.zeros(len(engine), dtype=bool)
+        mask[::3] = True
+        
+        page, total = engine.search_page(self.queries[1], top_k=5, offset=5, mask=mask)
+        expected, expected_total = self.exact.search_page(self.queries[1], top_k=5, offset=5, mask=mask)
+        self.assertEqual([idx for _, idx in page], [idx for _, idx in expected])
+        self.assertEqual(total, expected_total)
+    
+    def test_page_with_min_similarity_scans_once(self):
+        """min_similarity 페이징 시 ADC 전체 스캔이 한 번만 수행되는지 테스트"""
+        from unittest import mock
+        quantizer = ScalarQuantizer.train(self.matrix)
+        engine = CompressedSearchEngine(quantizer, quantizer.encode(self.matrix), self.matrix, rerank_k=100)
+        expected, expected_total = self.exact.search_page(self.queries[1], top_k=5, min_similarity=0.1)
+        
+        with mock.patch.object(quantizer, "score_codes", wraps=quantizer.score_codes) as score_codes:
+            page, total = engine.search_page(self.queries[1], top_k=5, min_similarity=0.1)
+        self.assertEqual(score_codes.call_count, 1)
+        self.assertEqual([idx for _, idx in page], [idx for _, idx in expected])
+        self.assertEqual(total, expected_total)
+    
+    def test_load_search_engine_caches_codes(self):
+        """압축 코드 캐시 생성/재사용 테스트"""
+        import numpy as np
+        temp_dir = tempfile.mkdtemp()
+        try:
+            index_path = os.path.join(temp_dir, "simple_vector_index.npy")
+            np.save(index_path, self.matrix)
+            
+            self.assertIsInstance(load_search_engine(index_path), VectorSearchEngine)
+            engine = load_search_engine(index_path, "int8")
+            self.assertTrue(os.path.exists(compressed_path(index_path, "int8")))
+            
+            cached = load_search_engine(index_path, "int8")
+            np.testing.assert_array_equal(cached.codes, engine.codes)
+            self.assertIsInstance(cached.vectors, np.memmap)
+            
+            with self.assertRaises(ValueError):
+                load_search_engine(index_path, "fp4")
+        finally:
+            shutil.rmtree(temp_dir)
+
+
+class TestSimpleVectorStore(unittest.TestCase):
+    """SimpleVectorStore (ChromaDB 호환) 테스트"""
+    
+    def setUp(self):
+        """테스트 설정 (upsert/query만 사용하므로 임베더 불필요)"""
+        import numpy as np
+        rng = np.random.default_rng(3)
+        self.vectors = rng.normal(size=(50, 16)).astype(np.float32)
+        self.store = SimpleVectorStore(embedder=object())
+        self.store.upsert(
+            [f"doc-{i}" for i in range(50)],
+            [f"문서 {i}" for i in range(50)],
+            self.vectors.tolist(),
+            [{"cat": "채권추심" if i % 2 == 0 else "지급명령", "date": f"2024-01-{i % 28 + 1:02d}"} for i in range(50)]
+        )
+    
+    def test_query_matches_brute_force(self):
+        """검색 결과가 전수 코사인 비교와 동일한지 테스트"""
+        import numpy as np
+        query = self.vectors[5] + 0.1
+        sims = self.vectors @ query / (np.linalg.norm(self.vectors, axis=1) * np.linalg.norm(query))
+        
+        result = self.store.query([query.tolist()], n_results=5)
+        
+        self.assertEqual(result["ids"][0], [f"doc-{i}" for i in np.argsort(-sims)[:5]])
+        self.assertAlmostEqual(1.0 - result["distances"][0][0], float(sims.max()), places=5)
+    
+    def test_upsert_updates_in_place(self):
+        """기존 ID 업서트는 행을 교체하는지 테스트 (인덱스 세대 증가)"""
+        generation = current_index_generation()
+        self.store.upsert(["doc-3"], ["수정된 문서"], [self.vectors[10].tolist()], [{"cat": "강제집행"}])
+        
+        self.assertEqual(len(self.store), 50)
+        self.assertIn("doc-3", self.store)
+        self.assertEqual(self.store.documents[self.store.id_to_row["doc-3"]], "수정된 문서")
+        result = self.store.query([self.vectors[10].tolist()], n_results=50, where={"cat": "강제집행"})
+        self.assertEqual(result["ids"][0], ["doc-3"])
+        self.assertNotEqual(current_index_generation(), generation)
+    
+    def test_unchanged_upsert_keeps_generation(self):
+        """내용이 같은 재업서트는 세대/비트맵을 건드리지 않음 (벡터만 바뀌어도 세대 증가)"""
+        ids = [f"doc-{i}" for i in range(50)]
+        metadatas = [dict(self.store.metadatas[i]) for i in range(50)]
+        generation = current_index_generation()
+        self.store.upsert(ids, list(self.store.documents), self.vectors.tolist(), metadatas)
+        self.assertEqual(current_index_generation(), generation)
+        self.assertFalse(self.store._filter_dirty)
+        
+        self.store.upsert(["doc-4"], ["문서 4"], [self.vectors[9].tolist()], [metadatas[4]])
+        self.assertNotEqual(current_index_generation(), generation)
+        self.assertFalse(self.store._filter_dirty)
+    
+    def test_where_filter(self):
+        """where 필터 및 다중 쿼리 테스트"""
+        result = self.store.query(self.vectors[:2].tolist(), n_results=50, where={
+            "cat": "지급명령", "date": {"$lte": "2024-01-10"}
+        })
+        
+        self.assertEqual(len(result["ids"]), 2)
+        for metadatas in result["metadatas"]:
+            self.assertTrue(metadatas)
+            self.assertTrue(all(m["cat"] == "지급명령" and m["date"] <= "2024-01-10" for m in metadatas))
+        
+        empty = self.store.query([self.vectors[0].tolist()], n_results=5, where={"cat": "없음"})
+        self.assertEqual(empty["ids"], [[]])
+    
+    def test_snapshot_roundtrip_and_stale_rows(self):
+        """스냅샷 저장/로드 및 변경 문서 판별 테스트"""
+        import numpy as np
+        temp_dir = tempfile.mkdtemp()
+        try:
+            self.store.save(temp_dir)
+            self.store.upsert(["doc-1"], ["문서 1 수정"], [self.vectors[1].tolist()], [{"cat": "지급명령"}])
+            self.store.save(temp_dir)
+            self.assertEqual(len([f for f in os.listdir(temp_dir) if f.startswith("vectors-")]), 1)
+            
+            restored = SimpleVectorStore(embedder=object())
+            self.assertTrue(restored.load(temp_dir))
+            np.testing.assert_allclose(restored.embeddings, self.store.embeddings, atol=1e-6)
+            self.assertEqual(restored.documents, self.store.documents)
+            
+            # 해시가 같은 문서는 재임베딩 대상에서 제외
+            self.assertEqual(restored.stale_rows(["doc-0", "doc-1", "doc-99"], ["문서 0", "문서 1", "새 문서"]), [1, 2])
+            
+            # 로드 시 스냅샷 해시 재사용 (재해싱 없음)
+            from unittest import mock
+            with mock.patch.object(SimpleVectorStore, "content_hash", side_effect=AssertionError("rehashed")):
+                again = SimpleVectorStore(embedder=object())
+                generation = current_index_generation()
+                self.assertTrue(again.load(temp_dir))
+            self.assertEqual(again.content_hashes, self.store.content_hashes)
+            # 스냅샷 복원은 세대를 올리지 않음 (공유 결과 캐시 유지)
+            self.assertEqual(current_index_generation(), generation)
+            
+            other_model = SimpleVectorStore(embedder=object(), model_name="other-model")
+            self.assertFalse(other_model.load(temp_dir))
+        finally:
+            shutil.rmtree(temp_dir)
+    
+    def test_sample_reload_upserts_only_changed_rows(self):
+        """재시작 시 샘플 코퍼스가 그대로면 업서트/저장 생략, 바뀐 문서만 업서트"""
+        import json
+        from unittest import mock
+        import simple_vector_store
+        temp_dir = tempfile.mkdtemp()
+        cwd = os.getcwd()
+        try:
+            docs = [{"id": f"doc-{i}", "text": f"문서 {i}", **self.store.metadatas[i]} for i in range(50)]
+            os.chdir(temp_dir)
+            with mock.patch.object(simple_vector_store, "_store", self.store), \
+                    mock.patch.object(simple_vector_store.settings, "VECTOR_STORE_DIR", temp_dir), \
+                    mock.patch.object(self.store, "upsert", wraps=self.store.upsert) as upsert:
+                with open("sample_corpus.jsonl", "w", encoding="utf-8") as f:
+                    f.writelines(json.dumps(doc, ensure_ascii=False) + "\n" for doc in docs)
+                self.assertEqual(simple_vector_store._load_sample_data(), [])
+                upsert.assert_not_called()
+                
+                docs[5]["cat"] = "강제집행"
+                with open("sample_corpus.jsonl", "w", encoding="utf-8") as f:
+                    f.writelines(json.dumps(doc, ensure_ascii=False) + "\n" for doc in docs)
+                self.assertEqual(simple_vector_store._load_sample_data(), [])
+                self.assertEqual(upsert.call_args[0][0], ["doc-5"])
+            self.assertEqual(self.store.metadatas[5]["cat"], "강제집행")
+        finally:
+            os.chdir(cwd)
+            shutil.rmtree(temp_dir)
 
 
 class TestIntegration(unittest.TestCase):
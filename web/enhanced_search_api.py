@@ -10,17 +10,29 @@ import time
 import logging
 from pathlib import Path
 from typing import List, Optional, Dict, Any
-from sentence_transformers import SentenceTransformer
 import torch
 from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from functools import lru_cache
 from collections import deque
 import statistics
+import sys
 import threading
 from datetime import datetime, timedelta
 
+# 프로젝트 루트를 Python 경로에 추가
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.vector.model_registry import get_sentence_transformer
+from src.vector.micro_batcher import get_query_batcher
+from src.vector.quantization import load_search_engine
+from src.search.tokenizer import get_tokenizer
+from src.search.fusion import fuse, FUSION_STRATEGIES
+from src.vector.search_engine import top_k_indices
+
 # ===== 환경 가드 설정 =====
 os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
 os.environ.setdefault("OMP_NUM_THREADS", "1")
@@ -33,6 +45,8 @@ logger = logging.getLogger(__name__)
 USE_HYBRID_SEARCH = os.getenv("USE_HYBRID_SEARCH", "false").lower() == "true"
 USE_RERANKER = os.getenv("USE_RERANKER", "false").lower() == "true"
 RERANKER_CACHE_SIZE = int(os.getenv("RERANKER_CACHE_SIZE", "50"))
+VECTOR_COMPRESSION = os.getenv("VECTOR_COMPRESSION", "none").lower()  # none | int8 | pq
+FUSION_STRATEGY = os.getenv("FUSION_STRATEGY", "minmax").lower()  # rrf | zscore | minmax
 
 # FastAPI 앱 초기화
 app = FastAPI(
@@ -52,8 +66,10 @@ app.add_middleware(
 
 # 전역 변수
 embeddings = None
+search_engine = None
 metadata = None
 model = None
+query_batcher = None  # 공용 쿼리 마이크로 배처 (동시 요청을 모아 encode 1회)
 reranker_model = None
 bm25_index = None
 system_ready = False
@@ -125,19 +141,14 @@ class EnhancedMetricsCollector:
 
 metrics = EnhancedMetricsCollector()
 
-def cosine_similarity(a, b):
-    """코사인 유사도 계산"""
-    return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
-
 @lru_cache(maxsize=200)
 def encode_query_cached(query: str) -> tuple:
     """쿼리 임베딩 캐시"""
     if model is None:
         raise HTTPException(status_code=500, detail="Model not loaded")
     
-    # e5 프리픽스 적용
-    prefixed_query = f"query: {query}"
-    embedding = model.encode([prefixed_query], normalize_embeddings=True)[0]
+    # e5 프리픽스 적용 + 동시 요청과 함께 배치 인코딩
+    embedding = query_batcher.encode(query)
     return tuple(embedding)
 
 def build_bm25_index():
@@ -145,17 +156,8 @@ def build_bm25_index():
     try:
         from rank_bm25 import BM25Okapi
         
-        # 한국어 bi-gram 토큰화
-        def ko_tokenize(text):
-            # 간단한 bi-gram 토큰화
-            words = text.split()
-            tokens = []
-            for word in words:
-                if len(word) >= 2:
-                    for i in range(len(word) - 1):
-                        tokens.append(word[i:i+2])
-                tokens.append(word)
-            return tokens
+        # 한국어 bi-gram + 어절 토큰화 (공용 토크나이저 mixed 모드)
+        ko_tokenize = get_tokenizer("mixed")
         
         # 문서 토큰화
         tokenized_docs = []
@@ -173,8 +175,8 @@ def build_bm25_index():
         logger.warning("rank_bm25 not installed, BM25 disabled")
         return None, None
 
-def hybrid_search(query: str, top_k: int = 50) -> List[tuple]:
-    """하이브리드 검색 (벡터 + BM25)"""
+def hybrid_search(query: str, top_k: int = 50, fusion: Optional[str] = None) -> List[tuple]:
+    """하이브리드 검색 (벡터 + BM25, 순위 목록 융합)"""
     if bm25_index is None:
         # BM25 없으면 벡터 검색만
         return vector_search(query, top_k)
@@ -187,39 +189,23 @@ def hybrid_search(query: str, top_k: int = 50) -> List[tuple]:
     bm25_scores = bm25_index[0].get_scores(query_tokens)
     
     # BM25 상위 결과
-    bm25_indices = np.argsort(bm25_scores)[::-1][:top_k]
+    bm25_indices = top_k_indices(np.asarray(bm25_scores), top_k)
     bm25_results = [(bm25_scores[i], i) for i in bm25_indices if bm25_scores[i] > 0]
     
-    # ID 기반 머지 (가중합)
-    merged_scores = {}
-    
-    # 벡터 결과 (가중치 0.7)
-    for sim, idx in vector_results:
-        merged_scores[idx] = merged_scores.get(idx, 0) + sim * 0.7
-    
-    # BM25 결과 (가중치 0.3)
-    for score, idx in bm25_results:
-        # BM25 점수를 0-1 범위로 정규화
-        normalized_score = min(score / 10.0, 1.0)  # 경험적 정규화
-        merged_scores[idx] = merged_scores.get(idx, 0) + normalized_score * 0.3
-    
-    # 최종 결과 정렬
-    final_results = [(score, idx) for idx, score in merged_scores.items()]
-    final_results.sort(reverse=True)
-    
-    return final_results[:top_k]
+    # 순위 목록 융합 (벡터 0.7, BM25 0.3)
+    fused = fuse(
+        {"vector": [(idx, sim) for sim, idx in vector_results],
+         "bm25": [(idx, score) for score, idx in bm25_results]},
+        strategy=fusion or FUSION_STRATEGY,
+        weights={"vector": 0.7, "bm25": 0.3},
+        top_k=top_k
+    )
+    return [(score, idx) for idx, score in fused]
 
 def vector_search(query: str, top_k: int = 50) -> List[tuple]:
     """벡터 검색"""
     query_embedding = np.array(encode_query_cached(query))
-    
-    similarities = []
-    for i, embedding in enumerate(embeddings):
-        sim = cosine_similarity(query_embedding, embedding)
-        similarities.append((sim, i))
-    
-    similarities.sort(reverse=True)
-    return similarities[:top_k]
+    return search_engine.search(query_embedding, top_k)
 
 @lru_cache(maxsize=RERANKER_CACHE_SIZE)
 def rerank_cached(query: str, candidate_texts: tuple) -> tuple:
@@ -244,7 +230,7 @@ def rerank_cached(query: str, candidate_texts: tuple) -> tuple:
 
 def load_artifacts_with_enhancements():
     """확장 기능과 함께 아티팩트 로드"""
-    global embeddings, metadata, model, reranker_model, bm25_index, system_ready
+    global embeddings, search_engine, metadata, model, query_batcher, reranker_model, bm25_index, system_ready
     
     logger.info("Loading artifacts with enhancements...")
     
@@ -264,6 +250,7 @@ def load_artifacts_with_enhancements():
     
     # 벡터 인덱스 로드
     embeddings = np.load(index_path, mmap_mode='r')
+    search_engine = load_search_engine(index_path, VECTOR_COMPRESSION, vectors=embeddings)
     
     # 메타데이터 로드
     with open(metadata_path, "r", encoding="utf-8") as f:
@@ -276,14 +263,15 @@ def load_artifacts_with_enhancements():
     
     # 모델 로드
     device = "cuda" if torch.cuda.is_available() else "cpu"
-    model = SentenceTransformer("intfloat/multilingual-e5-base", device=device)
+    model = get_sentence_transformer("intfloat/multilingual-e5-base", device)
+    query_batcher = get_query_batcher("intfloat/multilingual-e5-base", device)
     model.max_seq_length = 512
     
     # 리랭커 모델 로드 (선택적)
     if USE_RERANKER:
         try:
-            from sentence_transformers import CrossEncoder
-            reranker_model = CrossEncoder('cross-encoder/ms-marco-MiniLM-L-6-v2')
+            from src.vector.model_registry import get_cross_encoder
+            reranker_model = get_cross_encoder('cross-encoder/ms-marco-MiniLM-L-6-v2')
             logger.info("Reranker model loaded")
         except Exception as e:
             logger.warning(f"Failed to load reranker: {e}")
@@ -306,6 +294,7 @@ class EnhancedSearchRequest(BaseModel):
     # AB 플래그
     hybrid: Optional[bool] = None  # None이면 환경변수 사용
     reranker: Optional[bool] = None  # None이면 환경변수 사용
+    fusion: Optional[str] = None  # 하이브리드 융합 전략 (rrf | zscore | minmax), None이면 환경변수 사용
 
 class SearchResult(BaseModel):
     id: str
@@ -415,6 +404,8 @@ async def enhanced_search(request: EnhancedSearchRequest):
     """확장 검색 API"""
     if not system_ready:
         raise HTTPException(status_code=503, detail="System not ready")
+    if request.fusion is not None and request.fusion not in FUSION_STRATEGIES:
+        raise HTTPException(status_code=400, detail=f"fusion must be one of {', '.join(FUSION_STRATEGIES)}")
     
     start_time = time.time()
     
@@ -423,12 +414,12 @@ async def enhanced_search(request: EnhancedSearchRequest):
         use_hybrid = request.hybrid if request.hybrid is not None else USE_HYBRID_SEARCH
         use_reranker = request.reranker if request.reranker is not None else USE_RERANKER
         
-        # 검색 실행
+        # 검색 실행 (스레드 풀에서 실행 — 이벤트 루프를 막지 않고 동시 요청의 쿼리 인코딩이 배치로 묶임)
         if use_hybrid:
-            search_results = hybrid_search(request.q, request.top_k * 2)  # 리랭킹을 위해 더 많이
+            search_results = await run_in_threadpool(hybrid_search, request.q, request.top_k * 2, request.fusion)  # 리랭킹을 위해 더 많이
             search_method = "hybrid"
         else:
-            search_results = vector_search(request.q, request.top_k * 2)
+            search_results = await run_in_threadpool(vector_search, request.q, request.top_k * 2)
             search_method = "vector"
         
         # 리랭킹 적용
@@ -461,7 +452,8 @@ async def enhanced_search(request: EnhancedSearchRequest):
         # 필터 적용
         filtered_results = []
         for sim, idx in search_results:
-            if sim < request.min_similarity:
+            # 융합 점수는 전략별 스케일이 달라(zscore는 음수 가능) 임계값이 양수일 때만 적용
+            if request.min_similarity > 0 and sim < request.min_similarity:
                 continue
                 
             meta = metadata["metadatas"][idx]
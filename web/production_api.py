@@ -11,17 +11,27 @@ import psutil
 import logging
 from pathlib import Path
 from typing import List, Optional, Dict, Any
-from sentence_transformers import SentenceTransformer
 import torch
 from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from functools import lru_cache
 from collections import deque
 import statistics
+import sys
 import threading
 from datetime import datetime, timedelta
 
+# 프로젝트 루트를 Python 경로에 추가
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.vector.model_registry import get_sentence_transformer, get_model_registry_stats
+from src.vector.micro_batcher import get_query_batcher, get_encode_batcher_stats
+from src.vector.quantization import load_search_engine
+from src.vector.title_vectors import TITLE_WEIGHT, load_or_build_titles, titles_path
+
 # ===== 환경 가드 설정 =====
 os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
 os.environ.setdefault("OMP_NUM_THREADS", "1")
@@ -35,6 +45,10 @@ SLO_P95_LATENCY_MS = 200
 SLO_ERROR_RATE = 0.005  # 0.5%
 SLO_COLD_START_MS = 2000  # 2초
 SLO_CACHE_HIT_RATE = 0.6  # 60%
+MAX_BATCH_QUERIES = 500  # /search/batch 요청당 최대 쿼리 수
+
+# 벡터 압축 (none | int8 | pq): 상주 메모리 4~16배 절감, 상위 후보는 float32로 재스코어링
+VECTOR_COMPRESSION = os.getenv("VECTOR_COMPRESSION", "none").lower()
 
 # FastAPI 앱 초기화
 app = FastAPI(
@@ -54,8 +68,11 @@ app.add_middleware(
 
 # 전역 변수
 embeddings = None
+search_engine = None
+category_masks = {}
 metadata = None
 model = None
+query_batcher = None  # 공용 쿼리 마이크로 배처 (동시 요청을 모아 encode 1회)
 system_ready = False
 startup_time = None
 
@@ -129,9 +146,20 @@ class MetricsCollector:
 
 metrics = MetricsCollector()
 
-def cosine_similarity(a, b):
-    """코사인 유사도 계산"""
-    return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
+def build_category_masks(metadatas: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """카테고리별 불리언 마스크 사전 계산"""
+    categories = np.array([meta.get("category", "N/A") for meta in metadatas], dtype=object)
+    return {category: categories == category for category in set(categories.tolist())}
+
+def get_filter_mask(filters: Optional[Dict[str, List[str]]]) -> Optional[np.ndarray]:
+    """요청 필터를 후보 마스크로 변환"""
+    if not filters or "category" not in filters:
+        return None
+    mask = np.zeros(len(search_engine), dtype=bool)
+    for category in filters["category"]:
+        if category in category_masks:
+            mask |= category_masks[category]
+    return mask
 
 @lru_cache(maxsize=200)  # 캐시 크기 증가
 def encode_query_cached(query: str) -> tuple:
@@ -141,14 +169,13 @@ def encode_query_cached(query: str) -> tuple:
     
     metrics.record_embedding_request()
     
-    # e5 프리픽스 적용
-    prefixed_query = f"query: {query}"
-    embedding = model.encode([prefixed_query], normalize_embeddings=True)[0]
+    # e5 프리픽스 적용 + 동시 요청과 함께 배치 인코딩
+    embedding = query_batcher.encode(query)
     return tuple(embedding)
 
 def load_artifacts_with_memmap():
     """메모리 매핑으로 아티팩트 로드"""
-    global embeddings, metadata, model, system_ready, startup_time
+    global embeddings, search_engine, category_masks, metadata, model, query_batcher, system_ready, startup_time
     
     startup_time = time.time()
     logger.info("Starting artifact loading...")
@@ -187,12 +214,26 @@ def load_artifacts_with_memmap():
         
         logger.info(f"Loaded metadata: {len(metadata['ids'])} chunks")
         
+        # 검색 엔진 (VECTOR_COMPRESSION=int8|pq 이면 압축 코드 + float32 재스코어링)
+        search_engine = load_search_engine(index_path, VECTOR_COMPRESSION, vectors=embeddings)
+        category_masks = build_category_masks(metadata["metadatas"])
+        
         # 모델 로드
         device = "cuda" if torch.cuda.is_available() else "cpu"
         logger.info(f"Loading model on device: {device}")
-        model = SentenceTransformer("intfloat/multilingual-e5-base", device=device)
+        model = get_sentence_transformer("intfloat/multilingual-e5-base", device)
+        query_batcher = get_query_batcher("intfloat/multilingual-e5-base", device)
         model.max_seq_length = 512
         
+        # 문서 제목 벡터 (본문 유사도와 late fusion, 새 제목만 인코딩해 {index}.titles.npz에 캐시)
+        if TITLE_WEIGHT > 0:
+            search_engine.titles = load_or_build_titles(
+                titles_path(index_path),
+                [meta.get("title") for meta in metadata["metadatas"]],
+                lambda titles: model.encode([f"passage: {title}" for title in titles], normalize_embeddings=True),
+                TITLE_WEIGHT
+            )
+        
         # 워밍업 (상위 다빈도 쿼리)
         warmup_queries = [
             "채권추심", "지급명령", "압류", "제3채무자", "채권회수",
@@ -242,6 +283,21 @@ class SearchResponse(BaseModel):
     query: str
     processing_time_ms: float
 
+class BatchSearchRequest(BaseModel):
+    queries: List[str]
+    top_k: int = 20
+    filters: Optional[Dict[str, List[str]]] = None
+    min_similarity: float = 0.0
+
+class BatchSearchItem(BaseModel):
+    query: str
+    results: List[SearchResult]
+
+class BatchSearchResponse(BaseModel):
+    results: List[BatchSearchItem]
+    total_queries: int
+    processing_time_ms: float
+
 class HealthResponse(BaseModel):
     status: str
     timestamp: str
@@ -306,7 +362,7 @@ async def readiness_check():
 async def get_metrics():
     """메트릭 정보"""
     return MetricsResponse(
-        metrics=metrics.get_metrics(),
+        metrics={**metrics.get_metrics(), "encode_batchers": get_encode_batcher_stats()},
         timestamp=datetime.now().isoformat()
     )
 
@@ -335,13 +391,31 @@ async def get_categories():
     
     return {"categories": sorted(list(categories))}
 
+def format_search_result(sim: float, idx: int) -> SearchResult:
+    """(점수, 행 번호) -> SearchResult"""
+    meta = metadata["metadatas"][idx]
+    doc = metadata["documents"][idx]
+    
+    # 스니펫 생성 (첫 200자)
+    snippet = doc[:200] + "..." if len(doc) > 200 else doc
+    
+    return SearchResult(
+        id=metadata["ids"][idx],
+        score=float(sim),
+        title=meta.get("title", "N/A"),
+        url=meta.get("url", "N/A"),
+        snippet=snippet,
+        category=meta.get("category", "N/A"),
+        date=meta.get("date", "N/A")
+    )
+
 @app.post("/search", response_model=SearchResponse)
 async def search(request: SearchRequest):
     """검색 API (하드닝됨)"""
     if not system_ready:
         raise HTTPException(status_code=503, detail="System not ready")
     
-    if not embeddings or not metadata or not model:
+    if search_engine is None or not metadata or not model:
         raise HTTPException(status_code=500, detail="System not ready")
     
     start_time = time.time()
@@ -354,58 +428,20 @@ async def search(request: SearchRequest):
         if request.top_k > 100:
             raise HTTPException(status_code=400, detail="top_k cannot exceed 100")
         
-        # 쿼리 임베딩 생성 (캐시 사용)
-        query_embedding = np.array(encode_query_cached(request.q))
-        
-        # 검색 실행
-        similarities = []
-        for i, embedding in enumerate(embeddings):
-            sim = cosine_similarity(query_embedding, embedding)
-            similarities.append((sim, i))
-        
-        similarities.sort(reverse=True)
+        # 쿼리 임베딩 생성 (캐시 사용, 스레드 풀에서 대기 — 동시 요청이 마이크로 배처에서 묶임)
+        query_embedding = np.array(await run_in_threadpool(encode_query_cached, request.q))
         
-        # 필터 적용
-        filtered_results = []
-        for sim, idx in similarities:
-            if sim < request.min_similarity:
-                continue
-                
-            meta = metadata["metadatas"][idx]
-            
-            # 카테고리 필터 적용
-            if request.filters and "category" in request.filters:
-                category = meta.get("category", "N/A")
-                if category not in request.filters["category"]:
-                    continue
-            
-            filtered_results.append((sim, idx))
-        
-        # 페이징 적용
-        total = len(filtered_results)
-        start_idx = request.offset
-        end_idx = start_idx + request.top_k
-        page_results = filtered_results[start_idx:end_idx]
+        # 검색 실행 (행렬-벡터 곱 1회 + argpartition)
+        page_results, total = search_engine.search_page(
+            query_embedding,
+            top_k=request.top_k,
+            offset=request.offset,
+            mask=get_filter_mask(request.filters),
+            min_similarity=request.min_similarity
+        )
         
         # 결과 포맷팅
-        results = []
-        for sim, idx in page_results:
-            meta = metadata["metadatas"][idx]
-            doc = metadata["documents"][idx]
-            
-            # 스니펫 생성 (첫 200자)
-            snippet = doc[:200] + "..." if len(doc) > 200 else doc
-            
-            result = SearchResult(
-                id=metadata["ids"][idx],
-                score=float(sim),
-                title=meta.get("title", "N/A"),
-                url=meta.get("url", "N/A"),
-                snippet=snippet,
-                category=meta.get("category", "N/A"),
-                date=meta.get("date", "N/A")
-            )
-            results.append(result)
+        results = [format_search_result(sim, idx) for sim, idx in page_results]
         
         processing_time = (time.time() - start_time) * 1000
         
@@ -422,6 +458,62 @@ async def search(request: SearchRequest):
         logger.error(f"Search error: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@app.post("/search/batch", response_model=BatchSearchResponse)
+async def search_batch(request: BatchSearchRequest):
+    """다중 쿼리 검색 API (인코딩 1회 + 행렬-행렬 곱 1회)"""
+    if not system_ready:
+        raise HTTPException(status_code=503, detail="System not ready")
+    
+    if search_engine is None or not metadata or not model:
+        raise HTTPException(status_code=500, detail="System not ready")
+    
+    start_time = time.time()
+    
+    try:
+        # 입력 검증
+        queries = [q.strip() for q in request.queries]
+        if not queries or any(not q for q in queries):
+            raise HTTPException(status_code=400, detail="Queries cannot be empty")
+        
+        if len(queries) > MAX_BATCH_QUERIES:
+            raise HTTPException(status_code=400, detail=f"queries cannot exceed {MAX_BATCH_QUERIES}")
+        
+        if request.top_k > 100:
+            raise HTTPException(status_code=400, detail="top_k cannot exceed 100")
+        
+        # 쿼리 임베딩 일괄 생성 (모델 호출 1회, e5 프리픽스 적용, 스레드 풀 — 이벤트 루프 블로킹 방지)
+        metrics.record_embedding_request()
+        query_embeddings = await run_in_threadpool(
+            model.encode, [f"query: {q}" for q in queries], normalize_embeddings=True)
+        
+        # 검색 실행 (전체 쿼리 스코어링 1회, 스레드 풀)
+        hits_per_query = await run_in_threadpool(
+            search_engine.search_many,
+            query_embeddings,
+            top_k=request.top_k,
+            mask=get_filter_mask(request.filters),
+            min_similarity=request.min_similarity
+        )
+        
+        items = [
+            BatchSearchItem(query=query, results=[format_search_result(sim, idx) for sim, idx in hits])
+            for query, hits in zip(queries, hits_per_query)
+        ]
+        
+        processing_time = (time.time() - start_time) * 1000
+        
+        return BatchSearchResponse(
+            results=items,
+            total_queries=len(items),
+            processing_time_ms=round(processing_time, 2)
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Batch search error: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
 @app.get("/stats")
 async def get_stats():
     """통계 정보"""
@@ -437,8 +529,13 @@ async def get_stats():
     return {
         "total_chunks": len(metadata["ids"]),
         "embedding_dimension": embeddings.shape[1] if embeddings is not None else 0,
+        "vector_compression": VECTOR_COMPRESSION,
+        "title_vectors": len(search_engine.titles) if search_engine is not None and search_engine.titles else 0,
+        "title_weight": TITLE_WEIGHT,
         "categories": category_counts,
         "model": "intfloat/multilingual-e5-base",
+        "model_registry": get_model_registry_stats(),
+        "encode_batchers": get_encode_batcher_stats(),
         "system_ready": system_ready,
         "slo": {
             "p95_latency_ms": SLO_P95_LATENCY_MS,
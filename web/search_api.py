@@ -4,18 +4,25 @@
 FastAPI 기반 검색 API 서버
 """
 import os
+import sys
 import json
 import numpy as np
 from pathlib import Path
 import logging
 from typing import List, Optional, Dict, Any
-from sentence_transformers import SentenceTransformer
 import torch
 from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 import time
 from functools import lru_cache
 
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.vector.model_registry import get_sentence_transformer
+from src.vector.micro_batcher import get_query_batcher
+
 # ===== 환경 가드 설정 =====
 os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
 os.environ.setdefault("OMP_NUM_THREADS", "1")
@@ -35,6 +42,7 @@ app = FastAPI(
 embeddings = None
 metadata = None
 model = None
+query_batcher = None  # 공용 쿼리 마이크로 배처 (동시 요청을 모아 encode 1회)
 
 def cosine_similarity(a, b):
     """코사인 유사도 계산"""
@@ -46,14 +54,13 @@ def encode_query_cached(query: str) -> tuple:
     if model is None:
         raise HTTPException(status_code=500, detail="Model not loaded")
     
-    # e5 프리픽스 적용
-    prefixed_query = f"query: {query}"
-    embedding = model.encode([prefixed_query], normalize_embeddings=True)[0]
+    # e5 프리픽스 적용 + 동시 요청과 함께 배치 인코딩
+    embedding = query_batcher.encode(query)
     return tuple(embedding)
 
 def load_artifacts():
     """벡터 인덱스와 메타데이터 로드"""
-    global embeddings, metadata, model
+    global embeddings, metadata, model, query_batcher
     
     # 최신 버전 찾기
     artifacts_dir = Path("artifacts")
@@ -88,7 +95,8 @@ def load_artifacts():
     # 모델 로드
     device = "cuda" if torch.cuda.is_available() else "cpu"
     logger.info(f"Loading model on device: {device}")
-    model = SentenceTransformer("intfloat/multilingual-e5-base", device=device)
+    model = get_sentence_transformer("intfloat/multilingual-e5-base", device)
+    query_batcher = get_query_batcher("intfloat/multilingual-e5-base", device)
     model.max_seq_length = 512
     
     logger.info(f"Loaded {len(metadata['ids'])} chunks, embeddings shape: {embeddings.shape}")
@@ -157,8 +165,8 @@ async def search(request: SearchRequest):
     start_time = time.time()
     
     try:
-        # 쿼리 임베딩 생성 (캐시 사용)
-        query_embedding = np.array(encode_query_cached(request.q))
+        # 쿼리 임베딩 생성 (캐시 사용, 스레드 풀에서 대기 — 동시 요청이 마이크로 배처에서 묶임)
+        query_embedding = np.array(await run_in_threadpool(encode_query_cached, request.q))
         
         # 검색 실행
         similarities = []
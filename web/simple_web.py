@@ -11,11 +11,11 @@ from pathlib import Path
 from typing import Dict, List, Any, Optional
 from flask import Flask, render_template, request, jsonify
 import torch
-from sentence_transformers import SentenceTransformer
 
 # 프로젝트 루트를 Python 경로에 추가
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
+from src.vector.model_registry import get_sentence_transformer
 
 # A 파이프라인만 사용 (LLM 없음)
 try:
@@ -65,7 +65,7 @@ def load_artifacts():
     # 모델 로드
     try:
         device = "cuda" if torch.cuda.is_available() else "cpu"
-        model = SentenceTransformer('intfloat/multilingual-e5-base', device=device)
+        model = get_sentence_transformer('intfloat/multilingual-e5-base', device)
         print(f"✅ 모델 로드됨: {device}")
     except Exception as e:
         print(f"❌ 모델 로드 실패: {e}")
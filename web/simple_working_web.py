@@ -12,11 +12,11 @@ from pathlib import Path
 from typing import Dict, List, Any
 from flask import Flask, render_template_string, request, jsonify
 import torch
-from sentence_transformers import SentenceTransformer
 
 # 프로젝트 루트를 Python 경로에 추가
 project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
+from src.vector.model_registry import get_sentence_transformer
 
 app = Flask(__name__)
 
@@ -55,7 +55,7 @@ def load_artifacts():
     device = "cuda" if torch.cuda.is_available() else "cpu"
     print(f"🔧 디바이스: {device}")
     
-    model = SentenceTransformer('intfloat/multilingual-e5-base', device=device)
+    model = get_sentence_transformer('intfloat/multilingual-e5-base', device)
     print("✅ 모델 로드 완료")
 
 def search_documents(query: str, top_k: int = 5) -> List[Dict]: